@@ -10,6 +10,7 @@ API 路由模块
 - app: 应用管理相关接口
 - adb: ADB 命令相关接口
 - script: 自动化脚本相关接口
+- remote: 远程控制 WebSocket 接口
 """
 
 from .device import router as device_router
@@ -18,6 +19,7 @@ from .navigation import router as navigation_router
 from .app import router as app_router
 from .adb import router as adb_router
 from .script import router as script_router
+from .remote import router as remote_router
 
 __all__ = [
     "device_router",
@@ -26,4 +28,5 @@ __all__ = [
     "app_router",
     "adb_router",
     "script_router",
+    "remote_router",
 ]
@@ -4,9 +4,12 @@ ADB 操作 API 路由模块
 提供基于 adbutils 的 ADB 命令相关的 REST API 接口。
 """
 
-from typing import Optional
-from fastapi import APIRouter, Depends, Query, HTTPException
+from typing import Any, Dict, Optional, Tuple
+from fastapi import APIRouter, Depends, Header, Query, HTTPException
 from pydantic import BaseModel
+from app.core.device_executor import read_on_device, run_on_device
+from app.core.etag import conditional_json, content_etag, read_snapshot
+from app.core.responses import json_list_response
 from app.dependencies.services import get_adb_service
 from app.services.adb_service import AdbService
 
@@ -38,7 +41,7 @@ class InstallRequest(BaseModel):
 
 
 @router.get("/packages")
-def list_packages(
+async def list_packages(
     filter_type: Optional[str] = Query(
         None, description="过滤类型: third_party/3=第三方应用, system/s=系统应用, 空=全部"
     ),
@@ -52,14 +55,14 @@ def list_packages(
         adb_service: ADB 服务实例
 
     Returns:
-        dict: 包含应用包名列表和数量
+        StreamingResponse: 包含应用包名列表和数量（流式输出）
     """
-    packages = adb_service.list_packages(filter_type)
-    return {"count": len(packages), "packages": packages}
+    packages = await run_on_device(adb_service.list_packages, filter_type, read=True)
+    return json_list_response("packages", packages, count=len(packages))
 
 
 @router.get("/packages/{package_name}")
-def get_package_info(package_name: str, adb_service: AdbService = Depends(get_adb_service)):
+async def get_package_info(package_name: str, adb_service: AdbService = Depends(get_adb_service)):
     """
     获取指定应用的详细信息
 
@@ -70,14 +73,14 @@ def get_package_info(package_name: str, adb_service: AdbService = Depends(get_ad
     Returns:
         dict: 应用详细信息
     """
-    info = adb_service.get_package_info(package_name)
+    info = await run_on_device(adb_service.get_package_info, package_name, read=True)
     if info is None:
         raise HTTPException(status_code=404, detail=f"Package {package_name} not found")
     return info
 
 
 @router.get("/packages-info")
-def get_all_packages_info(
+async def get_all_packages_info(
     filter_type: Optional[str] = Query(
         None, description="过滤类型: third_party/3=第三方应用, system/s=系统应用, 空=全部"
     ),
@@ -93,14 +96,14 @@ def get_all_packages_info(
         adb_service: ADB 服务实例
 
     Returns:
-        dict: 包含所有应用详细信息的列表
+        StreamingResponse: 包含所有应用详细信息的列表（流式输出）
     """
-    packages_info = adb_service.get_all_packages_info(filter_type)
-    return {"count": len(packages_info), "packages": packages_info}
+    packages_info = await run_on_device(adb_service.get_all_packages_info, filter_type, read=True)
+    return json_list_response("packages", packages_info, count=len(packages_info))
 
 
 @router.post("/install")
-def install_apk(request: InstallRequest, adb_service: AdbService = Depends(get_adb_service)):
+async def install_apk(request: InstallRequest, adb_service: AdbService = Depends(get_adb_service)):
     """
     安装 APK 文件
 
@@ -111,7 +114,8 @@ def install_apk(request: InstallRequest, adb_service: AdbService = Depends(get_a
     Returns:
         dict: 安装结果
     """
-    success = adb_service.install_apk(
+    success = await run_on_device(
+        adb_service.install_apk,
         request.apk_path, reinstall=request.reinstall, grant_permissions=request.grant_permissions
     )
     if not success:
@@ -120,7 +124,7 @@ def install_apk(request: InstallRequest, adb_service: AdbService = Depends(get_a
 
 
 @router.delete("/packages/{package_name}")
-def uninstall_package(
+async def uninstall_package(
     package_name: str,
     keep_data: bool = Query(False, description="是否保留应用数据"),
     adb_service: AdbService = Depends(get_adb_service),
@@ -136,7 +140,7 @@ def uninstall_package(
     Returns:
         dict: 卸载结果
     """
-    success = adb_service.uninstall_package(package_name, keep_data=keep_data)
+    success = await run_on_device(adb_service.uninstall_package, package_name, keep_data=keep_data)
     if not success:
         raise HTTPException(status_code=500, detail=f"Failed to uninstall {package_name}")
     return {"message": f"Package {package_name} uninstalled successfully"}
@@ -146,51 +150,51 @@ def uninstall_package(
 
 
 @router.get("/device-info")
-def get_device_info(adb_service: AdbService = Depends(get_adb_service)):
+async def get_device_info(adb_service: AdbService = Depends(get_adb_service)):
     """
     获取设备详细信息
 
     Returns:
         dict: 设备信息（型号、品牌、Android 版本等）
     """
-    return adb_service.get_device_info()
+    return await read_on_device(adb_service.get_device_info)
 
 
 @router.get("/battery")
-def get_battery_info(adb_service: AdbService = Depends(get_adb_service)):
+async def get_battery_info(adb_service: AdbService = Depends(get_adb_service)):
     """
     获取电池信息
 
     Returns:
         dict: 电池信息（电量、充电状态等）
     """
-    return adb_service.get_battery_info()
+    return await read_on_device(adb_service.get_battery_info)
 
 
 @router.get("/screen/resolution")
-def get_screen_resolution(adb_service: AdbService = Depends(get_adb_service)):
+async def get_screen_resolution(adb_service: AdbService = Depends(get_adb_service)):
     """
     获取屏幕分辨率
 
     Returns:
         dict: 屏幕宽高
     """
-    return adb_service.get_screen_resolution()
+    return await read_on_device(adb_service.get_screen_resolution)
 
 
 @router.get("/screen/density")
-def get_screen_density(adb_service: AdbService = Depends(get_adb_service)):
+async def get_screen_density(adb_service: AdbService = Depends(get_adb_service)):
     """
     获取屏幕密度
 
     Returns:
         dict: 屏幕密度 (dpi)
     """
-    return {"density": adb_service.get_screen_density()}
+    return {"density": await read_on_device(adb_service.get_screen_density)}
 
 
 @router.get("/prop/{prop_name:path}")
-def get_prop(prop_name: str, adb_service: AdbService = Depends(get_adb_service)):
+async def get_prop(prop_name: str, adb_service: AdbService = Depends(get_adb_service)):
     """
     获取设备属性
 
@@ -200,7 +204,7 @@ def get_prop(prop_name: str, adb_service: AdbService = Depends(get_adb_service))
     Returns:
         dict: 属性值
     """
-    value = adb_service.get_prop(prop_name)
+    value = await run_on_device(adb_service.get_prop, prop_name, read=True)
     return {"prop": prop_name, "value": value}
 
 
@@ -208,7 +212,7 @@ def get_prop(prop_name: str, adb_service: AdbService = Depends(get_adb_service))
 
 
 @router.post("/shell")
-def execute_shell(request: ShellRequest, adb_service: AdbService = Depends(get_adb_service)):
+async def execute_shell(request: ShellRequest, adb_service: AdbService = Depends(get_adb_service)):
     """
     执行 shell 命令
 
@@ -219,7 +223,7 @@ def execute_shell(request: ShellRequest, adb_service: AdbService = Depends(get_a
     Returns:
         dict: 命令输出
     """
-    output = adb_service.shell(request.command)
+    output = await run_on_device(adb_service.shell, request.command)
     return {"command": request.command, "output": output}
 
 
@@ -227,7 +231,10 @@ def execute_shell(request: ShellRequest, adb_service: AdbService = Depends(get_a
 
 
 @router.post("/push")
-def push_file(request: FileTransferRequest, adb_service: AdbService = Depends(get_adb_service)):
+async def push_file(
+    request: FileTransferRequest,
+    adb_service: AdbService = Depends(get_adb_service),
+):
     """
     推送文件到设备
 
@@ -238,7 +245,7 @@ def push_file(request: FileTransferRequest, adb_service: AdbService = Depends(ge
     Returns:
         dict: 操作结果
     """
-    success = adb_service.push_file(request.local_path, request.remote_path)
+    success = await run_on_device(adb_service.push_file, request.local_path, request.remote_path)
     if not success:
         raise HTTPException(status_code=500, detail="Failed to push file")
     return {
@@ -249,7 +256,10 @@ def push_file(request: FileTransferRequest, adb_service: AdbService = Depends(ge
 
 
 @router.post("/pull")
-def pull_file(request: FileTransferRequest, adb_service: AdbService = Depends(get_adb_service)):
+async def pull_file(
+    request: FileTransferRequest,
+    adb_service: AdbService = Depends(get_adb_service),
+):
     """
     从设备拉取文件
 
@@ -260,7 +270,7 @@ def pull_file(request: FileTransferRequest, adb_service: AdbService = Depends(ge
     Returns:
         dict: 操作结果
     """
-    success = adb_service.pull_file(request.remote_path, request.local_path)
+    success = await run_on_device(adb_service.pull_file, request.remote_path, request.local_path)
     if not success:
         raise HTTPException(status_code=500, detail="Failed to pull file")
     return {
@@ -271,7 +281,7 @@ def pull_file(request: FileTransferRequest, adb_service: AdbService = Depends(ge
 
 
 @router.post("/screenshot")
-def take_screenshot(
+async def take_screenshot(
     local_path: str = Query(..., description="保存截图的本地路径"),
     adb_service: AdbService = Depends(get_adb_service),
 ):
@@ -285,33 +295,48 @@ def take_screenshot(
     Returns:
         dict: 操作结果
     """
-    success = adb_service.take_screenshot(local_path)
+    success = await run_on_device(adb_service.take_screenshot, local_path)
     if not success:
         raise HTTPException(status_code=500, detail="Failed to take screenshot")
     return {"message": "Screenshot saved", "path": local_path}
 
 
+def _screenshot_snapshot(result: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str]]:
+    """截图及其 ETag（在设备线程中计算），截图失败时没有 ETag"""
+    if result.get("image") is None:
+        return result, None
+    return result, content_etag(result["image"], result.get("width"), result.get("height"))
+
+
 @router.get("/screenshot-base64")
-def take_screenshot_base64(
+async def take_screenshot_base64(
     adb_service: AdbService = Depends(get_adb_service),
+    if_none_match: Optional[str] = Header(None),
 ):
     """
     截取屏幕截图并返回 base64 编码
 
+    响应带有基于图片内容哈希的 ETag，请求带上 If-None-Match 且画面未变化时返回 304。
+    截图缓存 DEVICE_SNAPSHOT_TTL 秒，点击、输入等操作会使缓存失效。
+
+    Args:
+        adb_service: AdbService 实例（依赖注入）
+        if_none_match: 上次响应的 ETag
+
     Returns:
         dict: 包含 base64 图片数据和屏幕尺寸
     """
-    result = adb_service.take_screenshot_base64()
-    if "error" in result and result.get("image") is None:
+    result, etag = await read_snapshot(adb_service.take_screenshot_base64, _screenshot_snapshot)
+    if etag is None:
         raise HTTPException(status_code=500, detail=result.get("error", "Failed to take screenshot"))
-    return result
+    return conditional_json(result, etag, if_none_match)
 
 
 # ==================== 设备控制 ====================
 
 
 @router.post("/reboot")
-def reboot_device(
+async def reboot_device(
     mode: Optional[str] = Query(None, description="重启模式: recovery, bootloader, 空=正常重启"),
     adb_service: AdbService = Depends(get_adb_service),
 ):
@@ -325,7 +350,7 @@ def reboot_device(
     Returns:
         dict: 操作结果
     """
-    success = adb_service.reboot(mode)
+    success = await run_on_device(adb_service.reboot, mode)
     if not success:
         raise HTTPException(status_code=500, detail="Failed to reboot device")
     return {"message": f"Device rebooting" + (f" to {mode}" if mode else "")}
@@ -5,6 +5,7 @@
 """
 
 from fastapi import APIRouter, Depends
+from app.core.device_executor import read_on_device, run_on_device
 from app.dependencies.services import get_app_service
 from app.services import AppService
 
@@ -12,7 +13,7 @@ router = APIRouter(prefix="/app", tags=["App"])
 
 
 @router.post("/start/{package_name}")
-def start_app(package_name: str, app_service: AppService = Depends(get_app_service)):
+async def start_app(package_name: str, app_service: AppService = Depends(get_app_service)):
     """
     启动应用
 
@@ -25,12 +26,12 @@ def start_app(package_name: str, app_service: AppService = Depends(get_app_servi
     Returns:
         dict: 操作结果消息。
     """
-    app_service.start_app(package_name)
+    await run_on_device(app_service.start_app, package_name)
     return {"message": f"App {package_name} started"}
 
 
 @router.post("/stop/{package_name}")
-def stop_app(package_name: str, app_service: AppService = Depends(get_app_service)):
+async def stop_app(package_name: str, app_service: AppService = Depends(get_app_service)):
     """
     停止应用
 
@@ -43,12 +44,12 @@ def stop_app(package_name: str, app_service: AppService = Depends(get_app_servic
     Returns:
         dict: 操作结果消息。
     """
-    app_service.stop_app(package_name)
+    await run_on_device(app_service.stop_app, package_name)
     return {"message": f"App {package_name} stopped"}
 
 
 @router.post("/clear/{package_name}")
-def clear_app(package_name: str, app_service: AppService = Depends(get_app_service)):
+async def clear_app(package_name: str, app_service: AppService = Depends(get_app_service)):
     """
     清除应用数据
 
@@ -61,12 +62,12 @@ def clear_app(package_name: str, app_service: AppService = Depends(get_app_servi
     Returns:
         dict: 操作结果消息。
     """
-    app_service.clear_app_data(package_name)
+    await run_on_device(app_service.clear_app_data, package_name)
     return {"message": f"App {package_name} data cleared"}
 
 
 @router.get("/version/{package_name}")
-def get_version(package_name: str, app_service: AppService = Depends(get_app_service)):
+async def get_version(package_name: str, app_service: AppService = Depends(get_app_service)):
     """
     获取应用版本
 
@@ -79,12 +80,12 @@ def get_version(package_name: str, app_service: AppService = Depends(get_app_ser
     Returns:
         dict: 包含包名和版本号的响应。
     """
-    version = app_service.get_app_version(package_name)
+    version = await run_on_device(app_service.get_app_version, package_name, read=True)
     return {"package": package_name, "version": version}
 
 
 @router.get("/status/{package_name}")
-def is_running(package_name: str, app_service: AppService = Depends(get_app_service)):
+async def is_running(package_name: str, app_service: AppService = Depends(get_app_service)):
     """
     检查应用运行状态
 
@@ -97,12 +98,12 @@ def is_running(package_name: str, app_service: AppService = Depends(get_app_serv
     Returns:
         dict: 包含包名和运行状态的响应。
     """
-    running = app_service.is_app_running(package_name)
+    running = await run_on_device(app_service.is_app_running, package_name, read=True)
     return {"package": package_name, "running": running}
 
 
 @router.get("/current")
-def get_current_app(app_service: AppService = Depends(get_app_service)):
+async def get_current_app(app_service: AppService = Depends(get_app_service)):
     """
     获取当前前台应用
 
@@ -114,4 +115,4 @@ def get_current_app(app_service: AppService = Depends(get_app_service)):
     Returns:
         dict: 包含当前应用的包名、Activity 和 PID。
     """
-    return app_service.get_current_app()
+    return await read_on_device(app_service.get_current_app)
@@ -1,18 +1,21 @@
 """
 设备管理 API 路由模块
 
-提供设备连接、状态查询和断开连接的 REST API 接口。
+提供设备连接、状态查询和断开连接的 REST API 接口，以及设备执行器的运行指标。
 """
 
+from typing import Any, Dict, List
+
 from fastapi import APIRouter, Depends
-from app.core.device import get_device_manager
+from app.core.device import DeviceManager, get_device_manager
+from app.core.device_executor import device_executor_stats, run_on_device
 from app.schemas import DeviceConnectRequest, DeviceInfoResponse, DeviceStatusResponse
 
 router = APIRouter(prefix="/device", tags=["Device"])
 
 
 @router.post("/connect", response_model=DeviceInfoResponse)
-def connect_device(request: DeviceConnectRequest = None):  # type: ignore[assignment]
+async def connect_device(request: DeviceConnectRequest = None):  # type: ignore[assignment]
     """
     连接设备
 
@@ -26,7 +29,7 @@ def connect_device(request: DeviceConnectRequest = None):  # type: ignore[assign
     """
     manager = get_device_manager()
     device_serial = request.device_serial if request else None
-    info = manager.connect(device_serial)
+    info = await run_on_device(manager.connect, device_serial)
     return DeviceInfoResponse(
         serial=info.serial,
         product_name=info.product_name,
@@ -35,8 +38,39 @@ def connect_device(request: DeviceConnectRequest = None):  # type: ignore[assign
     )
 
 
+def _read_status(manager: DeviceManager) -> DeviceStatusResponse:
+    """
+    读取当前设备的信息（在设备执行器中调用）
+
+    Args:
+        manager: 设备管理器
+
+    Returns:
+        DeviceStatusResponse: 包含连接状态和设备信息的响应。
+    """
+    try:
+        device = manager.get_device()
+        info = device.info
+        # 通过 ADB 获取电池信息
+        battery_level = manager._get_battery_level(device.serial)
+
+        return DeviceStatusResponse(
+            connected=True,
+            device_info=DeviceInfoResponse(
+                serial=device.serial,
+                product_name=info.get("productName", "Unknown"),
+                api_level=info.get("sdkInt", 0),
+                battery_level=battery_level,
+            ),
+        )
+    except Exception:
+        # 设备可能已断开
+        manager.disconnect()
+        return DeviceStatusResponse(connected=False)
+
+
 @router.get("/status", response_model=DeviceStatusResponse)
-def get_device_status():
+async def get_device_status():
     """
     获取设备状态
 
@@ -47,30 +81,12 @@ def get_device_status():
     """
     manager = get_device_manager()
     if manager.is_connected():
-        try:
-            device = manager.get_device()
-            info = device.info
-            # 通过 ADB 获取电池信息
-            battery_level = manager._get_battery_level(device.serial)
-
-            return DeviceStatusResponse(
-                connected=True,
-                device_info=DeviceInfoResponse(
-                    serial=device.serial,
-                    product_name=info.get("productName", "Unknown"),
-                    api_level=info.get("sdkInt", 0),
-                    battery_level=battery_level,
-                ),
-            )
-        except Exception:
-            # 设备可能已断开
-            manager.disconnect()
-            return DeviceStatusResponse(connected=False)
+        return await run_on_device(_read_status, manager, read=True)
     return DeviceStatusResponse(connected=False)
 
 
 @router.post("/disconnect")
-def disconnect_device():
+async def disconnect_device():
     """
     断开设备连接
 
@@ -82,3 +98,17 @@ def disconnect_device():
     manager = get_device_manager()
     manager.disconnect()
     return {"message": "Device disconnected"}
+
+
+@router.get("/executors")
+async def get_executor_stats() -> List[Dict[str, Any]]:
+    """
+    获取设备执行器指标
+
+    每台设备的 API 调用和异步脚本调用都在该设备独立的有界线程池中执行，
+    用于观察排队数、执行中的调用数、超时和拒绝次数。
+
+    Returns:
+        list: 每个设备执行器的指标。
+    """
+    return device_executor_stats()
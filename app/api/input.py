@@ -5,25 +5,34 @@
 包括元素定位和查找功能，以及人类模拟操作。
 """
 
-from fastapi import APIRouter, Depends, Query
+import functools
+import time
+from fastapi import APIRouter, Depends, Header, Query
+from app.core.device import get_device_manager
+from app.core.device_executor import current_device_executor, run_on_device
+from app.core.etag import conditional_json, content_etag, read_snapshot
 from app.dependencies.services import get_input_service
 from app.services import InputService
+from app.services.batch import batch_wait, execute_batch
 from app.schemas import (
     ActionRequest,
     ActionResponse,
+    BatchRequest,
+    BatchResponse,
+    BatchStepResult,
     HumanClickRequest,
     HumanDoubleClickRequest,
     HumanLongPressRequest,
     HumanDragRequest,
     ClickByPointRequest,
 )
-from typing import Literal, Optional
+from typing import Literal, Optional, Tuple
 
 router = APIRouter(prefix="/input", tags=["Input"])
 
 
 @router.post("/click", response_model=ActionResponse)
-def click(
+async def click(
     resource_id: str = Query(..., description="元素的 resource-id"),
     input_service: InputService = Depends(get_input_service),
 ):
@@ -39,12 +48,12 @@ def click(
     Returns:
         ActionResponse: 操作结果响应。
     """
-    result = input_service.click(resource_id)
+    result = await run_on_device(input_service.click, resource_id)
     return ActionResponse(success=result, result={"clicked": resource_id})
 
 
 @router.post("/click-by-text", response_model=ActionResponse)
-def click_by_text(
+async def click_by_text(
     text: str = Query(..., description="元素的文本内容"),
     input_service: InputService = Depends(get_input_service),
 ):
@@ -60,12 +69,12 @@ def click_by_text(
     Returns:
         ActionResponse: 操作结果响应。
     """
-    result = input_service.click_by_text(text)
+    result = await run_on_device(input_service.click_by_text, text)
     return ActionResponse(success=result, result={"clicked": text})
 
 
 @router.post("/click-by-class", response_model=ActionResponse)
-def click_by_class(
+async def click_by_class(
     class_name: str = Query(..., description="元素的类名"),
     input_service: InputService = Depends(get_input_service),
 ):
@@ -81,12 +90,12 @@ def click_by_class(
     Returns:
         ActionResponse: 操作结果响应。
     """
-    result = input_service.click_by_class(class_name)
+    result = await run_on_device(input_service.click_by_class, class_name)
     return ActionResponse(success=result, result={"clicked": class_name})
 
 
 @router.post("/click-by-xpath", response_model=ActionResponse)
-def click_by_xpath(
+async def click_by_xpath(
     xpath: str = Query(..., description="XPath 表达式"),
     input_service: InputService = Depends(get_input_service),
 ):
@@ -102,12 +111,12 @@ def click_by_xpath(
     Returns:
         ActionResponse: 操作结果响应。
     """
-    result = input_service.click_by_xpath(xpath)
+    result = await run_on_device(input_service.click_by_xpath, xpath)
     return ActionResponse(success=result, result={"clicked": xpath})
 
 
 @router.post("/click-by-point", response_model=ActionResponse)
-def click_by_point(
+async def click_by_point(
     request: ClickByPointRequest,
     input_service: InputService = Depends(get_input_service),
 ):
@@ -122,7 +131,7 @@ def click_by_point(
     Returns:
         ActionResponse: 操作结果响应
     """
-    result = input_service.click_by_point(request.x, request.y)
+    result = await run_on_device(input_service.click_by_point, request.x, request.y)
     return ActionResponse(
         success=result,
         result={"x": request.x, "y": request.y},
@@ -131,7 +140,7 @@ def click_by_point(
 
 
 @router.get("/exists-by-text", response_model=ActionResponse)
-def exists_by_text(
+async def exists_by_text(
     text: str = Query(..., description="元素的文本内容"),
     input_service: InputService = Depends(get_input_service),
 ):
@@ -147,12 +156,12 @@ def exists_by_text(
     Returns:
         ActionResponse: 操作结果响应。
     """
-    exists = input_service.exists_by_text(text)
+    exists = await run_on_device(input_service.exists_by_text, text, read=True)
     return ActionResponse(success=True, result={"exists": exists, "text": text})
 
 
 @router.get("/exists-by-class", response_model=ActionResponse)
-def exists_by_class(
+async def exists_by_class(
     class_name: str = Query(..., description="元素的类名"),
     input_service: InputService = Depends(get_input_service),
 ):
@@ -168,12 +177,12 @@ def exists_by_class(
     Returns:
         ActionResponse: 操作结果响应。
     """
-    exists = input_service.exists_by_class(class_name)
+    exists = await run_on_device(input_service.exists_by_class, class_name, read=True)
     return ActionResponse(success=True, result={"exists": exists, "class_name": class_name})
 
 
 @router.get("/exists-by-xpath", response_model=ActionResponse)
-def exists_by_xpath(
+async def exists_by_xpath(
     xpath: str = Query(..., description="XPath 表达式"),
     input_service: InputService = Depends(get_input_service),
 ):
@@ -189,12 +198,12 @@ def exists_by_xpath(
     Returns:
         ActionResponse: 操作结果响应。
     """
-    exists = input_service.exists_by_xpath(xpath)
+    exists = await run_on_device(input_service.exists_by_xpath, xpath, read=True)
     return ActionResponse(success=True, result={"exists": exists, "xpath": xpath})
 
 
 @router.post("/set-text", response_model=ActionResponse)
-def set_text(
+async def set_text(
     resource_id: str = Query(..., description="元素的 resource-id"),
     text: str = Query(..., description="要输入的文本"),
     input_service: InputService = Depends(get_input_service),
@@ -212,12 +221,12 @@ def set_text(
     Returns:
         ActionResponse: 操作结果响应。
     """
-    result = input_service.set_text(resource_id, text)
+    result = await run_on_device(input_service.set_text, resource_id, text)
     return ActionResponse(success=result, result={"resource_id": resource_id, "text": text})
 
 
 @router.post("/clear-text", response_model=ActionResponse)
-def clear_text(
+async def clear_text(
     resource_id: str = Query(..., description="元素的 resource-id"),
     input_service: InputService = Depends(get_input_service),
 ):
@@ -233,12 +242,12 @@ def clear_text(
     Returns:
         ActionResponse: 操作结果响应。
     """
-    result = input_service.clear_text(resource_id)
+    result = await run_on_device(input_service.clear_text, resource_id)
     return ActionResponse(success=result, result={"cleared": resource_id})
 
 
 @router.post("/swipe", response_model=ActionResponse)
-def swipe(
+async def swipe(
     direction: str = Query(..., description="滑动方向（up/down/left/right）"),
     percent: float = Query(0.5, description="滑动距离比例（0-1）"),
     input_service: InputService = Depends(get_input_service),
@@ -256,12 +265,12 @@ def swipe(
     Returns:
         ActionResponse: 操作结果响应。
     """
-    result = input_service.swipe(direction, percent)
+    result = await run_on_device(input_service.swipe, direction, percent)
     return ActionResponse(success=result, result={"direction": direction, "percent": percent})
 
 
 @router.post("/execute", response_model=ActionResponse)
-def execute_action(
+async def execute_action(
     request: ActionRequest, input_service: InputService = Depends(get_input_service)
 ):
     """
@@ -276,11 +285,49 @@ def execute_action(
     Returns:
         ActionResponse: 操作结果响应。
     """
-    return input_service.execute(request.action, **request.params)
+    # 参数原样交给服务方法，避免与 run_on_device 自身的参数重名；等待类操作按 timeout 放宽超时
+    call = functools.partial(input_service.execute, request.action, **request.params)
+    timeout = request.params.get("timeout")
+    return await run_on_device(call, wait=timeout if isinstance(timeout, (int, float)) else 0.0)
+
+
+@router.post("/execute-batch", response_model=BatchResponse)
+async def execute_batch_actions(request: BatchRequest):
+    """
+    批量执行操作
+
+    按顺序执行一组 input / navigation / app 服务方法，整批操作只需一次请求往返，
+    每个服务只创建一次。方法抛出异常或返回 False 时该步骤失败，
+    stop_on_error 为 True 时跳过剩余步骤。整批操作共用一次设备调用超时，
+    各步骤的 timeout 参数累加到超时上。每一步执行后都会使缓存的读取结果失效。
+
+    Args:
+        request: 操作列表和执行选项。
+
+    Returns:
+        BatchResponse: 每一步的执行结果。
+    """
+    steps = [(step.service, step.action, step.params) for step in request.steps]
+    start = time.perf_counter()
+    results = await run_on_device(
+        execute_batch,
+        get_device_manager(),
+        steps,
+        request.stop_on_error,
+        request.timing,
+        current_device_executor().invalidate,
+        wait=batch_wait(steps),
+    )
+    return BatchResponse(
+        success=len(results) == len(steps) and all(item["success"] for item in results),
+        completed=len(results),
+        results=[BatchStepResult(**item) for item in results],
+        elapsed_ms=(time.perf_counter() - start) * 1000 if request.timing else None,
+    )
 
 
 @router.get("/find-by-id")
-def find_element_by_id(
+async def find_element_by_id(
     resource_id: str = Query(..., description="元素的 resource-id"),
     input_service: InputService = Depends(get_input_service),
 ):
@@ -296,12 +343,12 @@ def find_element_by_id(
     Returns:
         dict: 元素信息，包含 text、bounds、className 等信息，元素不存在时返回 exists: false。
     """
-    result = input_service.find_element_by_id(resource_id)
+    result = await run_on_device(input_service.find_element_by_id, resource_id, read=True)
     return result or {"exists": False, "resource_id": resource_id}
 
 
 @router.get("/find-by-text")
-def find_element_by_text(
+async def find_element_by_text(
     text: str = Query(..., description="元素的文本内容"),
     input_service: InputService = Depends(get_input_service),
 ):
@@ -317,12 +364,12 @@ def find_element_by_text(
     Returns:
         dict: 元素信息，元素不存在时返回 exists: false。
     """
-    result = input_service.find_element_by_text(text)
+    result = await run_on_device(input_service.find_element_by_text, text, read=True)
     return result or {"exists": False, "text": text}
 
 
 @router.get("/find-by-class")
-def find_element_by_class(
+async def find_element_by_class(
     class_name: str = Query(..., description="元素的类名"),
     input_service: InputService = Depends(get_input_service),
 ):
@@ -338,12 +385,12 @@ def find_element_by_class(
     Returns:
         dict: 元素信息，元素不存在时返回 exists: false。
     """
-    result = input_service.find_element_by_class(class_name)
+    result = await run_on_device(input_service.find_element_by_class, class_name, read=True)
     return result or {"exists": False, "class_name": class_name}
 
 
 @router.get("/find-elements-by-class")
-def find_elements_by_class(
+async def find_elements_by_class(
     class_name: str = Query(..., description="元素的类名"),
     input_service: InputService = Depends(get_input_service),
 ):
@@ -359,12 +406,12 @@ def find_elements_by_class(
     Returns:
         list: 所有匹配元素的列表。
     """
-    results = input_service.find_elements_by_class(class_name)
+    results = await run_on_device(input_service.find_elements_by_class, class_name, read=True)
     return {"elements": results, "count": len(results)}
 
 
 @router.get("/find-by-xpath")
-def find_element_by_xpath(
+async def find_element_by_xpath(
     xpath: str = Query(..., description="XPath 表达式"),
     input_service: InputService = Depends(get_input_service),
 ):
@@ -380,12 +427,12 @@ def find_element_by_xpath(
     Returns:
         dict: 元素信息，元素不存在时返回 exists: false。
     """
-    result = input_service.find_element_by_xpath(xpath)
+    result = await run_on_device(input_service.find_element_by_xpath, xpath, read=True)
     return result or {"exists": False, "xpath": xpath}
 
 
 @router.get("/exists")
-def element_exists(
+async def element_exists(
     resource_id: str = Query(..., description="元素的 resource-id"),
     input_service: InputService = Depends(get_input_service),
 ):
@@ -401,12 +448,12 @@ def element_exists(
     Returns:
         dict: 包含 exists: true/false。
     """
-    exists = input_service.element_exists(resource_id)
+    exists = await run_on_device(input_service.element_exists, resource_id, read=True)
     return {"exists": exists, "resource_id": resource_id}
 
 
 @router.get("/text")
-def get_element_text(
+async def get_element_text(
     resource_id: str = Query(..., description="元素的 resource-id"),
     input_service: InputService = Depends(get_input_service),
 ):
@@ -422,12 +469,12 @@ def get_element_text(
     Returns:
         dict: 包含元素文本内容。
     """
-    text = input_service.get_element_text(resource_id)
+    text = await run_on_device(input_service.get_element_text, resource_id, read=True)
     return {"resource_id": resource_id, "text": text}
 
 
 @router.get("/bounds")
-def get_element_bounds(
+async def get_element_bounds(
     resource_id: str = Query(..., description="元素的 resource-id"),
     input_service: InputService = Depends(get_input_service),
 ):
@@ -443,12 +490,12 @@ def get_element_bounds(
     Returns:
         dict: 包含元素边界信息 {left, top, right, bottom}。
     """
-    bounds = input_service.get_element_bounds(resource_id)
+    bounds = await run_on_device(input_service.get_element_bounds, resource_id, read=True)
     return {"resource_id": resource_id, "bounds": bounds}
 
 
 @router.get("/wait-appear")
-def wait_for_element(
+async def wait_for_element(
     resource_id: str = Query(..., description="元素的 resource-id"),
     timeout: float = Query(10.0, description="最大等待时间（秒）"),
     input_service: InputService = Depends(get_input_service),
@@ -466,12 +513,18 @@ def wait_for_element(
     Returns:
         dict: 包含等待结果。
     """
-    appeared = input_service.wait_for_element(resource_id, timeout)
+    appeared = await run_on_device(
+        input_service.wait_for_element,
+        resource_id,
+        timeout,
+        wait=timeout,
+        read=True,
+    )
     return {"resource_id": resource_id, "appeared": appeared, "timeout": timeout}
 
 
 @router.get("/wait-gone")
-def wait_for_element_gone(
+async def wait_for_element_gone(
     resource_id: str = Query(..., description="元素的 resource-id"),
     timeout: float = Query(10.0, description="最大等待时间（秒）"),
     input_service: InputService = Depends(get_input_service),
@@ -489,26 +542,46 @@ def wait_for_element_gone(
     Returns:
         dict: 包含等待结果。
     """
-    gone = input_service.wait_for_element_gone(resource_id, timeout)
+    gone = await run_on_device(
+        input_service.wait_for_element_gone,
+        resource_id,
+        timeout,
+        wait=timeout,
+        read=True,
+    )
     return {"resource_id": resource_id, "gone": gone, "timeout": timeout}
 
 
+def _xml_snapshot(xml: str) -> Tuple[str, str]:
+    """界面层次结构及其 ETag（在设备线程中计算）"""
+    return xml, content_etag(xml)
+
+
 @router.get("/hierarchy")
-def get_ui_hierarchy(input_service: InputService = Depends(get_input_service)):
+async def get_ui_hierarchy(
+    input_service: InputService = Depends(get_input_service),
+    if_none_match: Optional[str] = Header(None),
+):
     """
     获取当前界面 XML 结构
 
-    返回当前界面的完整 XML 层次结构。
+    返回当前界面的完整 XML 层次结构。响应带有基于内容哈希的 ETag，
+    请求带上 If-None-Match 且界面未变化时返回 304。界面快照缓存 DEVICE_SNAPSHOT_TTL 秒，
+    点击、输入等操作会使缓存失效。
+
+    Args:
+        input_service: InputService 实例（依赖注入）。
+        if_none_match: 上次响应的 ETag。
 
     Returns:
         dict: 包含 XML 字符串。
     """
-    xml = input_service.get_current_ui_xml()
-    return {"xml": xml}
+    xml, etag = await read_snapshot(input_service.get_current_ui_xml, _xml_snapshot)
+    return conditional_json({"xml": xml}, etag, if_none_match)
 
 
 @router.post("/screen-on", response_model=ActionResponse)
-def screen_on(input_service: InputService = Depends(get_input_service)):
+async def screen_on(input_service: InputService = Depends(get_input_service)):
     """
     亮屏
 
@@ -517,12 +590,12 @@ def screen_on(input_service: InputService = Depends(get_input_service)):
     Returns:
         ActionResponse: 操作结果响应。
     """
-    result = input_service.screen_on()
+    result = await run_on_device(input_service.screen_on)
     return ActionResponse(success=result, result={"action": "screen_on"})
 
 
 @router.post("/screen-off", response_model=ActionResponse)
-def screen_off(input_service: InputService = Depends(get_input_service)):
+async def screen_off(input_service: InputService = Depends(get_input_service)):
     """
     锁屏
 
@@ -531,12 +604,12 @@ def screen_off(input_service: InputService = Depends(get_input_service)):
     Returns:
         ActionResponse: 操作结果响应。
     """
-    result = input_service.screen_off()
+    result = await run_on_device(input_service.screen_off)
     return ActionResponse(success=result, result={"action": "screen_off"})
 
 
 @router.post("/unlock", response_model=ActionResponse)
-def unlock_screen(input_service: InputService = Depends(get_input_service)):
+async def unlock_screen(input_service: InputService = Depends(get_input_service)):
     """
     解锁屏幕
 
@@ -545,12 +618,12 @@ def unlock_screen(input_service: InputService = Depends(get_input_service)):
     Returns:
         ActionResponse: 操作结果响应。
     """
-    result = input_service.unlock_screen()
+    result = await run_on_device(input_service.unlock_screen)
     return ActionResponse(success=result, result={"action": "unlock"})
 
 
 @router.post("/send-action", response_model=ActionResponse)
-def send_action(
+async def send_action(
     resource_id: str = Query(..., description="元素的 resource-id"),
     action: str = Query("IME_ACTION_DONE", description="动作类型"),
     input_service: InputService = Depends(get_input_service),
@@ -568,7 +641,7 @@ def send_action(
     Returns:
         ActionResponse: 操作结果响应。
     """
-    result = input_service.send_action(resource_id, action)
+    result = await run_on_device(input_service.send_action, resource_id, action)
     return ActionResponse(success=result, result={"resource_id": resource_id, "action": action})
 
 
@@ -576,7 +649,7 @@ def send_action(
 
 
 @router.post("/set-text-by-selector", response_model=ActionResponse)
-def set_text_by_selector(
+async def set_text_by_selector(
     selector_type: str = Query(..., description="选择器类型: id, text, class, xpath"),
     selector_value: str = Query(..., description="选择器值"),
     text: str = Query(..., description="要输入的文本"),
@@ -587,14 +660,19 @@ def set_text_by_selector(
 
     支持多种选择器类型定位元素并输入文本。
     """
-    result = input_service.set_text_by_selector(selector_type, selector_value, text)
+    result = await run_on_device(
+        input_service.set_text_by_selector,
+        selector_type,
+        selector_value,
+        text,
+    )
     return ActionResponse(
         success=result, result={"selector_type": selector_type, "selector_value": selector_value}
     )
 
 
 @router.post("/clear-text-by-selector", response_model=ActionResponse)
-def clear_text_by_selector(
+async def clear_text_by_selector(
     selector_type: str = Query(..., description="选择器类型: id, text, class, xpath"),
     selector_value: str = Query(..., description="选择器值"),
     input_service: InputService = Depends(get_input_service),
@@ -604,14 +682,18 @@ def clear_text_by_selector(
 
     支持多种选择器类型定位元素并清除文本。
     """
-    result = input_service.clear_text_by_selector(selector_type, selector_value)
+    result = await run_on_device(
+        input_service.clear_text_by_selector,
+        selector_type,
+        selector_value,
+    )
     return ActionResponse(
         success=result, result={"selector_type": selector_type, "selector_value": selector_value}
     )
 
 
 @router.post("/send-action-by-selector", response_model=ActionResponse)
-def send_action_by_selector(
+async def send_action_by_selector(
     selector_type: str = Query(..., description="选择器类型: id, text, class, xpath"),
     selector_value: str = Query(..., description="选择器值"),
     input_service: InputService = Depends(get_input_service),
@@ -621,14 +703,18 @@ def send_action_by_selector(
 
     支持多种选择器类型定位元素并发送完成动作。
     """
-    result = input_service.send_action_by_selector(selector_type, selector_value)
+    result = await run_on_device(
+        input_service.send_action_by_selector,
+        selector_type,
+        selector_value,
+    )
     return ActionResponse(
         success=result, result={"selector_type": selector_type, "selector_value": selector_value}
     )
 
 
 @router.get("/wait-appear-by-selector")
-def wait_for_element_by_selector(
+async def wait_for_element_by_selector(
     selector_type: str = Query(..., description="选择器类型: id, text, class, xpath"),
     selector_value: str = Query(..., description="选择器值"),
     timeout: float = Query(10.0, description="最大等待时间（秒）"),
@@ -639,7 +725,14 @@ def wait_for_element_by_selector(
 
     支持多种选择器类型等待元素出现。
     """
-    appeared = input_service.wait_for_element_by_selector(selector_type, selector_value, timeout)
+    appeared = await run_on_device(
+        input_service.wait_for_element_by_selector,
+        selector_type,
+        selector_value,
+        timeout,
+        wait=timeout,
+        read=True,
+    )
     return {
         "selector_type": selector_type,
         "selector_value": selector_value,
@@ -649,7 +742,7 @@ def wait_for_element_by_selector(
 
 
 @router.get("/wait-gone-by-selector")
-def wait_for_element_gone_by_selector(
+async def wait_for_element_gone_by_selector(
     selector_type: str = Query(..., description="选择器类型: id, text, class, xpath"),
     selector_value: str = Query(..., description="选择器值"),
     timeout: float = Query(10.0, description="最大等待时间（秒）"),
@@ -660,7 +753,14 @@ def wait_for_element_gone_by_selector(
 
     支持多种选择器类型等待元素消失。
     """
-    gone = input_service.wait_for_element_gone_by_selector(selector_type, selector_value, timeout)
+    gone = await run_on_device(
+        input_service.wait_for_element_gone_by_selector,
+        selector_type,
+        selector_value,
+        timeout,
+        wait=timeout,
+        read=True,
+    )
     return {
         "selector_type": selector_type,
         "selector_value": selector_value,
@@ -670,7 +770,7 @@ def wait_for_element_gone_by_selector(
 
 
 @router.get("/text-by-selector")
-def get_element_text_by_selector(
+async def get_element_text_by_selector(
     selector_type: str = Query(..., description="选择器类型: id, text, class, xpath"),
     selector_value: str = Query(..., description="选择器值"),
     input_service: InputService = Depends(get_input_service),
@@ -680,12 +780,17 @@ def get_element_text_by_selector(
 
     支持多种选择器类型获取元素文本内容。
     """
-    result = input_service.get_element_text_by_selector(selector_type, selector_value)
+    result = await run_on_device(
+        input_service.get_element_text_by_selector,
+        selector_type,
+        selector_value,
+        read=True,
+    )
     return {"selector_type": selector_type, "selector_value": selector_value, "result": result}
 
 
 @router.get("/bounds-by-selector")
-def get_element_bounds_by_selector(
+async def get_element_bounds_by_selector(
     selector_type: str = Query(..., description="选择器类型: id, text, class, xpath"),
     selector_value: str = Query(..., description="选择器值"),
     parent_selector_type: Optional[str] = Query(None, description="父元素选择器类型"),
@@ -702,7 +807,8 @@ def get_element_bounds_by_selector(
 
     支持多种选择器类型获取元素边界位置，支持父级/兄弟关系和偏移。
     """
-    result = input_service.get_element_bounds_by_selector(
+    result = await run_on_device(
+        input_service.get_element_bounds_by_selector,
         selector_type,
         selector_value,
         parent_selector_type,
@@ -712,6 +818,7 @@ def get_element_bounds_by_selector(
         sibling_relation,
         offset_x,
         offset_y,
+        read=True,
     )
     return {
         "selector_type": selector_type,
@@ -728,7 +835,7 @@ def get_element_bounds_by_selector(
 
 
 @router.get("/find-with-parent")
-def find_with_parent(
+async def find_with_parent(
     child_selector_type: str = Query(..., description="子元素选择器类型"),
     child_selector_value: str = Query(..., description="子元素选择器值"),
     parent_selector_type: str = Query(..., description="父元素选择器类型"),
@@ -740,11 +847,13 @@ def find_with_parent(
 
     验证子元素是否在指定的父元素内部。
     """
-    result = input_service.find_with_parent(
+    result = await run_on_device(
+        input_service.find_with_parent,
         child_selector_type,
         child_selector_value,
         parent_selector_type,
         parent_selector_value,
+        read=True,
     )
     return {
         "child_selector_type": child_selector_type,
@@ -756,7 +865,7 @@ def find_with_parent(
 
 
 @router.get("/find-with-sibling")
-def find_with_sibling(
+async def find_with_sibling(
     target_selector_type: str = Query(..., description="目标元素选择器类型"),
     target_selector_value: str = Query(..., description="目标元素选择器值"),
     sibling_selector_type: str = Query(..., description="兄弟元素选择器类型"),
@@ -769,12 +878,14 @@ def find_with_sibling(
 
     基于兄弟元素的位置关系查找目标元素。
     """
-    result = input_service.find_with_sibling(
+    result = await run_on_device(
+        input_service.find_with_sibling,
         target_selector_type,
         target_selector_value,
         sibling_selector_type,
         sibling_selector_value,
         sibling_relation,
+        read=True,
     )
     return {
         "target_selector_type": target_selector_type,
@@ -790,7 +901,7 @@ def find_with_sibling(
 
 
 @router.post("/human-click", response_model=ActionResponse)
-def human_click(
+async def human_click(
     request: HumanClickRequest,
     input_service: InputService = Depends(get_input_service),
 ):
@@ -813,7 +924,8 @@ def human_click(
     Returns:
         ActionResponse: 操作结果响应
     """
-    result = input_service.human_click(
+    result = await run_on_device(
+        input_service.human_click,
         x=request.x,
         y=request.y,
         selector_type=request.selector_type,
@@ -852,7 +964,7 @@ def human_click(
 
 
 @router.post("/human-double-click", response_model=ActionResponse)
-def human_double_click(
+async def human_double_click(
     request: HumanDoubleClickRequest,
     input_service: InputService = Depends(get_input_service),
 ):
@@ -868,7 +980,8 @@ def human_double_click(
     Returns:
         ActionResponse: 操作结果响应
     """
-    result = input_service.human_double_click(
+    result = await run_on_device(
+        input_service.human_double_click,
         x=request.x,
         y=request.y,
         selector_type=request.selector_type,
@@ -893,7 +1006,7 @@ def human_double_click(
 
 
 @router.post("/human-long-press", response_model=ActionResponse)
-def human_long_press(
+async def human_long_press(
     request: HumanLongPressRequest,
     input_service: InputService = Depends(get_input_service),
 ):
@@ -908,7 +1021,8 @@ def human_long_press(
     Returns:
         ActionResponse: 操作结果响应
     """
-    result = input_service.human_long_press(
+    result = await run_on_device(
+        input_service.human_long_press,
         x=request.x,
         y=request.y,
         selector_type=request.selector_type,
@@ -933,7 +1047,7 @@ def human_long_press(
 
 
 @router.post("/human-drag", response_model=ActionResponse)
-def human_drag(
+async def human_drag(
     request: HumanDragRequest,
     input_service: InputService = Depends(get_input_service),
 ):
@@ -966,7 +1080,8 @@ def human_drag(
     Returns:
         ActionResponse: 操作结果响应
     """
-    result = input_service.human_drag(
+    result = await run_on_device(
+        input_service.human_drag,
         start_x=request.start_x,
         start_y=request.start_y,
         end_x=request.end_x,
@@ -5,6 +5,7 @@
 """
 
 from fastapi import APIRouter, Depends
+from app.core.device_executor import run_on_device
 from app.dependencies.services import get_navigation_service
 from app.services import NavigationService
 
@@ -12,7 +13,7 @@ router = APIRouter(prefix="/navigation", tags=["Navigation"])
 
 
 @router.post("/home")
-def press_home(nav_service: NavigationService = Depends(get_navigation_service)):
+async def press_home(nav_service: NavigationService = Depends(get_navigation_service)):
     """
     点击 Home 键
 
@@ -21,12 +22,12 @@ def press_home(nav_service: NavigationService = Depends(get_navigation_service))
     Returns:
         dict: 操作结果消息。
     """
-    nav_service.press_home()
+    await run_on_device(nav_service.press_home)
     return {"message": "Home pressed"}
 
 
 @router.post("/back")
-def press_back(nav_service: NavigationService = Depends(get_navigation_service)):
+async def press_back(nav_service: NavigationService = Depends(get_navigation_service)):
     """
     点击返回键
 
@@ -35,12 +36,12 @@ def press_back(nav_service: NavigationService = Depends(get_navigation_service))
     Returns:
         dict: 操作结果消息。
     """
-    nav_service.press_back()
+    await run_on_device(nav_service.press_back)
     return {"message": "Back pressed"}
 
 
 @router.post("/menu")
-def press_menu(nav_service: NavigationService = Depends(get_navigation_service)):
+async def press_menu(nav_service: NavigationService = Depends(get_navigation_service)):
     """
     点击菜单键
 
@@ -49,12 +50,12 @@ def press_menu(nav_service: NavigationService = Depends(get_navigation_service))
     Returns:
         dict: 操作结果消息。
     """
-    nav_service.press_menu()
+    await run_on_device(nav_service.press_menu)
     return {"message": "Menu pressed"}
 
 
 @router.post("/go-home")
-def go_home(nav_service: NavigationService = Depends(get_navigation_service)):
+async def go_home(nav_service: NavigationService = Depends(get_navigation_service)):
     """
     返回主屏幕
 
@@ -63,12 +64,12 @@ def go_home(nav_service: NavigationService = Depends(get_navigation_service)):
     Returns:
         dict: 操作结果消息。
     """
-    nav_service.go_home()
+    await run_on_device(nav_service.go_home)
     return {"message": "Returned to home"}
 
 
 @router.post("/recent-apps")
-def recent_apps(nav_service: NavigationService = Depends(get_navigation_service)):
+async def recent_apps(nav_service: NavigationService = Depends(get_navigation_service)):
     """
     打开最近应用
 
@@ -77,5 +78,5 @@ def recent_apps(nav_service: NavigationService = Depends(get_navigation_service)
     Returns:
         dict: 操作结果消息。
     """
-    nav_service.open_recent_apps()
+    await run_on_device(nav_service.open_recent_apps)
     return {"message": "Recent apps opened"}
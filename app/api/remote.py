@@ -0,0 +1,154 @@
+"""
+远程控制 WebSocket 路由模块
+
+提供低延迟的交互式输入通道：客户端在一条 WebSocket 连接上连续发送紧凑指令
+（格式见 app.services.remote_input），服务端按顺序在设备执行器中执行并逐条确认。
+相比每次点击一个 HTTP 请求，省去了请求解析、依赖注入和请求模型校验的开销。
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from app.core.config import get_settings
+from app.core.device import get_device_manager
+from app.core.device_executor import DeviceExecutor, get_device_executor
+from app.services.remote_input import InputCommand, apply_command, parse_command
+
+router = APIRouter(prefix="/ws/device", tags=["Remote"])
+
+# 每台设备一个锁：多个连接同时控制同一台设备时，指令逐条交替执行
+_device_locks: Dict[str, asyncio.Lock] = {}
+
+# 解析失败的消息：(序号, 错误信息)
+_Rejected = Tuple[Optional[int], str]
+
+
+def _device_lock(serial: str) -> asyncio.Lock:
+    lock = _device_locks.get(serial)
+    if lock is None:
+        lock = _device_locks[serial] = asyncio.Lock()
+    return lock
+
+
+def _parse(text: str) -> Union[InputCommand, _Rejected]:
+    try:
+        message = json.loads(text)
+    except ValueError:
+        return None, "Invalid JSON"
+    try:
+        return parse_command(message)
+    except ValueError as e:
+        seq = message[0] if isinstance(message, list) and message else None
+        return (seq if isinstance(seq, int) else None), str(e)
+
+
+async def _apply(
+    device, executor: DeviceExecutor, lock: asyncio.Lock, command: InputCommand
+) -> Optional[str]:
+    """执行一条指令，返回错误信息（成功时为 None）；指令会使缓存的读取结果失效"""
+    timeout = get_settings().DEVICE_CALL_TIMEOUT
+    try:
+        async with lock:
+            await executor.run_action(
+                timeout + command.duration if timeout > 0 else None, apply_command, device, command
+            )
+    except Exception as e:
+        return str(e) or type(e).__name__
+    return None
+
+
+async def _apply_loop(
+    websocket: WebSocket, device, serial: str, pending: "asyncio.Queue[Any]"
+) -> None:
+    """
+    按接收顺序执行指令并发送确认
+
+    执行期间积压的连续 move 只执行最后一条（其余直接确认），拖动时设备始终跟随最新位置。
+    """
+    executor = get_device_executor(serial)
+    lock = _device_lock(serial)
+    while True:
+        batch: List[Any] = [await pending.get()]
+        while not pending.empty():
+            batch.append(pending.get_nowait())
+        for index, item in enumerate(batch):
+            if isinstance(item, InputCommand):
+                following = batch[index + 1] if index + 1 < len(batch) else None
+                superseded = (
+                    item.op == "move"
+                    and isinstance(following, InputCommand)
+                    and following.op == "move"
+                )
+                seq = item.seq
+                error = None if superseded else await _apply(device, executor, lock, item)
+            else:
+                seq, error = item
+            await websocket.send_text(json.dumps([seq] if error is None else [seq, error]))
+
+
+class _QueueOverflow(Exception):
+    """排队的指令超过上限"""
+
+    pass
+
+
+async def _receive_loop(websocket: WebSocket, pending: "asyncio.Queue[Any]") -> None:
+    """接收并解析指令，客户端断开时正常结束，排队的指令超过上限时抛出 _QueueOverflow"""
+    try:
+        while True:
+            item = _parse(await websocket.receive_text())
+            try:
+                pending.put_nowait(item)
+            except asyncio.QueueFull:
+                raise _QueueOverflow(f"Too many pending commands ({pending.maxsize})")
+    except WebSocketDisconnect:
+        pass
+
+
+@router.websocket("/{serial}/input")
+async def remote_input(websocket: WebSocket, serial: str):
+    """
+    远程输入通道
+
+    每条消息为 [序号, 操作, 参数...]，例如 [1, "tap", 540, 1200]、[2, "key", "back"]。
+    指令按接收顺序执行，每条指令执行后回复 [序号]，失败时回复 [序号, 错误信息]。
+    serial 与当前连接的设备不一致时以 1008 关闭连接；排队的指令超过 REMOTE_INPUT_QUEUE 时
+    以 1013 关闭；接收或发送确认出错时以 1011 关闭。
+
+    Args:
+        websocket: WebSocket 连接
+        serial: 设备序列号
+    """
+    await websocket.accept()
+    manager = get_device_manager()
+    device = manager.get_device() if manager.is_connected() else None
+    if device is None or device.serial != serial:
+        await websocket.close(code=1008, reason=f"Device not connected: {serial}")
+        return
+
+    pending: "asyncio.Queue[Any]" = asyncio.Queue(get_settings().REMOTE_INPUT_QUEUE)
+    receiver = asyncio.create_task(_receive_loop(websocket, pending))
+    worker = asyncio.create_task(_apply_loop(websocket, device, serial, pending))
+    try:
+        # 执行循环不会自行结束，先结束的一方要么是客户端断开，要么出了错
+        done, _ = await asyncio.wait({receiver, worker}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        # 连接断开后尚未执行的指令直接丢弃
+        receiver.cancel()
+        worker.cancel()
+
+    error = next((task.exception() for task in done if task.exception() is not None), None)
+    if error is None:
+        return
+    code = 1013 if isinstance(error, _QueueOverflow) else 1011
+    try:
+        # 关闭原因最长 123 字节
+        reason = str(error) or type(error).__name__
+        reason = reason.encode("utf-8")[:123].decode("utf-8", "ignore")
+        await websocket.close(code=code, reason=reason)
+    except Exception:
+        # 连接已经断开
+        pass
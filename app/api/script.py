@@ -7,30 +7,91 @@
 import os
 import uuid
 import asyncio
-import json
+from functools import lru_cache
 from typing import Optional, Dict, Any, List
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, BackgroundTasks
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from queue import Queue
-from threading import Thread
 
+from app.core.config import get_settings
 from app.core.device import get_device_manager
+from app.core.event_stream import EventChannel, sse_stream
+from app.core.hierarchy import Hierarchy
+from app.core.metrics import REGISTRY, MetricFamily
+from app.core.tracing import Trace, submit_chrome_trace, tracing
+from app.services.script_async import AsyncScriptExecutor
+from app.services.script_checkpoint import (
+    Checkpoint,
+    CheckpointError,
+    CheckpointStore,
+    Checkpointer,
+    script_hash,
+)
 from app.services.script_executor import ScriptExecutor, ExecutionResult
+from app.services.script_log import read_log_file
+from app.services.script_runs import RunStatus, ScriptRunStore, profile_summary
+from app.services.script_simulator import HierarchySnapshot, Simulation, SimulatedScriptExecutor
 
 router = APIRouter(prefix="/script", tags=["Script"])
 
 # 脚本存储目录
 SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "scripts")
 
+# 脚本执行日志目录（NDJSON，文件名为执行会话 ID）
+LOGS_DIR = os.path.join(os.path.dirname(SCRIPTS_DIR), "logs")
+
+# 脚本检查点目录（文件名为检查点 ID）
+CHECKPOINTS_DIR = os.path.join(os.path.dirname(SCRIPTS_DIR), "checkpoints")
+checkpoint_store = CheckpointStore(CHECKPOINTS_DIR)
+
+# 脚本执行记录数据库（SQLite）
+RUNS_DB = os.path.join(os.path.dirname(SCRIPTS_DIR), "data", "script_runs.db")
+
+# 录制的界面快照目录（每个子目录为一组快照，用于模拟执行）
+RECORDINGS_DIR = os.path.join(os.path.dirname(SCRIPTS_DIR), "recordings")
+
 # 确保脚本目录存在
 os.makedirs(SCRIPTS_DIR, exist_ok=True)
 
 # 存储正在执行的脚本
 running_scripts: Dict[str, ScriptExecutor] = {}
 
-# 存储执行会话的日志队列
-execution_sessions: Dict[str, Queue] = {}
+# 存储执行会话的事件通道（执行结束后保留 SCRIPT_STREAM_REPLAY_TTL 秒，供断线重连）
+execution_sessions: Dict[str, EventChannel] = {}
+
+# 正在运行的执行任务（保持引用，避免任务被垃圾回收）
+_execution_tasks: set = set()
+
+
+@lru_cache()
+def get_run_store() -> ScriptRunStore:
+    """
+    获取脚本执行记录存储
+
+    第一次调用时才创建，导入模块不会创建数据库文件和目录。
+
+    Returns:
+        ScriptRunStore: 执行记录存储
+    """
+    return ScriptRunStore(
+        RUNS_DB,
+        retention=get_settings().SCRIPT_RUN_RETENTION_DAYS * 86400,
+        checkpoints=checkpoint_store,
+    )
+
+
+@REGISTRY.register_collector
+def _collect_script_metrics() -> List[MetricFamily]:
+    """脚本会话指标（/metrics 抓取时读取）"""
+    channels = list(execution_sessions.values())
+    return [
+        MetricFamily("script_sessions_running", "gauge", "Scripts being executed")
+        .add(len(running_scripts)),
+        MetricFamily("script_stream_sessions", "gauge", "Execution sessions kept for SSE replay")
+        .add(len(channels)),
+        MetricFamily("script_stream_subscribers", "gauge", "Clients reading script SSE streams")
+        .add(sum(channel.subscribers for channel in channels)),
+    ]
 
 
 class ScriptContent(BaseModel):
@@ -38,6 +99,30 @@ class ScriptContent(BaseModel):
 
     content: str
     variables: Optional[Dict[str, Any]] = None
+    optimize: bool = False
+    profile: bool = False
+    log_level: Optional[str] = None
+    checkpoint: bool = False
+
+
+class SnapshotContent(BaseModel):
+    """界面快照模型"""
+
+    at: float
+    xml: str
+
+
+class SimulateRequest(BaseModel):
+    """模拟执行请求模型"""
+
+    content: str
+    variables: Optional[Dict[str, Any]] = None
+    optimize: bool = False
+    snapshots: Optional[List[SnapshotContent]] = None
+    recording: Optional[str] = None
+    interval: float = 1.0
+    rpc_latency: float = 0.1
+    dump_latency: float = 0.5
 
 
 class ScriptFile(BaseModel):
@@ -55,6 +140,136 @@ class ScriptInfo(BaseModel):
     modified: float
 
 
+def _create_executor(
+    executor_class,
+    session_id: str,
+    log_level: Optional[str],
+    checkpoint_id: Optional[str] = None,
+    script_name: Optional[str] = None,
+):
+    """
+    创建执行器，日志溢出时写入 LOGS_DIR/{session_id}.ndjson
+
+    Args:
+        executor_class: ScriptExecutor 或 AsyncScriptExecutor
+        session_id: 执行会话 ID
+        log_level: 最低日志级别
+        checkpoint_id: 检查点 ID，为 None 时不保存检查点
+        script_name: 脚本文件名（记录在检查点中）
+
+    Returns:
+        执行器实例
+
+    Raises:
+        HTTPException: 日志级别无效时返回 400
+    """
+    try:
+        executor = executor_class(
+            get_device_manager(),
+            log_level=log_level,
+            log_file=os.path.join(LOGS_DIR, f"{session_id}.ndjson"),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if checkpoint_id is not None:
+        executor.checkpointer = Checkpointer(
+            checkpoint_store,
+            checkpoint_id,
+            interval=get_settings().SCRIPT_CHECKPOINT_INTERVAL,
+            script_name=script_name,
+        )
+    return executor
+
+
+def _current_device() -> Optional[str]:
+    """当前已连接设备的序列号"""
+    device_manager = get_device_manager()
+    if not device_manager.is_connected():
+        return None
+    return getattr(device_manager.get_device(), "serial", None)
+
+
+def _record_start(
+    session_id: str,
+    source: str,
+    script_name: Optional[str] = None,
+    resumed_from: Optional[str] = None,
+) -> None:
+    """
+    在执行记录中登记一次脚本执行
+
+    Args:
+        session_id: 执行会话 ID
+        source: 脚本源代码
+        script_name: 脚本文件名
+        resumed_from: 从检查点恢复时为检查点 ID
+    """
+    get_run_store().start(
+        session_id, script_hash(source), script_name, _current_device(), resumed_from
+    )
+
+
+def _record_finish(session_id: str, executor: ScriptExecutor, result: ExecutionResult) -> None:
+    """
+    在执行记录中写入执行结果
+
+    Args:
+        session_id: 执行会话 ID
+        executor: 执行器
+        result: 执行结果
+    """
+    if executor.context is not None and executor.context.stop_requested:
+        status = RunStatus.STOPPED
+    else:
+        status = RunStatus.SUCCESS if result.success else RunStatus.FAILED
+    get_run_store().finish(
+        session_id,
+        status,
+        # 不访问 executor.device：未使用设备的脚本不应在结束时自动连接设备
+        device=getattr(executor._cached_device, "serial", None),
+        error=result.error,
+        variables=result.variables,
+        log_file=result.log_file,
+        log_total=result.log_total,
+        checkpoint_id=result.checkpoint_id,
+        profile=profile_summary(result.profile),
+    )
+
+
+def _load_checkpoint(checkpoint_id: str) -> Checkpoint:
+    """
+    读取检查点，脚本文件在保存检查点之后被修改时拒绝恢复
+
+    Args:
+        checkpoint_id: 检查点 ID
+
+    Returns:
+        Checkpoint: 检查点
+
+    Raises:
+        HTTPException: ID 无效返回 400，不存在返回 404，无法恢复返回 409
+    """
+    try:
+        checkpoint = checkpoint_store.load(checkpoint_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except CheckpointError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if checkpoint is None:
+        raise HTTPException(status_code=404, detail=f"Checkpoint not found: {checkpoint_id}")
+
+    if checkpoint.script_name:
+        filepath = os.path.join(SCRIPTS_DIR, checkpoint.script_name)
+        if os.path.exists(filepath):
+            with open(filepath, "r", encoding="utf-8") as f:
+                if f.read() != checkpoint.source:
+                    raise HTTPException(
+                        status_code=409,
+                        detail=f"Script changed since checkpoint: {checkpoint.script_name}",
+                    )
+    return checkpoint
+
+
 @router.get("/list")
 def list_scripts() -> List[ScriptInfo]:
     """
@@ -140,22 +355,31 @@ def delete_script(name: str) -> Dict[str, str]:
 
 
 @router.post("/execute")
-def execute_script(script: ScriptContent) -> ExecutionResult:
+async def execute_script(script: ScriptContent) -> ExecutionResult:
     """
     执行脚本内容
 
+    脚本在当前设备的脚本线程池中执行（同一设备同时执行的脚本数受 DEVICE_SCRIPT_WORKERS 限制）。
+
     Args:
         script: 脚本内容和变量
 
     Returns:
         ExecutionResult: 执行结果
     """
-    manager = get_device_manager()
-
-    executor = ScriptExecutor(manager)
-    result = executor.execute_script(
-        script.content, variables=script.variables, script_dir=SCRIPTS_DIR
+    session_id = str(uuid.uuid4())
+    executor = _create_executor(
+        AsyncScriptExecutor, session_id, script.log_level, session_id if script.checkpoint else None
+    )
+    await asyncio.to_thread(_record_start, session_id, script.content)
+    result = await executor.execute_script_async(
+        script.content,
+        variables=script.variables,
+        script_dir=SCRIPTS_DIR,
+        optimize=script.optimize,
+        profile=script.profile,
     )
+    await asyncio.to_thread(_record_finish, session_id, executor, result)
 
     return result
 
@@ -171,77 +395,143 @@ async def execute_script_stream(script: ScriptContent):
     Returns:
         StreamingResponse: SSE 事件流
     """
-    manager = get_device_manager()
+    return await _start_script_stream(script)
+
+
+async def _start_script_stream(script: ScriptContent, script_name: Optional[str] = None) -> StreamingResponse:
+    """
+    创建执行会话并以 SSE 返回执行日志
 
+    Args:
+        script: 脚本内容和变量
+        script_name: 脚本文件名（执行脚本文件时传入，记录在检查点中）
+
+    Returns:
+        StreamingResponse: SSE 事件流
+    """
     # 创建执行会话
     session_id = str(uuid.uuid4())
-    log_queue: Queue = Queue()
-    execution_sessions[session_id] = log_queue
 
-    # 创建执行器
-    executor = ScriptExecutor(manager)
+    # 创建执行器（脚本在当前设备的脚本线程池中执行）
+    executor = _create_executor(
+        AsyncScriptExecutor,
+        session_id,
+        script.log_level,
+        session_id if script.checkpoint else None,
+        script_name,
+    )
+
+    await asyncio.to_thread(_record_start, session_id, script.content, script_name)
+
+    def run(log_callback):
+        return executor.execute_script_async(
+            script.content,
+            variables=script.variables,
+            script_dir=SCRIPTS_DIR,
+            log_callback=log_callback,
+            optimize=script.optimize,
+            profile=script.profile,
+        )
+
+    return _stream_execution(session_id, executor, run)
+
+
+def _stream_execution(session_id: str, executor: AsyncScriptExecutor, run) -> StreamingResponse:
+    """
+    启动脚本执行任务，并通过 SSE 实时返回日志
+
+    Args:
+        session_id: 执行会话 ID
+        executor: 执行器
+        run: 接收日志回调函数、返回执行协程的函数
+
+    Returns:
+        StreamingResponse: SSE 事件流
+    """
+    # 日志在脚本线程中产生，通道负责跨线程唤醒 SSE 连接
+    settings = get_settings()
+    channel = EventChannel(capacity=settings.SCRIPT_STREAM_REPLAY_EVENTS)
+    channel.publish({"type": "session", "data": session_id})
+    execution_sessions[session_id] = channel
     running_scripts[session_id] = executor
 
     # 日志回调函数
     def log_callback(message: str):
-        log_queue.put({"type": "log", "data": message})
+        channel.publish({"type": "log", "data": message})
 
-    # 在后台线程中执行脚本
-    def run_script():
+    # 等待脚本执行完成并发送结果
+    async def run_script():
+        # 执行在请求返回后继续进行，使用独立的 trace（配置 TRACE_FILE 时写入文件）
+        trace = Trace(f"script {session_id}", keep_spans=bool(settings.TRACE_FILE))
         try:
-            result = executor.execute_script(
-                script.content,
-                variables=script.variables,
-                script_dir=SCRIPTS_DIR,
-                log_callback=log_callback,
-            )
+            with tracing(trace):
+                result = await run(log_callback)
+            # 完整日志写入文件，供 /script/logs/{session_id} 分页读取
+            if executor.context:
+                result.log_file = await asyncio.to_thread(executor.context.logs.persist)
+            await asyncio.to_thread(_record_finish, session_id, executor, result)
             # 发送执行结果
-            log_queue.put(
+            channel.publish(
                 {
                     "type": "result",
                     "data": {
                         "success": result.success,
                         "error": result.error,
                         "variables": result.variables,
+                        "optimizations": result.optimizations,
+                        "profile": result.profile,
+                        "log_total": result.log_total,
+                        "log_file": result.log_file,
+                        "checkpoint_id": result.checkpoint_id,
+                        "rpc_count": trace.rpc_count,
                     },
                 }
             )
         except Exception as e:
-            log_queue.put({"type": "error", "data": str(e)})
+            await asyncio.to_thread(
+                get_run_store().finish, session_id, RunStatus.FAILED, error=str(e)
+            )
+            channel.publish({"type": "error", "data": str(e)})
         finally:
+            if trace.keep_spans:
+                submit_chrome_trace(trace)
             # 发送结束信号
-            log_queue.put({"type": "end", "data": None})
-            # 清理会话
+            channel.publish({"type": "end", "data": None})
+            channel.close()
+            # 清理会话；事件通道保留一段时间，断线的客户端仍可重新连接取回剩余事件
             if session_id in running_scripts:
                 del running_scripts[session_id]
-            if session_id in execution_sessions:
-                del execution_sessions[session_id]
-
-    # 启动执行线程
-    thread = Thread(target=run_script, daemon=True)
-    thread.start()
-
-    # SSE 事件生成器
-    async def event_generator():
-        # 发送会话 ID
-        yield f"data: {json.dumps({'type': 'session', 'data': session_id})}\n\n"
-
-        while True:
-            try:
-                # 非阻塞方式获取日志
-                await asyncio.sleep(0.05)  # 小延迟避免 CPU 占用过高
-                while not log_queue.empty():
-                    event = log_queue.get_nowait()
-                    yield f"data: {json.dumps(event)}\n\n"
-
-                    # 如果是结束信号，退出循环
-                    if event.get("type") == "end":
-                        return
-            except Exception:
-                break
+            asyncio.get_running_loop().call_later(
+                settings.SCRIPT_STREAM_REPLAY_TTL, _expire_session, session_id, channel
+            )
+
+    # 启动执行任务
+    task = asyncio.create_task(run_script())
+    _execution_tasks.add(task)
+    task.add_done_callback(_execution_tasks.discard)
+
+    return _sse_response(channel)
+
 
+def _expire_session(session_id: str, channel: EventChannel) -> None:
+    """删除已结束会话的事件通道"""
+    if execution_sessions.get(session_id) is channel:
+        del execution_sessions[session_id]
+
+
+def _sse_response(channel: EventChannel, last_id: int = 0) -> StreamingResponse:
+    """
+    以 SSE 返回事件通道中 id 大于 last_id 的事件
+
+    Args:
+        channel: 事件通道
+        last_id: 客户端已收到的最后一个事件 id
+
+    Returns:
+        StreamingResponse: SSE 事件流
+    """
     return StreamingResponse(
-        event_generator(),
+        sse_stream(channel, get_settings().SCRIPT_STREAM_HEARTBEAT, last_id),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -251,14 +541,58 @@ async def execute_script_stream(script: ScriptContent):
     )
 
 
+@router.get("/stream/{session_id}")
+async def attach_script_stream(
+    session_id: str,
+    last_event_id: Optional[int] = Query(None, description="已收到的最后一个事件 id"),
+    last_event_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    重新连接执行会话的 SSE 事件流
+
+    每个事件都带有递增的 id。断线后带上 Last-Event-ID 请求头（EventSource 会自动发送）
+    或 last_event_id 参数重新连接，从下一个事件继续，不丢失也不重复；不带时从头重放。
+    需要的事件已超出 SCRIPT_STREAM_REPLAY_EVENTS 的保留范围时，先发送一个不带 id 的 gap 事件。
+    同一会话可以同时有多个连接。执行结束后会话仍保留 SCRIPT_STREAM_REPLAY_TTL 秒。
+
+    Args:
+        session_id: 执行会话 ID
+        last_event_id: 已收到的最后一个事件 id
+        last_event_header: Last-Event-ID 请求头（优先于 last_event_id 参数）
+
+    Returns:
+        StreamingResponse: SSE 事件流
+    """
+    channel = execution_sessions.get(session_id)
+    if channel is None:
+        raise HTTPException(status_code=404, detail=f"Session not found: {session_id}")
+    if last_event_header is not None:
+        try:
+            last_event_id = int(last_event_header)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+    return _sse_response(channel, last_event_id or 0)
+
+
 @router.post("/execute/stream/{name}")
-async def execute_script_file_stream(name: str, variables: Optional[Dict[str, Any]] = None):
+async def execute_script_file_stream(
+    name: str,
+    variables: Optional[Dict[str, Any]] = None,
+    optimize: bool = Query(False, description="执行前是否优化脚本"),
+    profile: bool = Query(False, description="是否记录性能分析数据"),
+    log_level: Optional[str] = Query(None, description="最低日志级别"),
+    checkpoint: bool = Query(False, description="是否定期保存检查点"),
+):
     """
     执行脚本文件并通过 SSE 实时返回日志
 
     Args:
         name: 脚本文件名
         variables: 初始变量
+        optimize: 执行前是否优化脚本
+        profile: 是否记录性能分析数据
+        log_level: 最低日志级别（trace/debug/info/warning/error）
+        checkpoint: 是否定期保存检查点（失败后可通过 /script/resume 继续执行）
 
     Returns:
         StreamingResponse: SSE 事件流
@@ -271,18 +605,36 @@ async def execute_script_file_stream(name: str, variables: Optional[Dict[str, An
         content = f.read()
 
     # 复用 execute_script_stream 的逻辑
-    script = ScriptContent(content=content, variables=variables)
-    return await execute_script_stream(script)
+    script = ScriptContent(
+        content=content,
+        variables=variables,
+        optimize=optimize,
+        profile=profile,
+        log_level=log_level,
+        checkpoint=checkpoint,
+    )
+    return await _start_script_stream(script, script_name=name)
 
 
 @router.post("/execute/{name}")
-def execute_script_file(name: str, variables: Optional[Dict[str, Any]] = None) -> ExecutionResult:
+async def execute_script_file(
+    name: str,
+    variables: Optional[Dict[str, Any]] = None,
+    optimize: bool = Query(False, description="执行前是否优化脚本"),
+    profile: bool = Query(False, description="是否记录性能分析数据"),
+    log_level: Optional[str] = Query(None, description="最低日志级别"),
+    checkpoint: bool = Query(False, description="是否定期保存检查点"),
+) -> ExecutionResult:
     """
     执行脚本文件
 
     Args:
         name: 脚本文件名
         variables: 初始变量
+        optimize: 执行前是否优化脚本
+        profile: 是否记录性能分析数据
+        log_level: 最低日志级别（trace/debug/info/warning/error）
+        checkpoint: 是否定期保存检查点（失败后可通过 /script/resume 继续执行）
 
     Returns:
         ExecutionResult: 执行结果
@@ -291,14 +643,169 @@ def execute_script_file(name: str, variables: Optional[Dict[str, Any]] = None) -
     if not os.path.exists(filepath):
         raise HTTPException(status_code=404, detail=f"Script not found: {name}")
 
-    manager = get_device_manager()
-
     with open(filepath, "r", encoding="utf-8") as f:
         content = f.read()
 
-    executor = ScriptExecutor(manager)
-    result = executor.execute_script(content, variables=variables, script_dir=SCRIPTS_DIR)
+    session_id = str(uuid.uuid4())
+    executor = _create_executor(
+        AsyncScriptExecutor, session_id, log_level, session_id if checkpoint else None, name
+    )
+    await asyncio.to_thread(_record_start, session_id, content, name)
+    result = await executor.execute_script_async(
+        content,
+        variables=variables,
+        script_dir=SCRIPTS_DIR,
+        optimize=optimize,
+        profile=profile,
+    )
+    await asyncio.to_thread(_record_finish, session_id, executor, result)
+
+    return result
+
+
+@router.get("/runs")
+def list_runs(
+    device: Optional[str] = Query(None, description="设备序列号"),
+    status: Optional[RunStatus] = Query(None, description="执行状态"),
+    since: Optional[float] = Query(None, description="开始时间下限（Unix 时间戳）"),
+    until: Optional[float] = Query(None, description="开始时间上限（Unix 时间戳，不含）"),
+    limit: int = Query(100, ge=1, le=1000, description="每页条数"),
+    offset: int = Query(0, ge=0, description="跳过的条数"),
+) -> List[Dict[str, Any]]:
+    """
+    查询脚本执行记录
+
+    Args:
+        device: 设备序列号
+        status: 执行状态（running/success/failed/stopped/interrupted）
+        since: 开始时间下限
+        until: 开始时间上限
+        limit: 每页条数
+        offset: 跳过的条数
+
+    Returns:
+        List[Dict]: 执行记录列表（按开始时间倒序）
+    """
+    runs = get_run_store().query(
+        device=device, status=status, since=since, until=until, limit=limit, offset=offset
+    )
+    return [run.to_dict() for run in runs]
+
+
+@router.get("/runs/{run_id}")
+def get_run(run_id: str) -> Dict[str, Any]:
+    """
+    获取一次脚本执行的记录
+
+    Args:
+        run_id: 执行会话 ID
+
+    Returns:
+        Dict: 执行记录
+    """
+    run = get_run_store().get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"Run not found: {run_id}")
+    return run.to_dict()
+
+
+@router.get("/checkpoints")
+def list_checkpoints() -> List[Dict[str, Any]]:
+    """
+    获取检查点列表
+
+    Returns:
+        List[Dict]: 检查点摘要列表（按保存时间倒序）
+    """
+    return checkpoint_store.list()
+
+
+@router.delete("/checkpoints/{checkpoint_id}")
+def delete_checkpoint(checkpoint_id: str) -> Dict[str, str]:
+    """
+    删除检查点
+
+    Args:
+        checkpoint_id: 检查点 ID
+
+    Returns:
+        Dict: 操作结果
+    """
+    try:
+        deleted = checkpoint_store.delete(checkpoint_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"Checkpoint not found: {checkpoint_id}")
+    return {"message": f"Checkpoint deleted: {checkpoint_id}"}
+
+
+@router.post("/resume/stream/{checkpoint_id}")
+async def resume_script_stream(
+    checkpoint_id: str,
+    log_level: Optional[str] = Query(None, description="最低日志级别"),
+):
+    """
+    从检查点继续执行脚本并通过 SSE 实时返回日志
+
+    Args:
+        checkpoint_id: 检查点 ID
+        log_level: 最低日志级别（trace/debug/info/warning/error）
+
+    Returns:
+        StreamingResponse: SSE 事件流
+    """
+    checkpoint = _load_checkpoint(checkpoint_id)
+    session_id = str(uuid.uuid4())
+    executor = _create_executor(
+        AsyncScriptExecutor, session_id, log_level, checkpoint.id, checkpoint.script_name
+    )
+    await asyncio.to_thread(
+        _record_start,
+        session_id,
+        checkpoint.source,
+        checkpoint.script_name,
+        resumed_from=checkpoint.id,
+    )
+
+    def run(log_callback):
+        return executor.resume_async(checkpoint, log_callback=log_callback)
+
+    return _stream_execution(session_id, executor, run)
+
+
+@router.post("/resume/{checkpoint_id}")
+async def resume_script(
+    checkpoint_id: str,
+    log_level: Optional[str] = Query(None, description="最低日志级别"),
+) -> ExecutionResult:
+    """
+    从检查点继续执行脚本
+
+    检查点所在的语句会重新执行一次；恢复后的执行继续写入同一个检查点，
+    再次失败时可以用同一个 ID 继续恢复，执行完成后检查点被删除。
+
+    Args:
+        checkpoint_id: 检查点 ID
+        log_level: 最低日志级别（trace/debug/info/warning/error）
 
+    Returns:
+        ExecutionResult: 执行结果
+    """
+    checkpoint = _load_checkpoint(checkpoint_id)
+    session_id = str(uuid.uuid4())
+    executor = _create_executor(
+        AsyncScriptExecutor, session_id, log_level, checkpoint.id, checkpoint.script_name
+    )
+    await asyncio.to_thread(
+        _record_start,
+        session_id,
+        checkpoint.source,
+        checkpoint.script_name,
+        resumed_from=checkpoint.id,
+    )
+    result = await executor.resume_async(checkpoint)
+    await asyncio.to_thread(_record_finish, session_id, executor, result)
     return result
 
 
@@ -322,11 +829,92 @@ def validate_script(script: ScriptContent) -> Dict[str, Any]:
         return {"valid": False, "error": str(e), "message": "Script has syntax errors"}
 
 
+@router.post("/simulate")
+def simulate_script(request: SimulateRequest) -> ExecutionResult:
+    """
+    使用录制的界面快照模拟执行脚本（不需要连接设备，等待不消耗真实时间）
+
+    快照可以直接在请求中提供，也可以指定 RECORDINGS_DIR 下的录制目录
+    （目录中的 XML 文件按 timeline.json 或文件名顺序排列，见 load_snapshots）。
+
+    Args:
+        request: 脚本内容、变量、快照和延迟参数
+
+    Returns:
+        ExecutionResult: 执行结果，simulation 字段包含估算时长和失败的选择器
+    """
+    try:
+        if request.recording is not None:
+            directory = os.path.join(RECORDINGS_DIR, request.recording)
+            if os.path.dirname(os.path.normpath(directory)) != RECORDINGS_DIR or not os.path.isdir(directory):
+                raise HTTPException(status_code=404, detail=f"Recording not found: {request.recording}")
+            simulation = Simulation.from_directory(
+                directory,
+                request.interval,
+                rpc_latency=request.rpc_latency,
+                dump_latency=request.dump_latency,
+            )
+        else:
+            snapshots = [
+                HierarchySnapshot(snapshot.at, Hierarchy(snapshot.xml), f"#{index}")
+                for index, snapshot in enumerate(request.snapshots or [])
+            ]
+            simulation = Simulation(
+                snapshots, rpc_latency=request.rpc_latency, dump_latency=request.dump_latency
+            )
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid snapshots: {e}")
+
+    return SimulatedScriptExecutor(simulation).execute_script(
+        request.content,
+        variables=request.variables,
+        script_dir=SCRIPTS_DIR,
+        optimize=request.optimize,
+    )
+
+
+@router.get("/logs/{session_id}")
+def get_script_logs(
+    session_id: str,
+    offset: int = Query(0, ge=0, description="起始序号"),
+    limit: int = Query(100, ge=1, le=1000, description="每页条数"),
+) -> Dict[str, Any]:
+    """
+    分页读取脚本执行日志
+
+    正在执行的会话从内存缓冲区（及其溢出文件）读取，已结束的会话从日志文件读取。
+
+    Args:
+        session_id: 执行会话 ID
+        offset: 起始序号
+        limit: 每页条数
+
+    Returns:
+        Dict: 包含 total、offset 和 items 的字典
+    """
+    executor = running_scripts.get(session_id)
+    if executor is not None and executor.context is not None:
+        return executor.context.logs.page(offset, limit)
+
+    try:
+        uuid.UUID(session_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid session id")
+
+    filepath = os.path.join(LOGS_DIR, f"{session_id}.ndjson")
+    if not os.path.exists(filepath):
+        raise HTTPException(status_code=404, detail=f"Logs not found: {session_id}")
+    return read_log_file(filepath, offset, limit)
+
+
 @router.post("/stop/{session_id}")
 def stop_script(session_id: str) -> Dict[str, str]:
     """
     停止正在执行的脚本
 
+    正在进行的 wait、元素等待和人类模拟操作的延迟立即结束，之后的设备调用直接失败，
+    执行线程随即退出并释放会话。
+
     Args:
         session_id: 执行会话 ID
 
@@ -0,0 +1,221 @@
+"""
+协作式取消模块
+
+CancellationToken 在脚本执行期间通过 contextvars 绑定到当前上下文，所有阻塞原语都会响应它：
+- 等待：cancellable_sleep / CancellationToken.sleep 基于 threading.Event，取消时立即返回
+- 异步等待：CancellationToken.run_async 让任意 awaitable 与取消信号竞争，
+  取消时不再等待仍在设备线程池中执行的调用
+- 设备 RPC：埋点包装层在每次调用前检查当前上下文的令牌，已取消时直接抛出
+
+线程池中的调用通过 contextvars.copy_context() 继承令牌（见 app.core.device_executor）。
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, List, Optional
+
+
+class OperationCancelled(Exception):
+    """操作已被取消"""
+
+    pass
+
+
+class CancellationToken:
+    """
+    取消令牌
+
+    Attributes:
+        reason: 取消原因（未取消时为 None）
+    """
+
+    def __init__(self):
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        """是否已取消"""
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "Operation cancelled") -> None:
+        """
+        取消令牌（可从任意线程调用，重复调用无效果）
+
+        Args:
+            reason: 取消原因，作为 OperationCancelled 的消息
+        """
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                # 回调所在的事件循环可能已经关闭
+                pass
+
+    def add_callback(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        注册取消回调，已取消时立即调用
+
+        Args:
+            callback: 回调函数（在调用 cancel 的线程中执行）
+
+        Returns:
+            注销回调的函数
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove_callback(callback)
+        callback()
+        return lambda: None
+
+    def _remove_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def raise_if_cancelled(self) -> None:
+        """
+        Raises:
+            OperationCancelled: 令牌已取消
+        """
+        if self._event.is_set():
+            raise OperationCancelled(self.reason)
+
+    def sleep(self, seconds: float) -> None:
+        """
+        等待指定时间，取消时立即结束
+
+        Args:
+            seconds: 等待时间（秒）
+
+        Raises:
+            OperationCancelled: 等待期间（或之前）令牌被取消
+        """
+        if self._event.wait(max(seconds, 0)):
+            raise OperationCancelled(self.reason)
+
+    async def run_async(self, awaitable: Awaitable[Any]) -> Any:
+        """
+        等待 awaitable 完成，令牌被取消时立即放弃等待
+
+        Args:
+            awaitable: 协程或 Future
+
+        Returns:
+            awaitable 的结果
+
+        Raises:
+            OperationCancelled: 完成前令牌被取消（awaitable 会被取消）
+        """
+        task = asyncio.ensure_future(awaitable)
+        if self._event.is_set():
+            task.cancel()
+            raise OperationCancelled(self.reason)
+
+        loop = asyncio.get_running_loop()
+        cancelled = loop.create_future()
+
+        def wake() -> None:
+            loop.call_soon_threadsafe(lambda: cancelled.done() or cancelled.set_result(None))
+
+        remove = self.add_callback(wake)
+        try:
+            await asyncio.wait((task, cancelled), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            remove()
+            cancelled.cancel()
+        if not task.done():
+            task.cancel()
+            raise OperationCancelled(self.reason)
+        return task.result()
+
+    async def sleep_async(self, seconds: float) -> None:
+        """
+        异步等待指定时间，取消时立即结束
+
+        Args:
+            seconds: 等待时间（秒）
+
+        Raises:
+            OperationCancelled: 等待期间令牌被取消
+        """
+        await self.run_async(asyncio.sleep(max(seconds, 0)))
+
+
+_current_token: ContextVar[Optional[CancellationToken]] = ContextVar("cancellation_token", default=None)
+
+
+def current_token() -> Optional[CancellationToken]:
+    """当前上下文绑定的取消令牌"""
+    return _current_token.get()
+
+
+@contextmanager
+def cancellation_scope(token: CancellationToken):
+    """
+    在当前上下文中绑定取消令牌
+
+    Args:
+        token: 取消令牌
+
+    Usage:
+        with cancellation_scope(token):
+            input_service.human_click(...)
+    """
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+def check_cancelled() -> None:
+    """
+    检查当前上下文的令牌
+
+    Raises:
+        OperationCancelled: 令牌已取消
+    """
+    token = _current_token.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def cancellable_sleep(seconds: float) -> None:
+    """
+    time.sleep 的可取消版本：当前上下文绑定了令牌时，取消会立即结束等待
+
+    Args:
+        seconds: 等待时间（秒）
+
+    Raises:
+        OperationCancelled: 等待期间令牌被取消
+    """
+    token = _current_token.get()
+    if token is None:
+        time.sleep(seconds)
+    else:
+        token.sleep(seconds)
+
+
+# 导出的公共接口
+__all__ = [
+    "OperationCancelled",
+    "CancellationToken",
+    "current_token",
+    "cancellation_scope",
+    "check_cancelled",
+    "cancellable_sleep",
+]
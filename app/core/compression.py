@@ -0,0 +1,255 @@
+"""
+响应压缩模块
+
+按 Accept-Encoding 协商压缩方式：客户端支持且安装了 brotli 时使用 br，否则使用 gzip。
+小于 RESPONSE_COMPRESS_MIN_SIZE 的响应、SSE 流和图片等已压缩的内容不压缩。
+压缩逻辑只依赖 ASGI 消息，不依赖 Starlette GZipMiddleware 的内部实现（各版本之间并不稳定）。
+压缩后响应体与原始表示不再逐字节相同，强 ETag 改为弱 ETag，条件请求仍按弱比较命中。
+
+安装 brotli：
+    pip install "android-automation-api[speedups]"
+"""
+
+import zlib
+from typing import Any, Callable, Dict, Optional
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - 可选依赖
+    brotli = None
+
+# gzip 压缩级别：更高的级别对 JSON 几乎不再减小体积，只增加耗时
+GZIP_LEVEL = 6
+
+# brotli 压缩质量：4 左右压缩率已优于 gzip 6，速度与之相当
+BROTLI_QUALITY = 4
+
+# 超过该大小的响应块在线程中压缩，避免阻塞事件循环
+THREAD_MINIMUM_SIZE = 128 * 1024
+
+# 不压缩的内容类型（已压缩的格式和 SSE 流），"type/*" 匹配该大类下的所有类型
+EXCLUDED_CONTENT_TYPES = frozenset(
+    {
+        "text/event-stream",
+        "application/gzip",
+        "application/x-gzip",
+        "application/zip",
+        "font/woff",
+        "font/woff2",
+        "image/*",
+        "audio/*",
+        "video/*",
+    }
+)
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """
+    解析 Accept-Encoding 请求头
+
+    Args:
+        header: Accept-Encoding 请求头
+
+    Returns:
+        Dict[str, float]: 编码 -> 权重（q 值），q=0 表示明确拒绝
+    """
+    result = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        result[coding.strip().lower()] = quality
+    return result
+
+
+class GzipCompressor:
+    """gzip 流式压缩"""
+
+    encoding = "gzip"
+
+    def __init__(self, level: int = GZIP_LEVEL):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        """
+        压缩一个响应块
+
+        Args:
+            body: 响应块
+            more_body: 后面是否还有响应块（有则只刷新，否则结束压缩流）
+
+        Returns:
+            压缩后的数据
+        """
+        flush = zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH
+        return self._compressor.compress(body) + self._compressor.flush(flush)
+
+
+class BrotliCompressor:
+    """brotli 流式压缩（需要安装 brotli）"""
+
+    encoding = "br"
+
+    def __init__(self, quality: int = BROTLI_QUALITY):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        """
+        压缩一个响应块
+
+        Args:
+            body: 响应块
+            more_body: 后面是否还有响应块（有则只刷新，否则结束压缩流）
+
+        Returns:
+            压缩后的数据
+        """
+        data = self._compressor.process(body)
+        return data + (self._compressor.flush() if more_body else self._compressor.finish())
+
+
+def _is_excluded(content_type: str) -> bool:
+    media_type = content_type.partition(";")[0].strip().lower()
+    return (
+        media_type in EXCLUDED_CONTENT_TYPES
+        or media_type.partition("/")[0] + "/*" in EXCLUDED_CONTENT_TYPES
+    )
+
+
+class CompressionResponder:
+    """
+    压缩一个响应的 ASGI 包装
+
+    响应头推迟到第一个响应块到达后发送：不压缩时原样发送；压缩时加上 Content-Encoding
+    和 Vary，单块响应改写 Content-Length，流式响应去掉 Content-Length 并逐块压缩。
+    已带 Content-Encoding、部分内容（206）和 EXCLUDED_CONTENT_TYPES 中的响应不压缩。
+
+    Args:
+        app: ASGI 应用
+        minimum_size: 不压缩的单块响应体大小上限（字节）
+        compressor: 创建压缩器（GzipCompressor / BrotliCompressor）的函数
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int, compressor: Callable[[], Any]):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.create_compressor = compressor
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        start: Optional[Message] = None
+        compressor: Any = None
+        passthrough = False
+
+        async def compress(body: bytes, more_body: bool) -> bytes:
+            if len(body) >= THREAD_MINIMUM_SIZE:
+                return await anyio.to_thread.run_sync(compressor.compress, body, more_body)
+            return compressor.compress(body, more_body)
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compressor, passthrough
+            message_type = message["type"]
+            if message_type == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                passthrough = (
+                    "content-encoding" in headers
+                    or message["status"] == 206
+                    or _is_excluded(headers.get("content-type", ""))
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start = message
+                return
+            if passthrough or message_type != "http.response.body":
+                # pathsend 等其他消息不压缩，先补发推迟的响应头
+                if start is not None:
+                    await send(start)
+                    start = None
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                if len(body) < self.minimum_size and not more_body:
+                    passthrough = True
+                else:
+                    compressor = self.create_compressor()
+                    headers["Content-Encoding"] = compressor.encoding
+                    headers.add_vary_header("Accept-Encoding")
+                    if more_body or start.get("trailers", False):
+                        del headers["Content-Length"]
+                    message["body"] = await compress(body, more_body)
+                    if "content-length" in headers:
+                        headers["Content-Length"] = str(len(message["body"]))
+                await send(start)
+                start = None
+            elif compressor is not None:
+                message["body"] = await compress(body, more_body)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+
+class CompressionMiddleware:
+    """
+    按 Accept-Encoding 协商 br / gzip 压缩的中间件
+
+    Args:
+        app: ASGI 应用
+        minimum_size: 不压缩的响应体大小上限（字节）
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    def _responder(self, accept_encoding: str) -> ASGIApp:
+        accepted = accepted_encodings(accept_encoding)
+        if brotli is not None and accepted.get("br", 0) > 0:
+            return CompressionResponder(self.app, self.minimum_size, BrotliCompressor)
+        if accepted.get("gzip", 0) > 0:
+            return CompressionResponder(self.app, self.minimum_size, GzipCompressor)
+        return self.app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_weak_etag(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                etag = headers.get("etag")
+                if "content-encoding" in headers and etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+            await send(message)
+
+        headers = Headers(scope=scope)
+        responder = self._responder(headers.get("accept-encoding", ""))
+        await responder(scope, receive, send_weak_etag)
+
+
+# 导出的公共接口
+__all__ = [
+    "GZIP_LEVEL",
+    "BROTLI_QUALITY",
+    "EXCLUDED_CONTENT_TYPES",
+    "accepted_encodings",
+    "GzipCompressor",
+    "BrotliCompressor",
+    "CompressionResponder",
+    "CompressionMiddleware",
+]
@@ -22,12 +22,55 @@ class Settings(BaseSettings):
         APP_VERSION: 应用版本号，默认为 "1.0.0"
         DEBUG: 调试模式开关，默认为 True
         DEFAULT_DEVICE_SERIAL: 默认连接的设备序列号，为空时自动选择第一个设备
+        DEVICE_EXECUTOR_WORKERS: 每台设备用于执行阻塞 RPC 的线程数
+        DEVICE_EXECUTOR_QUEUE: 每台设备排队等待执行的 API 调用上限，超出时返回 503，为 0 时不限制
+        DEVICE_SCRIPT_WORKERS: 每台设备同时执行的脚本数（每个脚本占用一个线程），超出的脚本排队等待
+        DEVICE_CALL_TIMEOUT: API 设备调用的超时时间（秒，等待类接口再加上各自的等待时间），超时返回 504，为 0 时不限制
+        DEVICE_READ_CACHE_TTL: 合并读取（当前应用、电量、设备信息等）的结果缓存时间（秒），为 0 时只合并并发调用
+        DEVICE_SNAPSHOT_TTL: 界面快照（界面层次结构、截图）及其 ETag 的缓存时间（秒），改变设备状态的 API 调用和脚本命令会使其失效，
+            设备自身的界面变化最多延迟该时间才能看到，为 0 时只合并并发调用
+        REMOTE_INPUT_QUEUE: 远程输入通道每个连接排队等待执行的指令上限，超出时以 1013 关闭连接，为 0 时不限制
+        RESPONSE_COMPRESS_MIN_SIZE: 响应体超过该大小（字节）时按 Accept-Encoding 进行 br/gzip 压缩，为 0 时不压缩
+        TRACE_FILE: 请求和流式脚本执行的设备调用追踪写入的 Chrome trace 文件路径，为空时只在响应头中返回汇总
+        TRACE_FILE_MAX_MB: trace 文件超过该大小（MB）时改名为 <TRACE_FILE>.1 并写入新文件，为 0 时不轮转
+        ADB_SERVER_HOST: ADB server 地址
+        ADB_SERVER_PORT: ADB server 端口
+        SCRIPT_LOG_LEVEL: 脚本日志的最低级别（trace/debug/info/warning/error）
+        SCRIPT_LOG_CAPACITY: 每次脚本执行在内存中保留的日志条数，超出部分写入日志文件
+        SCRIPT_STREAM_HEARTBEAT: 脚本 SSE 日志流空闲时发送心跳的间隔（秒），为 0 时不发送
+        SCRIPT_STREAM_REPLAY_EVENTS: 每个执行会话保留、供重新连接时重放的 SSE 事件数，为 0 时不限制
+        SCRIPT_STREAM_REPLAY_TTL: 执行结束后会话事件继续保留的时间（秒）
+        SCRIPT_CHECKPOINT_INTERVAL: 开启检查点时，定期保存检查点的间隔（秒）
+        SCRIPT_RUN_RETENTION_DAYS: 脚本执行记录的保留天数（过期记录的日志文件和检查点一并删除），为 0 时不清理
+        FAKE_DEVICE_RPC_LATENCY: 假设备（序列号 fake）每次调用的延迟（秒）
+        FAKE_DEVICE_DUMP_LATENCY: 假设备导出层次结构的延迟（秒），为空时与 FAKE_DEVICE_RPC_LATENCY 相同
     """
 
     APP_NAME: str = "Android Automation API"
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = True
     DEFAULT_DEVICE_SERIAL: Optional[str] = None
+    DEVICE_EXECUTOR_WORKERS: int = 4
+    DEVICE_EXECUTOR_QUEUE: int = 64
+    DEVICE_SCRIPT_WORKERS: int = 8
+    DEVICE_CALL_TIMEOUT: float = 30.0
+    DEVICE_READ_CACHE_TTL: float = 0.0
+    DEVICE_SNAPSHOT_TTL: float = 1.0
+    REMOTE_INPUT_QUEUE: int = 256
+    RESPONSE_COMPRESS_MIN_SIZE: int = 1024
+    TRACE_FILE: str = ""
+    TRACE_FILE_MAX_MB: int = 100
+    ADB_SERVER_HOST: str = "127.0.0.1"
+    ADB_SERVER_PORT: int = 5037
+    SCRIPT_LOG_LEVEL: str = "trace"
+    SCRIPT_LOG_CAPACITY: int = 1000
+    SCRIPT_STREAM_HEARTBEAT: float = 15.0
+    SCRIPT_STREAM_REPLAY_EVENTS: int = 10000
+    SCRIPT_STREAM_REPLAY_TTL: float = 300.0
+    SCRIPT_CHECKPOINT_INTERVAL: float = 30.0
+    SCRIPT_RUN_RETENTION_DAYS: int = 30
+    FAKE_DEVICE_RPC_LATENCY: float = 0.0
+    FAKE_DEVICE_DUMP_LATENCY: Optional[float] = None
 
     class Config:
         env_file = ".env"
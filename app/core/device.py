@@ -4,6 +4,8 @@
 提供与安卓设备的连接和管理功能。
 使用单例模式确保全局只有一个设备管理器实例。
 支持通过 USB 或 WiFi 连接设备，并提供设备信息查询能力。
+序列号为 "fake" 或 "fake:<fixture 目录>" 时连接进程内假设备（见 fake_device 模块），
+用于没有手机时的测试和基准测试。
 """
 
 import uiautomator2 as u2
@@ -14,6 +16,13 @@ import threading
 import subprocess
 import re
 
+from .config import get_settings
+from .fake_device import FakeDevice, LatencyModel
+from .instrumentation import instrument_u2_device
+
+# 假设备序列号前缀
+FAKE_SERIAL = "fake"
+
 
 @dataclass
 class DeviceInfo:
@@ -113,6 +122,9 @@ class DeviceManager:
         Returns:
             int: 电池电量百分比 (0-100)
         """
+        # 假设备不经过 ADB
+        if self._device is not None and self._device.serial == serial and hasattr(self._device, "battery_level"):
+            return self._device.battery_level
         try:
             result = subprocess.run(
                 ["adb", "-s", serial, "shell", "dumpsys", "battery"],
@@ -136,6 +148,8 @@ class DeviceManager:
         则自动选择第一个可用的设备。
 
         对于 WiFi 连接（IP 地址格式），会先执行 adb connect 命令。
+        序列号为 "fake" 或 "fake:<fixture 目录>" 时连接假设备，延迟由配置项
+        FAKE_DEVICE_RPC_LATENCY / FAKE_DEVICE_DUMP_LATENCY 决定。
 
         Args:
             device_serial: 设备序列号或 IP 地址。传入 None 或空字符串时自动选择设备。
@@ -146,6 +160,8 @@ class DeviceManager:
         Raises:
             Exception: 连接失败时抛出异常。
         """
+        if device_serial and device_serial.split(":", 1)[0] == FAKE_SERIAL:
+            return self.attach(self._create_fake_device(device_serial))
         if device_serial:
             # 如果是 IP 地址格式，先执行 adb connect
             if self._is_ip_address(device_serial):
@@ -159,6 +175,24 @@ class DeviceManager:
             self._device = u2.connect(device_serial)
         else:
             self._device = u2.connect()
+        return self.attach(self._device)
+
+    def attach(self, device) -> DeviceInfo:
+        """
+        使用已创建的设备对象
+
+        设备对象需要实现 uiautomator2 Device 的接口（如 FakeDevice），
+        接入后所有服务和脚本执行器都会使用该设备。
+
+        Args:
+            device: 设备对象
+
+        Returns:
+            DeviceInfo: 设备信息
+        """
+        self._device = device
+        # 统一埋点，用于脚本性能分析等
+        instrument_u2_device(self._device)
 
         info = self._device.info
         # 通过 ADB 获取电池信息
@@ -171,6 +205,23 @@ class DeviceManager:
             battery_level=battery_level,
         )
 
+    def _create_fake_device(self, device_serial: str):
+        """
+        创建假设备
+
+        Args:
+            device_serial: "fake" 或 "fake:<fixture 目录>"
+
+        Returns:
+            FakeDevice: 假设备
+        """
+        settings = get_settings()
+        latency = LatencyModel(settings.FAKE_DEVICE_RPC_LATENCY, settings.FAKE_DEVICE_DUMP_LATENCY)
+        _, _, directory = device_serial.partition(":")
+        if directory:
+            return FakeDevice.from_directory(directory, latency=latency, serial=device_serial)
+        return FakeDevice(latency=latency, serial=device_serial)
+
     def get_device(self) -> u2.Device:
         """
         获取 uiautomator2 设备对象
@@ -0,0 +1,548 @@
+"""
+设备执行器模块
+
+为每台设备提供一个有界的线程池，用于在异步代码中执行阻塞的设备 RPC。
+同一设备上的并发调用受线程池大小限制，不同设备之间互不影响。
+脚本整段执行在另一个独立的有界线程池中（run_script），长时间运行的脚本不占用 API 调用的线程，
+同一设备同时执行的脚本数受 DEVICE_SCRIPT_WORKERS 限制。
+
+API 路由同样通过 run_on_device 把设备调用交给当前设备的执行器，
+长时间的等待只占用该设备的线程，不会耗尽服务器的公共线程池：
+- 排队上限：排队中的调用达到 DEVICE_EXECUTOR_QUEUE 时直接拒绝（DeviceBusyError）
+- 超时：调用超过 DEVICE_CALL_TIMEOUT 未完成时放弃等待（DeviceTimeoutError），
+  并取消调用绑定的令牌，让可取消的等待尽快结束、释放线程
+- 合并读取：run_shared 让同一设备上参数相同的并发读取共用一次设备调用（single-flight），
+  可选地在 DEVICE_READ_CACHE_TTL 秒内直接复用结果；
+  run_action 执行的操作（点击、输入等）在提交时和完成时调用 invalidate()，
+  清空缓存的结果并放弃合并进行中的读取，操作之后的读取总是重新访问设备
+- 指标：stats() 返回提交、完成、排队、超时、合并等计数
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from .cancellation import CancellationToken, cancellation_scope
+from .config import get_settings
+from .device import get_device_manager
+
+
+class DeviceBusyError(Exception):
+    """设备执行器排队的调用已达上限"""
+
+    pass
+
+
+class DeviceTimeoutError(Exception):
+    """设备调用超时"""
+
+    pass
+
+
+class DeviceExecutor:
+    """
+    单台设备的有界执行器
+
+    Attributes:
+        serial: 设备序列号（未连接设备时为空字符串）
+        max_workers: 线程池大小
+        max_queue: 有界调用的排队上限，为 0 时不限制
+        script_workers: 同时执行的脚本数
+    """
+
+    def __init__(self, serial: str, max_workers: int, max_queue: int = 0, script_workers: int = 1):
+        """
+        初始化设备执行器
+
+        Args:
+            serial: 设备序列号
+            max_workers: 线程池大小
+            max_queue: 有界调用的排队上限，为 0 时不限制
+            script_workers: 脚本线程池大小（同时执行的脚本数）
+        """
+        self.serial = serial
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.script_workers = script_workers
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"device-{serial or 'default'}"
+        )
+        self._script_pool = ThreadPoolExecutor(
+            max_workers=script_workers, thread_name_prefix=f"script-{serial or 'default'}"
+        )
+        self._scripts_queued = 0
+        self._scripts_running = 0
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._counters = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "rejected": 0,
+            "timeouts": 0,
+            "shared": 0,
+            "cache_hits": 0,
+            "invalidations": 0,
+        }
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+        # 进行中的合并读取：键 -> (事件循环, 任务)
+        self._inflight: Dict[Hashable, Tuple[asyncio.AbstractEventLoop, "asyncio.Task[Any]"]] = {}
+        # 合并读取的结果缓存：键 -> (过期时间, 结果)
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        # 每次 invalidate() 加一，失效之前开始的读取完成后不写入缓存
+        self._generation = 0
+
+    async def run_script(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        在设备的脚本线程池中执行整段脚本（不受 API 调用的排队上限和超时限制）
+
+        脚本线程池已满时排队等待；等待方被取消时，排队中的脚本不再执行，
+        已开始的脚本需要调用方自行停止（见 AsyncScriptExecutor）。
+
+        Args:
+            func: 阻塞函数（如 ScriptExecutor.execute_script）
+            *args: 位置参数
+
+        Returns:
+            函数返回值
+        """
+        context = contextvars.copy_context()
+        with self._lock:
+            self._scripts_queued += 1
+        try:
+            future = self._script_pool.submit(self._invoke_script, context, func, args)
+        except BaseException:
+            with self._lock:
+                self._scripts_queued -= 1
+            raise
+        future.add_done_callback(self._release_script)
+        return await asyncio.wrap_future(future)
+
+    def _invoke_script(self, context: contextvars.Context, func: Callable[..., Any], args: tuple) -> Any:
+        with self._lock:
+            self._scripts_queued -= 1
+            self._scripts_running += 1
+        return context.run(func, *args)
+
+    def _release_script(self, future: Future) -> None:
+        with self._lock:
+            if future.cancelled():
+                self._scripts_queued -= 1
+            else:
+                self._scripts_running -= 1
+
+    async def run_bounded(
+        self, timeout: Optional[float], func: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Any:
+        """
+        在设备线程池中执行阻塞调用，受排队上限和超时限制
+
+        Args:
+            timeout: 超时时间（秒，从提交开始计算，包含排队时间），为 None 时不限制
+            func: 阻塞函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            函数返回值
+
+        Raises:
+            DeviceBusyError: 排队的调用已达上限
+            DeviceTimeoutError: 调用在超时时间内未完成
+        """
+        return await self._submit(func, args, kwargs, timeout)
+
+    async def run_action(
+        self, timeout: Optional[float], func: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Any:
+        """
+        执行会改变设备状态的调用（参数和限制同 run_bounded）
+
+        提交前和调用结束后（包括超时后调用在线程中自然结束时）各调用一次 invalidate()，
+        调用期间及之后的读取不会拿到调用之前的结果。
+
+        Args:
+            timeout: 超时时间（秒），为 None 时不限制
+            func: 阻塞函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            函数返回值
+
+        Raises:
+            DeviceBusyError: 排队的调用已达上限
+            DeviceTimeoutError: 调用在超时时间内未完成
+        """
+        self.invalidate()
+        return await self._submit(self._invalidating(func), args, kwargs, timeout)
+
+    def _invalidating(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def call(*args: Any, **kwargs: Any) -> Any:
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.invalidate()
+
+        return call
+
+    def invalidate(self) -> None:
+        """
+        使合并读取的结果失效
+
+        清空结果缓存，并让进行中的读取不再被新的调用方合并、完成后不写入缓存
+        （已经在等待的调用方仍然拿到该次读取的结果）。可以在任意线程中调用。
+        """
+        with self._lock:
+            self._results.clear()
+            self._inflight.clear()
+            self._generation += 1
+            self._counters["invalidations"] += 1
+
+    async def run_shared(
+        self,
+        key: Hashable,
+        ttl: float,
+        timeout: Optional[float],
+        func: Callable[..., Any],
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        合并相同的并发读取：键相同的调用共用一次设备调用和结果（受排队上限和超时限制）
+
+        设备调用在独立的任务中执行，某个等待方取消（如客户端断开）不影响其他等待方。
+        调用失败时所有等待方收到同一个异常，失败结果不缓存。
+
+        Args:
+            key: 合并键（同一设备上操作和参数相同的读取应得到相同的键）
+            ttl: 结果缓存时间（秒），为 0 时只合并进行中的调用
+            timeout: 超时时间（秒），为 None 时不限制
+            func: 阻塞函数（只读操作）
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            函数返回值
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                if cached[0] > time.monotonic():
+                    self._counters["cache_hits"] += 1
+                    return cached[1]
+                del self._results[key]
+            inflight = self._inflight.get(key)
+            if inflight is not None and inflight[0] is loop and not inflight[1].done():
+                self._counters["shared"] += 1
+                task = inflight[1]
+            else:
+                generation = self._generation
+                task = loop.create_task(self._submit(func, args, kwargs, timeout))
+                self._inflight[key] = (loop, task)
+                task.add_done_callback(lambda done: self._settle(key, done, ttl, generation))
+        return await asyncio.shield(task)
+
+    def _settle(
+        self, key: Hashable, task: "asyncio.Task[Any]", ttl: float, generation: int
+    ) -> None:
+        with self._lock:
+            inflight = self._inflight.get(key)
+            if inflight is not None and inflight[1] is task:
+                del self._inflight[key]
+            if task.cancelled() or task.exception() is not None:
+                return
+            if generation != self._generation:
+                # 读取期间设备状态可能已经改变
+                return
+            if ttl > 0:
+                now = time.monotonic()
+                # 顺带清理过期结果，缓存只保留近期读取过的键
+                for stale in [k for k, (expires, _) in self._results.items() if expires <= now]:
+                    del self._results[stale]
+                self._results[key] = (now + ttl, task.result())
+
+    async def _submit(
+        self,
+        func: Callable[..., Any],
+        args: tuple,
+        kwargs: Dict[str, Any],
+        timeout: Optional[float],
+    ) -> Any:
+        with self._lock:
+            if self.max_queue and self._queued >= self.max_queue:
+                self._counters["rejected"] += 1
+                raise DeviceBusyError(
+                    f"Device {self.serial or 'default'} is busy: {self._queued} calls queued"
+                )
+            self._queued += 1
+            self._counters["submitted"] += 1
+
+        # 复制当前上下文，使埋点监听器、取消令牌等上下文变量在线程池中同样生效；
+        # 有超时的调用额外绑定一个令牌，超时后取消它
+        context = contextvars.copy_context()
+        token = CancellationToken() if timeout is not None else None
+        try:
+            future = self._pool.submit(
+                self._invoke, time.monotonic(), context, token, func, args, kwargs
+            )
+        except BaseException:
+            with self._lock:
+                self._queued -= 1
+            raise
+        future.add_done_callback(self._release)
+
+        wrapped = asyncio.wrap_future(future)
+        if timeout is None:
+            return await wrapped
+
+        done, _ = await asyncio.wait({wrapped}, timeout=timeout)
+        if not done:
+            token.cancel("Device call timed out")
+            # 还在排队的调用直接取消；已经开始的调用只能等它响应令牌或自然结束
+            future.cancel()
+            wrapped.add_done_callback(_consume_exception)
+            with self._lock:
+                self._counters["timeouts"] += 1
+            raise DeviceTimeoutError(
+                f"Device call {getattr(func, '__name__', func)} timed out after {timeout:g}s"
+            )
+        return wrapped.result()
+
+    def _invoke(
+        self,
+        enqueued: float,
+        context: contextvars.Context,
+        token: Optional[CancellationToken],
+        func: Callable[..., Any],
+        args: tuple,
+        kwargs: Dict[str, Any],
+    ) -> Any:
+        waited = time.monotonic() - enqueued
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+            self._queue_wait_total += waited
+            self._queue_wait_max = max(self._queue_wait_max, waited)
+        if token is None:
+            return context.run(func, *args, **kwargs)
+        return context.run(_call_in_scope, token, func, args, kwargs)
+
+    def _release(self, future: Future) -> None:
+        with self._lock:
+            if future.cancelled():
+                # 排队期间被取消，_invoke 没有执行
+                self._queued -= 1
+                self._counters["cancelled"] += 1
+                return
+            self._active -= 1
+            key = "failed" if future.exception() is not None else "completed"
+            self._counters[key] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        执行器指标
+
+        Returns:
+            包含线程数、排队数、执行中的调用数、各类计数、排队耗时和脚本数的字典
+        """
+        with self._lock:
+            started = self._counters["completed"] + self._counters["failed"] + self._active
+            return {
+                "serial": self.serial,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queued": self._queued,
+                "active": self._active,
+                **self._counters,
+                "queue_wait_avg": self._queue_wait_total / started if started else 0.0,
+                "queue_wait_max": self._queue_wait_max,
+                "script_workers": self.script_workers,
+                "scripts_queued": self._scripts_queued,
+                "scripts_running": self._scripts_running,
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        关闭线程池
+
+        Args:
+            wait: 是否等待正在执行的调用完成
+        """
+        self._pool.shutdown(wait=wait)
+        self._script_pool.shutdown(wait=wait)
+
+
+def _call_in_scope(
+    token: CancellationToken, func: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]
+) -> Any:
+    with cancellation_scope(token):
+        return func(*args, **kwargs)
+
+
+def _consume_exception(future: "asyncio.Future[Any]") -> None:
+    # 超时后不再有人等待结果，取出异常避免 "exception was never retrieved" 警告
+    if not future.cancelled():
+        future.exception()
+
+
+_executors: Dict[str, DeviceExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_device_executor(serial: str = "") -> DeviceExecutor:
+    """
+    获取指定设备的执行器（不存在时创建）
+
+    Args:
+        serial: 设备序列号
+
+    Returns:
+        DeviceExecutor: 设备执行器
+    """
+    executor = _executors.get(serial)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(serial)
+            if executor is None:
+                settings = get_settings()
+                executor = DeviceExecutor(
+                    serial,
+                    settings.DEVICE_EXECUTOR_WORKERS,
+                    settings.DEVICE_EXECUTOR_QUEUE,
+                    settings.DEVICE_SCRIPT_WORKERS,
+                )
+                _executors[serial] = executor
+    return executor
+
+
+def device_executor_stats() -> List[Dict[str, Any]]:
+    """
+    所有设备执行器的指标
+
+    Returns:
+        每个执行器的 stats() 结果列表
+    """
+    with _executors_lock:
+        executors = list(_executors.values())
+    return [executor.stats() for executor in executors]
+
+
+def current_device_executor() -> DeviceExecutor:
+    """
+    获取当前连接设备的执行器（未连接设备时为默认执行器）
+
+    Returns:
+        DeviceExecutor: 设备执行器
+    """
+    manager = get_device_manager()
+    serial = manager.get_device().serial if manager.is_connected() else ""
+    return get_device_executor(serial or "")
+
+
+async def run_on_device(
+    func: Callable[..., Any], *args: Any, wait: float = 0.0, read: bool = False, **kwargs: Any
+) -> Any:
+    """
+    在当前连接设备的执行器中执行阻塞调用，供异步路由使用
+
+    Args:
+        func: 阻塞函数
+        *args: 位置参数
+        wait: 调用本身预期的等待时间（秒，如等待元素出现的 timeout），累加到超时时间上
+        read: 是否为只读调用；非只读调用通过 run_action 执行，使缓存的读取结果失效
+        **kwargs: 关键字参数
+
+    Returns:
+        函数返回值
+
+    Raises:
+        DeviceBusyError: 排队的调用已达上限
+        DeviceTimeoutError: 调用在超时时间内未完成
+    """
+    executor = current_device_executor()
+    timeout = get_settings().DEVICE_CALL_TIMEOUT
+    run = executor.run_bounded if read else executor.run_action
+    return await run(timeout + wait if timeout > 0 else None, func, *args, **kwargs)
+
+
+async def read_on_device(
+    func: Callable[..., Any],
+    *args: Any,
+    ttl: Optional[float] = None,
+    transform: Optional[Callable[[Any], Any]] = None,
+    **kwargs: Any,
+) -> Any:
+    """
+    在当前连接设备上执行只读调用，操作和参数相同的并发调用共用一次设备调用
+
+    Args:
+        func: 阻塞的只读函数（通常是服务的绑定方法，按 __qualname__ 区分操作）
+        *args: 位置参数（需可哈希）
+        ttl: 结果缓存时间（秒），默认为 DEVICE_READ_CACHE_TTL
+        transform: 在设备线程中对结果做的处理（如计算 ETag），处理后的值一并合并和缓存
+        **kwargs: 关键字参数（需可哈希）
+
+    Returns:
+        函数返回值（指定 transform 时为处理后的值）
+
+    Raises:
+        DeviceBusyError: 排队的调用已达上限
+        DeviceTimeoutError: 调用在超时时间内未完成
+    """
+    settings = get_settings()
+    timeout = settings.DEVICE_CALL_TIMEOUT
+    key = (
+        getattr(func, "__qualname__", repr(func)),
+        getattr(transform, "__qualname__", None),
+        args,
+        tuple(sorted(kwargs.items())),
+    )
+    if transform is not None:
+        func = functools.update_wrapper(functools.partial(_transformed, func, transform), func)
+    return await current_device_executor().run_shared(
+        key,
+        settings.DEVICE_READ_CACHE_TTL if ttl is None else ttl,
+        timeout if timeout > 0 else None,
+        func,
+        *args,
+        **kwargs,
+    )
+
+
+def _transformed(
+    func: Callable[..., Any], transform: Callable[[Any], Any], *args: Any, **kwargs: Any
+) -> Any:
+    return transform(func(*args, **kwargs))
+
+
+def shutdown_device_executors() -> None:
+    """关闭所有设备执行器"""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown()
+
+
+# 导出的公共接口
+__all__ = [
+    "DeviceBusyError",
+    "DeviceTimeoutError",
+    "DeviceExecutor",
+    "get_device_executor",
+    "device_executor_stats",
+    "current_device_executor",
+    "run_on_device",
+    "read_on_device",
+    "shutdown_device_executors",
+]
@@ -0,0 +1,109 @@
+"""
+条件请求模块
+
+为界面层次结构、截图等大响应提供基于内容哈希的强 ETag：
+客户端带上 If-None-Match 轮询时，内容未变化直接返回 304，不再传输响应体。
+
+ETag 本身不能省去设备调用：服务端仍要读取快照才能判断内容是否变化，304 只节省带宽。
+read_snapshot 在此基础上缓存快照及其 ETag（DEVICE_SNAPSHOT_TTL 秒），有效期内的轮询
+不访问设备也不重新计算哈希。通过 API 或脚本执行的点击、输入等操作会立即使缓存失效
+（见 DeviceExecutor.invalidate），只有设备自身的变化（动画、手动操作等）最多延迟一个有效期才能看到。
+"""
+
+import hashlib
+from typing import Any, Callable, Optional, Tuple, Union
+
+from fastapi import Response
+
+from app.core.config import get_settings
+from app.core.device_executor import read_on_device
+from app.core.responses import FastJSONResponse
+
+
+def content_etag(*parts: Union[str, bytes, int, None]) -> str:
+    """
+    计算内容的强 ETag
+
+    Args:
+        *parts: 参与哈希的内容（字符串按 UTF-8 编码）
+
+    Returns:
+        带引号的 ETag，例如 "3f2a..."
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        elif not isinstance(part, bytes):
+            part = repr(part).encode("utf-8")
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    判断 If-None-Match 是否命中（按 RFC 9110 使用弱比较）
+
+    Args:
+        if_none_match: If-None-Match 请求头
+        etag: 当前内容的 ETag
+
+    Returns:
+        命中时返回 True
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(",")
+    )
+
+
+async def read_snapshot(
+    func: Callable[[], Any], transform: Callable[[Any], Tuple[Any, Optional[str]]]
+) -> Tuple[Any, Optional[str]]:
+    """
+    读取当前设备的界面快照及其 ETag，结果缓存 DEVICE_SNAPSHOT_TTL 秒
+
+    Args:
+        func: 阻塞的快照读取函数（如 InputService.get_current_ui_xml）
+        transform: 模块级函数，把快照转换为 (内容, ETag)，在设备线程中执行，
+            读取失败等不应返回 ETag 的情况返回 (内容, None)
+
+    Returns:
+        (内容, ETag)
+    """
+    return await read_on_device(
+        func, ttl=get_settings().DEVICE_SNAPSHOT_TTL, transform=transform
+    )
+
+
+def conditional_json(content: Any, etag: str, if_none_match: Optional[str]) -> Response:
+    """
+    返回带 ETag 的 JSON 响应，If-None-Match 命中时返回 304
+
+    Args:
+        content: 响应内容
+        etag: 内容的 ETag
+        if_none_match: If-None-Match 请求头
+
+    Returns:
+        Response: 200 JSON 响应（orjson 序列化）或空的 304 响应
+    """
+    # no-cache：客户端可以缓存，但每次使用前都要带上 ETag 向服务端确认
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(content=content, headers=headers)
+
+
+# 导出的公共接口
+__all__ = [
+    "content_etag",
+    "etag_matches",
+    "read_snapshot",
+    "conditional_json",
+]
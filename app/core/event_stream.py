@@ -0,0 +1,227 @@
+"""
+事件流模块
+
+脚本执行日志通过 EventChannel 从执行器推送到 SSE 连接：
+- 事件驱动：发布事件时唤醒等待中的订阅者，空闲连接不做任何轮询
+- 线程安全：可以在事件循环线程或任意工作线程中发布，跨线程时通过 call_soon_threadsafe 唤醒
+- 批量：订阅者被唤醒前累积的事件一次取出，合并为一次写出（每个事件仍是独立的 SSE 事件）
+- 心跳：超过心跳间隔没有事件时发送 SSE 注释行，避免代理断开空闲连接
+- 重放：每个事件带有从 1 开始递增的 id，通道保留最近的事件，
+  断线的客户端带上 Last-Event-ID 重新连接即可从下一个事件继续，多个订阅者可以同时观察一次执行；
+  请求的事件已经不在保留范围内时，先发送一个不带 id 的 gap 事件，说明丢失了多少事件、从哪个 id 继续
+"""
+
+import asyncio
+import itertools
+import json
+import threading
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+# SSE 心跳（注释行，客户端会忽略）
+SSE_HEARTBEAT = ": keep-alive\n\n"
+
+# (事件 id, 事件)，gap 事件的 id 为 None
+StreamEvent = Tuple[Optional[int], Dict[str, Any]]
+
+
+def gap_event(first_id: int, missed: int) -> Dict[str, Any]:
+    """
+    构造 gap 事件：订阅者请求的事件已经被丢弃
+
+    Args:
+        first_id: 最早保留的事件 id（接下来发送的第一个事件）
+        missed: 丢失的事件数
+
+    Returns:
+        {"type": "gap", "data": {"first_id": ..., "missed": ...}}
+    """
+    return {"type": "gap", "data": {"first_id": first_id, "missed": missed}}
+
+
+def format_sse(event: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """
+    把事件编码为一条 SSE 消息
+
+    Args:
+        event: 事件（JSON 可序列化）
+        event_id: 事件 id，为 None 时不输出 id 字段
+
+    Returns:
+        SSE 消息文本
+    """
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}data: {json.dumps(event)}\n\n"
+
+
+class EventChannel:
+    """
+    可重放的多订阅者事件通道
+
+    Attributes:
+        capacity: 保留的事件数上限，超出时丢弃最早的事件（为 0 时不限制）
+        last_id: 最后一个事件的 id（没有事件时为 0）
+        subscribers: 正在通过 sse_stream 读取的订阅者数
+    """
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None, capacity: int = 0):
+        """
+        创建事件通道
+
+        Args:
+            loop: 订阅者所在的事件循环，默认为当前运行中的事件循环
+            capacity: 保留的事件数上限，为 0 时不限制
+        """
+        self.capacity = capacity
+        self.last_id = 0
+        self.subscribers = 0
+        self._loop = loop or asyncio.get_running_loop()
+        self._lock = threading.Lock()
+        self._events: Deque[StreamEvent] = deque(maxlen=capacity or None)
+        self._waiters: Set[asyncio.Future] = set()
+        self._wake_scheduled = False
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        """通道是否已关闭"""
+        return self._closed
+
+    @property
+    def published(self) -> int:
+        """已发布的事件数"""
+        return self.last_id
+
+    def publish(self, event: Dict[str, Any]) -> int:
+        """
+        发布事件（可从任意线程调用，通道关闭后的事件被丢弃）
+
+        Args:
+            event: 事件
+
+        Returns:
+            事件 id，通道已关闭时返回 0
+        """
+        with self._lock:
+            if self._closed:
+                return 0
+            self.last_id += 1
+            self._events.append((self.last_id, event))
+            self._schedule_wake()
+            return self.last_id
+
+    def close(self) -> None:
+        """关闭通道，订阅者取完剩余事件后结束（已保留的事件仍可重放）"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._schedule_wake()
+
+    def _schedule_wake(self) -> None:
+        # 调用方持有 _lock；一批事件只安排一次唤醒
+        if not self._waiters or self._wake_scheduled:
+            return
+        self._wake_scheduled = True
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._loop.call_soon(self._wake)
+        else:
+            try:
+                self._loop.call_soon_threadsafe(self._wake)
+            except RuntimeError:
+                # 事件循环已关闭，订阅者不存在了
+                pass
+
+    def _wake(self) -> None:
+        with self._lock:
+            self._wake_scheduled = False
+            waiters = list(self._waiters)
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _after(self, last_id: int) -> Optional[List[StreamEvent]]:
+        # 调用方持有 _lock；返回 id 大于 last_id 的事件，有事件已被丢弃时在最前面加上 gap 事件
+        if last_id < self.last_id and self._events:
+            first_id = self._events[0][0]
+            skip = max(last_id - first_id + 1, 0)
+            batch: List[StreamEvent] = list(itertools.islice(self._events, skip, None))
+            if last_id < first_id - 1:
+                batch.insert(0, (None, gap_event(first_id, first_id - 1 - last_id)))
+            return batch
+        return None if self._closed else []
+
+    async def get_batch(
+        self, last_id: int = 0, timeout: Optional[float] = None
+    ) -> Optional[List[StreamEvent]]:
+        """
+        等待并取出 id 大于 last_id 的所有事件
+
+        last_id 之后的事件已有被丢弃的，从最早保留的事件开始返回，并在最前面附带一个
+        id 为 None 的 gap 事件（见 gap_event），订阅者据此得知日志不完整。
+
+        Args:
+            last_id: 订阅者已收到的最后一个事件 id
+            timeout: 最长等待时间（秒），为 None 时一直等待
+
+        Returns:
+            事件列表；超时时返回空列表，通道已关闭且没有更多事件时返回 None
+        """
+        with self._lock:
+            batch = self._after(last_id)
+            if batch != []:
+                return batch
+            waiter = self._loop.create_future()
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=timeout)
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+                batch = self._after(last_id)
+            waiter.cancel()
+        return batch
+
+
+async def sse_stream(channel: EventChannel, heartbeat: float, last_id: int = 0) -> AsyncIterator[str]:
+    """
+    把通道中的事件编码为 SSE 文本
+
+    每批事件合并为一次写出；通道关闭且事件全部写出后结束。
+
+    Args:
+        channel: 事件通道
+        heartbeat: 心跳间隔（秒），为 0 时不发送心跳
+        last_id: 客户端已收到的最后一个事件 id（Last-Event-ID），从下一个事件开始发送
+
+    Yields:
+        SSE 文本
+    """
+    channel.subscribers += 1
+    try:
+        while True:
+            batch = await channel.get_batch(last_id, heartbeat if heartbeat > 0 else None)
+            if batch is None:
+                return
+            if not batch:
+                yield SSE_HEARTBEAT
+                continue
+            last_id = batch[-1][0]
+            yield "".join(format_sse(event, event_id) for event_id, event in batch)
+    finally:
+        channel.subscribers -= 1
+
+
+# 导出的公共接口
+__all__ = [
+    "SSE_HEARTBEAT",
+    "StreamEvent",
+    "format_sse",
+    "gap_event",
+    "EventChannel",
+    "sse_stream",
+]
@@ -0,0 +1,511 @@
+"""
+假 ADB 服务模块
+
+在本地端口上实现 ADB server 的 smart-socket 协议子集，代替 127.0.0.1:5037 上的真实
+adb server，使 AdbService（adbutils）的各条路径可以在没有手机的情况下测试和基准测试：
+
+- host:version、host:devices、host:devices-l
+- host:transport:<serial>、host:tport:serial:<serial>、host-serial:<serial>:get-state 等
+- shell:<cmd> 和 shell,v2:<cmd>，输出由内置或注册的处理函数生成
+- sync:（STAT / SEND / RECV / QUIT），文件保存在内存中
+
+每个请求按延迟模型（LatencyModel，方法名为 "host"、"shell"、"sync"）等待，
+数据传输按 bandwidth 限速；应用数量、截图大小等输出规模都可以配置。
+
+Usage:
+    with FakeAdbServer(serials=["fake-1"], packages=200) as server:
+        service = AdbService("fake-1", port=server.port)
+        service.list_packages()
+"""
+
+import re
+import socket
+import socketserver
+import stat
+import struct
+import threading
+import time
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from .fake_device import LatencyModel
+
+ShellOutput = Union[str, bytes, Callable[[str], Union[str, bytes]]]
+
+# 被当作目录的路径（STAT 返回目录）
+_DIRECTORIES = ("/", "/sdcard", "/data", "/data/local", "/data/local/tmp", "/storage/emulated/0")
+
+_SYNC_CHUNK = 64 * 1024
+
+
+def fake_png(size: int) -> bytes:
+    """
+    生成约 size 字节的 PNG 数据（有效的 PNG 头和 IHDR，后接填充数据块）
+
+    Args:
+        size: 目标大小（字节）
+
+    Returns:
+        PNG 字节数据
+    """
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", 1080, 2340, 8, 6, 0, 0, 0))
+    end = chunk(b"IEND", b"")
+    padding = max(size - len(header) - len(end) - 12, 0)
+    return header + chunk(b"IDAT", bytes(padding)) + end
+
+
+class FakeAdbDevice:
+    """
+    假 ADB 设备的状态
+
+    Attributes:
+        serial: 设备序列号
+        state: 设备状态（device / offline / unauthorized）
+        packages: 已安装的应用包名
+        system_packages: 其中的系统应用
+        props: 系统属性（getprop）
+        files: 设备上的文件（路径 -> 内容）
+        screenshot_size: screencap 输出的 PNG 大小（字节）
+    """
+
+    def __init__(
+        self,
+        serial: str,
+        packages: int = 50,
+        system_ratio: float = 0.5,
+        screenshot_size: int = 200 * 1024,
+        state: str = "device",
+    ):
+        """
+        初始化假设备状态
+
+        Args:
+            serial: 设备序列号
+            packages: 生成的应用数量
+            system_ratio: 其中系统应用的比例
+            screenshot_size: 截图大小（字节）
+            state: 设备状态
+        """
+        self.serial = serial
+        self.state = state
+        system_count = int(packages * system_ratio)
+        self.system_packages = [f"com.android.system{index:04d}" for index in range(system_count)]
+        self.packages = self.system_packages + [
+            f"com.example.app{index:04d}" for index in range(packages - system_count)
+        ]
+        self.props: Dict[str, str] = {
+            "ro.product.model": "Fake Phone",
+            "ro.product.brand": "fake",
+            "ro.product.manufacturer": "fake",
+            "ro.product.device": "fake",
+            "ro.product.name": "fake",
+            "ro.build.version.release": "14",
+            "ro.build.version.sdk": "34",
+            "ro.build.id": "FAKE.240101.001",
+        }
+        self.files: Dict[str, bytes] = {}
+        self.screenshot_size = screenshot_size
+        self._screenshot: Optional[bytes] = None
+
+    @property
+    def screenshot(self) -> bytes:
+        if self._screenshot is None or len(self._screenshot) != self.screenshot_size:
+            self._screenshot = fake_png(self.screenshot_size)
+        return self._screenshot
+
+    def dumpsys_package(self, package: str) -> str:
+        """dumpsys package 的输出（只包含 AdbService 解析的字段和一些常见的填充行）"""
+        if package not in self.packages:
+            return f"Unable to find package: {package}\n"
+        index = self.packages.index(package)
+        lines = [
+            "Activity Resolver Table:",
+            "  Non-Data Actions:",
+            "      android.intent.action.MAIN:",
+            f"        1a2b3c {package}/.MainActivity filter 4d5e6f",
+            "Packages:",
+            f"  Package [{package}] (7f8e9d):",
+            f"    userId={10000 + index}",
+            f"    pkg=Package{{7f8e9d {package}}}",
+            f"    codePath=/data/app/{package}-1",
+            f"    versionCode={index + 1} minSdk=21 targetSdk=34",
+            f"    versionName=1.{index}.0",
+            "    flags=[ HAS_CODE ALLOW_CLEAR_USER_DATA ALLOW_BACKUP ]",
+            "    timeStamp=2024-01-01 00:00:00",
+            "    firstInstallTime=2024-01-01 00:00:00",
+            "    lastUpdateTime=2024-06-01 12:00:00",
+            "    installerPackageName=com.android.vending",
+        ]
+        lines.extend(f"    requested permission android.permission.PERM_{i}" for i in range(20))
+        return "\n".join(lines) + "\n"
+
+    def is_directory(self, path: str) -> bool:
+        path = path.rstrip("/") or "/"
+        return path in _DIRECTORIES or any(name.startswith(path + "/") for name in self.files)
+
+
+class FakeAdbServer:
+    """
+    假 ADB server
+
+    Attributes:
+        host: 监听地址
+        port: 监听端口（构造时为 0 则在启动后为实际分配的端口）
+        devices: 序列号 -> 设备状态
+        latency: 延迟模型（方法名 "host"、"shell"、"sync"）
+        bandwidth: 数据传输速率（字节/秒），为 0 时不限速
+        version: host:version 返回的服务版本
+        requests: 各类请求的计数
+    """
+
+    def __init__(
+        self,
+        serials: Optional[List[str]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: Optional[LatencyModel] = None,
+        bandwidth: float = 0.0,
+        version: int = 41,
+        **device_options,
+    ):
+        """
+        初始化假 ADB server
+
+        Args:
+            serials: 设备序列号列表，默认一台 "fake-adb"
+            host: 监听地址
+            port: 监听端口，0 为自动分配
+            latency: 延迟模型，默认无延迟
+            bandwidth: 数据传输速率（字节/秒），0 为不限速
+            version: 服务版本（41 起 adbutils 使用 host:tport）
+            **device_options: 传给 FakeAdbDevice 的参数（packages、screenshot_size 等）
+        """
+        self.host = host
+        self.port = port
+        self.devices: Dict[str, FakeAdbDevice] = {
+            serial: FakeAdbDevice(serial, **device_options) for serial in (serials or ["fake-adb"])
+        }
+        self.latency = latency or LatencyModel()
+        self.bandwidth = bandwidth
+        self.version = version
+        self.requests: Dict[str, int] = {}
+        self._handlers: List[Tuple[re.Pattern, ShellOutput]] = []
+        self._server: Optional[socketserver.ThreadingTCPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # ============ 生命周期 ============
+
+    def start(self) -> "FakeAdbServer":
+        """在后台线程中启动服务"""
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self) -> None:
+                # 回复通常分多次小块写出（OKAY + 数据），关闭 Nagle 避免与延迟确认叠加出 40ms 的等待
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                try:
+                    _Session(server, self.request).run()
+                except (ConnectionError, socket.timeout, _Closed):
+                    pass
+
+        self._server = _ThreadingServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), name="fake-adb", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """停止服务"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeAdbServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    # ============ shell 输出 ============
+
+    def on_shell(self, pattern: str, output: ShellOutput) -> None:
+        """
+        注册 shell 命令的输出（先注册的优先，优先于内置输出）
+
+        Args:
+            pattern: 匹配命令的正则表达式（re.search）
+            output: 固定输出，或根据命令生成输出的函数
+        """
+        self._handlers.append((re.compile(pattern), output))
+
+    def shell_output(self, device: FakeAdbDevice, command: str) -> bytes:
+        """
+        生成 shell 命令的输出
+
+        Args:
+            device: 设备状态
+            command: shell 命令
+
+        Returns:
+            输出字节
+        """
+        for pattern, output in self._handlers:
+            if pattern.search(command):
+                result = output(command) if callable(output) else output
+                return result.encode("utf-8") if isinstance(result, str) else result
+        return _builtin_shell(device, command)
+
+    def count(self, kind: str) -> None:
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def delay(self, kind: str) -> None:
+        """记录一次请求并按延迟模型等待"""
+        self.count(kind)
+        seconds = self.latency.delay(kind)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def transfer(self, size: int) -> None:
+        """按传输速率等待"""
+        if self.bandwidth and size:
+            time.sleep(size / self.bandwidth)
+
+
+def _builtin_shell(device: FakeAdbDevice, command: str) -> bytes:
+    """AdbService 用到的命令的内置输出"""
+    command = command.strip()
+    if command.startswith("pm list packages"):
+        if "-3" in command.split():
+            packages = [name for name in device.packages if name not in device.system_packages]
+        elif "-s" in command.split():
+            packages = device.system_packages
+        else:
+            packages = device.packages
+        return "".join(f"package:{name}\n" for name in packages).encode("utf-8")
+    if command.startswith("dumpsys package "):
+        return device.dumpsys_package(command.split()[2]).encode("utf-8")
+    if command == "dumpsys battery":
+        return (
+            "Current Battery Service state:\n  AC powered: false\n  USB powered: true\n"
+            "  status: 2\n  health: 2\n  present: true\n  level: 85\n  scale: 100\n"
+            "  voltage: 4200\n  temperature: 300\n  technology: Li-ion\n"
+        ).encode("utf-8")
+    if command.startswith("getprop"):
+        parts = command.split()
+        if len(parts) > 1:
+            return (device.props.get(parts[1].strip("'\""), "") + "\n").encode("utf-8")
+        return "".join(f"[{key}]: [{value}]\n" for key, value in device.props.items()).encode("utf-8")
+    if command == "wm size":
+        return b"Physical size: 1080x2340\n"
+    if command == "wm density":
+        return b"Physical density: 420\n"
+    if command.startswith("screencap"):
+        parts = command.split()
+        if len(parts) > 2:
+            device.files[parts[-1]] = device.screenshot
+            return b""
+        return device.screenshot
+    if command.startswith("rm "):
+        device.files.pop(command.split()[-1], None)
+        return b""
+    if command.startswith("pm uninstall"):
+        package = command.split()[-1]
+        if package in device.packages:
+            device.packages.remove(package)
+            return b"Success\n"
+        return b"Failure [DELETE_FAILED_INTERNAL_ERROR]\n"
+    return b""
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _Closed(Exception):
+    """客户端关闭了连接"""
+
+
+class _Session:
+    """一个客户端连接上的协议状态"""
+
+    def __init__(self, server: FakeAdbServer, sock: socket.socket):
+        self.server = server
+        self.sock = sock
+        self.device: Optional[FakeAdbDevice] = None
+
+    # ============ 读写 ============
+
+    def read(self, size: int) -> bytes:
+        data = b""
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise _Closed()
+            data += chunk
+        return data
+
+    def okay(self, payload: bytes = b"") -> None:
+        self.sock.sendall(b"OKAY" + payload)
+
+    def fail(self, message: str) -> None:
+        self.sock.sendall(b"FAIL" + _block(message))
+
+    # ============ smart-socket 请求 ============
+
+    def run(self) -> None:
+        while True:
+            length = int(self.read(4), 16)
+            request = self.read(length).decode("utf-8")
+            if not self.handle(request):
+                return
+
+    def handle(self, request: str) -> bool:
+        """处理一个请求，返回 False 时关闭连接"""
+        server = self.server
+        if self.device is not None:
+            return self.handle_transport(request)
+
+        server.delay("host")
+        if request == "host:version":
+            self.okay(_block(f"{server.version:04x}"))
+            return False
+        if request in ("host:devices", "host:devices-l"):
+            lines = []
+            for device in server.devices.values():
+                extra = " product:fake model:Fake_Phone device:fake transport_id:1" if request.endswith("-l") else ""
+                lines.append(f"{device.serial}\t{device.state}{extra}\n")
+            self.okay(_block("".join(lines)))
+            return False
+        for prefix in ("host:transport:", "host:tport:serial:"):
+            if request.startswith(prefix):
+                device = self.find_device(request[len(prefix):])
+                if device is None:
+                    return False
+                self.device = device
+                # host:tport 在 OKAY 后返回 8 字节的 transport id
+                self.okay(struct.pack("<Q", 1) if prefix == "host:tport:serial:" else b"")
+                return True
+        if request.startswith("host-serial:"):
+            serial, _, command = request[len("host-serial:"):].rpartition(":")
+            device = self.find_device(serial)
+            if device is None:
+                return False
+            values = {"get-state": device.state, "get-serialno": device.serial, "get-devpath": "usb:fake", "features": "shell_v2,cmd,stat_v2"}
+            if command not in values:
+                self.fail(f"unsupported command: {command}")
+                return False
+            self.okay(_block(values[command]))
+            return False
+        self.fail(f"unsupported request: {request}")
+        return False
+
+    def find_device(self, serial: str) -> Optional[FakeAdbDevice]:
+        device = self.server.devices.get(serial)
+        if device is None:
+            self.fail(f"device '{serial}' not found")
+        elif device.state != "device":
+            self.fail(f"device {device.state}")
+            return None
+        return device
+
+    def handle_transport(self, request: str) -> bool:
+        server = self.server
+        device = self.device
+        if request.startswith("shell,v2:"):
+            server.delay("shell")
+            output = server.shell_output(device, request[len("shell,v2:"):])
+            server.transfer(len(output))
+            self.okay()
+            if output:
+                self.sock.sendall(b"\x01" + struct.pack("<I", len(output)) + output)
+            self.sock.sendall(b"\x03" + struct.pack("<I", 1) + b"\x00")
+            return False
+        if request.startswith("shell:"):
+            server.delay("shell")
+            command = request[len("shell:"):]
+            # adbutils 的 shell2（v1）在命令后追加 "; echo X4EXIT:$?" 获取退出码
+            command, marker, _ = command.partition("; echo X4EXIT:")
+            output = server.shell_output(device, command)
+            if marker:
+                output += b"X4EXIT:0\n"
+            server.transfer(len(output))
+            self.okay()
+            self.sock.sendall(output)
+            return False
+        if request == "sync:":
+            self.okay()
+            self.sync()
+            return False
+        self.fail(f"unsupported service: {request}")
+        return False
+
+    # ============ sync 协议 ============
+
+    def sync(self) -> None:
+        server = self.server
+        device = self.device
+        while True:
+            command = self.read(4)
+            length = struct.unpack("<I", self.read(4))[0]
+            if command == b"QUIT":
+                return
+            path = self.read(length).decode("utf-8")
+            server.delay("sync")
+            if command == b"STAT":
+                if device.is_directory(path):
+                    payload = struct.pack("<III", stat.S_IFDIR | 0o755, 4096, int(time.time()))
+                elif path in device.files:
+                    payload = struct.pack("<III", stat.S_IFREG | 0o644, len(device.files[path]), int(time.time()))
+                else:
+                    payload = struct.pack("<III", 0, 0, 0)
+                self.sock.sendall(b"STAT" + payload)
+            elif command == b"SEND":
+                remote, _, _ = path.rpartition(",")
+                data = bytearray()
+                while True:
+                    kind = self.read(4)
+                    size = struct.unpack("<I", self.read(4))[0]
+                    if kind == b"DONE":
+                        break
+                    data += self.read(size)
+                server.transfer(len(data))
+                device.files[remote] = bytes(data)
+                self.sock.sendall(b"OKAY" + struct.pack("<I", 0))
+            elif command == b"RECV":
+                data = device.files.get(path)
+                if data is None:
+                    message = f"remote object '{path}' does not exist".encode("utf-8")
+                    self.sock.sendall(b"FAIL" + struct.pack("<I", len(message)) + message)
+                    continue
+                server.transfer(len(data))
+                for offset in range(0, len(data), _SYNC_CHUNK):
+                    chunk = data[offset : offset + _SYNC_CHUNK]
+                    self.sock.sendall(b"DATA" + struct.pack("<I", len(chunk)) + chunk)
+                self.sock.sendall(b"DONE" + struct.pack("<I", 0))
+            else:
+                message = f"unsupported sync command: {command!r}".encode("utf-8")
+                self.sock.sendall(b"FAIL" + struct.pack("<I", len(message)) + message)
+                return
+
+
+def _block(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return f"{len(data):04x}".encode("utf-8") + data
+
+
+# 导出的公共接口
+__all__ = [
+    "FakeAdbDevice",
+    "FakeAdbServer",
+    "fake_png",
+]
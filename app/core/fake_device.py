@@ -0,0 +1,621 @@
+"""
+假设备模块
+
+进程内实现 uiautomator2 Device 的一个子集（InputService、NavigationService、AppService
+和 ScriptExecutor 用到的部分），由录制的层次结构（fixture）驱动，不需要连接手机：
+
+- 每个 fixture 是一个界面，点击元素、按键、启动应用或停留一段时间后按转移规则切换界面
+- 所有操作都经过 jsonrpc_call（流水线批量请求经过 jsonrpc_batch），按延迟模型真实等待，
+  因此埋点、性能分析和基准测试得到的耗时是可复现的
+- 通过 DeviceManager.connect("fake") / connect("fake:<fixture 目录>") 或
+  DeviceManager.attach(device) 接入，上层代码无需修改
+
+fixture 目录格式：
+    home.xml、login.xml ...          每个 XML 是一个界面，界面名为文件名（不含扩展名）
+    transitions.json（可选）：
+    {
+        "initial": "home",
+        "transitions": [
+            {"from": "home", "click": {"text": "登录"}, "to": "login"},
+            {"from": "login", "click": {"xpath": "//*[@text='返回']"}, "to": "home"},
+            {"from": "login", "press": "back", "to": "home"},
+            {"from": "splash", "after": 2.0, "to": "home"}
+        ]
+    }
+没有 initial 时初始界面为文件名排序后的第一个；app_start 会切换到该应用的第一个界面。
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from uiautomator2 import ShellResponse
+from uiautomator2.exceptions import UiObjectNotFoundError, XPathElementNotFoundError
+
+from .hierarchy import Hierarchy, UiNode
+
+# 导出层次结构的 JSON-RPC 方法名（XPath 查找也需要导出层次结构）
+DUMP_METHOD = "dumpWindowHierarchy"
+
+_BLANK_SCREEN = (
+    '<?xml version="1.0" encoding="UTF-8"?><hierarchy rotation="0">'
+    '<node class="android.widget.FrameLayout" package="com.android.launcher" bounds="[0,0][1080,2340]"/>'
+    "</hierarchy>"
+)
+
+
+class LatencyModel:
+    """
+    设备调用延迟模型
+
+    Attributes:
+        rpc: 普通 JSON-RPC 调用的延迟（秒）
+        dump: 导出层次结构的延迟（秒）
+        methods: 按方法名覆盖的延迟（秒）
+        jitter: 随机抖动比例（0.1 表示 ±10%）
+    """
+
+    def __init__(
+        self,
+        rpc: float = 0.0,
+        dump: Optional[float] = None,
+        methods: Optional[Dict[str, float]] = None,
+        jitter: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        """
+        初始化延迟模型
+
+        Args:
+            rpc: 普通 JSON-RPC 调用的延迟（秒）
+            dump: 导出层次结构的延迟（秒），默认与 rpc 相同
+            methods: 按方法名覆盖的延迟（秒）
+            jitter: 随机抖动比例
+            seed: 随机种子（固定种子时抖动可复现）
+        """
+        self.rpc = rpc
+        self.dump = rpc if dump is None else dump
+        self.methods = dict(methods or {})
+        self.jitter = jitter
+        self._random = random.Random(seed)
+
+    def delay(self, method: str) -> float:
+        """
+        计算一次调用的延迟
+
+        Args:
+            method: JSON-RPC 方法名
+
+        Returns:
+            延迟（秒）
+        """
+        base = self.methods.get(method, self.dump if method == DUMP_METHOD else self.rpc)
+        if self.jitter and base:
+            base *= 1 + self._random.uniform(-self.jitter, self.jitter)
+        return max(base, 0.0)
+
+
+def describe_selector(selector: Dict[str, Any]) -> str:
+    """
+    选择器描述（与脚本中的选择器写法一致），例如 id:"com.example:id/login"
+
+    Args:
+        selector: uiautomator2 选择器参数
+
+    Returns:
+        选择器描述
+    """
+    names = {"resourceId": "id", "text": "text", "className": "class"}
+    return ", ".join(
+        f"{names.get(key, key)}:{json.dumps(value, ensure_ascii=False)}"
+        for key, value in selector.items()
+        if key != "instance"
+    )
+
+
+class FakeSelector:
+    """假设备上的选择器对象（对应 uiautomator2 UiObject）"""
+
+    def __init__(self, device: "FakeDevice", selector: Dict[str, Any]):
+        self._device = device
+        self._selector = selector
+        self._description = describe_selector(selector)
+
+    def _find(self, hierarchy: Optional[Hierarchy] = None) -> List[UiNode]:
+        return (hierarchy or self._device.hierarchy).select(**self._selector)
+
+    def _lookup(self, method: str) -> List[UiNode]:
+        self._device.jsonrpc_call(method, [self._selector])
+        nodes = self._find()
+        self._device._record(self._description, bool(nodes))
+        return nodes
+
+    def _first(self, method: str) -> UiNode:
+        nodes = self._lookup(method)
+        if not nodes:
+            raise UiObjectNotFoundError({"code": -32002, "message": self._description})
+        return nodes[0]
+
+    @property
+    def exists(self) -> bool:
+        return bool(self._lookup("exist"))
+
+    @property
+    def count(self) -> int:
+        # uiautomator2 的 UiObject 定义了 __len__，"if element" 也会查询匹配数量
+        return len(self._lookup("count"))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield FakeSelector(self._device, {**self._selector, "instance": index})
+
+    def wait(self, exists: bool = True, timeout: Optional[float] = None) -> bool:
+        found = self._device._wait_until(
+            "waitForExists" if exists else "waitUntilGone",
+            lambda hierarchy: bool(self._find(hierarchy)) == exists,
+            20.0 if timeout is None else timeout,
+        )
+        self._device._record(self._description, found)
+        return found
+
+    def wait_gone(self, timeout: Optional[float] = None) -> bool:
+        return self.wait(exists=False, timeout=timeout)
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        return self._first("objInfo").info
+
+    def center(self) -> Tuple[int, int]:
+        return self._first("objInfo").center()
+
+    def bounds(self) -> Tuple[int, int, int, int]:
+        return self._first("objInfo").bounds
+
+    def get_text(self) -> str:
+        return self._first("getText").text
+
+    def click(self, *args: Any, **kwargs: Any) -> None:
+        self._device._click_node(self._first("objInfo"))
+
+    def long_click(self, *args: Any, **kwargs: Any) -> None:
+        self._device._click_node(self._first("objInfo"), "longClick")
+
+    def set_text(self, text: str) -> None:
+        self._first("setText")
+
+    def clear_text(self) -> None:
+        self._first("clearTextField")
+
+
+class FakeXPath:
+    """假设备上的 XPath 选择器（对应 uiautomator2 XPathSelector，每次查找都导出层次结构）"""
+
+    def __init__(self, device: "FakeDevice", expression: str):
+        self._device = device
+        self._expression = expression
+        self._description = f"xpath:{json.dumps(expression, ensure_ascii=False)}"
+
+    def _find(self, hierarchy: Optional[Hierarchy] = None) -> List[UiNode]:
+        return (hierarchy or self._device.hierarchy).xpath(self._expression)
+
+    def _lookup(self) -> List[UiNode]:
+        self._device.jsonrpc_call(DUMP_METHOD)
+        nodes = self._find()
+        self._device._record(self._description, bool(nodes))
+        return nodes
+
+    def _first(self) -> UiNode:
+        nodes = self._lookup()
+        if not nodes:
+            raise XPathElementNotFoundError(self._expression)
+        return nodes[0]
+
+    @property
+    def exists(self) -> bool:
+        return bool(self._lookup())
+
+    def all(self) -> List[UiNode]:
+        return self._lookup()
+
+    def get(self, timeout: Optional[float] = None) -> UiNode:
+        return self._first()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        found = self._device._wait_until(
+            DUMP_METHOD, lambda hierarchy: bool(self._find(hierarchy)), 10.0 if timeout is None else timeout
+        )
+        self._device._record(self._description, found)
+        return found
+
+    def wait_gone(self, timeout: Optional[float] = None) -> bool:
+        gone = self._device._wait_until(
+            DUMP_METHOD, lambda hierarchy: not self._find(hierarchy), 10.0 if timeout is None else timeout
+        )
+        self._device._record(self._description, gone)
+        return gone
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        return self._first().info
+
+    def get_text(self) -> str:
+        return self._first().text
+
+    def click(self, *args: Any, **kwargs: Any) -> None:
+        self._device._click_node(self._first())
+
+    def set_text(self, text: str) -> None:
+        self._first()
+
+
+class _FakeWait:
+    """device.wait.idle()"""
+
+    def __init__(self, device: "FakeDevice"):
+        self._device = device
+
+    def idle(self, timeout: float = 10.0) -> bool:
+        self._device.jsonrpc_call("waitForIdle", [timeout])
+        return True
+
+
+class _FakeTouch:
+    """device.touch.down / move / up（按下和抬起位置相同且中间没有移动时视为点击）"""
+
+    ACTION_DOWN, ACTION_UP, ACTION_MOVE = 0, 1, 2
+
+    def __init__(self, device: "FakeDevice"):
+        self._device = device
+        self._start: Optional[Tuple[int, int]] = None
+
+    def _inject(self, action: int, x: float, y: float) -> None:
+        self._device.jsonrpc_call("injectInputEvent", [action, int(x), int(y), 0])
+
+    def down(self, x: float, y: float) -> "_FakeTouch":
+        self._inject(self.ACTION_DOWN, x, y)
+        self._start = (int(x), int(y))
+        return self
+
+    def move(self, x: float, y: float) -> "_FakeTouch":
+        self._inject(self.ACTION_MOVE, x, y)
+        if self._start != (int(x), int(y)):
+            self._start = None
+        return self
+
+    def up(self, x: float, y: float) -> "_FakeTouch":
+        self._inject(self.ACTION_UP, x, y)
+        if self._start == (int(x), int(y)):
+            self._device._click_at(int(x), int(y))
+        self._start = None
+        return self
+
+
+class FakeDevice:
+    """
+    进程内假设备
+
+    Attributes:
+        serial: 设备序列号
+        latency: 延迟模型
+        poll_interval: 等待元素时检查界面的间隔（秒）
+        battery_level: 电池电量（DeviceManager 不再通过 ADB 查询）
+        calls: 所有 JSON-RPC 调用 (方法名, 参数)，用于测试断言
+    """
+
+    battery_level = 100
+
+    def __init__(
+        self,
+        screens: Optional[Dict[str, Hierarchy]] = None,
+        initial: Optional[str] = None,
+        transitions: Optional[List[Dict[str, Any]]] = None,
+        latency: Optional[LatencyModel] = None,
+        serial: str = "fake",
+        poll_interval: float = 0.1,
+    ):
+        """
+        初始化假设备
+
+        Args:
+            screens: 界面名 -> 层次结构（为空时只有一个空白桌面）
+            initial: 初始界面名，默认第一个界面
+            transitions: 界面转移规则（格式见模块说明）
+            latency: 延迟模型，默认无延迟
+            serial: 设备序列号
+            poll_interval: 等待元素时检查界面的间隔（秒）
+
+        Raises:
+            ValueError: 初始界面或转移规则引用了不存在的界面
+        """
+        self.screens = dict(screens or {"launcher": Hierarchy(_BLANK_SCREEN)})
+        self.transitions = list(transitions or [])
+        for name in [initial] + [item.get(key) for item in self.transitions for key in ("from", "to")]:
+            if name is not None and name not in self.screens:
+                raise ValueError(f"Unknown screen: {name}")
+        self.initial = initial or next(iter(self.screens))
+        self.latency = latency or LatencyModel()
+        self.serial = serial
+        self.poll_interval = poll_interval
+        self.calls: List[Tuple[str, Any]] = []
+        self.wait = _FakeWait(self)
+        self.touch = _FakeTouch(self)
+        self._lock = threading.Lock()
+        self._screen = self.initial
+        self._entered_at = self._now()
+
+    @classmethod
+    def from_directory(cls, directory: str, **kwargs: Any) -> "FakeDevice":
+        """
+        从 fixture 目录创建假设备（目录格式见模块说明）
+
+        Args:
+            directory: fixture 目录
+            **kwargs: 传给构造函数的其它参数
+
+        Returns:
+            FakeDevice: 假设备
+        """
+        screens = {
+            name[: -len(".xml")]: Hierarchy.from_file(os.path.join(directory, name))
+            for name in sorted(os.listdir(directory))
+            if name.endswith(".xml")
+        }
+        config: Dict[str, Any] = {}
+        config_path = os.path.join(directory, "transitions.json")
+        if os.path.exists(config_path):
+            with open(config_path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+        return cls(screens, config.get("initial"), config.get("transitions"), **kwargs)
+
+    # ============ 界面状态 ============
+
+    def _now(self) -> float:
+        return time.monotonic()
+
+    @property
+    def screen(self) -> str:
+        """当前界面名（会先处理到期的定时转移）"""
+        with self._lock:
+            while True:
+                rule = self._find_rule(lambda item: "after" in item)
+                if rule is None or self._now() - self._entered_at < float(rule["after"]):
+                    return self._screen
+                self._entered_at += float(rule["after"])
+                self._screen = rule["to"]
+
+    @property
+    def hierarchy(self) -> Hierarchy:
+        """当前界面的层次结构"""
+        return self.screens[self.screen]
+
+    def goto(self, screen: str) -> None:
+        """
+        切换到指定界面
+
+        Args:
+            screen: 界面名
+        """
+        if screen not in self.screens:
+            raise ValueError(f"Unknown screen: {screen}")
+        with self._lock:
+            self._screen = screen
+            self._entered_at = self._now()
+
+    def _find_rule(self, predicate: Callable[[Dict[str, Any]], bool]) -> Optional[Dict[str, Any]]:
+        for item in self.transitions:
+            if item.get("from", self._screen) == self._screen and predicate(item):
+                return item
+        return None
+
+    def _click_at(self, x: int, y: int) -> None:
+        """点击坐标：坐标落在某条点击转移规则的元素内时切换界面"""
+        hierarchy = self.hierarchy
+
+        def hit(item: Dict[str, Any]) -> bool:
+            if "click" not in item:
+                return False
+            selector = dict(item["click"])
+            expression = selector.pop("xpath", None)
+            nodes = hierarchy.xpath(expression) if expression else hierarchy.select(**selector)
+            return any(_contains(node, x, y) for node in nodes)
+
+        rule = self._find_rule(hit)
+        if rule is not None:
+            self.goto(rule["to"])
+
+    def _press_key(self, key: Any) -> None:
+        """按键：有匹配的按键转移规则时切换界面"""
+        rule = self._find_rule(lambda item: item.get("press") == key)
+        if rule is not None:
+            self.goto(rule["to"])
+
+    def _click_node(self, node: UiNode, method: str = "click") -> None:
+        x, y = node.center()
+        self.jsonrpc_call(method, [x, y])
+        self._click_at(x, y)
+
+    # ============ 延迟、等待和统计钩子 ============
+
+    def _pause(self, seconds: float) -> None:
+        """调用延迟"""
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def _wait_until(self, method: str, predicate: Callable[[Hierarchy], bool], timeout: float) -> bool:
+        """等待界面满足条件（一次调用，调用期间按 poll_interval 检查界面）"""
+        self.jsonrpc_call(method, [timeout])
+        deadline = self._now() + max(float(timeout), 0.0)
+        while not predicate(self.hierarchy):
+            remaining = deadline - self._now()
+            if remaining <= 0:
+                return False
+            self.sleep(min(self.poll_interval, remaining))
+        return True
+
+    def _record(self, selector: str, found: bool) -> None:
+        """选择器查找结果（供模拟执行统计）"""
+
+    # ============ uiautomator2 Device 接口 ============
+
+    def jsonrpc_call(self, method: str, params: Any = None, timeout: float = 10) -> Any:
+        """记录调用并按延迟模型等待（DeviceManager 会在这里安装埋点）"""
+        with self._lock:
+            self.calls.append((method, params))
+        self._pause(self.latency.delay(method))
+        # 与真实设备一致：导出层次结构的 RPC 返回 XML（埋点据此统计数据量）
+        if method == DUMP_METHOD:
+            return self.hierarchy.xml
+        return True
+
+    def jsonrpc_batch(
+        self, payload: List[Dict[str, Any]], timeout: float = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        JSON-RPC 2.0 批量请求（见 app.services.script_pipeline）
+
+        逐条记录调用并应用点击、按键的界面转移，整批只等待一次 RPC 延迟（一次往返）。
+        """
+        with self._lock:
+            self.calls.extend((item["method"], item.get("params")) for item in payload)
+        self._pause(self.latency.delay("batch"))
+        for item in payload:
+            params = item.get("params") or []
+            if item["method"] == "click":
+                self._click_at(int(params[0]), int(params[1]))
+            elif item["method"] == "pressKey":
+                self._press_key(params[0])
+        return [{"jsonrpc": "2.0", "id": item.get("id"), "result": True} for item in payload]
+
+    def shell(self, cmdargs: Any, timeout: float = 60) -> ShellResponse:
+        self.jsonrpc_call("shell", [cmdargs])
+        return ShellResponse("", 0)
+
+    def __call__(self, **selector: Any) -> FakeSelector:
+        return FakeSelector(self, selector)
+
+    def xpath(self, expression: str) -> FakeXPath:
+        return FakeXPath(self, expression)
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        self.jsonrpc_call("deviceInfo")
+        width, height = self.hierarchy.display_size
+        return {
+            "currentPackageName": self.hierarchy.package,
+            "displayHeight": height,
+            "displayWidth": width,
+            "displayRotation": 0,
+            "displaySizeDpX": width,
+            "displaySizeDpY": height,
+            "productName": "fake",
+            "screenOn": True,
+            "sdkInt": 34,
+            "naturalOrientation": True,
+        }
+
+    def window_size(self) -> Tuple[int, int]:
+        self.jsonrpc_call("deviceInfo")
+        return self.hierarchy.display_size
+
+    def dump_hierarchy(self, *args: Any, **kwargs: Any) -> str:
+        return self.jsonrpc_call(DUMP_METHOD)
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def click(self, x: float, y: float) -> None:
+        x, y = int(x), int(y)
+        self.jsonrpc_call("click", [x, y])
+        self._click_at(x, y)
+
+    def long_click(self, x: float, y: float, duration: float = 0.5) -> None:
+        self.jsonrpc_call("longClick", [int(x), int(y), duration])
+
+    def double_click(self, x: float, y: float, duration: float = 0.1) -> None:
+        self.click(x, y)
+        self.click(x, y)
+
+    def swipe(self, fx: float, fy: float, tx: float, ty: float, duration: Optional[float] = None, steps: Optional[int] = None) -> None:
+        self.jsonrpc_call("swipe", [fx, fy, tx, ty, duration, steps])
+
+    def swipe_points(self, points: List[Tuple[int, int]], duration: float = 0.5) -> None:
+        self.jsonrpc_call("swipePoints", [points, duration])
+
+    def drag(self, sx: float, sy: float, ex: float, ey: float, duration: float = 0.5) -> None:
+        self.jsonrpc_call("drag", [sx, sy, ex, ey, duration])
+
+    def press(self, key: Any, meta: Any = None) -> bool:
+        self.jsonrpc_call("pressKey", [key])
+        self._press_key(key)
+        return True
+
+    def send_keys(self, text: str, clear: bool = False) -> None:
+        self.jsonrpc_call("setText", [text, clear])
+
+    def clear_text(self) -> None:
+        self.jsonrpc_call("clearText")
+
+    def set_input_ime(self, enable: bool = True) -> None:
+        self.jsonrpc_call("setInputIme", [enable])
+
+    def screen_on(self) -> None:
+        self.jsonrpc_call("wakeUp")
+
+    def screen_off(self) -> None:
+        self.jsonrpc_call("sleep")
+
+    def unlock(self) -> None:
+        self.jsonrpc_call("unlock")
+
+    def app_start(self, package_name: str, activity: Optional[str] = None, wait: bool = False, stop: bool = False) -> None:
+        self.shell(["am", "start", package_name])
+        if self.hierarchy.package != package_name:
+            for name, hierarchy in self.screens.items():
+                if hierarchy.package == package_name:
+                    self.goto(name)
+                    break
+
+    def app_stop(self, package_name: str) -> None:
+        self.shell(["am", "force-stop", package_name])
+        if self.hierarchy.package == package_name:
+            self.goto(self.initial)
+
+    def app_clear(self, package_name: str) -> None:
+        self.shell(["pm", "clear", package_name])
+        if self.hierarchy.package == package_name:
+            self.goto(self.initial)
+
+    def app_current(self) -> Dict[str, str]:
+        self.shell(["dumpsys", "activity", "activities"])
+        return {"package": self.hierarchy.package, "activity": ""}
+
+    def app_wait(self, package_name: str, timeout: float = 20.0, front: bool = False) -> int:
+        found = self._wait_until("appWait", lambda hierarchy: hierarchy.package == package_name, timeout)
+        return 1 if found else 0
+
+    def app_info(self, package_name: str) -> Dict[str, Any]:
+        self.shell(["dumpsys", "package", package_name])
+        return {"packageName": package_name, "mainActivity": "", "label": package_name, "versionName": "1.0", "versionCode": 1}
+
+
+def _contains(node: UiNode, x: int, y: int) -> bool:
+    left, top, right, bottom = node.bounds
+    return left <= x < right and top <= y < bottom
+
+
+# 导出的公共接口
+__all__ = [
+    "DUMP_METHOD",
+    "FakeDevice",
+    "FakeSelector",
+    "FakeXPath",
+    "LatencyModel",
+    "describe_selector",
+]
@@ -0,0 +1,262 @@
+"""
+UI 层次结构模块
+
+解析 uiautomator2 dump_hierarchy 导出的 XML，并按 uiautomator2 的选择器语义查找节点，
+供离线执行（模拟执行、假设备）使用，不需要连接真实设备。
+
+与 uiautomator2 的 XPath 插件一致，节点的标签名会替换为其 class 属性，
+因此 //android.widget.Button 这样的表达式同样可以使用。
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from lxml import etree
+
+_BOUNDS_PATTERN = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+_TAG_PATTERN = re.compile(r"^[A-Za-z_][\w.\-]*$")
+
+# 选择器参数名 -> XML 属性名
+_SELECTOR_ATTRIBUTES = {
+    "text": "text",
+    "className": "class",
+    "resourceId": "resource-id",
+    "description": "content-desc",
+    "packageName": "package",
+}
+
+# 布尔选择器参数名 -> XML 属性名
+_BOOLEAN_ATTRIBUTES = {
+    "checkable": "checkable",
+    "checked": "checked",
+    "clickable": "clickable",
+    "enabled": "enabled",
+    "focusable": "focusable",
+    "focused": "focused",
+    "scrollable": "scrollable",
+    "longClickable": "long-clickable",
+    "selected": "selected",
+}
+
+# 选择器参数后缀 -> 匹配函数
+_MATCHERS: Dict[str, Callable[[str, str], bool]] = {
+    "Contains": lambda actual, expected: expected in actual,
+    "StartsWith": lambda actual, expected: actual.startswith(expected),
+    "Matches": lambda actual, expected: re.fullmatch(expected, actual) is not None,
+}
+
+
+class UiNode:
+    """
+    层次结构中的一个节点
+
+    Attributes:
+        element: lxml 元素
+    """
+
+    __slots__ = ("element",)
+
+    def __init__(self, element: Any):
+        self.element = element
+
+    @property
+    def attrib(self) -> Dict[str, str]:
+        """XML 属性"""
+        return dict(self.element.attrib)
+
+    @property
+    def text(self) -> str:
+        return self.element.get("text", "")
+
+    @property
+    def bounds(self) -> Tuple[int, int, int, int]:
+        """(left, top, right, bottom)"""
+        match = _BOUNDS_PATTERN.match(self.element.get("bounds", ""))
+        if not match:
+            return (0, 0, 0, 0)
+        return tuple(int(value) for value in match.groups())  # type: ignore[return-value]
+
+    def center(self) -> Tuple[int, int]:
+        """节点中心点坐标"""
+        left, top, right, bottom = self.bounds
+        return (left + right) // 2, (top + bottom) // 2
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        """与 uiautomator2 UiObject.info 格式相同的节点信息"""
+        get = self.element.get
+        left, top, right, bottom = self.bounds
+        bounds = {"left": left, "top": top, "right": right, "bottom": bottom}
+        info: Dict[str, Any] = {
+            "text": get("text", ""),
+            "className": get("class", ""),
+            "resourceName": get("resource-id", ""),
+            "contentDescription": get("content-desc", ""),
+            "packageName": get("package", ""),
+            "bounds": bounds,
+            "visibleBounds": dict(bounds),
+            "childCount": len(self.element),
+        }
+        for key, attribute in _BOOLEAN_ATTRIBUTES.items():
+            info[key] = get(attribute) == "true"
+        return info
+
+
+def _matches(element: Any, key: str, expected: Any) -> bool:
+    """判断节点是否满足一个选择器条件"""
+    if key in _BOOLEAN_ATTRIBUTES:
+        return (element.get(_BOOLEAN_ATTRIBUTES[key]) == "true") == bool(expected)
+    if key in _SELECTOR_ATTRIBUTES:
+        return element.get(_SELECTOR_ATTRIBUTES[key], "") == str(expected)
+    for suffix, matcher in _MATCHERS.items():
+        name = key[: -len(suffix)]
+        if key.endswith(suffix) and name in _SELECTOR_ATTRIBUTES:
+            return matcher(element.get(_SELECTOR_ATTRIBUTES[name], ""), str(expected))
+    raise ValueError(f"Unsupported selector: {key}")
+
+
+def normalize_xpath(expression: str) -> str:
+    """
+    将 uiautomator2 XPath 插件的简写转换为标准 XPath
+
+    - "@xxx" 表示 resource-id 为 xxx
+    - 不以 / 或 ( 开头的字符串表示 text 为该字符串
+
+    Args:
+        expression: XPath 表达式或简写
+
+    Returns:
+        标准 XPath 表达式
+    """
+    if expression.startswith(("/", "(")):
+        return expression
+    if expression.startswith("@"):
+        return f"//*[@resource-id={_quote(expression[1:])}]"
+    return f"//*[@text={_quote(expression)}]"
+
+
+def _quote(value: str) -> str:
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    parts = value.split('"')
+    return "concat(" + ", '\"', ".join(f'"{part}"' for part in parts) + ")"
+
+
+class Hierarchy:
+    """
+    一份 UI 层次结构快照
+
+    Attributes:
+        xml: 原始 XML
+    """
+
+    def __init__(self, xml: str):
+        """
+        解析层次结构
+
+        Args:
+            xml: dump_hierarchy 导出的 XML
+
+        Raises:
+            ValueError: XML 无法解析
+        """
+        self.xml = xml
+        try:
+            self._root = etree.fromstring(xml.encode("utf-8"))
+        except etree.XMLSyntaxError as e:
+            raise ValueError(f"Invalid hierarchy XML: {e}")
+        self._elements = [element for element in self._root.iter() if element is not self._root]
+        for element in self._elements:
+            class_name = element.get("class", "")
+            if element.tag == "node" and _TAG_PATTERN.match(class_name):
+                element.tag = class_name
+
+    @classmethod
+    def from_file(cls, path: str) -> "Hierarchy":
+        """
+        从文件读取层次结构
+
+        Args:
+            path: XML 文件路径
+
+        Returns:
+            Hierarchy: 层次结构
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(f.read())
+
+    @property
+    def package(self) -> str:
+        """前台应用包名（第一个节点的 package 属性）"""
+        for element in self._elements:
+            package = element.get("package")
+            if package:
+                return package
+        return ""
+
+    @property
+    def display_size(self) -> Tuple[int, int]:
+        """根节点的宽和高"""
+        for element in self._elements:
+            node = UiNode(element)
+            left, top, right, bottom = node.bounds
+            if right or bottom:
+                return right - left, bottom - top
+        return 0, 0
+
+    def select(self, **selector: Any) -> List[UiNode]:
+        """
+        按 uiautomator2 选择器参数查找节点
+
+        支持 text、className、resourceId、description、packageName 及其
+        Contains / StartsWith / Matches 变体、布尔属性和 instance。
+
+        Args:
+            **selector: 选择器参数
+
+        Returns:
+            按文档顺序排列的匹配节点
+
+        Raises:
+            ValueError: 不支持的选择器参数
+        """
+        instance: Optional[int] = selector.pop("instance", None)
+        matches = [
+            UiNode(element)
+            for element in self._elements
+            if all(_matches(element, key, value) for key, value in selector.items())
+        ]
+        if instance is not None:
+            return matches[instance : instance + 1]
+        return matches
+
+    def xpath(self, expression: str) -> List[UiNode]:
+        """
+        按 XPath 查找节点
+
+        Args:
+            expression: XPath 表达式（支持 uiautomator2 简写）
+
+        Returns:
+            匹配节点
+
+        Raises:
+            ValueError: XPath 表达式无效
+        """
+        try:
+            result = self._root.xpath(normalize_xpath(expression))
+        except etree.XPathError as e:
+            raise ValueError(f"Invalid xpath {expression!r}: {e}")
+        if not isinstance(result, list):
+            return []
+        return [UiNode(element) for element in result if isinstance(element, etree._Element)]
+
+
+# 导出的公共接口
+__all__ = [
+    "Hierarchy",
+    "UiNode",
+    "normalize_xpath",
+]
@@ -0,0 +1,291 @@
+"""
+设备调用埋点模块
+
+所有设备 RPC（uiautomator2 JSON-RPC、uiautomator2 shell、adbutils shell 和 sync 文件传输）都在这里统一计时，
+再分发给监听器。监听器分为两类：
+- 全局监听器：进程内常驻，接收所有调用
+- 上下文监听器：通过 contextvars 绑定到当前请求或脚本执行，只接收该上下文内的调用
+
+没有任何监听器时，包装层只多一次列表和上下文变量检查。
+包装层还会在每次调用前检查当前上下文的取消令牌（见 app.core.cancellation），
+已取消的脚本不会再发出新的设备调用。
+"""
+
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import u2_compat
+from .cancellation import check_cancelled
+
+
+@dataclass
+class RpcEvent:
+    """
+    一次设备调用
+
+    Attributes:
+        kind: 调用类型（jsonrpc / shell / sync）
+        operation: 操作名（JSON-RPC 方法名、shell 命令名或 sync 方法名）
+        duration: 耗时（秒）
+        serial: 设备序列号
+        error: 调用是否抛出异常
+        size: 返回数据量（字符串/字节长度，sync 为传输的字节数，其他结果为 0）
+        calls: 包含的调用数（JSON-RPC 批量请求为批内调用数，其他为 1）
+    """
+
+    kind: str
+    operation: str
+    duration: float
+    serial: str
+    error: bool = False
+    size: int = 0
+    calls: int = 1
+
+
+# JSON-RPC 批量请求的操作名
+BATCH_OPERATION = "batch"
+
+RpcListener = Callable[[RpcEvent], None]
+
+_global_listeners: List[RpcListener] = []
+_context_listeners: ContextVar[Tuple[RpcListener, ...]] = ContextVar(
+    "rpc_listeners", default=()
+)
+
+
+def add_rpc_listener(listener: RpcListener) -> None:
+    """
+    注册全局监听器
+
+    Args:
+        listener: 监听函数
+    """
+    if listener not in _global_listeners:
+        _global_listeners.append(listener)
+
+
+def remove_rpc_listener(listener: RpcListener) -> None:
+    """
+    移除全局监听器
+
+    Args:
+        listener: 监听函数
+    """
+    if listener in _global_listeners:
+        _global_listeners.remove(listener)
+
+
+@contextmanager
+def rpc_listener(listener: RpcListener):
+    """
+    在当前上下文中注册监听器
+
+    Args:
+        listener: 监听函数
+
+    Usage:
+        with rpc_listener(on_rpc):
+            device.click(100, 200)
+    """
+    token = _context_listeners.set(_context_listeners.get() + (listener,))
+    try:
+        yield listener
+    finally:
+        _context_listeners.reset(token)
+
+
+def _emit(event: RpcEvent) -> None:
+    for listener in _global_listeners:
+        listener(event)
+    for listener in _context_listeners.get():
+        listener(event)
+
+
+def instrumented(
+    kind: str,
+    serial: str,
+    func: Callable[..., Any],
+    operation: Callable[[Tuple[Any, ...], Dict[str, Any]], str],
+    size: Optional[Callable[[Any], int]] = None,
+    calls: Optional[Callable[[Tuple[Any, ...], Dict[str, Any]], int]] = None,
+) -> Callable[..., Any]:
+    """
+    包装设备调用函数，调用结束后向监听器发送 RpcEvent
+
+    Args:
+        kind: 调用类型
+        serial: 设备序列号
+        func: 原始调用函数
+        operation: 根据调用参数生成操作名的函数
+        size: 根据返回值计算数据量的函数，默认取字符串/字节长度
+        calls: 根据调用参数计算包含调用数的函数，默认为 1
+
+    Returns:
+        包装后的函数
+    """
+
+    result_size = size or _payload_size
+
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        check_cancelled()
+        if not _global_listeners and not _context_listeners.get():
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        error = False
+        result = None
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except BaseException:
+            error = True
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            _emit(
+                RpcEvent(
+                    kind,
+                    operation(args, kwargs),
+                    duration,
+                    serial,
+                    error,
+                    result_size(result),
+                    calls(args, kwargs) if calls else 1,
+                )
+            )
+
+    wrapper.__wrapped__ = func  # type: ignore[attr-defined]
+    return wrapper
+
+
+def _payload_size(result: Any) -> int:
+    # shell 返回 ShellResponse（output 字段）或字符串；不为统计数据量序列化其他结果
+    output = getattr(result, "output", result)
+    return len(output) if isinstance(output, (str, bytes, bytearray)) else 0
+
+
+def _sync_size(result: Any) -> int:
+    # push/pull 返回传输的字节数，read_bytes 返回内容
+    if isinstance(result, int) and not isinstance(result, bool):
+        return result
+    return _payload_size(result)
+
+
+def _jsonrpc_operation(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> str:
+    return str(args[0] if args else kwargs.get("method", ""))
+
+
+def _batch_operation(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> str:
+    return BATCH_OPERATION
+
+
+def _batch_calls(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> int:
+    payload = args[0] if args else kwargs.get("payload", ())
+    return len(payload)
+
+
+def _shell_operation(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> str:
+    cmdargs = args[0] if args else kwargs.get("cmdargs", "")
+    if isinstance(cmdargs, (list, tuple)):
+        return str(cmdargs[0]) if cmdargs else ""
+    parts = str(cmdargs).split()
+    return parts[0] if parts else ""
+
+
+def instrument_u2_device(device: Any) -> Any:
+    """
+    为 uiautomator2 设备对象安装埋点（jsonrpc_call、jsonrpc_batch 和 shell）
+
+    jsonrpc_batch(payload) 发送 JSON-RPC 2.0 批量请求（见 app.services.script_pipeline），
+    uiautomator2 设备对象没有该方法时在这里补上；批量请求记录为一次 operation 为
+    BATCH_OPERATION 的 jsonrpc 调用，calls 为批内调用数。重复调用是安全的。
+
+    Args:
+        device: uiautomator2 设备对象
+
+    Returns:
+        同一个设备对象
+    """
+    if getattr(device, "_rpc_instrumented", False):
+        return device
+    serial = getattr(device, "serial", "") or ""
+    device.jsonrpc_call = instrumented("jsonrpc", serial, device.jsonrpc_call, _jsonrpc_operation)
+    batch = getattr(device, "jsonrpc_batch", None)
+    if batch is None and u2_compat.supports_batch(device):
+        batch = functools.partial(u2_compat.jsonrpc_batch, device)
+    if batch is not None:
+        device.jsonrpc_batch = instrumented(
+            "jsonrpc", serial, batch, _batch_operation, calls=_batch_calls
+        )
+    device.shell = instrumented("shell", serial, device.shell, _shell_operation)
+    device._rpc_instrumented = True
+    return device
+
+
+# 埋点的 sync 方法：互相之间没有调用关系，每次文件传输只记录一次
+_SYNC_METHODS = ("push", "pull", "read_bytes", "list")
+
+# adbutils 设备类 -> 返回带埋点 Sync 对象的子类
+_instrumented_adb_classes: Dict[type, type] = {}
+
+
+def _instrument_sync(sync: Any, serial: str) -> Any:
+    for name in _SYNC_METHODS:
+        method = getattr(sync, name, None)
+        if method is not None:
+            operation = lambda args, kwargs, name=name: name  # noqa: E731
+            setattr(sync, name, instrumented("sync", serial, method, operation, _sync_size))
+    return sync
+
+
+def _instrumented_adb_class(cls: type) -> type:
+    subclass = _instrumented_adb_classes.get(cls)
+    if subclass is None:
+        # sync 是每次创建新 Sync 对象的只读属性，只能在子类中覆盖
+        base = getattr(cls, "sync")
+
+        def sync(self: Any) -> Any:
+            return _instrument_sync(base.fget(self), getattr(self, "serial", "") or "")
+
+        subclass = type(cls.__name__, (cls,), {"sync": property(sync)})
+        _instrumented_adb_classes[cls] = subclass
+    return subclass
+
+
+def instrument_adb_device(device: Any) -> Any:
+    """
+    为 adbutils 设备对象安装埋点（shell 和 sync 文件传输）
+
+    重复调用是安全的。
+
+    Args:
+        device: adbutils AdbDevice 对象
+
+    Returns:
+        同一个设备对象
+    """
+    if getattr(device, "_rpc_instrumented", False):
+        return device
+    serial = getattr(device, "serial", "") or ""
+    device.shell = instrumented("shell", serial, device.shell, _shell_operation)
+    if isinstance(getattr(type(device), "sync", None), property):
+        device.__class__ = _instrumented_adb_class(type(device))
+    device._rpc_instrumented = True
+    return device
+
+
+# 导出的公共接口
+__all__ = [
+    "BATCH_OPERATION",
+    "RpcEvent",
+    "RpcListener",
+    "add_rpc_listener",
+    "remove_rpc_listener",
+    "rpc_listener",
+    "instrumented",
+    "instrument_u2_device",
+    "instrument_adb_device",
+]
@@ -0,0 +1,425 @@
+"""
+指标模块
+
+进程内的 Prometheus 风格指标，由 GET /metrics 以文本格式（0.0.4）输出，适合每 10 秒抓取一次。
+
+- 直方图和计数器在热路径上记录：一次字典查找、一次二分查找和加锁后的几次加法
+- 队列深度、执行中的请求数、会话数等状态类指标由采集函数在抓取时读取，不在热路径上维护
+
+内置指标：
+- http_request_duration_seconds: 按路由模板统计的请求耗时（到响应头发出为止，流式响应不计入流的持续时间）
+- http_requests_in_flight: 按路由模板统计的处理中请求数
+- device_rpc_duration_seconds / device_rpc_errors_total: 按设备和操作统计的设备 RPC（见 app.core.instrumentation），
+  流水线的 JSON-RPC 批量请求按一次 operation="batch" 的调用统计
+- device_rpc_batched_calls_total: 批量请求中包含的调用数
+- device_executor_*: 设备执行器的排队数、执行中调用数、各类调用计数、合并读取和缓存命中次数
+"""
+
+import itertools
+import math
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .device_executor import device_executor_stats
+from .instrumentation import BATCH_OPERATION, RpcEvent
+
+# 默认直方图分桶（秒），覆盖单次 RPC 到等待元素的长调用
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 输出格式的 Content-Type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[str, ...]
+
+
+@dataclass
+class MetricFamily:
+    """
+    一个指标的全部样本
+
+    Attributes:
+        name: 指标名
+        kind: 类型（counter / gauge / histogram）
+        documentation: 说明
+        samples: (名称后缀, 标签, 值) 列表
+    """
+
+    name: str
+    kind: str
+    documentation: str
+    samples: List[Tuple[str, Dict[str, str], float]] = field(default_factory=list)
+
+    def add(self, value: float, suffix: str = "", **labels: Any) -> "MetricFamily":
+        """
+        添加一个样本
+
+        Args:
+            value: 样本值
+            suffix: 名称后缀（如 _bucket）
+            **labels: 标签
+
+        Returns:
+            自身，便于链式调用
+        """
+        self.samples.append((suffix, {k: str(v) for k, v in labels.items()}, value))
+        return self
+
+
+class _Metric:
+    """带标签的指标基类"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _labels(self, labels: Labels) -> Dict[str, str]:
+        return dict(zip(self.labelnames, labels))
+
+    def collect(self) -> MetricFamily:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """
+        增加计数
+
+        Args:
+            *labels: 标签值（与 labelnames 顺序一致）
+            amount: 增加量
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, self.kind, self.documentation)
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            family.add(value, **self._labels(labels))
+        return family
+
+
+class Histogram(_Metric):
+    """分桶直方图"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 标签 -> [各桶计数（最后一个为 +Inf）, 总和]
+        self._values: Dict[Labels, List[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """
+        记录一次观测值
+
+        Args:
+            value: 观测值
+            *labels: 标签值（与 labelnames 顺序一致）
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, self.kind, self.documentation)
+        with self._lock:
+            values = [
+                (labels, list(counts), total) for labels, (counts, total) in self._values.items()
+            ]
+        for labels, counts, total in values:
+            base = self._labels(labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                family.add(cumulative, "_bucket", **base, le=_format_value(bound))
+            family.add(total, "_sum", **base)
+            family.add(cumulative, "_count", **base)
+        return family
+
+
+Collector = Callable[[], Iterable[MetricFamily]]
+
+
+class Registry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Collector] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        """
+        注册指标
+
+        Args:
+            metric: 指标
+
+        Returns:
+            同一个指标
+        """
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Collector) -> Collector:
+        """
+        注册采集函数（抓取时调用，返回当前状态的 MetricFamily）
+
+        Args:
+            collector: 采集函数
+
+        Returns:
+            同一个采集函数，可以作为装饰器使用
+        """
+        self._collectors.append(collector)
+        return collector
+
+    def collect(self) -> List[MetricFamily]:
+        """
+        采集所有指标
+
+        Returns:
+            MetricFamily 列表
+        """
+        families = [metric.collect() for metric in self._metrics]
+        for collector in self._collectors:
+            families.extend(collector())
+        return families
+
+    def render(self) -> str:
+        """
+        以 Prometheus 文本格式输出所有指标
+
+        Returns:
+            str: 指标文本
+        """
+        lines = []
+        for family in self.collect():
+            lines.append(f"# HELP {family.name} {_escape(family.documentation, help_text=True)}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for suffix, labels, value in family.samples:
+                label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                name = family.name + suffix
+                lines.append(
+                    f"{name}{{{label_text}}} {_format_value(value)}"
+                    if label_text
+                    else f"{name} {_format_value(value)}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str, help_text: bool = False) -> str:
+    value = value.replace("\\", "\\\\").replace("\n", "\\n")
+    return value if help_text else value.replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# 全局注册表
+REGISTRY = Registry()
+
+HTTP_DURATION = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency until response headers are sent",
+        ("method", "route", "status"),
+    )
+)
+
+RPC_DURATION = REGISTRY.register(
+    Histogram(
+        "device_rpc_duration_seconds",
+        "Device RPC latency by operation",
+        ("serial", "kind", "operation"),
+    )
+)
+
+RPC_ERRORS = REGISTRY.register(
+    Counter(
+        "device_rpc_errors_total",
+        "Device RPCs that raised an exception",
+        ("serial", "kind", "operation"),
+    )
+)
+
+RPC_BATCHED_CALLS = REGISTRY.register(
+    Counter(
+        "device_rpc_batched_calls_total",
+        "Calls sent inside JSON-RPC batch requests",
+        ("serial",),
+    )
+)
+
+
+def record_rpc(event: RpcEvent) -> None:
+    """
+    记录一次设备 RPC（作为全局监听器注册到 app.core.instrumentation）
+
+    Args:
+        event: 设备调用事件
+    """
+    RPC_DURATION.observe(event.duration, event.serial, event.kind, event.operation)
+    if event.error:
+        RPC_ERRORS.inc(event.serial, event.kind, event.operation)
+    if event.operation == BATCH_OPERATION:
+        RPC_BATCHED_CALLS.inc(event.serial, amount=event.calls)
+
+
+# 处理中的请求：编号 -> ASGI scope（路由匹配后 scope 中带有 route）
+_active_requests: Dict[int, Scope] = {}
+_request_ids = itertools.count()
+
+
+def _route_template(scope: Scope) -> str:
+    route = scope.get("route")
+    template = getattr(route, "path_format", None) or getattr(route, "path", None)
+    if not template:
+        return "unmatched"
+    # 通过 include_router(prefix=...) 嵌套时 route 只带有自身的路径，前缀从请求路径中还原
+    path = scope.get("path", "")
+    try:
+        concrete = template.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+    if concrete != path and path.endswith(concrete):
+        return path[: len(path) - len(concrete)] + template
+    return template
+
+
+class MetricsMiddleware:
+    """
+    记录 HTTP 请求耗时和处理中请求数的中间件
+
+    Args:
+        app: ASGI 应用
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        request_id = next(_request_ids)
+        recorded = False
+
+        def record(status: int) -> None:
+            nonlocal recorded
+            recorded = True
+            HTTP_DURATION.observe(
+                time.perf_counter() - start, scope["method"], _route_template(scope), str(status)
+            )
+
+        async def send_with_metrics(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                record(message["status"])
+            await send(message)
+
+        _active_requests[request_id] = scope
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            del _active_requests[request_id]
+            if not recorded:
+                record(500)
+
+
+@REGISTRY.register_collector
+def _collect_requests_in_flight() -> Iterable[MetricFamily]:
+    family = MetricFamily("http_requests_in_flight", "gauge", "HTTP requests being processed")
+    counts: Dict[Tuple[str, str], int] = {}
+    for scope in list(_active_requests.values()):
+        key = (scope["method"], _route_template(scope))
+        counts[key] = counts.get(key, 0) + 1
+    for (method, route), count in counts.items():
+        family.add(count, method=method, route=route)
+    return [family]
+
+
+# 设备执行器计数 -> (指标名, 说明)
+_EXECUTOR_COUNTERS = {
+    "submitted": ("device_executor_submitted_total", "Device calls accepted by the executor"),
+    "completed": ("device_executor_completed_total", "Device calls that returned normally"),
+    "failed": ("device_executor_failed_total", "Device calls that raised an exception"),
+    "cancelled": ("device_executor_cancelled_total", "Device calls cancelled before finishing"),
+    "rejected": ("device_executor_rejected_total", "Device calls rejected by a full queue"),
+    "timeouts": ("device_executor_timeouts_total", "Device calls that exceeded their timeout"),
+    "shared": ("device_executor_shared_reads_total", "Reads served by an identical in-flight call"),
+    "cache_hits": ("device_executor_cache_hits_total", "Reads served from the read cache"),
+}
+
+
+@REGISTRY.register_collector
+def _collect_device_executors() -> Iterable[MetricFamily]:
+    stats = device_executor_stats()
+    families = [
+        MetricFamily("device_executor_queued", "gauge", "Device calls waiting for a worker"),
+        MetricFamily("device_executor_active", "gauge", "Device calls being executed"),
+        MetricFamily(
+            "device_executor_queue_wait_max_seconds", "gauge", "Longest queue wait so far"
+        ),
+    ]
+    counters = {
+        key: MetricFamily(name, "counter", documentation)
+        for key, (name, documentation) in _EXECUTOR_COUNTERS.items()
+    }
+    for item in stats:
+        serial = item["serial"]
+        families[0].add(item["queued"], serial=serial)
+        families[1].add(item["active"], serial=serial)
+        families[2].add(item["queue_wait_max"], serial=serial)
+        for key, family in counters.items():
+            family.add(item[key], serial=serial)
+    return families + list(counters.values())
+
+
+# 导出的公共接口
+__all__ = [
+    "DEFAULT_BUCKETS",
+    "CONTENT_TYPE",
+    "MetricFamily",
+    "Counter",
+    "Histogram",
+    "Registry",
+    "REGISTRY",
+    "record_rpc",
+    "MetricsMiddleware",
+]
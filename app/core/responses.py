@@ -0,0 +1,99 @@
+"""
+JSON 响应模块
+
+界面层次结构、截图、应用信息列表等大响应使用 orjson 序列化（未安装时回退到标准库 json），
+列表接口按批流式输出，不必先在内存中拼出完整的响应体。
+
+安装 orjson：
+    pip install "android-automation-api[speedups]"
+"""
+
+import json
+from typing import Any, Dict, Iterable, Iterator, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+# 流式列表每批序列化的元素数
+STREAM_BATCH_SIZE = 256
+
+
+def dumps(content: Any) -> bytes:
+    """
+    把内容序列化为紧凑的 JSON 字节串
+
+    Args:
+        content: 要序列化的内容（orjson 不支持的类型交给 jsonable_encoder 转换）
+
+    Returns:
+        bytes: UTF-8 编码的 JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, default=jsonable_encoder, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    使用 orjson 序列化的 JSON 响应
+
+    直接返回该响应可以跳过 FastAPI 的 jsonable_encoder 遍历，适合没有 response_model 的大响应。
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _stream_list(
+    fields: Dict[str, Any], key: str, items: List[Any], batch_size: int
+) -> Iterator[bytes]:
+    head = dumps(fields)
+    # 在对象的右花括号前接上列表字段
+    yield head[:-1] + (b"," if fields else b"") + dumps(key) + b":["
+    for start in range(0, len(items), batch_size):
+        chunk = dumps(items[start:start + batch_size])[1:-1]
+        yield (b"," if start else b"") + chunk
+    yield b"]}"
+
+
+def json_list_response(
+    key: str,
+    items: Iterable[Any],
+    batch_size: int = STREAM_BATCH_SIZE,
+    **fields: Any,
+) -> StreamingResponse:
+    """
+    流式输出包含列表字段的 JSON 对象
+
+    输出与 {**fields, key: items} 相同，但按批序列化并逐批发送，首字节更早到达客户端，
+    开启压缩时也按批压缩。
+
+    Args:
+        key: 列表字段名
+        items: 列表内容
+        batch_size: 每批序列化的元素数
+        **fields: 列表之前的其他字段（如 count）
+
+    Returns:
+        StreamingResponse: application/json 流式响应
+    """
+    return StreamingResponse(
+        _stream_list(fields, key, list(items), max(batch_size, 1)),
+        media_type="application/json",
+    )
+
+
+# 导出的公共接口
+__all__ = [
+    "STREAM_BATCH_SIZE",
+    "dumps",
+    "FastJSONResponse",
+    "json_list_response",
+]
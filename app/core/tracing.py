@@ -0,0 +1,427 @@
+"""
+请求追踪模块
+
+每个 HTTP 请求（以及每次流式脚本执行）绑定一个 Trace，期间的设备 RPC
+（uiautomator2 JSON-RPC、shell、adb shell 和 sync 文件传输）都记录为 span：操作名、耗时、返回数据量。
+脚本语句作为父级 span 记录，语句内的设备调用按时间嵌套在语句下面。
+
+响应头中返回汇总，便于直接看出一个接口发出了多少次设备调用：
+- X-Device-RPC-Count: 设备调用次数
+- Server-Timing: rpc（设备调用总耗时和次数）、各调用类型耗时、total（到响应头发出为止的耗时）
+
+配置 TRACE_FILE 后，每个 trace 追加写入 Chrome trace-event 格式（JSON 数组格式，末尾不闭合）的文件，
+可以直接用 chrome://tracing 或 Perfetto 打开：每个请求占一行，设备调用嵌套在请求和脚本语句下面。
+文件由后台线程写入（见 ChromeTraceWriter），不阻塞事件循环；超过 TRACE_FILE_MAX_MB 时
+当前文件改名为 <TRACE_FILE>.1（覆盖上一个），再写入新文件。
+
+注意：合并读取（见 device_executor.run_shared）只有实际发起设备调用的请求记录 span。
+"""
+
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import get_settings
+from .instrumentation import RpcEvent, rpc_listener
+
+# 每个 trace 最多保留的 span 数（超出后只计数），避免长时间运行的脚本占用过多内存
+MAX_SPANS = 10000
+
+# 等待写入文件的 trace 数上限（超出后丢弃并计数），避免磁盘过慢时占用过多内存
+MAX_PENDING_TRACES = 1000
+
+logger = logging.getLogger(__name__)
+
+_trace_ids = itertools.count(1)
+
+
+@dataclass
+class Span:
+    """
+    一个计时区间
+
+    Attributes:
+        name: 名称（设备调用为操作名，脚本语句为 "行号 命令"）
+        category: 类别（jsonrpc / shell / sync / script）
+        start: 开始时间（time.perf_counter() 秒）
+        duration: 耗时（秒）
+        args: 附加信息（设备序列号、数据量、是否出错等）
+    """
+
+    name: str
+    category: str
+    start: float
+    duration: float
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+class Trace:
+    """
+    一次请求或脚本执行的追踪记录
+
+    设备调用可能在设备执行器线程中记录，所有修改都在锁内完成。
+
+    Attributes:
+        name: 名称（如 "GET /api/v1/input/hierarchy"）
+        id: 进程内唯一编号（Chrome trace 中的行号）
+        start: 开始时间（time.perf_counter() 秒）
+        rpc_count: 设备调用次数
+        rpc_time: 设备调用总耗时（秒）
+        spans: 记录的 span（keep_spans 为 False 时为空）
+    """
+
+    def __init__(self, name: str, keep_spans: bool = False):
+        """
+        创建追踪记录
+
+        Args:
+            name: 名称
+            keep_spans: 是否保留每个 span（写入 trace 文件时需要），否则只做汇总
+        """
+        self.name = name
+        self.id = next(_trace_ids)
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.rpc_count = 0
+        self.rpc_time = 0.0
+        self.rpc_time_by_kind: Dict[str, float] = {}
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self.keep_spans = keep_spans
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        """是否已结束（结束后不再记录，例如请求返回后仍在运行的后台任务）"""
+        return self.end is not None
+
+    def _add(self, span: Span) -> None:
+        if len(self.spans) < MAX_SPANS:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+
+    def record_rpc(self, event: RpcEvent) -> None:
+        """
+        记录一次设备调用（作为上下文监听器注册到 app.core.instrumentation）
+
+        Args:
+            event: 设备调用事件
+        """
+        end = time.perf_counter()
+        with self._lock:
+            if self.end is not None:
+                return
+            self.rpc_count += 1
+            self.rpc_time += event.duration
+            self.rpc_time_by_kind[event.kind] = (
+                self.rpc_time_by_kind.get(event.kind, 0.0) + event.duration
+            )
+            if self.keep_spans:
+                args = {"serial": event.serial, "size": event.size}
+                if event.error:
+                    args["error"] = True
+                start = end - event.duration
+                self._add(Span(event.operation, event.kind, start, event.duration, args))
+
+    @contextmanager
+    def section(self, name: str, category: str = "script") -> Iterator[None]:
+        """
+        记录一个父级区间（如一条脚本语句）
+
+        Args:
+            name: 名称
+            category: 类别
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.keep_spans:
+                duration = time.perf_counter() - start
+                with self._lock:
+                    if self.end is None:
+                        self._add(Span(name, category, start, duration))
+
+    def finish(self) -> None:
+        """结束追踪"""
+        with self._lock:
+            if self.end is None:
+                self.end = time.perf_counter()
+
+    def server_timing(self) -> str:
+        """
+        生成 Server-Timing 响应头
+
+        Returns:
+            str: 例如 rpc;dur=12.5;desc="3 calls", jsonrpc;dur=12.5, total;dur=15.1
+        """
+        with self._lock:
+            count, rpc_time = self.rpc_count, self.rpc_time
+            by_kind = list(self.rpc_time_by_kind.items())
+        total = (self.end or time.perf_counter()) - self.start
+        metrics = [f'rpc;dur={rpc_time * 1000:.2f};desc="{count} calls"']
+        metrics.extend(f"{kind};dur={elapsed * 1000:.2f}" for kind, elapsed in by_kind)
+        metrics.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(metrics)
+
+    def chrome_events(self) -> List[Dict[str, Any]]:
+        """
+        转换为 Chrome trace-event 事件
+
+        Returns:
+            List[Dict]: 行名元数据事件、整体区间事件和各 span 的完整事件（ph=X，时间单位为微秒）
+        """
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+            end = self.end or time.perf_counter()
+            summary = {"rpc_count": self.rpc_count, "rpc_ms": round(self.rpc_time * 1000, 3)}
+            if self.dropped:
+                summary["dropped_spans"] = self.dropped
+        events: List[Dict[str, Any]] = [
+            {
+                "ph": "M",
+                "name": "thread_name",
+                "pid": pid,
+                "tid": self.id,
+                "args": {"name": self.name},
+            },
+            {
+                "ph": "X",
+                "name": self.name,
+                "cat": "trace",
+                "ts": self.start * 1e6,
+                "dur": (end - self.start) * 1e6,
+                "pid": pid,
+                "tid": self.id,
+                "args": summary,
+            },
+        ]
+        for span in spans:
+            events.append(
+                {
+                    "ph": "X",
+                    "name": span.name,
+                    "cat": span.category,
+                    "ts": span.start * 1e6,
+                    "dur": span.duration * 1e6,
+                    "pid": pid,
+                    "tid": self.id,
+                    "args": span.args,
+                }
+            )
+        return events
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_file_lock = threading.Lock()
+
+
+def current_trace() -> Optional[Trace]:
+    """
+    当前上下文的追踪记录
+
+    Returns:
+        Trace 或 None（当前不在追踪中）
+    """
+    return _current_trace.get()
+
+
+def recording_trace() -> Optional[Trace]:
+    """
+    当前上下文中保留 span 的追踪记录，供脚本执行器记录语句区间
+
+    Returns:
+        Trace 或 None（不在追踪中、只做汇总或已结束）
+    """
+    trace = _current_trace.get()
+    if trace is None or not trace.keep_spans or trace.finished:
+        return None
+    return trace
+
+
+@contextmanager
+def tracing(trace: Trace) -> Iterator[Trace]:
+    """
+    在当前上下文中开始追踪，期间的设备调用记录到 trace 中，退出时结束追踪
+
+    设备执行器复制调用方的上下文，在设备线程中发起的调用同样会被记录。
+
+    Args:
+        trace: 追踪记录
+
+    Usage:
+        with tracing(Trace("script")) as trace:
+            ...
+        print(trace.rpc_count)
+    """
+    token = _current_trace.set(trace)
+    try:
+        with rpc_listener(trace.record_rpc):
+            yield trace
+    finally:
+        trace.finish()
+        _current_trace.reset(token)
+
+
+def write_chrome_trace(trace: Trace, path: str, max_bytes: int = 0) -> None:
+    """
+    把追踪记录追加写入 Chrome trace-event 文件（JSON 数组格式，末尾的 ] 可以省略）
+
+    同步写入，服务中通过 trace_writer 在后台线程调用。
+
+    Args:
+        trace: 追踪记录
+        path: 文件路径
+        max_bytes: 文件超过该大小时先改名为 <path>.1（覆盖上一个）再写入新文件，为 0 时不轮转
+    """
+    events = trace.chrome_events()
+    lines = "".join(",\n" + json.dumps(event, ensure_ascii=False) for event in events)
+    with _file_lock:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if max_bytes and os.path.exists(path) and os.path.getsize(path) >= max_bytes:
+            os.replace(path, path + ".1")
+        with open(path, "a", encoding="utf-8") as file:
+            # 新文件以 [ 开头，之后的事件都以逗号分隔
+            file.write(("[" + lines[2:]) if file.tell() == 0 else lines)
+
+
+class ChromeTraceWriter:
+    """
+    在后台线程中写入 trace 文件
+
+    请求和脚本结束时只把已结束的 Trace 放入队列，序列化和磁盘写入都在写入线程中完成。
+    队列满时丢弃新的 trace 并计入 dropped。
+
+    Args:
+        max_pending: 等待写入的 trace 数上限
+    """
+
+    def __init__(self, max_pending: int = MAX_PENDING_TRACES):
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def submit(self, trace: Trace, path: str, max_bytes: int = 0) -> bool:
+        """
+        提交一个 trace（不阻塞）
+
+        Args:
+            trace: 已结束的追踪记录
+            path: 文件路径
+            max_bytes: 轮转大小（见 write_chrome_trace）
+
+        Returns:
+            是否已放入队列
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="trace-writer", daemon=True
+                )
+                self._thread.start()
+        try:
+            self._queue.put_nowait((trace, path, max_bytes))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self) -> None:
+        """等待已提交的 trace 全部写入"""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            trace, path, max_bytes = self._queue.get()
+            try:
+                write_chrome_trace(trace, path, max_bytes)
+            except OSError as e:
+                logger.warning(f"写入 trace 文件失败: {e}")
+            finally:
+                self._queue.task_done()
+
+
+# 全局写入线程
+trace_writer = ChromeTraceWriter()
+
+
+def submit_chrome_trace(trace: Trace) -> None:
+    """
+    按配置（TRACE_FILE、TRACE_FILE_MAX_MB）在后台写入有设备调用的 trace
+
+    Args:
+        trace: 已结束的追踪记录
+    """
+    settings = get_settings()
+    if settings.TRACE_FILE and trace.rpc_count:
+        trace_writer.submit(trace, settings.TRACE_FILE, settings.TRACE_FILE_MAX_MB * 1024 * 1024)
+
+
+class TraceMiddleware:
+    """
+    为每个 HTTP 请求绑定 Trace 的中间件
+
+    响应头中加入 X-Device-RPC-Count 和 Server-Timing；配置了 TRACE_FILE 时，
+    请求结束后把有设备调用的 trace 交给后台线程追加写入该文件。
+
+    Args:
+        app: ASGI 应用
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_file = get_settings().TRACE_FILE
+        trace = Trace(f"{scope['method']} {scope['path']}", keep_spans=bool(trace_file))
+
+        async def send_with_trace(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Device-RPC-Count", str(trace.rpc_count))
+                headers.append("Server-Timing", trace.server_timing())
+            await send(message)
+
+        try:
+            with tracing(trace):
+                await self.app(scope, receive, send_with_trace)
+        finally:
+            if trace.keep_spans:
+                submit_chrome_trace(trace)
+
+
+# 导出的公共接口
+__all__ = [
+    "MAX_SPANS",
+    "MAX_PENDING_TRACES",
+    "Span",
+    "Trace",
+    "current_trace",
+    "recording_trace",
+    "tracing",
+    "write_chrome_trace",
+    "ChromeTraceWriter",
+    "trace_writer",
+    "submit_chrome_trace",
+    "TraceMiddleware",
+]
@@ -0,0 +1,98 @@
+"""
+uiautomator2 私有接口适配模块
+
+脚本流水线的 JSON-RPC 批量请求依赖 uiautomator2 没有公开的接口，所有访问都集中在这里：
+- uiautomator2.core._http_request：向设备端服务发送 HTTP 请求
+- 设备对象的 _dev、_device_server_port 属性（由 BasicUiautomatorServer.__init__ 设置）
+- uiautomator2._proto.SCROLL_STEPS：swipe 默认的步数
+
+导入时检测一次，缺失的接口记录在 MISSING_INTERNALS 中：批量请求不可用时流水线逐条发送，
+SCROLL_STEPS 不可用时使用 uiautomator2 3.x 的默认值。pyproject.toml 将 uiautomator2
+限定在验证过的版本范围内，tests/test_u2_compat.py 在这些接口变化时失败。
+"""
+
+import inspect
+from typing import Any, Callable, Dict, List, Optional
+
+# uiautomator2 3.x 中 SCROLL_STEPS 的值
+DEFAULT_SCROLL_STEPS = 55
+
+# _http_request 的前几个参数，调用时按位置传入
+_HTTP_REQUEST_PARAMS = ["dev", "device_port", "method", "path", "data"]
+
+MISSING_INTERNALS: List[str] = []
+
+try:
+    from uiautomator2._proto import SCROLL_STEPS
+except ImportError:
+    SCROLL_STEPS = DEFAULT_SCROLL_STEPS
+    MISSING_INTERNALS.append("uiautomator2._proto.SCROLL_STEPS")
+
+
+def _detect_http_request() -> Optional[Callable[..., Any]]:
+    try:
+        from uiautomator2.core import BasicUiautomatorServer, _http_request
+    except ImportError:
+        MISSING_INTERNALS.append("uiautomator2.core._http_request")
+        return None
+    params = list(inspect.signature(_http_request).parameters)
+    if params[: len(_HTTP_REQUEST_PARAMS)] != _HTTP_REQUEST_PARAMS:
+        MISSING_INTERNALS.append(
+            "uiautomator2.core._http_request(dev, device_port, method, path, data)"
+        )
+        return None
+    # 设备属性在 __init__ 中设置，不连接设备无法直接检查，改为检查 __init__ 引用的属性名
+    assigned = BasicUiautomatorServer.__init__.__code__.co_names
+    missing = [name for name in ("_dev", "_device_server_port") if name not in assigned]
+    if missing:
+        MISSING_INTERNALS.extend(f"BasicUiautomatorServer.{name}" for name in missing)
+        return None
+    return _http_request
+
+
+_http_request = _detect_http_request()
+
+
+def supports_batch(device: Any) -> bool:
+    """
+    设备对象是否可以发送 JSON-RPC 批量请求
+
+    Args:
+        device: 设备对象
+
+    Returns:
+        uiautomator2 私有接口可用且设备对象是 uiautomator2 设备时返回 True
+    """
+    return (
+        _http_request is not None
+        and hasattr(device, "_dev")
+        and hasattr(device, "_device_server_port")
+    )
+
+
+def jsonrpc_batch(device: Any, payload: List[Dict[str, Any]], timeout: float = 10) -> Any:
+    """
+    向设备端 /jsonrpc/0 发送 JSON-RPC 2.0 批量请求（调用前应先检查 supports_batch）
+
+    Args:
+        device: uiautomator2 设备对象
+        payload: JSON-RPC 请求列表
+        timeout: 超时时间（秒）
+
+    Returns:
+        解析后的 JSON 响应
+    """
+    response = _http_request(
+        device._dev, device._device_server_port, "POST", "/jsonrpc/0", payload, timeout=timeout
+    )
+    return response.json()
+
+
+# 导出的公共接口
+__all__ = [
+    "DEFAULT_SCROLL_STEPS",
+    "MISSING_INTERNALS",
+    "SCROLL_STEPS",
+    "supports_batch",
+    "jsonrpc_batch",
+]
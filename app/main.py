@@ -3,9 +3,10 @@ Android Automation API 主应用模块
 
 这是 FastAPI 应用的入口模块，负责：
 - 创建 FastAPI 应用实例
-- 配置中间件（CORS 等）
+- 配置中间件（CORS、响应压缩、设备调用追踪、请求指标等）
 - 注册所有 API 路由
-- 提供根路径和健康检查接口
+- 把设备执行器的排队/超时错误转换为 503/504 响应
+- 提供根路径、健康检查和 Prometheus 指标接口
 
 启动方式：
     python -m uvicorn app.main:app --reload --host 0.0.0.0 --port 8000
@@ -14,7 +15,8 @@ Android Automation API 主应用模块
     http://localhost:8000/api/docs
 """
 
-from fastapi import FastAPI, applications
+from fastapi import FastAPI, Request, applications
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import (
@@ -24,8 +26,14 @@ from app.api import (
     app_router,
     adb_router,
     script_router,
+    remote_router,
 )
+from app.core.compression import CompressionMiddleware
 from app.core.config import get_settings
+from app.core.device_executor import DeviceBusyError, DeviceTimeoutError
+from app.core.instrumentation import add_rpc_listener
+from app.core.metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware, record_rpc
+from app.core.tracing import TraceMiddleware
 
 settings = get_settings()
 
@@ -68,7 +76,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 跨域页面也能读取设备调用汇总
+    expose_headers=["X-Device-RPC-Count", "Server-Timing"],
 )
+if settings.RESPONSE_COMPRESS_MIN_SIZE > 0:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.RESPONSE_COMPRESS_MIN_SIZE)
+# 每个请求的设备调用次数和耗时通过 X-Device-RPC-Count、Server-Timing 响应头返回
+app.add_middleware(TraceMiddleware)
+# 最外层：请求耗时包含压缩等中间件的开销
+app.add_middleware(MetricsMiddleware)
+
+# 所有设备 RPC 按设备和操作计入 /metrics
+add_rpc_listener(record_rpc)
 
 app.include_router(device_router, prefix="/api/v1")
 app.include_router(input_router, prefix="/api/v1")
@@ -76,10 +95,35 @@ app.include_router(navigation_router, prefix="/api/v1")
 app.include_router(app_router, prefix="/api/v1")
 app.include_router(adb_router, prefix="/api/v1")
 app.include_router(script_router, prefix="/api/v1")
+app.include_router(remote_router, prefix="/api/v1")
+
+
+@app.exception_handler(DeviceBusyError)
+async def device_busy_handler(request: Request, exc: DeviceBusyError):
+    """
+    设备繁忙处理
+
+    设备执行器排队的调用已达上限时返回 503，提示客户端稍后重试。
+
+    Returns:
+        JSONResponse: 503 响应。
+    """
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(DeviceTimeoutError)
+async def device_timeout_handler(request: Request, exc: DeviceTimeoutError):
+    """
+    设备调用超时处理
+
+    Returns:
+        JSONResponse: 504 响应。
+    """
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
 
 
 @app.get("/")
-def root():
+async def root():
     """
     根路径接口
 
@@ -92,13 +136,28 @@ def root():
 
 
 @app.get("/health")
-def health():
+async def health():
     """
     健康检查接口
 
-    用于服务监控和负载均衡器的健康探测。
+    用于服务监控和负载均衡器的健康探测。直接在事件循环中返回，
+    不依赖线程池，设备调用堆积时同样能及时响应。
 
     Returns:
         dict: 包含服务状态的字典。
     """
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus 指标接口
+
+    输出请求耗时、处理中请求数、设备 RPC 耗时、设备执行器队列和缓存命中、脚本会话等指标，
+    指标在进程内汇总，抓取时才生成文本。
+
+    Returns:
+        PlainTextResponse: Prometheus 文本格式的指标。
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
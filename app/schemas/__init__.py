@@ -7,6 +7,7 @@
 包含以下模型：
 - 设备相关：DeviceConnectRequest, DeviceInfoResponse, DeviceStatusResponse
 - 操作相关：ActionRequest, ActionResponse
+- 批量操作：BatchStep, BatchRequest, BatchStepResult, BatchResponse
 - 人类模拟：HumanClickRequest, HumanDoubleClickRequest, HumanLongPressRequest, HumanDragRequest
 """
 
@@ -19,6 +20,10 @@ from .action import (
     HumanLongPressRequest,
     HumanDragRequest,
     ClickByPointRequest,
+    BatchStep,
+    BatchRequest,
+    BatchStepResult,
+    BatchResponse,
 )
 
 __all__ = [
@@ -32,4 +37,8 @@ __all__ = [
     "HumanLongPressRequest",
     "HumanDragRequest",
     "ClickByPointRequest",
+    "BatchStep",
+    "BatchRequest",
+    "BatchStepResult",
+    "BatchResponse",
 ]
@@ -174,3 +174,73 @@ class HumanDragRequest(BaseModel):
     jitter_max: int = Field(5, description="直线轨迹抖动最大值（像素）")
     delay_min: float = Field(0.05, description="操作前延迟最小值（秒）")
     delay_max: float = Field(0.2, description="操作前延迟最大值（秒）")
+
+
+class BatchStep(BaseModel):
+    """
+    批量操作中的一步
+
+    Attributes:
+        service: 执行操作的服务（input、navigation、app）
+        action: 服务中的方法名
+        params: 方法参数
+    """
+
+    service: Literal["input", "navigation", "app"] = Field("input", description="服务")
+    action: str = Field(..., description="操作类型")
+    params: Dict[str, Any] = Field(default_factory=dict, description="操作参数")
+
+
+class BatchRequest(BaseModel):
+    """
+    批量操作请求模型
+
+    Attributes:
+        steps: 按顺序执行的操作
+        stop_on_error: 某一步失败后是否跳过剩余步骤
+        timing: 是否在结果中返回每一步的耗时
+    """
+
+    steps: List[BatchStep] = Field(..., description="按顺序执行的操作", min_length=1, max_length=200)
+    stop_on_error: bool = Field(True, description="某一步失败后是否跳过剩余步骤")
+    timing: bool = Field(False, description="是否返回每一步的耗时")
+
+
+class BatchStepResult(BaseModel):
+    """
+    批量操作中一步的执行结果
+
+    Attributes:
+        index: 步骤序号（从 0 开始）
+        service: 服务
+        action: 操作类型
+        success: 是否执行成功
+        result: 方法返回值
+        error: 失败原因
+        elapsed_ms: 耗时（毫秒，请求 timing 时返回）
+    """
+
+    index: int
+    service: str
+    action: str
+    success: bool
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    elapsed_ms: Optional[float] = None
+
+
+class BatchResponse(BaseModel):
+    """
+    批量操作响应模型
+
+    Attributes:
+        success: 所有步骤是否都执行成功
+        completed: 已执行的步骤数（包括失败的步骤）
+        results: 已执行步骤的结果
+        elapsed_ms: 总耗时（毫秒，请求 timing 时返回）
+    """
+
+    success: bool
+    completed: int
+    results: List[BatchStepResult]
+    elapsed_ms: Optional[float] = None
@@ -14,6 +14,9 @@ from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 from adbutils import AdbClient, AdbDevice
 
+from ..core.config import get_settings
+from ..core.instrumentation import instrument_adb_device
+
 
 @dataclass
 class AppInfo:
@@ -47,14 +50,24 @@ class AdbService:
         _device: AdbDevice 实例
     """
 
-    def __init__(self, device_serial: Optional[str] = None):
+    def __init__(
+        self,
+        device_serial: Optional[str] = None,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+    ):
         """
         初始化 ADB 服务
 
         Args:
             device_serial: 设备序列号。如果为 None，则使用第一个可用设备。
+            host: ADB server 地址，默认使用配置项 ADB_SERVER_HOST
+            port: ADB server 端口，默认使用配置项 ADB_SERVER_PORT
         """
-        self._client = AdbClient(host="127.0.0.1", port=5037)
+        settings = get_settings()
+        self._client = AdbClient(
+            host=host or settings.ADB_SERVER_HOST, port=port or settings.ADB_SERVER_PORT
+        )
         if device_serial:
             self._device = self._client.device(device_serial)
         else:
@@ -62,6 +75,7 @@ class AdbService:
             if not devices:
                 raise RuntimeError("No ADB devices found")
             self._device = devices[0]
+        instrument_adb_device(self._device)
 
     @property
     def device(self) -> AdbDevice:
@@ -0,0 +1,104 @@
+"""
+批量操作模块
+
+在一次调用中按顺序执行多个服务方法（input、navigation、app），
+每个服务只创建一次，整批操作只占用一次设备执行器调度，远程编排一个流程只需一次请求往返。
+"""
+
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from .base import AutomationService
+from .input import InputService
+from .navigation import NavigationService
+from .app_service import AppService
+from ..core.cancellation import OperationCancelled, check_cancelled
+from ..core.device import DeviceManager
+
+# 批量操作可以使用的服务
+BATCH_SERVICES: Dict[str, Type[AutomationService]] = {
+    "input": InputService,
+    "navigation": NavigationService,
+    "app": AppService,
+}
+
+
+def batch_wait(steps: List[Tuple[str, str, Dict[str, Any]]]) -> float:
+    """
+    整批操作中等待类步骤的等待时间之和（秒），累加到设备调用超时上
+
+    Args:
+        steps: (服务, 方法名, 参数) 列表
+
+    Returns:
+        各步骤 timeout 参数之和
+    """
+    total = 0.0
+    for _, _, params in steps:
+        timeout = params.get("timeout")
+        if isinstance(timeout, (int, float)) and not isinstance(timeout, bool):
+            total += max(float(timeout), 0.0)
+    return total
+
+
+def execute_batch(
+    device_manager: DeviceManager,
+    steps: List[Tuple[str, str, Dict[str, Any]]],
+    stop_on_error: bool = True,
+    timing: bool = False,
+    on_step: Optional[Callable[[], None]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    按顺序执行一批操作（阻塞，在设备执行器线程中调用）
+
+    Args:
+        device_manager: 设备管理器
+        steps: (服务, 方法名, 参数) 列表
+        stop_on_error: 某一步失败后是否跳过剩余步骤
+        timing: 是否记录每一步的耗时
+        on_step: 每一步执行后调用（无论成功与否），如使设备读取缓存失效
+
+    Returns:
+        已执行步骤的结果列表，每项包含 index、service、action、success、result、error，
+        timing 为 True 时还包含 elapsed_ms；方法抛出异常或返回 False 时该步骤失败
+
+    Raises:
+        OperationCancelled: 执行期间调用被取消（例如超时）
+    """
+    services: Dict[str, AutomationService] = {}
+    results: List[Dict[str, Any]] = []
+    for index, (name, action, params) in enumerate(steps):
+        check_cancelled()
+        item: Dict[str, Any] = {"index": index, "service": name, "action": action}
+        start = time.perf_counter()
+        try:
+            service = services.get(name)
+            if service is None:
+                service = services[name] = BATCH_SERVICES[name](device_manager)
+            item["result"] = service.execute(action, **params)["result"]
+            # 与 /input/click 等接口一致：方法返回 False（如元素不存在）视为失败
+            item["success"] = item["result"] is not False
+            if not item["success"]:
+                item["error"] = f"{action} returned False"
+        except OperationCancelled:
+            raise
+        except Exception as e:
+            item["success"] = False
+            item["error"] = str(e) or type(e).__name__
+        finally:
+            if on_step is not None:
+                on_step()
+        if timing:
+            item["elapsed_ms"] = (time.perf_counter() - start) * 1000
+        results.append(item)
+        if not item["success"] and stop_on_error:
+            break
+    return results
+
+
+# 导出的公共接口
+__all__ = [
+    "BATCH_SERVICES",
+    "batch_wait",
+    "execute_batch",
+]
@@ -12,9 +12,9 @@
 """
 
 from .base import AutomationService
+from ..core.cancellation import cancellable_sleep
 from typing import Any, Dict, List, Optional, Tuple, Literal
 import random
-import time
 import math
 import logging
 
@@ -742,7 +742,7 @@ class InputService(AutomationService):
                 while time.time() - start_time < timeout:
                     if not element.exists:
                         return True
-                    time.sleep(0.5)
+                    cancellable_sleep(0.5)
                 return not element.exists
             result = element.wait.gone(timeout=timeout)  # type: ignore
             return result is True
@@ -1383,7 +1383,7 @@ class InputService(AutomationService):
         final_x, final_y = self._add_random_offset(target_x, target_y, offset_range)
 
         delay = random.uniform(delay_range[0], delay_range[1])
-        time.sleep(delay)
+        cancellable_sleep(delay)
 
         duration = random.uniform(duration_range[0], duration_range[1])
 
@@ -1458,7 +1458,7 @@ class InputService(AutomationService):
             self.device.swipe(x1, y1, x1, y1, duration=duration1)
 
             interval = random.uniform(interval_range[0], interval_range[1])
-            time.sleep(interval)
+            cancellable_sleep(interval)
 
             x2, y2 = self._add_random_offset(target_x, target_y, offset_range)
             duration2 = random.uniform(duration_range[0], duration_range[1])
@@ -1530,7 +1530,7 @@ class InputService(AutomationService):
         final_x, final_y = self._add_random_offset(target_x, target_y, offset_range)
 
         delay = random.uniform(delay_range[0], delay_range[1])
-        time.sleep(delay)
+        cancellable_sleep(delay)
 
         duration = random.uniform(duration_range[0], duration_range[1])
 
@@ -1638,7 +1638,7 @@ class InputService(AutomationService):
 
         # 添加随机延迟
         delay = random.uniform(delay_range[0], delay_range[1])
-        time.sleep(delay)
+        cancellable_sleep(delay)
 
         # 生成基础轨迹
         if trajectory_type == "bezier":
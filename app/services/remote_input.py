@@ -0,0 +1,151 @@
+"""
+远程输入指令模块
+
+WebSocket 远程控制通道使用的紧凑指令格式，每条消息是一个 JSON 数组：
+
+    [序号, 操作, 参数...]
+
+支持的操作：
+- ["tap", x, y]                         点击
+- ["swipe", x1, y1, x2, y2, 时长?]      滑动（时长单位秒，默认 0.1）
+- ["key", 按键名]                       按键（home、back、enter 等 uiautomator2 按键名）
+- ["text", 文本]                        向当前焦点输入文本
+- ["down", x, y] / ["move", x, y] / ["up", x, y]   触摸按下 / 移动 / 抬起
+
+指令直接调用 uiautomator2 设备对象，不经过 InputService 和请求模型校验，
+参数只做必要的类型检查。
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Tuple
+
+# 滑动的默认时长（秒）
+DEFAULT_SWIPE_DURATION = 0.1
+
+
+@dataclass
+class InputCommand:
+    """
+    一条远程输入指令
+
+    Attributes:
+        seq: 客户端指定的序号（原样返回在确认消息中）
+        op: 操作名
+        args: 操作参数
+    """
+
+    seq: int
+    op: str
+    args: Tuple[Any, ...]
+
+    @property
+    def duration(self) -> float:
+        """指令本身的预期耗时（秒），累加到设备调用超时上"""
+        if self.op != "swipe":
+            return 0.0
+        duration = self.args[4] if len(self.args) > 4 else DEFAULT_SWIPE_DURATION
+        return float(duration) if isinstance(duration, (int, float)) else 0.0
+
+
+def _number(value: Any) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"Expected a number, got {value!r}")
+    return value
+
+
+def _string(value: Any) -> str:
+    if not isinstance(value, str):
+        raise ValueError(f"Expected a string, got {value!r}")
+    return value
+
+
+def _tap(device, x, y) -> None:
+    device.click(_number(x), _number(y))
+
+
+def _swipe(device, x1, y1, x2, y2, duration=DEFAULT_SWIPE_DURATION) -> None:
+    device.swipe(_number(x1), _number(y1), _number(x2), _number(y2), _number(duration))
+
+
+def _key(device, key) -> None:
+    device.press(_string(key))
+
+
+def _text(device, text) -> None:
+    device.send_keys(_string(text))
+
+
+def _down(device, x, y) -> None:
+    device.touch.down(_number(x), _number(y))
+
+
+def _move(device, x, y) -> None:
+    device.touch.move(_number(x), _number(y))
+
+
+def _up(device, x, y) -> None:
+    device.touch.up(_number(x), _number(y))
+
+
+# 操作名 -> (处理函数, 最少参数个数, 最多参数个数)
+_OPERATIONS: Dict[str, Tuple[Callable[..., None], int, int]] = {
+    "tap": (_tap, 2, 2),
+    "swipe": (_swipe, 4, 5),
+    "key": (_key, 1, 1),
+    "text": (_text, 1, 1),
+    "down": (_down, 2, 2),
+    "move": (_move, 2, 2),
+    "up": (_up, 2, 2),
+}
+
+
+def parse_command(message: Any) -> InputCommand:
+    """
+    解析一条指令
+
+    Args:
+        message: 已解码的 JSON 消息
+
+    Returns:
+        InputCommand: 指令
+
+    Raises:
+        ValueError: 消息格式错误、操作不存在或参数个数不对
+    """
+    if not isinstance(message, list) or len(message) < 2:
+        raise ValueError("Expected [seq, op, ...args]")
+    seq, op, *args = message
+    if isinstance(seq, bool) or not isinstance(seq, int):
+        raise ValueError(f"Invalid sequence number: {seq!r}")
+    operation = _OPERATIONS.get(op) if isinstance(op, str) else None
+    if operation is None:
+        raise ValueError(f"Unknown operation: {op!r}")
+    _, min_args, max_args = operation
+    if not min_args <= len(args) <= max_args:
+        raise ValueError(f"{op} expects {min_args}-{max_args} arguments, got {len(args)}")
+    return InputCommand(seq, op, tuple(args))
+
+
+def apply_command(device, command: InputCommand) -> None:
+    """
+    在设备上执行一条指令（阻塞，在设备执行器线程中调用）
+
+    Args:
+        device: uiautomator2 设备对象
+        command: 指令
+
+    Raises:
+        ValueError: 参数类型错误
+        Exception: 设备调用失败
+    """
+    handler, _, _ = _OPERATIONS[command.op]
+    handler(device, *command.args)
+
+
+# 导出的公共接口
+__all__ = [
+    "DEFAULT_SWIPE_DURATION",
+    "InputCommand",
+    "parse_command",
+    "apply_command",
+]
@@ -0,0 +1,109 @@
+"""
+异步脚本执行模块
+
+供异步路由使用的 ScriptExecutor 入口。脚本只有一个解释器：AsyncScriptExecutor 不重新实现
+控制流，而是把 execute_script / resume 整段交给当前设备的脚本线程池执行
+（见 DeviceExecutor.run_script），同一设备同时执行的脚本数受 DEVICE_SCRIPT_WORKERS 限制，
+超出的脚本排队等待，不会每个请求占用一个线程。
+
+等待方被取消（如客户端断开）时调用 stop()：排队中的脚本不再执行，正在执行的脚本通过取消令牌
+立即结束 wait、元素等待等阻塞操作并释放线程。
+
+脚本直接调用设备，不经过 API 的设备调用；每条访问设备的语句执行后使该设备缓存的读取结果失效，
+脚本运行期间 /input/hierarchy 等接口不会返回脚本操作之前的界面。
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, Optional
+
+from .script_checkpoint import Checkpoint
+from .script_parser import ASTNode, CommandNode, SetNode
+from .script_executor import ExecutionResult, ScriptExecutor
+from ..core.device_executor import DeviceExecutor, get_device_executor
+
+
+class AsyncScriptExecutor(ScriptExecutor):
+    """
+    异步脚本执行器
+
+    脚本语义与 ScriptExecutor 完全相同（执行的就是 ScriptExecutor 的代码），
+    区别只在于调用方在事件循环中等待结果。
+    """
+
+    def _device_executor(self) -> DeviceExecutor:
+        """获取当前设备的执行器"""
+        device = self._cached_device
+        if device is None and self.device_manager.is_connected():
+            device = self.device_manager.get_device()
+        serial = getattr(device, "serial", "") if device is not None else ""
+        return get_device_executor(serial or "")
+
+    def _dispatch_node(self, node: ASTNode) -> Any:
+        """执行节点，访问设备的语句执行后使读取缓存失效"""
+        try:
+            return super()._dispatch_node(node)
+        finally:
+            if isinstance(node, (CommandNode, SetNode)) and not self._is_host_only(node):
+                self._device_executor().invalidate()
+
+    async def _run_script(self, func: Callable[..., ExecutionResult], *args: Any) -> ExecutionResult:
+        """在设备的脚本线程池中执行，等待方被取消时停止脚本"""
+        executor = self._device_executor()
+        try:
+            return await executor.run_script(func, *args)
+        except asyncio.CancelledError:
+            self.stop()
+            raise
+        finally:
+            # 流水线中缓存的命令在脚本结束时才发送
+            executor.invalidate()
+
+    async def execute_script_async(
+        self,
+        source: str,
+        variables: Optional[Dict[str, Any]] = None,
+        script_dir: str = "",
+        log_callback: Optional[Callable[[str], None]] = None,
+        optimize: bool = False,
+        profile: bool = False,
+    ) -> ExecutionResult:
+        """
+        解析并执行脚本（参数同 ScriptExecutor.execute_script）
+
+        Args:
+            source: 脚本源代码
+            variables: 初始变量字典
+            script_dir: 脚本所在目录（用于call命令）
+            log_callback: 日志回调函数（在脚本线程中调用）
+            optimize: 是否在执行前对 AST 进行优化
+            profile: 是否记录性能分析数据
+
+        Returns:
+            ExecutionResult: 执行结果
+        """
+        return await self._run_script(
+            self.execute_script, source, variables, script_dir, log_callback, optimize, profile
+        )
+
+    async def resume_async(
+        self,
+        checkpoint: Checkpoint,
+        log_callback: Optional[Callable[[str], None]] = None,
+    ) -> ExecutionResult:
+        """
+        从检查点继续执行脚本（参数同 ScriptExecutor.resume）
+
+        Args:
+            checkpoint: 检查点
+            log_callback: 日志回调函数（在脚本线程中调用）
+
+        Returns:
+            ExecutionResult: 执行结果
+        """
+        return await self._run_script(self.resume, checkpoint, log_callback)
+
+
+# 导出的公共接口
+__all__ = [
+    "AsyncScriptExecutor",
+]
@@ -0,0 +1,354 @@
+"""
+脚本检查点模块
+
+长时间运行的脚本会定期保存可恢复的执行状态（变量、在 AST 中的执行位置、脚本内容哈希），
+因设备重启、ADB 断开等原因失败后，可以从检查点继续执行，而不必从头开始。
+
+执行位置用游标（cursor）表示：从顶层开始，每层语句块对应一个帧，
+帧中的 index 为当前语句在所在语句块中的序号，控制语句还会记录附加状态：
+- loop / while: iteration（当前迭代）
+- if: branch（0 为 then，1 起为 elif，-1 为 else）
+- try: part（进入 catch 后为 "catch"）
+- call: call（子脚本路径和内容哈希），其后的帧属于子脚本
+- 调用脚本内函数: func（函数名和局部变量），其后的帧属于函数体；variables 只保存全局变量
+
+恢复时从游标指向的语句开始重新执行（该语句会再执行一次）。
+并行块内部不保存检查点，从并行块恢复时整个并行块会重新执行。
+
+检查点先写入临时文件再通过 os.replace 替换，写入过程中进程崩溃不会留下损坏的检查点。
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any, Dict, List, Optional
+
+
+class CheckpointError(Exception):
+    """检查点无法恢复（脚本内容已变化或检查点损坏）"""
+
+    pass
+
+
+def script_hash(source: str) -> str:
+    """
+    计算脚本内容哈希
+
+    Args:
+        source: 脚本源代码
+
+    Returns:
+        SHA-256 十六进制字符串
+    """
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def _json_safe(value: Any) -> Any:
+    """转换为可 JSON 序列化的值（无法序列化的对象转为字符串）"""
+    return json.loads(json.dumps(value, ensure_ascii=False, default=str))
+
+
+@dataclass
+class Checkpoint:
+    """
+    脚本检查点
+
+    Attributes:
+        id: 检查点 ID（同一次执行及其恢复执行共用一个 ID）
+        source: 顶层脚本源代码
+        script_hash: 顶层脚本内容哈希
+        cursor: 执行位置（见模块说明）
+        variables: 保存时的变量
+        script_dir: 脚本所在目录
+        script_name: 脚本文件名（执行的是脚本文件时）
+        initial_variables: 开始执行时的变量（恢复时用于重建优化后的 AST）
+        optimize: 是否优化执行
+        reason: 保存原因（periodic / failure）
+        error: 失败时的错误信息
+        created_at: 保存时间（Unix 时间戳）
+    """
+
+    id: str
+    source: str
+    script_hash: str
+    cursor: List[Dict[str, Any]]
+    variables: Dict[str, Any]
+    script_dir: str = ""
+    script_name: Optional[str] = None
+    initial_variables: Dict[str, Any] = field(default_factory=dict)
+    optimize: bool = False
+    reason: str = "periodic"
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Checkpoint":
+        names = {f.name for f in fields(cls)}
+        try:
+            return cls(**{key: value for key, value in data.items() if key in names})
+        except TypeError as e:
+            raise CheckpointError(f"Invalid checkpoint: {e}")
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        检查点摘要（不含脚本内容和变量）
+
+        Returns:
+            摘要字典
+        """
+        return {
+            "id": self.id,
+            "script_name": self.script_name,
+            "script_hash": self.script_hash,
+            "cursor": self.cursor,
+            "reason": self.reason,
+            "error": self.error,
+            "created_at": self.created_at,
+        }
+
+
+class CheckpointStore:
+    """
+    检查点存储（每个检查点一个 JSON 文件）
+
+    Attributes:
+        directory: 存储目录
+    """
+
+    _ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+    def __init__(self, directory: str):
+        """
+        初始化存储
+
+        Args:
+            directory: 存储目录（不存在时在第一次保存时创建）
+        """
+        self.directory = directory
+
+    def path(self, checkpoint_id: str) -> str:
+        """
+        检查点文件路径
+
+        Args:
+            checkpoint_id: 检查点 ID
+
+        Returns:
+            文件路径
+
+        Raises:
+            ValueError: ID 包含非法字符
+        """
+        if not self._ID_PATTERN.match(checkpoint_id):
+            raise ValueError(f"Invalid checkpoint id: {checkpoint_id}")
+        return os.path.join(self.directory, f"{checkpoint_id}.json")
+
+    def save(self, checkpoint: Checkpoint) -> str:
+        """
+        原子地保存检查点
+
+        Args:
+            checkpoint: 检查点
+
+        Returns:
+            检查点文件路径
+        """
+        path = self.path(checkpoint.id)
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{checkpoint.id}.", suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(checkpoint.to_dict(), f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    def load(self, checkpoint_id: str) -> Optional[Checkpoint]:
+        """
+        读取检查点
+
+        Args:
+            checkpoint_id: 检查点 ID
+
+        Returns:
+            检查点，不存在时返回 None
+
+        Raises:
+            CheckpointError: 检查点文件损坏
+        """
+        path = self.path(checkpoint_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except ValueError as e:
+            raise CheckpointError(f"Corrupted checkpoint {checkpoint_id}: {e}")
+        return Checkpoint.from_dict(data)
+
+    def delete(self, checkpoint_id: str) -> bool:
+        """
+        删除检查点
+
+        Args:
+            checkpoint_id: 检查点 ID
+
+        Returns:
+            检查点存在并已删除时返回 True
+        """
+        path = self.path(checkpoint_id)
+        if not os.path.exists(path):
+            return False
+        os.remove(path)
+        return True
+
+    def list(self) -> List[Dict[str, Any]]:
+        """
+        列出所有检查点的摘要（按保存时间倒序）
+
+        Returns:
+            摘要列表
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        summaries = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".json") or filename.startswith("."):
+                continue
+            try:
+                checkpoint = self.load(filename[: -len(".json")])
+            except (CheckpointError, ValueError):
+                continue
+            if checkpoint is not None:
+                summaries.append(checkpoint.summary())
+        return sorted(summaries, key=lambda item: item["created_at"], reverse=True)
+
+
+class Checkpointer:
+    """
+    执行期间的检查点写入器（由 ScriptExecutor 驱动）
+
+    Attributes:
+        store: 检查点存储
+        checkpoint_id: 检查点 ID
+        interval: 定期保存的间隔（秒）
+        script_name: 脚本文件名
+        saved: 当前是否存在检查点文件
+    """
+
+    def __init__(
+        self,
+        store: CheckpointStore,
+        checkpoint_id: str,
+        interval: float = 30.0,
+        script_name: Optional[str] = None,
+    ):
+        """
+        初始化写入器
+
+        Args:
+            store: 检查点存储
+            checkpoint_id: 检查点 ID
+            interval: 定期保存的间隔（秒）
+            script_name: 脚本文件名
+        """
+        self.store = store
+        self.checkpoint_id = checkpoint_id
+        self.interval = interval
+        self.script_name = script_name
+        self.saved = False
+        self._source = ""
+        self._script_dir = ""
+        self._initial_variables: Dict[str, Any] = {}
+        self._optimize = False
+        self._last_save = time.monotonic()
+
+    def bind(
+        self,
+        source: str,
+        script_dir: str,
+        variables: Optional[Dict[str, Any]],
+        optimize: bool,
+    ) -> None:
+        """
+        绑定要执行的顶层脚本
+
+        Args:
+            source: 脚本源代码
+            script_dir: 脚本所在目录
+            variables: 初始变量
+            optimize: 是否优化执行
+        """
+        self._source = source
+        self._script_dir = script_dir
+        self._initial_variables = _json_safe(variables or {})
+        self._optimize = optimize
+        self._last_save = time.monotonic()
+
+    def due(self) -> bool:
+        """是否到了定期保存的时间"""
+        return time.monotonic() - self._last_save >= self.interval
+
+    def save(
+        self,
+        cursor: List[Dict[str, Any]],
+        variables: Dict[str, Any],
+        reason: str = "periodic",
+        error: Optional[str] = None,
+    ) -> Checkpoint:
+        """
+        保存检查点
+
+        Args:
+            cursor: 执行位置
+            variables: 当前变量
+            reason: 保存原因
+            error: 失败时的错误信息
+
+        Returns:
+            已保存的检查点
+        """
+        checkpoint = Checkpoint(
+            id=self.checkpoint_id,
+            source=self._source,
+            script_hash=script_hash(self._source),
+            cursor=_json_safe(cursor),
+            variables=_json_safe(variables),
+            script_dir=self._script_dir,
+            script_name=self.script_name,
+            initial_variables=self._initial_variables,
+            optimize=self._optimize,
+            reason=reason,
+            error=error,
+        )
+        self.store.save(checkpoint)
+        self.saved = True
+        self._last_save = time.monotonic()
+        return checkpoint
+
+    def discard(self) -> None:
+        """脚本执行完成后删除检查点"""
+        self.store.delete(self.checkpoint_id)
+        self.saved = False
+
+
+# 导出的公共接口
+__all__ = [
+    "Checkpoint",
+    "CheckpointError",
+    "CheckpointStore",
+    "Checkpointer",
+    "script_hash",
+]
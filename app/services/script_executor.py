@@ -6,9 +6,13 @@
 
 import os
 import re
+import threading
 import time
+from collections import ChainMap
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from dataclasses import dataclass, field
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Set
 
 from .script_parser import (
     ASTNode,
@@ -19,12 +23,27 @@ from .script_parser import (
     WhileNode,
     TryNode,
     CallNode,
+    ParallelNode,
+    FuncNode,
+    ReturnNode,
+    OnNode,
     BreakNode,
     ContinueNode,
     ConditionNode,
     parse_script,
 )
+from .script_expression import Expression
+from .script_watchers import WATCHED_COMMANDS, Watcher, WatcherSet, find_nodes
+from .script_optimizer import HOIST_PREFIX, ScriptOptimizer
+from .script_pipeline import CommandPipeline, JsonRpcTransport
+from .script_profiler import ScriptProfiler, node_kind, profiling
+from .script_log import LogBuffer, LogLevel, LogRecord
+from .script_checkpoint import Checkpoint, CheckpointError, Checkpointer, script_hash
+from ..core.cancellation import CancellationToken, OperationCancelled, cancellation_scope
+from ..core.config import get_settings
 from ..core.device import DeviceManager
+from ..core.hierarchy import Hierarchy
+from ..core.tracing import recording_trace
 from .input import InputService
 from .navigation import NavigationService
 from .app_service import AppService
@@ -43,17 +62,33 @@ class ContinueException(Exception):
     pass
 
 
+class ReturnException(Exception):
+    """函数返回异常，携带返回值"""
+
+    def __init__(self, value: Any = None):
+        super().__init__()
+        self.value = value
+
+
+# 语句块之间传递控制流的异常，不作为执行失败处理
+CONTROL_FLOW_EXCEPTIONS = (BreakException, ContinueException, ReturnException)
+
+
 @dataclass
 class ExecutionContext:
     """执行上下文"""
 
     variables: Dict[str, Any] = field(default_factory=dict)
-    logs: List[str] = field(default_factory=list)
+    logs: LogBuffer = field(default_factory=LogBuffer)
     current_line: int = 0
     script_dir: str = ""
     max_iterations: int = 10000
     stop_requested: bool = False
     log_callback: Optional[Callable[[str], None]] = None
+    log_prefix: str = ""  # 并行分支的日志前缀，例如 "[branch 1] "
+    log_branch: str = ""  # 并行分支标签，例如 "1"，嵌套分支为 "1.2"
+    shared_logs: bool = False  # 日志缓冲区由调用方（父脚本）持有
+    assigned: Set[str] = field(default_factory=set)  # 赋值过的变量名（并行分支按此合并变量）
 
 
 @dataclass
@@ -64,6 +99,12 @@ class ExecutionResult:
     logs: List[str] = field(default_factory=list)
     error: Optional[str] = None
     variables: Dict[str, Any] = field(default_factory=dict)
+    optimizations: List[Dict[str, Any]] = field(default_factory=list)
+    profile: Optional[Dict[str, Any]] = None
+    log_total: int = 0  # 记录的日志总数（logs 只包含缓冲区中最近的部分）
+    log_file: Optional[str] = None  # 完整日志的 NDJSON 文件（日志溢出或持久化时存在）
+    checkpoint_id: Optional[str] = None  # 可用于恢复执行的检查点（执行未完成时存在）
+    simulation: Optional[Dict[str, Any]] = None  # 模拟执行报告（见 script_simulator）
 
 
 class ScriptExecutor:
@@ -71,17 +112,43 @@ class ScriptExecutor:
     脚本执行器
 
     负责执行解析后的AST，将脚本命令转换为实际的设备操作。
+
+    Attributes:
+        MAX_FUNCTION_DEPTH: 脚本内函数调用的最大嵌套深度（防止无限递归）
+        WAIT_SLICE: wait_element / wait_gone 单次服务端等待的最长时间（秒），
+            更长的超时拆成多次等待，每次之间检查取消
+        WATCH_INTERVAL: 两次事件处理器检查（导出界面快照）之间的最小间隔（秒），
+            也是有事件处理器时等待期间的检查周期
     """
 
-    def __init__(self, device_manager: DeviceManager):
+    MAX_FUNCTION_DEPTH = 64
+    WAIT_SLICE = 1.0
+    WATCH_INTERVAL = 1.0
+
+    def __init__(
+        self,
+        device_manager: DeviceManager,
+        log_level: Optional[str] = None,
+        log_capacity: Optional[int] = None,
+        log_file: Optional[str] = None,
+    ):
         """
         初始化脚本执行器
 
         Args:
             device_manager: 设备管理器实例
+            log_level: 最低日志级别（trace/debug/info/warning/error），默认读取配置
+            log_capacity: 内存中保留的日志条数，默认读取配置
+            log_file: 日志溢出文件（NDJSON），为 None 时溢出的日志直接丢弃
         """
         self.device_manager = device_manager
 
+        settings = get_settings()
+        default_level = LogLevel.parse(settings.SCRIPT_LOG_LEVEL, LogLevel.TRACE)
+        self.log_level = LogLevel.parse(log_level, default_level)
+        self.log_capacity = log_capacity or settings.SCRIPT_LOG_CAPACITY
+        self.log_file = log_file
+
         # 初始化各种服务（延迟初始化）
         self._input_service = None
         self._navigation_service = None
@@ -92,6 +159,35 @@ class ScriptExecutor:
         # 执行上下文
         self.context: Optional[ExecutionContext] = None
 
+        # 设备命令流水线（通过脚本中的 pipeline on/off 开启）
+        self._pipeline = CommandPipeline(lambda: JsonRpcTransport(self._ensure_device()))
+
+        # 正在运行的并行分支执行器（用于传播停止信号）
+        self._branches: List["ScriptExecutor"] = []
+
+        # 性能分析器（仅在 execute_script(profile=True) 期间存在）
+        self._profiler: Optional[ScriptProfiler] = None
+
+        # 检查点写入器（由调用方设置，为 None 时不保存检查点）
+        self.checkpointer: Optional[Checkpointer] = None
+        # 当前执行位置，每层语句块一个帧（格式见 script_checkpoint 模块说明）
+        self._cursor: List[Dict[str, Any]] = []
+        # 最内层失败语句的执行位置（异常向外传播时记录）
+        self._failed_cursor: Optional[List[Dict[str, Any]]] = None
+        # 从检查点恢复时尚未进入的帧，以及刚进入的语句和它的帧
+        self._resume_path: Optional[List[Dict[str, Any]]] = None
+        self._resume_frame: Optional[tuple] = None
+        # call 子脚本的嵌套深度
+        self._call_depth = 0
+        # 取消令牌：stop() 时取消，执行期间绑定到上下文，所有等待和设备调用都会响应
+        self._cancel = CancellationToken()
+        # 当前脚本顶层定义的函数（每次 execute_ast 时登记一次），以及函数调用的嵌套深度
+        self._functions: Dict[str, FuncNode] = {}
+        self._function_depth = 0
+        # 事件处理器（每次 execute_ast 时登记），以及是否正在执行处理器（处理器内不再检查）
+        self._watchers: Optional[WatcherSet] = None
+        self._in_watcher = False
+
     def _ensure_device(self):
         """
         确保设备已连接，如果未连接则自动连接
@@ -123,8 +219,8 @@ class ScriptExecutor:
 
     @property
     def device(self):
-        """获取设备对象"""
-        return self._cached_device
+        """获取设备对象（未连接时自动连接）"""
+        return self._ensure_device()
 
     @property
     def input_service(self):
@@ -152,6 +248,9 @@ class ScriptExecutor:
         variables: Optional[Dict[str, Any]] = None,
         script_dir: str = "",
         log_callback: Optional[Callable[[str], None]] = None,
+        optimize: bool = False,
+        profile: bool = False,
+        logs: Optional[LogBuffer] = None,
     ) -> ExecutionResult:
         """
         解析并执行脚本
@@ -161,14 +260,56 @@ class ScriptExecutor:
             variables: 初始变量字典
             script_dir: 脚本所在目录（用于call命令）
             log_callback: 日志回调函数，用于实时输出日志
+            optimize: 是否在执行前对 AST 进行优化（仅作用于当前脚本，不包括 call 的子脚本）
+            profile: 是否记录性能分析数据（结果见 ExecutionResult.profile）
+            logs: 日志缓冲区（call 子脚本与父脚本共享），默认新建
 
         Returns:
             ExecutionResult: 执行结果
         """
+        if not profile:
+            return self._execute_source(source, variables, script_dir, log_callback, optimize, logs)
+
+        self._profiler = ScriptProfiler()
+        try:
+            with profiling(self._profiler):
+                result = self._execute_source(
+                    source, variables, script_dir, log_callback, optimize, logs
+                )
+            result.profile = self._profiler.report()
+            return result
+        finally:
+            self._profiler = None
+
+    def _execute_source(
+        self,
+        source: str,
+        variables: Optional[Dict[str, Any]],
+        script_dir: str,
+        log_callback: Optional[Callable[[str], None]],
+        optimize: bool,
+        logs: Optional[LogBuffer] = None,
+    ) -> ExecutionResult:
+        """解析并执行脚本（参数同 execute_script）"""
+        if self.checkpointer is not None and not self._call_depth:
+            self.checkpointer.bind(source, script_dir, variables, optimize)
         try:
             # 解析脚本
             ast = parse_script(source)
-            return self.execute_ast(ast, variables, script_dir, log_callback)
+            if not optimize:
+                return self.execute_ast(ast, variables, script_dir, log_callback, logs)
+
+            optimizer = ScriptOptimizer(variables)
+            ast = optimizer.optimize(ast)
+            result = self.execute_ast(ast, variables, script_dir, log_callback, logs)
+            result.optimizations = optimizer.report()
+            # 移除循环不变量外提产生的临时变量
+            result.variables = {
+                name: value
+                for name, value in result.variables.items()
+                if not name.startswith(HOIST_PREFIX)
+            }
+            return result
         except SyntaxError as e:
             error_msg = f"Syntax error: {str(e)}"
             if log_callback:
@@ -190,6 +331,7 @@ class ScriptExecutor:
         variables: Optional[Dict[str, Any]] = None,
         script_dir: str = "",
         log_callback: Optional[Callable[[str], None]] = None,
+        logs: Optional[LogBuffer] = None,
     ) -> ExecutionResult:
         """
         执行AST
@@ -199,6 +341,7 @@ class ScriptExecutor:
             variables: 初始变量字典
             script_dir: 脚本所在目录
             log_callback: 日志回调函数
+            logs: 日志缓冲区，默认新建
 
         Returns:
             ExecutionResult: 执行结果
@@ -206,41 +349,178 @@ class ScriptExecutor:
         # 初始化执行上下文
         self.context = ExecutionContext(
             variables=variables.copy() if variables else {},
+            logs=logs if logs is not None else self._new_log_buffer(),
             script_dir=script_dir,
             log_callback=log_callback,
+            shared_logs=logs is not None,
         )
+        self._pipeline.enabled = False
+        self._pipeline.discard()
+        self._functions = self._define_functions(ast)
+        self._watchers = self._register_watchers(ast)
+        if not self._call_depth:
+            self._cursor = []
+            self._failed_cursor = None
+
+        with cancellation_scope(self._cancel):
+            try:
+                for index in range(self._block_start(), len(ast)):
+                    if self.context.stop_requested:
+                        self.log("Execution stopped by user", level=LogLevel.WARNING)
+                        break
+                    self._cursor.append({"index": index})
+                    try:
+                        self.execute_node(ast[index])
+                    finally:
+                        self._cursor.pop()
 
-        try:
-            for node in ast:
                 if self.context.stop_requested:
-                    self.log("Execution stopped by user")
-                    break
-                self.execute_node(node)
+                    self._pipeline.discard()
+                else:
+                    self._pipeline.flush()
+                    self._discard_checkpoint()
 
-            return ExecutionResult(
-                success=True, logs=self.context.logs, variables=self.context.variables
-            )
-        except BreakException:
-            return ExecutionResult(
-                success=False,
-                error="Break outside of loop",
-                logs=self.context.logs,
-                variables=self.context.variables,
-            )
-        except ContinueException:
-            return ExecutionResult(
-                success=False,
-                error="Continue outside of loop",
-                logs=self.context.logs,
-                variables=self.context.variables,
-            )
-        except Exception as e:
-            return ExecutionResult(
-                success=False,
-                error=str(e),
-                logs=self.context.logs,
-                variables=self.context.variables,
+                return self._result(True)
+            except BreakException:
+                return self._result(False, "Break outside of loop")
+            except ContinueException:
+                return self._result(False, "Continue outside of loop")
+            except ReturnException:
+                return self._result(False, "Return outside of function")
+            except Exception as e:
+                self._pipeline.discard()
+                self._checkpoint_failure(e)
+                return self._result(False, str(e))
+
+    @staticmethod
+    def _define_functions(ast: List[ASTNode]) -> Dict[str, FuncNode]:
+        """
+        登记脚本顶层定义的函数（函数可以在定义之前调用）
+
+        Args:
+            ast: AST节点列表
+
+        Returns:
+            函数名到函数定义的映射
+        """
+        return {node.name: node for node in ast if isinstance(node, FuncNode)}
+
+    def _register_watchers(self, ast: List[ASTNode]) -> WatcherSet:
+        """
+        登记脚本顶层定义的事件处理器（与定义位置无关，脚本开始执行时即生效）
+
+        子脚本的处理器在子脚本执行期间与调用方的处理器一起生效。
+
+        Args:
+            ast: AST节点列表
+
+        Returns:
+            事件处理器集合
+        """
+        handlers = [node for node in ast if isinstance(node, OnNode)]
+        parent = self._watchers if self._call_depth else None
+        if parent is not None and not handlers:
+            return parent
+        return WatcherSet(handlers, self.WATCH_INTERVAL, parent)
+
+    def resume(
+        self,
+        checkpoint: Checkpoint,
+        log_callback: Optional[Callable[[str], None]] = None,
+    ) -> ExecutionResult:
+        """
+        从检查点继续执行脚本
+
+        检查点所在的语句会重新执行一次。设置了 checkpointer 时，恢复后的执行继续保存检查点。
+
+        Args:
+            checkpoint: 检查点
+            log_callback: 日志回调函数
+
+        Returns:
+            ExecutionResult: 执行结果
+        """
+        try:
+            ast = self._prepare_resume(checkpoint)
+        except (SyntaxError, CheckpointError) as e:
+            error_msg = f"Resume error: {str(e)}"
+            if log_callback:
+                log_callback(error_msg)
+            return ExecutionResult(success=False, error=error_msg, logs=[error_msg])
+        try:
+            result = self.execute_ast(ast, checkpoint.variables, checkpoint.script_dir, log_callback)
+        finally:
+            self._resume_path = None
+        return self._resumed_result(result, checkpoint)
+
+    def _prepare_resume(self, checkpoint: Checkpoint) -> List[ASTNode]:
+        """
+        校验检查点并重建 AST（优化执行的脚本按原始初始变量重新优化，保证语句序号一致）
+
+        Args:
+            checkpoint: 检查点
+
+        Returns:
+            AST节点列表
+
+        Raises:
+            CheckpointError: 脚本内容与检查点不一致
+            SyntaxError: 脚本语法错误
+        """
+        if script_hash(checkpoint.source) != checkpoint.script_hash:
+            raise CheckpointError("Script content does not match checkpoint hash")
+        ast = parse_script(checkpoint.source)
+        if checkpoint.optimize:
+            ast = ScriptOptimizer(checkpoint.initial_variables).optimize(ast)
+
+        if self.checkpointer is not None:
+            self.checkpointer.bind(
+                checkpoint.source,
+                checkpoint.script_dir,
+                checkpoint.initial_variables,
+                checkpoint.optimize,
             )
+            self.checkpointer.saved = self.checkpointer.checkpoint_id == checkpoint.id
+        self._resume_path = [dict(frame) for frame in checkpoint.cursor]
+        return ast
+
+    @staticmethod
+    def _resumed_result(result: ExecutionResult, checkpoint: Checkpoint) -> ExecutionResult:
+        """移除优化执行产生的临时变量"""
+        if checkpoint.optimize:
+            result.variables = {
+                name: value
+                for name, value in result.variables.items()
+                if not name.startswith(HOIST_PREFIX)
+            }
+        return result
+
+    def _new_log_buffer(self, spill: bool = True) -> LogBuffer:
+        """按执行器配置创建日志缓冲区"""
+        return LogBuffer(
+            capacity=self.log_capacity,
+            level=self.log_level,
+            spill_path=self.log_file if spill else None,
+        )
+
+    def _result(self, success: bool, error: Optional[str] = None) -> ExecutionResult:
+        """根据当前执行上下文生成执行结果"""
+        logs = self.context.logs
+        logs.close()
+        return ExecutionResult(
+            success=success,
+            error=error,
+            # 共享的缓冲区由父脚本统一输出，避免每次 call 都格式化整个缓冲区
+            logs=[] if self.context.shared_logs else logs.formatted(),
+            variables=self.context.variables,
+            log_total=logs.total,
+            log_file=logs.spill_path if logs.on_disk else None,
+            checkpoint_id=(
+                self.checkpointer.checkpoint_id
+                if self.checkpointer is not None and self.checkpointer.saved and not self._call_depth
+                else None
+            ),
+        )
 
     def execute_node(self, node: ASTNode) -> Any:
         """
@@ -258,7 +538,135 @@ class ScriptExecutor:
         if self.context:
             self.context.current_line = node.line
 
+        if self._resume_path is not None:
+            self._enter_resume(node)
+        elif self.checkpointer is not None and self.checkpointer.due():
+            self._save_checkpoint()
+
+        profiler = self._profiler
+        trace = recording_trace()
+        try:
+            if profiler is None and trace is None:
+                return self._dispatch_node(node)
+            if profiler is not None:
+                profiler.enter(node)
+            try:
+                if trace is None:
+                    return self._dispatch_node(node)
+                # 语句作为父级 span，语句内的设备调用嵌套在下面
+                with trace.section(f"{node.line} {node_kind(node)}"):
+                    return self._dispatch_node(node)
+            finally:
+                if profiler is not None:
+                    profiler.exit()
+        except CONTROL_FLOW_EXCEPTIONS:
+            raise
+        except Exception:
+            if self._failed_cursor is None:
+                self._failed_cursor = [dict(frame) for frame in self._cursor]
+            raise
+
+    # ============ 执行位置与检查点 ============
+
+    def _execute_block(self, body: List[ASTNode]) -> None:
+        """执行语句块，并在执行位置中记录当前语句的序号"""
+        cursor = self._cursor
+        for index in range(self._block_start(), len(body)):
+            cursor.append({"index": index})
+            try:
+                self.execute_node(body[index])
+            finally:
+                cursor.pop()
+
+    def _block_start(self) -> int:
+        """语句块的起始序号（从检查点恢复时跳过已执行的语句）"""
+        return self._resume_path[0]["index"] if self._resume_path else 0
+
+    def _enter_resume(self, node: ASTNode) -> None:
+        """进入检查点路径上的语句，路径走完后恢复正常执行"""
+        self._resume_frame = (node, self._resume_path.pop(0))
+        if not self._resume_path:
+            self._resume_path = None
+
+    def _take_resume(self, node: ASTNode) -> Optional[Dict[str, Any]]:
+        """
+        取出当前语句在检查点中的帧
+
+        Args:
+            node: 正在执行的控制语句
+
+        Returns:
+            该语句是从检查点恢复进入的则返回其帧，否则返回 None
+        """
+        if self._resume_frame is None or self._resume_frame[0] is not node:
+            return None
+        frame = self._resume_frame[1]
+        self._resume_frame = None
+        return frame
+
+    def _cursor_frame(self) -> Dict[str, Any]:
+        """当前语句的执行位置帧"""
+        return self._cursor[-1] if self._cursor else {}
+
+    def _save_checkpoint(self) -> None:
+        """在当前语句之前保存检查点（先发送流水线中缓存的命令）"""
+        self._pipeline.flush()
+        self.checkpointer.save(self._cursor, self._global_variables())
+
+    def _global_variables(self) -> Dict[str, Any]:
+        """
+        脚本的全局变量表
+
+        函数体内的变量表是 ChainMap(局部变量, 全局变量)，局部变量保存在游标的函数帧中。
+        """
+        variables = self.context.variables
+        return variables.maps[-1] if isinstance(variables, ChainMap) else variables
+
+    def _assign(self, name: str, value: Any) -> None:
+        """
+        给变量赋值
+
+        脚本层级的赋值记录到执行上下文的 assigned 中，并行分支结束后按它合并变量；
+        函数体内的局部变量不记录。
+
+        Args:
+            name: 变量名
+            value: 值
+        """
+        variables = self.context.variables
+        variables[name] = value
+        if not isinstance(variables, ChainMap):
+            self.context.assigned.add(name)
+
+    def _discard_checkpoint(self) -> None:
+        """顶层脚本正常执行完成后删除检查点"""
+        if self.checkpointer is not None and not self._call_depth:
+            self.checkpointer.discard()
+
+    def _checkpoint_failure(self, error: Exception) -> None:
+        """
+        顶层脚本失败时在失败的语句处保存检查点
+
+        Args:
+            error: 导致失败的异常
+        """
+        cursor, self._failed_cursor = self._failed_cursor, None
+        if self.checkpointer is None or self._call_depth or cursor is None:
+            return
+        self.checkpointer.save(cursor, self._global_variables(), reason="failure", error=str(error))
+
+    def _dispatch_node(self, node: ASTNode) -> Any:
+        """按节点类型分发执行"""
+        if self._pipeline.enabled:
+            if isinstance(node, CommandNode) and self._defer_command(node):
+                return True
+            if not self._is_host_only(node):
+                # 即将读取设备状态或执行无法缓存的命令，先发送缓存的调用
+                self._pipeline.flush()
+
         if isinstance(node, CommandNode):
+            if self._watching and node.command.lower() in WATCHED_COMMANDS:
+                self._check_watchers()
             return self.execute_command(node)
         elif isinstance(node, SetNode):
             return self.execute_set(node)
@@ -272,14 +680,53 @@ class ScriptExecutor:
             return self.execute_try(node)
         elif isinstance(node, CallNode):
             return self.execute_call(node)
+        elif isinstance(node, ParallelNode):
+            return self.execute_parallel(node)
+        elif isinstance(node, (FuncNode, OnNode)):
+            # 函数和事件处理器在 execute_ast 开始时已经登记
+            return None
+        elif isinstance(node, ReturnNode):
+            raise ReturnException(self._return_value(node))
         elif isinstance(node, BreakNode):
             raise BreakException()
         elif isinstance(node, ContinueNode):
             raise ContinueException()
         else:
-            self.log(f"Unknown node type: {type(node).__name__}")
+            self.log("Unknown node type: {}", type(node).__name__, level=LogLevel.WARNING)
             return None
 
+    @staticmethod
+    def _is_host_only(node: ASTNode) -> bool:
+        """判断节点是否只在本地执行（不访问设备）"""
+        if isinstance(node, SetNode):
+            return not node.command and node.call is None
+        if isinstance(node, CommandNode):
+            return node.command.lower() == "log"
+        return isinstance(node, (BreakNode, ContinueNode, FuncNode, OnNode, ReturnNode))
+
+    def _defer_command(self, node: CommandNode) -> bool:
+        """
+        尝试将语句级命令加入流水线
+
+        语句级命令的返回值不会被使用，可以延迟到下一次 flush 时批量发送。
+
+        Args:
+            node: 命令节点
+
+        Returns:
+            已加入流水线返回 True
+        """
+        command = node.command.lower()
+        args = [self._interpolate_variables(self._resolve_value(arg)) for arg in node.args]
+        call = self._pipeline.build_call(
+            node.line, command, args, bool(node.selector_type and node.selector_value)
+        )
+        if call is None:
+            return False
+        self._pipeline.submit(call)
+        self.log("Pipelined: {} {}", command, args, level=LogLevel.TRACE)
+        return True
+
     def _resolve_value(self, value: Any) -> Any:
         """
         解析变量引用
@@ -323,6 +770,24 @@ class ScriptExecutor:
 
         return re.sub(pattern, replace_match, value)
 
+    def _evaluate(self, expression: Expression) -> Any:
+        """
+        在主机侧对表达式求值（不访问设备）
+
+        Args:
+            expression: 编译后的表达式
+
+        Returns:
+            表达式的值
+        """
+        return expression.evaluate(self.context.variables, self._interpolate_variables)
+
+    def _return_value(self, node: ReturnNode) -> Any:
+        """计算 return 语句的返回值"""
+        if node.expression is not None:
+            return self._evaluate(node.expression)
+        return self._interpolate_variables(self._resolve_value(node.value))
+
     def _get_element(self, selector_type: Optional[str], selector_value: Optional[str]):
         """
         根据选择器获取元素
@@ -365,7 +830,7 @@ class ScriptExecutor:
         command = node.command.lower()
         args = [self._interpolate_variables(self._resolve_value(arg)) for arg in node.args]
 
-        self.log(f"Executing: {command} {args}")
+        self.log("Executing: {} {}", command, args, level=LogLevel.TRACE)
 
         # 点击命令
         if command == "click":
@@ -436,17 +901,21 @@ class ScriptExecutor:
         elif command == "wait":
             if args:
                 duration = float(args[0])
-                time.sleep(duration)
+                self._wait(duration)
                 return True
             return False
 
         elif command == "wait_element":
             if node.selector_type and node.selector_value:
                 timeout = float(args[0]) if args else 10.0
+                if self._watching:
+                    return self._wait_watched(node.selector_type, node.selector_value, timeout, True)
                 element = self._get_element(node.selector_type, node.selector_value)
-                if element:
+                if element is not None:
                     try:
-                        return element.wait(timeout=timeout)
+                        return self._wait_sliced(lambda t: element.wait(timeout=t), timeout)
+                    except OperationCancelled:
+                        raise
                     except Exception:
                         return element.exists
             return False
@@ -454,10 +923,14 @@ class ScriptExecutor:
         elif command == "wait_gone":
             if node.selector_type and node.selector_value:
                 timeout = float(args[0]) if args else 10.0
+                if self._watching:
+                    return self._wait_watched(node.selector_type, node.selector_value, timeout, False)
                 element = self._get_element(node.selector_type, node.selector_value)
-                if element:
+                if element is not None:
                     try:
-                        return element.wait_gone(timeout=timeout)
+                        return self._wait_sliced(lambda t: element.wait_gone(timeout=t), timeout)
+                    except OperationCancelled:
+                        raise
                     except Exception:
                         return not element.exists
             return False
@@ -540,7 +1013,7 @@ class ScriptExecutor:
         elif command == "find_element":
             if node.selector_type and node.selector_value:
                 result = self._find_element_by_selector(node.selector_type, node.selector_value)
-                self.log(f"Found element: {result}")
+                self.log("Found element: {}", result, level=LogLevel.DEBUG)
                 return result
             return {"exists": False}
 
@@ -548,14 +1021,14 @@ class ScriptExecutor:
         elif command == "find_elements":
             if node.selector_type and node.selector_value:
                 results = self._find_elements_by_selector(node.selector_type, node.selector_value)
-                self.log(f"Found {len(results)} elements")
+                self.log("Found {} elements", len(results), level=LogLevel.DEBUG)
                 return {"elements": results, "count": len(results)}
             return {"elements": [], "count": 0}
 
         # 导出界面结构
         elif command == "dump_hierarchy":
             xml = self.input_service.get_current_ui_xml()
-            self.log(f"Hierarchy dump: {len(xml)} chars")
+            self.log("Hierarchy dump: {} chars", len(xml), level=LogLevel.DEBUG)
             return xml
 
         # 检查元素存在
@@ -570,7 +1043,7 @@ class ScriptExecutor:
         elif command == "log":
             if args:
                 message = " ".join(str(arg) for arg in args)
-                self.log(f"[LOG] {message}")
+                self.log("[LOG] {}", message)
             return True
 
         # Shell命令
@@ -578,10 +1051,25 @@ class ScriptExecutor:
             if args:
                 cmd = str(args[0])
                 result = self.adb_service.shell(cmd)
-                self.log(f"[SHELL] {cmd} -> {result}")
+                self.log("[SHELL] {} -> {}", cmd, result, level=LogLevel.DEBUG)
                 return result
             return ""
 
+        # 流水线开关
+        elif command == "pipeline":
+            mode = str(args[0]).lower() if args else "on"
+            if mode in ("on", "true", "1"):
+                self._pipeline.enabled = True
+                self.log("Pipeline enabled")
+            else:
+                self._pipeline.flush()
+                self._pipeline.enabled = False
+                self.log(
+                    f"Pipeline disabled ({self._pipeline.calls} calls "
+                    f"in {self._pipeline.batches} batches)"
+                )
+            return True
+
         # ============ 人类模拟操作 ============
 
         # 人类模拟点击
@@ -607,12 +1095,12 @@ class ScriptExecutor:
                 # 连接指定设备（序列号或IP）
                 device_serial = str(args[0])
                 info = self.device_manager.connect(device_serial)
-                self.log(f"Connected to device: {info.serial} ({info.product_name})")
+                self.log("Connected to device: {} ({})", info.serial, info.product_name)
                 return info.serial
             else:
                 # 自动连接第一个可用设备
                 info = self.device_manager.connect()
-                self.log(f"Auto-connected to device: {info.serial} ({info.product_name})")
+                self.log("Auto-connected to device: {} ({})", info.serial, info.product_name)
                 return info.serial
 
         elif command == "get_status":
@@ -641,19 +1129,177 @@ class ScriptExecutor:
             if args:
                 package_name = str(args[0])
                 version = self.app_service.get_app_version(package_name)
-                self.log(f"App {package_name} version: {version}")
+                self.log("App {} version: {}", package_name, version)
                 return version
             return None
 
         elif command == "get_current_app":
             result = self.app_service.get_current_app()
-            self.log(f"Current app: {result}")
+            self.log("Current app: {}", result)
             return result
 
         else:
-            self.log(f"Unknown command: {command}")
+            self.log("Unknown command: {}", command, level=LogLevel.WARNING)
             return None
 
+    def _sleep(self, seconds: float) -> None:
+        """
+        wait 命令的等待（停止执行时立即结束；模拟执行时改为推进虚拟时钟）
+
+        Args:
+            seconds: 等待时间（秒）
+        """
+        self._cancel.sleep(seconds)
+
+    def _wait_sliced(self, wait: Callable[[float], Any], timeout: float) -> bool:
+        """
+        分段执行服务端等待，每段最长 WAIT_SLICE 秒，段之间检查取消
+
+        Args:
+            wait: 接收超时时间的等待函数（如 element.wait）
+            timeout: 总超时时间（秒）
+
+        Returns:
+            等待成功返回 True
+        """
+        deadline = time.monotonic() + timeout
+        remaining = timeout
+        while remaining > self.WAIT_SLICE:
+            self._cancel.raise_if_cancelled()
+            if wait(self.WAIT_SLICE):
+                return True
+            remaining = deadline - time.monotonic()
+        self._cancel.raise_if_cancelled()
+        return bool(wait(max(remaining, 0)))
+
+    # ============ 事件处理器 ============
+
+    @property
+    def _watching(self) -> bool:
+        """当前是否需要检查事件处理器（处理器执行期间不检查）"""
+        return bool(self._watchers) and not self._in_watcher
+
+    def _now(self) -> float:
+        """事件处理器计时使用的时钟（模拟执行时为虚拟时钟）"""
+        return time.monotonic()
+
+    def _snapshot(self) -> Hierarchy:
+        """导出当前界面的层次结构快照"""
+        return Hierarchy(self._ensure_device().dump_hierarchy())
+
+    def _watch_condition(self, cond: ConditionNode, hierarchy: Hierarchy) -> bool:
+        """
+        在快照上判断事件处理器的条件
+
+        Args:
+            cond: 条件节点（表达式或 exists <选择器>）
+            hierarchy: 界面快照
+
+        Returns:
+            条件是否成立
+        """
+        if cond.expression is not None:
+            return bool(self._evaluate(cond.expression))
+        value = self._interpolate_variables(self._resolve_value(cond.selector_value))
+        found = bool(find_nodes(hierarchy, cond.selector_type, str(value)))
+        return found != cond.negated
+
+    def _check_watchers(self, hierarchy: Optional[Hierarchy] = None) -> Optional[Hierarchy]:
+        """
+        在界面快照上检查事件处理器，命中时执行处理器并重新导出快照
+
+        Args:
+            hierarchy: 刚导出的快照，为 None 时距离上次检查超过检查间隔才导出
+
+        Returns:
+            最后一份快照（未检查时为 None）
+        """
+        watchers = self._watchers
+        if hierarchy is None:
+            if not watchers.due(self._now()):
+                return None
+            hierarchy = self._snapshot()
+        for _ in range(watchers.MAX_ROUNDS):
+            watcher = watchers.match(hierarchy, self._watch_condition, self._now())
+            if watcher is None:
+                break
+            self._fire_watcher(watcher)
+            hierarchy = self._snapshot()
+        return hierarchy
+
+    def _fire_watcher(self, watcher: Watcher) -> None:
+        """
+        执行事件处理器
+
+        处理器不属于脚本的执行位置：执行期间不保存检查点，处理器失败只记录警告，不中断脚本。
+
+        Args:
+            watcher: 命中的处理器
+        """
+        node = watcher.node
+        self.log("On handler at line {} triggered ({} times)", node.line, watcher.fired)
+        cursor, checkpointer = self._cursor, self.checkpointer
+        self._cursor, self.checkpointer = [], None
+        self._in_watcher = True
+        try:
+            self._execute_block(node.body)
+            self._pipeline.flush()
+        except OperationCancelled:
+            raise
+        except Exception as e:
+            if self.context.stop_requested:
+                raise
+            self._pipeline.discard()
+            self._failed_cursor = None
+            self.log(
+                "On handler at line {} failed: {}", node.line, str(e) or type(e).__name__, level=LogLevel.WARNING
+            )
+        finally:
+            self._in_watcher = False
+            self._cursor, self.checkpointer = cursor, checkpointer
+
+    def _wait(self, seconds: float) -> None:
+        """
+        wait 命令：有事件处理器时分段等待，每段之后检查处理器
+
+        Args:
+            seconds: 等待时间（秒）
+        """
+        if not self._watching:
+            self._sleep(seconds)
+            return
+        deadline = self._now() + seconds
+        while True:
+            remaining = deadline - self._now()
+            if remaining <= 0:
+                return
+            self._sleep(min(self._watchers.interval, remaining))
+            self._check_watchers()
+
+    def _wait_watched(self, selector_type: str, selector_value: str, timeout: float, expect: bool) -> bool:
+        """
+        有事件处理器时的元素等待：每轮导出一份快照，先执行命中的处理器，再在快照上判断元素
+
+        Args:
+            selector_type: 选择器类型
+            selector_value: 选择器值
+            timeout: 超时时间（秒）
+            expect: True 等待出现，False 等待消失
+
+        Returns:
+            在超时前达到期望状态返回 True
+        """
+        value = str(self._interpolate_variables(self._resolve_value(selector_value)))
+        deadline = self._now() + timeout
+        while True:
+            hierarchy = self._check_watchers(self._snapshot())
+            if bool(find_nodes(hierarchy, selector_type, value)) == expect:
+                return True
+            remaining = deadline - self._now()
+            if remaining <= 0:
+                return False
+            self._sleep(min(self._watchers.interval, remaining))
+
     def execute_set(self, node: SetNode) -> Any:
         """
         执行变量赋值节点
@@ -669,7 +1315,11 @@ class ScriptExecutor:
 
         variable = node.variable
 
-        if node.command:
+        if node.call is not None:
+            value = self.execute_call(node.call, site=node)
+        elif node.expression is not None:
+            value = self._evaluate(node.expression)
+        elif node.command:
             # 执行命令并获取结果
             cmd_node = CommandNode(
                 command=node.command,
@@ -684,8 +1334,8 @@ class ScriptExecutor:
             # 直接赋值
             value = self._interpolate_variables(self._resolve_value(node.value))
 
-        self.context.variables[variable] = value
-        self.log(f"Set {variable} = {value}")
+        self._assign(variable, value)
+        self.log("Set {} = {}", variable, value, level=LogLevel.DEBUG)
         return value
 
     def execute_if(self, node: IfNode) -> Any:
@@ -698,27 +1348,48 @@ class ScriptExecutor:
         Returns:
             执行的分支结果
         """
+        # 从检查点恢复时直接进入保存时所在的分支，不重新评估条件
+        resume = self._take_resume(node)
+        if resume is not None and "branch" in resume:
+            return self._execute_if_branch(node, resume["branch"])
+
         # 评估主条件
         if node.condition and self.evaluate_condition(node.condition):
-            for stmt in node.then_body:
-                self.execute_node(stmt)
-            return True
+            return self._execute_if_branch(node, 0)
 
         # 评估elif分支
-        for elif_condition, elif_body in node.elif_branches:
+        for index, (elif_condition, _) in enumerate(node.elif_branches, 1):
             if self.evaluate_condition(elif_condition):
-                for stmt in elif_body:
-                    self.execute_node(stmt)
-                return True
+                return self._execute_if_branch(node, index)
 
         # 执行else分支
         if node.else_body:
-            for stmt in node.else_body:
-                self.execute_node(stmt)
-            return True
+            return self._execute_if_branch(node, -1)
 
         return False
 
+    def _if_branch_body(self, node: IfNode, branch: int) -> List[ASTNode]:
+        """
+        记录并返回条件判断选中的分支
+
+        Args:
+            node: 条件判断节点
+            branch: 分支序号（0 为 then，1 起为 elif，-1 为 else）
+
+        Returns:
+            分支语句列表
+        """
+        self._cursor_frame()["branch"] = branch
+        if branch == 0:
+            return node.then_body
+        if branch < 0:
+            return node.else_body
+        return node.elif_branches[branch - 1][1]
+
+    def _execute_if_branch(self, node: IfNode, branch: int) -> bool:
+        self._execute_block(self._if_branch_body(node, branch))
+        return True
+
     def execute_loop(self, node: LoopNode) -> Any:
         """
         执行循环节点
@@ -734,18 +1405,20 @@ class ScriptExecutor:
 
         count = node.count
         variable = node.variable
+        resume = self._take_resume(node)
+        frame = self._cursor_frame()
 
-        for i in range(count):
+        for i in range(resume.get("iteration", 0) if resume else 0, count):
             if self.context.stop_requested:
                 break
 
             # 设置循环变量
             if variable:
-                self.context.variables[variable] = i
+                self._assign(variable, i)
+            frame["iteration"] = i
 
             try:
-                for stmt in node.body:
-                    self.execute_node(stmt)
+                self._execute_block(node.body)
             except BreakException:
                 break
             except ContinueException:
@@ -766,20 +1439,25 @@ class ScriptExecutor:
         if not self.context:
             return None
 
-        iterations = 0
+        # 从检查点恢复时，保存时所在的那次迭代不重新评估条件
+        resume = self._take_resume(node)
+        resumed = resume is not None and "iteration" in resume
+        iterations = resume["iteration"] - 1 if resumed else 0
+        frame = self._cursor_frame()
 
-        while node.condition and self.evaluate_condition(node.condition):
+        while resumed or (node.condition and self.evaluate_condition(node.condition)):
+            resumed = False
             if self.context.stop_requested:
                 break
 
             iterations += 1
             if iterations > self.context.max_iterations:
-                self.log(f"Max iterations ({self.context.max_iterations}) exceeded")
+                self.log("Max iterations ({}) exceeded", self.context.max_iterations, level=LogLevel.WARNING)
                 break
+            frame["iteration"] = iterations
 
             try:
-                for stmt in node.body:
-                    self.execute_node(stmt)
+                self._execute_block(node.body)
             except BreakException:
                 break
             except ContinueException:
@@ -797,35 +1475,56 @@ class ScriptExecutor:
         Returns:
             执行结果
         """
+        resume = self._take_resume(node)
+        frame = self._cursor_frame()
+        if resume is not None and resume.get("part") == "catch":
+            frame["part"] = "catch"
+            self._execute_block(node.catch_body)
+            return False
+
         try:
-            for stmt in node.try_body:
-                self.execute_node(stmt)
+            self._execute_block(node.try_body)
+            # try 体内缓存的命令必须在离开 try 之前发送，失败才能被 catch 捕获
+            self._pipeline.flush()
             return True
-        except (BreakException, ContinueException):
-            # 重新抛出循环控制异常
+        except CONTROL_FLOW_EXCEPTIONS:
+            # 重新抛出循环控制和函数返回异常
+            raise
+        except OperationCancelled:
+            # 停止执行不能被 catch 捕获
             raise
         except Exception as e:
-            self.log(f"Caught exception: {str(e)}")
+            # 异常已被捕获，不再作为失败位置
+            self._failed_cursor = None
+            self.log("Caught exception: {}", e, level=LogLevel.WARNING)
             # 执行catch分支
-            for stmt in node.catch_body:
-                self.execute_node(stmt)
+            frame["part"] = "catch"
+            self._execute_block(node.catch_body)
             return False
 
-    def execute_call(self, node: CallNode) -> Any:
+    def execute_call(self, node: CallNode, site: Optional[ASTNode] = None) -> Any:
         """
-        执行子脚本调用节点
+        执行函数或子脚本调用节点
+
+        名称是当前脚本中定义的函数时调用函数，否则调用同目录下的 .script 子脚本。
 
         Args:
-            node: 子脚本调用节点
+            node: 调用节点
+            site: 调用所在的语句（set x = call ... 时为赋值节点），默认为 node 本身
 
         Returns:
-            子脚本执行结果
+            函数返回值，或子脚本是否执行成功
         """
         if not self.context:
             return None
 
         function_name = node.function_name
         args = [self._resolve_value(arg) for arg in node.args]
+        site = site or node
+
+        function = self._functions.get(function_name)
+        if function is not None:
+            return self._call_function(function, site, args)
 
         # 构建脚本文件路径
         if not function_name.endswith(".script"):
@@ -834,34 +1533,313 @@ class ScriptExecutor:
         script_path = os.path.join(self.context.script_dir, function_name)
 
         if not os.path.exists(script_path):
-            self.log(f"Script not found: {script_path}")
+            self.log("Script not found: {}", script_path, level=LogLevel.ERROR)
             return False
 
         try:
             with open(script_path, "r", encoding="utf-8") as f:
                 source = f.read()
 
-            # 准备子脚本的变量
-            child_variables = self.context.variables.copy()
-            for i, arg in enumerate(args):
-                child_variables[f"arg{i}"] = arg
-
-            # 执行子脚本
-            result = self.execute_script(
-                source,
-                variables=child_variables,
-                script_dir=os.path.dirname(script_path),
-                log_callback=self.context.log_callback,
-            )
+            child_variables = self._enter_call(site, script_path, source, args)
 
-            # 合并日志
-            self.context.logs.extend(result.logs)
+            # 执行子脚本（子脚本有独立的流水线开关和函数表）
+            pipeline_enabled = self._pipeline.enabled
+            functions, watchers = self._functions, self._watchers
+            parent_context = self.context
+            if self._profiler:
+                self._profiler.push_script(function_name)
+            self._call_depth += 1
+            try:
+                result = self.execute_script(
+                    source,
+                    variables=child_variables,
+                    script_dir=os.path.dirname(script_path),
+                    log_callback=self.context.log_callback,
+                    logs=self.context.logs,
+                )
+            finally:
+                self._call_depth -= 1
+                self._functions, self._watchers = functions, watchers
+                if self._profiler:
+                    self._profiler.pop_script()
+                self._return_from_call(parent_context)
+            self._pipeline.enabled = pipeline_enabled
 
             return result.success
+        except (CheckpointError, OperationCancelled):
+            raise
         except Exception as e:
-            self.log(f"Error calling script {function_name}: {str(e)}")
+            self.log("Error calling script {}: {}", function_name, e, level=LogLevel.ERROR)
             return False
 
+    def _call_function(self, function: FuncNode, site: ASTNode, args: List[Any]) -> Any:
+        """
+        调用脚本内定义的函数
+
+        函数体在新的调用帧中执行：局部变量表只包含参数，读取时回退到全局变量，
+        赋值只写入局部变量，不复制调用方的变量表。函数体内的错误照常向外传播。
+
+        Args:
+            function: 函数定义
+            site: 调用所在的语句
+            args: 已解析的参数
+
+        Returns:
+            return 的值，没有 return 时为 None
+        """
+        if self._function_depth >= self.MAX_FUNCTION_DEPTH:
+            raise Exception(f"Maximum function call depth ({self.MAX_FUNCTION_DEPTH}) exceeded")
+
+        scope = self._enter_function(function, site, args)
+        caller_variables = self.context.variables
+        self.context.variables = ChainMap(scope, self._global_variables())
+        self._function_depth += 1
+        try:
+            self._execute_block(function.body)
+            value = None
+        except ReturnException as e:
+            value = e.value
+        except (BreakException, ContinueException):
+            raise Exception(f"Break or continue outside of loop in function {function.name}")
+        finally:
+            self._function_depth -= 1
+            self.context.variables = caller_variables
+
+        self.log("Return from {}: {}", function.name, value, level=LogLevel.TRACE)
+        return value
+
+    def _enter_function(self, function: FuncNode, site: ASTNode, args: List[Any]) -> Dict[str, Any]:
+        """
+        创建函数的局部变量表，并记录在当前执行位置帧中
+
+        从检查点恢复时沿用检查点中的局部变量（不重新绑定参数）。
+
+        Args:
+            function: 函数定义
+            site: 调用所在的语句
+            args: 已解析的参数
+
+        Returns:
+            局部变量表
+        """
+        resume = self._take_resume(site)
+        if resume is not None and "func" in resume:
+            scope = dict(resume["func"].get("locals") or {})
+        else:
+            if len(args) != len(function.params):
+                raise Exception(
+                    f"{function.name}() takes {len(function.params)} arguments ({len(args)} given)"
+                )
+            scope = dict(zip(function.params, args))
+        self._cursor_frame()["func"] = {"name": function.name, "locals": scope}
+        return scope
+
+    def _enter_call(
+        self, node: ASTNode, script_path: str, source: str, args: List[Any]
+    ) -> Dict[str, Any]:
+        """
+        记录调用位置并准备子脚本的变量
+
+        从检查点恢复时校验子脚本内容未变化，并沿用检查点中的变量（不重新设置参数）。
+
+        Args:
+            node: 调用所在的语句
+            script_path: 子脚本路径
+            source: 子脚本源代码
+            args: 已解析的参数
+
+        Returns:
+            子脚本的初始变量
+
+        Raises:
+            CheckpointError: 子脚本内容与检查点不一致
+        """
+        digest = script_hash(source)
+        resume = self._take_resume(node)
+        self._cursor_frame()["call"] = {"path": script_path, "hash": digest}
+
+        child_variables = self.context.variables.copy()
+        if resume is not None and "call" in resume:
+            if resume["call"].get("hash") != digest:
+                raise CheckpointError(f"Script changed since checkpoint: {script_path}")
+            return child_variables
+
+        for i, arg in enumerate(args):
+            child_variables[f"arg{i}"] = arg
+        return child_variables
+
+    def _return_from_call(self, parent_context: ExecutionContext) -> None:
+        """
+        子脚本结束后恢复调用方的执行上下文
+
+        子脚本的变量表沿用到调用方（与之前的行为保持一致），停止请求也一并传递。
+        在函数体内调用时，子脚本的变量写回函数的局部变量表。
+
+        Args:
+            parent_context: 调用方的执行上下文
+        """
+        child_context = self.context
+        self.context = parent_context
+        if child_context is not None and child_context is not parent_context:
+            if isinstance(parent_context.variables, ChainMap):
+                child_variables = child_context.variables
+                if isinstance(child_variables, ChainMap):
+                    child_variables = child_variables.maps[0]
+                parent_context.variables.maps[0].update(child_variables)
+            else:
+                parent_context.variables = child_context.variables
+                parent_context.assigned |= child_context.assigned
+            parent_context.stop_requested |= child_context.stop_requested
+
+    def execute_parallel(self, node: ParallelNode) -> Any:
+        """
+        执行并行节点
+
+        每个分支在独立线程中使用独立的执行器运行，变量为进入并行块时的副本，
+        分支内的赋值默认不影响主流程，只有 merge 列出的变量会按分支顺序合并回来
+        （后面的分支覆盖前面的分支）。分支日志带有分支标签，产生时立即通过日志回调实时输出；
+        写入日志缓冲区时则在全部分支结束后按分支标签排序，保存的日志顺序与调度无关。
+        任一分支失败时会停止其他分支，并在此处抛出第一个失败。
+
+        Args:
+            node: 并行节点
+
+        Returns:
+            执行结果
+        """
+        if not self.context:
+            return None
+        if not node.branches:
+            return True
+
+        branches = [self._spawn_branch(index) for index in range(len(node.branches))]
+        lock = threading.Lock()
+        failures: List[tuple] = []
+
+        def run(index: int) -> None:
+            branch = branches[index]
+            try:
+                branch._run_branch(node.branches[index])
+            except Exception as e:
+                with lock:
+                    first = not failures
+                    failures.append((index, e))
+                if first:
+                    # 第一个失败的分支负责停止其他分支
+                    for other in branches:
+                        if other is not branch:
+                            other.stop()
+
+        self._branches = branches
+        self.log("Parallel: {} branches", len(branches), level=LogLevel.DEBUG)
+        try:
+            with ThreadPoolExecutor(max_workers=len(branches)) as pool:
+                list(pool.map(run, range(len(branches))))
+        finally:
+            self._branches = []
+
+        return self._join_branches(node, branches, failures)
+
+    def _join_branches(
+        self,
+        node: ParallelNode,
+        branches: List["ScriptExecutor"],
+        failures: List[tuple],
+    ) -> bool:
+        """
+        汇总已结束的并行分支：按分支顺序保存日志、抛出第一个失败、合并变量
+
+        Args:
+            node: 并行节点
+            branches: 分支执行器列表
+            failures: 按发生顺序记录的 (分支序号, 异常) 列表
+
+        Returns:
+            执行结果
+        """
+        for branch in branches:
+            if self._profiler and branch._profiler:
+                self._profiler.merge(branch._profiler)
+            # 分支日志已经实时回调过，这里只写入缓冲区
+            for record in branch.context.logs:
+                self.context.logs.append(record)
+
+        if failures:
+            index, error = failures[0]
+            raise Exception(f"Parallel branch {index + 1} failed: {error}")
+
+        for name in node.merge:
+            for branch in branches:
+                if name in branch.context.assigned:
+                    self._assign(name, branch.context.variables[name])
+            if name in self.context.variables:
+                self.log("Merged {} = {}", name, self.context.variables[name], level=LogLevel.DEBUG)
+
+        return True
+
+    def _spawn_branch(self, index: int) -> "ScriptExecutor":
+        """
+        创建并行分支执行器
+
+        分支共享设备连接和服务实例，但拥有独立的执行上下文和流水线。
+
+        Args:
+            index: 分支序号（从 0 开始）
+
+        Returns:
+            分支执行器
+        """
+        branch = self._create_branch_executor()
+        branch._cached_device = self._cached_device
+        branch._input_service = self._input_service
+        branch._navigation_service = self._navigation_service
+        branch._app_service = self._app_service
+        branch._adb_service = self._adb_service
+        branch._functions = self._functions
+        branch._watchers = self._watchers
+        branch.context = ExecutionContext(
+            variables=dict(self.context.variables),
+            logs=self._new_log_buffer(spill=False),
+            current_line=self.context.current_line,
+            script_dir=self.context.script_dir,
+            max_iterations=self.context.max_iterations,
+            log_callback=self.context.log_callback,
+            log_prefix=f"{self.context.log_prefix}[branch {index + 1}] ",
+            log_branch=(
+                f"{self.context.log_branch}.{index + 1}" if self.context.log_branch else str(index + 1)
+            ),
+        )
+        if self._profiler:
+            branch._profiler = self._profiler.fork(f"branch {index + 1}")
+        return branch
+
+    def _create_branch_executor(self) -> "ScriptExecutor":
+        """创建与当前执行器同类型的分支执行器"""
+        return type(self)(self.device_manager)
+
+    def _run_branch(self, body: List[ASTNode]) -> None:
+        """
+        在当前（分支）执行器中执行语句列表
+
+        Args:
+            body: 分支语句列表
+
+        Raises:
+            Exception: 分支执行失败或被停止时抛出
+        """
+        try:
+            with cancellation_scope(self._cancel), profiling(self._profiler) if self._profiler else nullcontext():
+                self._execute_block(body)
+                self._pipeline.flush()
+        except BreakException:
+            raise Exception("Break outside of loop")
+        except ContinueException:
+            raise Exception("Continue outside of loop")
+        except ReturnException:
+            raise Exception("Return inside parallel branch")
+        finally:
+            self._pipeline.discard()
+
     def evaluate_condition(self, cond: ConditionNode) -> bool:
         """
         评估条件节点
@@ -872,6 +1850,9 @@ class ScriptExecutor:
         Returns:
             条件评估结果
         """
+        if cond.expression is not None:
+            return bool(self._evaluate(cond.expression))
+
         command = cond.command.lower() if cond.command else ""
         args = [self._interpolate_variables(self._resolve_value(arg)) for arg in cond.args]
 
@@ -908,25 +1889,45 @@ class ScriptExecutor:
 
         return result
 
-    def log(self, message: str) -> None:
+    def log(self, template: str, *args: Any, level: int = LogLevel.INFO) -> None:
         """
         记录日志
 
+        消息在真正输出时才格式化，低于最低级别的日志不会产生任何格式化开销。
+
         Args:
-            message: 日志消息
+            template: 消息模板（str.format 语法，无参数时原样输出）
+            *args: 模板参数
+            level: 日志级别
         """
-        if self.context:
-            timestamp = time.strftime("%H:%M:%S")
-            log_entry = f"[{timestamp}] Line {self.context.current_line}: {message}"
-            self.context.logs.append(log_entry)
-            # 调用日志回调（用于实时输出）
-            if self.context.log_callback:
-                self.context.log_callback(log_entry)
+        context = self.context
+        if not context or level < context.logs.level:
+            return
+        record = LogRecord(
+            time.time(),
+            context.current_line,
+            level,
+            template,
+            args,
+            context.log_prefix,
+            context.log_branch,
+        )
+        context.logs.append(record)
+        # 调用日志回调（用于实时输出）
+        if context.log_callback:
+            context.log_callback(record.format())
 
     def stop(self) -> None:
-        """停止脚本执行"""
+        """
+        停止脚本执行
+
+        可从任意线程调用：正在进行的等待立即结束，之后的设备调用直接失败。
+        """
         if self.context:
             self.context.stop_requested = True
+        self._cancel.cancel("Execution stopped by user")
+        for branch in list(self._branches):
+            branch.stop()
 
     # ============ 元素信息获取辅助方法 ============
 
@@ -1247,6 +2248,7 @@ class ScriptExecutor:
 __all__ = [
     "BreakException",
     "ContinueException",
+    "ReturnException",
     "ExecutionContext",
     "ExecutionResult",
     "ScriptExecutor",
@@ -0,0 +1,295 @@
+"""
+脚本表达式模块
+
+为 if / while 条件、set 赋值和 return 提供在主机侧求值的表达式，求值过程不访问设备：
+- 算术：+ - * / %（+ 的任一操作数不是数字时按字符串拼接）
+- 比较：== != < <= > >=（数字与数字字符串比较时按数字比较）
+- 布尔：and or not（短路求值，语义同 Python）
+- 内置函数：len str int float abs min max lower upper trim contains startswith endswith
+
+标识符按变量解析，未定义时报错；true / false / none 为常量（同名变量优先）。
+字符串字面量支持 ${var} 插值。语法树由 ScriptParser 生成，创建 Expression 时
+编译为嵌套闭包，之后每次求值不再遍历语法树。
+"""
+
+import operator
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set
+
+# 与 ScriptExecutor._interpolate_variables 使用相同的插值语法
+_INTERPOLATION_PATTERN = re.compile(r"\$\{([^}]+)\}")
+
+CONSTANTS: Dict[str, Any] = {"true": True, "false": False, "none": None}
+
+Interpolate = Callable[[str], str]
+Evaluator = Callable[[Mapping[str, Any], Interpolate], Any]
+
+
+class ExpressionError(Exception):
+    """表达式求值错误（未定义的变量、类型不匹配、除零等）"""
+
+    pass
+
+
+@dataclass
+class Expr:
+    """表达式节点基类"""
+
+    line: int = 0
+    column: int = 0
+
+
+@dataclass
+class Literal(Expr):
+    """字面量"""
+
+    value: Any = None
+
+
+@dataclass
+class Name(Expr):
+    """变量引用"""
+
+    name: str = ""
+
+
+@dataclass
+class Unary(Expr):
+    """一元运算（- / not）"""
+
+    op: str = ""
+    operand: Optional[Expr] = None
+
+
+@dataclass
+class Binary(Expr):
+    """二元运算"""
+
+    op: str = ""
+    left: Optional[Expr] = None
+    right: Optional[Expr] = None
+
+
+@dataclass
+class FunctionCall(Expr):
+    """内置函数调用"""
+
+    name: str = ""
+    args: List[Expr] = field(default_factory=list)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _to_number(value: Any) -> Any:
+    """数字字符串转为数字，其余值原样返回"""
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            try:
+                return float(value)
+            except ValueError:
+                return value
+    return value
+
+
+def _coerce_pair(left: Any, right: Any) -> tuple:
+    """数字与字符串比较时，尝试把字符串转为数字（get_text 的结果总是字符串）"""
+    if _is_number(left) and isinstance(right, str):
+        return left, _to_number(right)
+    if isinstance(left, str) and _is_number(right):
+        return _to_number(left), right
+    return left, right
+
+
+def _add(left: Any, right: Any) -> Any:
+    if _is_number(left) and _is_number(right):
+        return left + right
+    if isinstance(left, list) and isinstance(right, list):
+        return left + right
+    return ("" if left is None else str(left)) + ("" if right is None else str(right))
+
+
+def _to_int(value: Any) -> int:
+    if isinstance(value, str):
+        value = value.strip()
+        try:
+            return int(value)
+        except ValueError:
+            return int(float(value))
+    return int(value)
+
+
+def _contains(container: Any, item: Any) -> bool:
+    if isinstance(container, (list, tuple, dict)):
+        return item in container
+    return str(item) in ("" if container is None else str(container))
+
+
+_ARITHMETIC: Dict[str, Callable[[Any, Any], Any]] = {
+    "+": _add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "%": operator.mod,
+}
+
+_COMPARISON: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+# 内置函数：名称 -> (实现, 参数个数)
+BUILTINS: Dict[str, tuple] = {
+    "len": (lambda value: len(value) if value is not None else 0, 1),
+    "str": (lambda value: "" if value is None else str(value), 1),
+    "int": (_to_int, 1),
+    "float": (lambda value: float(value), 1),
+    "abs": (abs, 1),
+    "min": (min, 2),
+    "max": (max, 2),
+    "lower": (lambda value: str(value).lower(), 1),
+    "upper": (lambda value: str(value).upper(), 1),
+    "trim": (lambda value: str(value).strip(), 1),
+    "contains": (_contains, 2),
+    "startswith": (lambda value, prefix: str(value).startswith(str(prefix)), 2),
+    "endswith": (lambda value, suffix: str(value).endswith(str(suffix)), 2),
+}
+
+
+def _compile(node: Expr) -> Evaluator:
+    """将表达式节点编译为求值闭包"""
+    if isinstance(node, Literal):
+        value = node.value
+        if isinstance(value, str) and "${" in value:
+            return lambda variables, interpolate: interpolate(value)
+        return lambda variables, interpolate: value
+
+    if isinstance(node, Name):
+        name = node.name
+        default = CONSTANTS.get(name.lower(), KeyError)
+
+        def lookup(variables, interpolate):
+            try:
+                return variables[name]
+            except KeyError:
+                if default is KeyError:
+                    raise ExpressionError(f"Undefined variable: {name}")
+                return default
+
+        return lookup
+
+    if isinstance(node, Unary):
+        operand = _compile(node.operand)
+        if node.op == "not":
+            return lambda variables, interpolate: not operand(variables, interpolate)
+        return lambda variables, interpolate: -operand(variables, interpolate)
+
+    if isinstance(node, Binary):
+        left, right = _compile(node.left), _compile(node.right)
+        if node.op == "and":
+            return lambda variables, interpolate: (
+                left(variables, interpolate) and right(variables, interpolate)
+            )
+        if node.op == "or":
+            return lambda variables, interpolate: (
+                left(variables, interpolate) or right(variables, interpolate)
+            )
+        if node.op in _COMPARISON:
+            compare = _COMPARISON[node.op]
+            return lambda variables, interpolate: compare(
+                *_coerce_pair(left(variables, interpolate), right(variables, interpolate))
+            )
+        apply = _ARITHMETIC[node.op]
+        return lambda variables, interpolate: apply(
+            left(variables, interpolate), right(variables, interpolate)
+        )
+
+    if isinstance(node, FunctionCall):
+        func, _ = BUILTINS[node.name]
+        args = [_compile(arg) for arg in node.args]
+        return lambda variables, interpolate: func(*(arg(variables, interpolate) for arg in args))
+
+    raise ExpressionError(f"Unknown expression node: {type(node).__name__}")
+
+
+class Expression:
+    """
+    编译后的表达式
+
+    Attributes:
+        root: 表达式语法树
+        line: 表达式所在的源码行号
+    """
+
+    def __init__(self, root: Expr):
+        self.root = root
+        self.line = root.line
+        self._evaluate = _compile(root)
+
+    def evaluate(self, variables: Mapping[str, Any], interpolate: Interpolate) -> Any:
+        """
+        求值
+
+        Args:
+            variables: 变量表
+            interpolate: 字符串插值函数
+
+        Returns:
+            表达式的值
+
+        Raises:
+            ExpressionError: 求值失败
+        """
+        try:
+            return self._evaluate(variables, interpolate)
+        except ExpressionError as e:
+            raise ExpressionError(f"{e} (line {self.line})") from None
+        except (TypeError, ValueError, ZeroDivisionError) as e:
+            raise ExpressionError(f"Expression error at line {self.line}: {e}") from None
+
+    def names(self) -> Set[str]:
+        """表达式引用的所有变量名（包括字符串插值中的变量）"""
+        names: Set[str] = set()
+
+        def visit(node: Expr) -> None:
+            if isinstance(node, Name):
+                names.add(node.name)
+            elif isinstance(node, Literal) and isinstance(node.value, str):
+                names.update(_INTERPOLATION_PATTERN.findall(node.value))
+            elif isinstance(node, Unary):
+                visit(node.operand)
+            elif isinstance(node, Binary):
+                visit(node.left)
+                visit(node.right)
+            elif isinstance(node, FunctionCall):
+                for arg in node.args:
+                    visit(arg)
+
+        visit(self.root)
+        return names
+
+    def __repr__(self) -> str:
+        return f"Expression({self.root!r})"
+
+
+# 导出的公共接口
+__all__ = [
+    "BUILTINS",
+    "CONSTANTS",
+    "Expr",
+    "Literal",
+    "Name",
+    "Unary",
+    "Binary",
+    "FunctionCall",
+    "Expression",
+    "ExpressionError",
+]
@@ -0,0 +1,393 @@
+"""
+脚本日志模块
+
+脚本执行日志以结构化记录（时间戳、行号、级别、消息模板和参数）保存在有界环形缓冲区中，
+只有在真正需要输出时才格式化为文本。低于设定级别的日志在记录时直接丢弃，不做任何格式化。
+
+缓冲区写满后，最早的记录会被追加到磁盘上的 NDJSON 文件（如果配置了溢出文件），
+通过 LogBuffer.page / read_log_file 可以分页读取完整日志。
+溢出记录由后台写线程写入，记录日志的脚本线程不做磁盘 I/O；写入的同时在 <文件>.idx 中
+追加每条记录的字节偏移（小端 uint64），分页读取时直接定位，不需要扫描整个文件。
+"""
+
+import json
+import os
+import struct
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, BinaryIO, Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+# 偏移索引中每条记录占用的字节数
+_OFFSET = struct.Struct("<Q")
+
+
+class LogLevel(IntEnum):
+    """日志级别"""
+
+    TRACE = 5  # 每条语句的执行跟踪
+    DEBUG = 10
+    INFO = 20
+    WARNING = 30
+    ERROR = 40
+
+    @classmethod
+    def parse(cls, value: Union[str, int, "LogLevel", None], default: "LogLevel") -> "LogLevel":
+        """
+        解析日志级别
+
+        Args:
+            value: 级别名（不区分大小写）或数值
+            default: 未指定级别时使用的默认级别
+
+        Returns:
+            LogLevel: 日志级别
+
+        Raises:
+            ValueError: 未知的级别名
+        """
+        if value is None or value == "":
+            return default
+        if isinstance(value, int):
+            return cls(value)
+        try:
+            return cls[str(value).upper()]
+        except KeyError:
+            raise ValueError(f"Unknown log level: {value}")
+
+
+@dataclass(slots=True)
+class LogRecord:
+    """
+    一条结构化日志
+
+    Attributes:
+        timestamp: 记录时间（Unix 时间戳）
+        line: 源码行号
+        level: 日志级别
+        template: 消息模板（str.format 语法，无参数时原样输出）
+        args: 模板参数
+        prefix: 消息前缀（并行分支使用）
+        branch: 并行分支标签（从 1 开始的分支序号，嵌套时用点连接，例如 "2.1"），主流程为空
+    """
+
+    timestamp: float
+    line: int
+    level: int
+    template: str
+    args: Tuple[Any, ...]
+    prefix: str
+    branch: str = ""
+
+    @property
+    def message(self) -> str:
+        """格式化后的消息"""
+        return self.template.format(*self.args) if self.args else self.template
+
+    def format(self) -> str:
+        """
+        格式化为文本日志
+
+        Returns:
+            与旧版 ScriptExecutor.log 相同格式的文本
+        """
+        timestamp = time.strftime("%H:%M:%S", time.localtime(self.timestamp))
+        return f"[{timestamp}] {self.prefix}Line {self.line}: {self.message}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "timestamp": self.timestamp,
+            "line": self.line,
+            "level": LogLevel(self.level).name.lower(),
+            "message": self.prefix + self.message,
+        }
+        if self.branch:
+            data["branch"] = self.branch
+        return data
+
+
+class LogBuffer:
+    """
+    有界日志环形缓冲区
+
+    Attributes:
+        level: 最低记录级别
+        capacity: 内存中最多保留的记录数
+        spill_path: 溢出 NDJSON 文件路径，为 None 时溢出记录直接丢弃
+        total: 已记录的日志总数
+        dropped: 因没有溢出文件而丢弃的记录数
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1000,
+        level: LogLevel = LogLevel.TRACE,
+        spill_path: Optional[str] = None,
+    ):
+        """
+        初始化缓冲区
+
+        Args:
+            capacity: 内存中最多保留的记录数
+            level: 最低记录级别
+            spill_path: 溢出 NDJSON 文件路径
+        """
+        self.capacity = max(capacity, 1)
+        self.level = level
+        self.spill_path = spill_path
+        self.total = 0
+        self.dropped = 0
+        self._records: Deque[LogRecord] = deque()
+        self._on_disk = 0  # 已写入文件的记录数（文件中为第 0 ~ _on_disk-1 条）
+        self._pending: Deque[LogRecord] = deque()  # 已挤出、等待写线程写入的记录（紧接在文件之后）
+        self._spilled = 0  # 已写入或等待写入文件的记录数
+        self._offsets: List[int] = []  # 每条已写入记录在文件中的字节偏移
+        self._file: Optional[BinaryIO] = None
+        self._index: Optional[BinaryIO] = None
+        self._lock = threading.Lock()
+        # 文件写入锁，持有时可以再获取 _lock（反之不行）
+        self._file_lock = threading.Lock()
+
+    def enabled(self, level: int) -> bool:
+        """指定级别的日志是否会被记录"""
+        return level >= self.level
+
+    def append(self, record: LogRecord) -> None:
+        """
+        追加一条记录（低于最低级别的记录会被忽略）
+
+        Args:
+            record: 日志记录
+        """
+        if record.level < self.level:
+            return
+        spilled = False
+        with self._lock:
+            if len(self._records) >= self.capacity:
+                # 被挤出的记录的全局序号
+                index = self.total - len(self._records)
+                evicted = self._records.popleft()
+                if not self.spill_path:
+                    self.dropped += 1
+                elif index >= self._spilled:
+                    self._pending.append(evicted)
+                    self._spilled += 1
+                    spilled = True
+            self._records.append(record)
+            self.total += 1
+        if spilled:
+            _writer.schedule(self)
+
+    def flush(self, include_memory: bool = False) -> None:
+        """
+        将等待写入的记录写入溢出文件（阻塞）
+
+        Args:
+            include_memory: 是否同时写入内存中尚未写入文件的记录
+
+        Raises:
+            OSError: 写入失败（记录保留在内存中，可以重试）
+        """
+        with self._file_lock:
+            with self._lock:
+                batch = list(self._pending)
+                written = len(batch)
+                if include_memory and self.spill_path:
+                    first_in_memory = self.total - len(self._records)
+                    batch += list(self._records)[self._spilled - first_in_memory :]
+                    self._spilled = self.total
+            if not batch and not include_memory:
+                return
+            offsets = self._write(batch)
+            with self._lock:
+                for _ in range(written):
+                    self._pending.popleft()
+                self._offsets.extend(offsets)
+                self._on_disk += len(batch)
+
+    def _write(self, records: List[LogRecord]) -> List[int]:
+        """将记录追加到溢出文件和偏移索引，返回各记录的字节偏移（持有 _file_lock 时调用）"""
+        if self._file is None:
+            directory = os.path.dirname(self.spill_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.spill_path, "ab")
+            self._index = open(self.spill_path + ".idx", "ab")
+        offsets = []
+        for record in records:
+            offsets.append(self._file.tell())
+            self._file.write(
+                json.dumps(record.to_dict(), ensure_ascii=False).encode("utf-8") + b"\n"
+            )
+        # 先写完记录再写索引，读取方看到的索引项总是指向完整的记录
+        self._file.flush()
+        self._index.write(b"".join(_OFFSET.pack(offset) for offset in offsets))
+        self._index.flush()
+        return offsets
+
+    def close(self) -> None:
+        """写入等待中的记录并关闭溢出文件（之后再次溢出时会重新打开）"""
+        self.flush()
+        with self._file_lock:
+            if self._file is not None:
+                self._file.close()
+                self._index.close()
+                self._file = None
+                self._index = None
+
+    def persist(self) -> Optional[str]:
+        """
+        将内存中尚未写入文件的记录全部写入溢出文件（阻塞，异步代码中应放到线程中执行）
+
+        Returns:
+            溢出文件路径，未配置时返回 None
+        """
+        if not self.spill_path:
+            return None
+        self.flush(include_memory=True)
+        self.close()
+        return self.spill_path
+
+    @property
+    def on_disk(self) -> int:
+        """已写入或等待写入溢出文件的记录数"""
+        return self._spilled
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[LogRecord]:
+        with self._lock:
+            return iter(list(self._records))
+
+    def formatted(self) -> List[str]:
+        """
+        内存中的记录格式化后的文本列表
+
+        Returns:
+            文本日志列表
+        """
+        return [record.format() for record in self]
+
+    def page(self, offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """
+        分页读取日志（包括已溢出到文件的记录）
+
+        未配置溢出文件时，被挤出缓冲区的记录无法读取，会被跳过。
+
+        Args:
+            offset: 起始序号
+            limit: 最多返回的条数
+
+        Returns:
+            包含 total、offset 和 items 的字典
+        """
+        index = max(offset, 0)
+        with self._lock:
+            records = list(self._records)
+            pending = list(self._pending)
+            on_disk = self._on_disk
+            start = self._offsets[index] if index < on_disk else 0
+            total = self.total
+        first_in_memory = total - len(records)
+
+        items: List[Dict[str, Any]] = []
+        if index < on_disk:
+            # 写线程写完记录才更新 _on_disk，文件中这些记录都是完整的
+            with open(self.spill_path, "rb") as f:
+                f.seek(start)
+                while index < on_disk and len(items) < limit:
+                    items.append(json.loads(f.readline()))
+                    index += 1
+        while index < on_disk + len(pending) and len(items) < limit:
+            items.append(pending[index - on_disk].to_dict())
+            index += 1
+        index = max(index, first_in_memory)
+        while index < total and len(items) < limit:
+            items.append(records[index - first_in_memory].to_dict())
+            index += 1
+
+        return {"total": total, "offset": offset, "items": items}
+
+
+class _SpillWriter:
+    """后台写线程：把各缓冲区挤出的记录写入溢出文件（所有缓冲区共用一个线程）"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._dirty: Dict[LogBuffer, None] = {}  # 有待写入记录的缓冲区（保持调度顺序）
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, buffer: LogBuffer) -> None:
+        """登记有待写入记录的缓冲区"""
+        with self._cond:
+            self._dirty[buffer] = None
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="log-spill", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._dirty:
+                    self._cond.wait()
+                buffer = next(iter(self._dirty))
+                del self._dirty[buffer]
+            try:
+                buffer.flush()
+            except OSError:
+                # 记录留在等待队列中（仍可分页读取），下次溢出或 close/persist 时重试
+                pass
+
+
+_writer = _SpillWriter()
+
+
+def read_log_file(path: str, offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+    """
+    分页读取已持久化的 NDJSON 日志文件
+
+    有偏移索引（<path>.idx）时直接定位到起始记录；没有索引的旧文件扫描一遍。
+
+    Args:
+        path: 日志文件路径
+        offset: 起始序号
+        limit: 最多返回的条数
+
+    Returns:
+        包含 total、offset 和 items 的字典
+    """
+    offset = max(offset, 0)
+    items: List[Dict[str, Any]] = []
+    try:
+        index = open(path + ".idx", "rb")
+    except FileNotFoundError:
+        total = 0
+        with open(path, "rb") as f:
+            for total, line in enumerate(f, 1):
+                if offset < total <= offset + limit:
+                    items.append(json.loads(line))
+        return {"total": total, "offset": offset, "items": items}
+
+    with index:
+        total = os.fstat(index.fileno()).st_size // _OFFSET.size
+        if offset < total:
+            index.seek(offset * _OFFSET.size)
+            (start,) = _OFFSET.unpack(index.read(_OFFSET.size))
+            with open(path, "rb") as f:
+                f.seek(start)
+                for _ in range(min(limit, total - offset)):
+                    items.append(json.loads(f.readline()))
+    return {"total": total, "offset": offset, "items": items}
+
+
+# 导出的公共接口
+__all__ = [
+    "LogBuffer",
+    "LogLevel",
+    "LogRecord",
+    "read_log_file",
+]
@@ -0,0 +1,641 @@
+"""
+脚本优化器模块
+
+在执行前对 ScriptParser 生成的 AST 进行优化，包括：
+- 常量折叠：沿字面量 set 链传播常量，提前完成参数和选择器中的变量插值，
+  只引用已知常量的表达式直接求值
+- 死分支消除：移除条件恒定（包括常量表达式）的 if/elif/while 分支以及次数为 0 的 loop
+- 循环不变量外提：将 loop/while 体内不随迭代变化的选择器/插值计算移到循环之前
+- 合并相邻的 wait 语句
+
+事件处理器（on ... do ... end）可能在任意界面操作或等待时执行，
+处理器中写入的变量不参与常量传播，也不视为循环不变量。
+
+优化器不会修改传入的 AST，所有改写都作用于节点副本，并记录每一处改动。
+"""
+
+import re
+from dataclasses import dataclass, asdict, replace
+from typing import Any, Dict, List, Optional, Set
+
+from .script_expression import CONSTANTS, Expression, ExpressionError
+from .script_parser import (
+    ASTNode,
+    CommandNode,
+    SetNode,
+    IfNode,
+    LoopNode,
+    WhileNode,
+    TryNode,
+    CallNode,
+    ParallelNode,
+    FuncNode,
+    ReturnNode,
+    OnNode,
+    ConditionNode,
+)
+
+
+# 与 ScriptExecutor._interpolate_variables 使用相同的插值语法
+_INTERPOLATION_PATTERN = re.compile(r"\$\{([^}]+)\}")
+
+# 外提的临时变量前缀，执行结束后会从结果变量中移除
+HOIST_PREFIX = "__opt_hoist_"
+
+
+class _Unknown:
+    """静态求值失败的标记"""
+
+    def __repr__(self) -> str:
+        return "<unknown>"
+
+
+_UNKNOWN = _Unknown()
+
+
+@dataclass
+class OptimizationRecord:
+    """
+    单条优化记录
+
+    Attributes:
+        line: 被优化语句所在的源码行号
+        kind: 优化类型 (constant_fold, dead_branch, dead_loop, hoist, merge_wait)
+        message: 改动说明
+    """
+
+    line: int
+    kind: str
+    message: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def collect_writes(nodes: List[ASTNode]) -> Set[str]:
+    """
+    收集语句块中所有可能被写入的变量名
+
+    Args:
+        nodes: AST节点列表
+
+    Returns:
+        变量名集合
+    """
+    writes: Set[str] = set()
+    for node in nodes:
+        if isinstance(node, SetNode):
+            writes.add(node.variable)
+        elif isinstance(node, LoopNode) and node.variable:
+            writes.add(node.variable)
+        elif isinstance(node, FuncNode):
+            writes.update(node.params)
+        for block in child_blocks(node):
+            writes |= collect_writes(block)
+    return writes
+
+
+def contains_call(nodes: List[ASTNode]) -> bool:
+    """
+    判断语句块中是否包含子脚本调用
+
+    Args:
+        nodes: AST节点列表
+
+    Returns:
+        包含 call 语句返回 True
+    """
+    for node in nodes:
+        if isinstance(node, CallNode) or (isinstance(node, SetNode) and node.call is not None):
+            return True
+        if any(contains_call(block) for block in child_blocks(node)):
+            return True
+    return False
+
+
+def child_blocks(node: ASTNode) -> List[List[ASTNode]]:
+    """
+    返回节点包含的所有子语句块
+
+    Args:
+        node: AST节点
+
+    Returns:
+        子语句块列表
+    """
+    if isinstance(node, IfNode):
+        return [node.then_body] + [body for _, body in node.elif_branches] + [node.else_body]
+    if isinstance(node, (LoopNode, WhileNode)):
+        return [node.body]
+    if isinstance(node, TryNode):
+        return [node.try_body, node.catch_body]
+    if isinstance(node, ParallelNode):
+        return list(node.branches)
+    if isinstance(node, (FuncNode, OnNode)):
+        return [node.body]
+    return []
+
+
+class ScriptOptimizer:
+    """
+    脚本优化器
+
+    对 AST 做保持语义的改写。静态求值严格模拟 ScriptExecutor 的
+    _resolve_value + _interpolate_variables 行为，无法确定的值一律保留原样。
+    """
+
+    def __init__(self, variables: Optional[Dict[str, Any]] = None):
+        """
+        初始化优化器
+
+        Args:
+            variables: 执行时传入的初始变量，作为已知常量参与折叠
+        """
+        self.initial_variables = dict(variables) if variables else {}
+        self.records: List[OptimizationRecord] = []
+        self._names: Set[str] = set()
+        self._functions: Set[str] = set()
+        # 事件处理器写入的变量（为 None 时处理器会调用子脚本，任何变量都可能被改写）
+        self._volatile: Optional[Set[str]] = set()
+        self._hoist_counter = 0
+
+    def optimize(self, ast: List[ASTNode]) -> List[ASTNode]:
+        """
+        优化 AST
+
+        Args:
+            ast: AST节点列表
+
+        Returns:
+            优化后的AST节点列表
+        """
+        self.records = []
+        self._names = set(self.initial_variables) | collect_writes(ast)
+        self._functions = {node.name for node in ast if isinstance(node, FuncNode)}
+        handlers = [node for node in ast if isinstance(node, OnNode)]
+        self._volatile = None if contains_call(handlers) else collect_writes(handlers)
+        known = {
+            name: value
+            for name, value in self.initial_variables.items()
+            if self._is_literal(value)
+        }
+        self._forget_volatile(known)
+        return self._optimize_block(ast, known)
+
+    def report(self) -> List[Dict[str, Any]]:
+        """
+        获取优化记录
+
+        Returns:
+            优化记录字典列表
+        """
+        return [record.to_dict() for record in self.records]
+
+    def _forget_volatile(self, known: Dict[str, Any]) -> None:
+        """移除事件处理器可能改写的已知常量"""
+        if self._volatile is None:
+            known.clear()
+            return
+        for name in self._volatile:
+            known.pop(name, None)
+
+    def _record(self, node: ASTNode, kind: str, message: str) -> None:
+        self.records.append(OptimizationRecord(line=node.line, kind=kind, message=message))
+
+    # ============ 静态求值 ============
+
+    def _is_literal(self, value: Any) -> bool:
+        """
+        判断值能否作为字面量直接写入 AST
+
+        字符串不能包含插值语法，也不能与任何变量同名，
+        否则执行器会再次解析它，导致语义变化。
+        """
+        if value is None or isinstance(value, (bool, int, float)):
+            return True
+        if isinstance(value, str):
+            return "${" not in value and value not in self._names
+        return False
+
+    def _static_value(self, value: Any, known: Dict[str, Any]) -> Any:
+        """
+        模拟执行器的变量解析与插值
+
+        Args:
+            value: 原始值
+            known: 当前已知的常量变量
+
+        Returns:
+            求值结果，无法确定时返回 _UNKNOWN
+        """
+        if isinstance(value, str) and value in self._names:
+            if value not in known:
+                return _UNKNOWN
+            value = known[value]
+
+        if not isinstance(value, str) or "${" not in value:
+            return value
+
+        for name in _INTERPOLATION_PATTERN.findall(value):
+            if name in self._names and name not in known:
+                return _UNKNOWN
+
+        def replace_match(match):
+            name = match.group(1)
+            if name in known:
+                return str(known[name]) if known[name] is not None else ""
+            return match.group(0)
+
+        return _INTERPOLATION_PATTERN.sub(replace_match, value)
+
+    def _static_expression(self, expression: Expression, known: Dict[str, Any]) -> Any:
+        """
+        对只引用已知常量的表达式求值
+
+        Args:
+            expression: 表达式
+            known: 当前已知的常量变量
+
+        Returns:
+            求值结果，引用了未知变量或求值失败（留给执行时报错）时返回 _UNKNOWN
+        """
+        for name in expression.names():
+            if name not in known and (name in self._names or name.lower() not in CONSTANTS):
+                return _UNKNOWN
+        try:
+            return expression.evaluate(known, lambda text: self._static_value(text, known))
+        except ExpressionError:
+            return _UNKNOWN
+
+    def _fold(self, value: Any, known: Dict[str, Any]) -> Any:
+        """折叠单个值，无法折叠时返回原值"""
+        folded = self._static_value(value, known)
+        if folded is _UNKNOWN or not self._is_literal(folded):
+            return value
+        return folded
+
+    def _fold_args(self, node: ASTNode, args: List[Any], known: Dict[str, Any]) -> List[Any]:
+        folded_args = []
+        for arg in args:
+            folded = self._fold(arg, known)
+            if folded != arg or type(folded) is not type(arg):
+                self._record(node, "constant_fold", f"{arg!r} -> {folded!r}")
+            folded_args.append(folded)
+        return folded_args
+
+    def _fold_selector(self, node: ASTNode, value: Optional[str], known: Dict[str, Any]):
+        if value is None:
+            return None
+        folded = self._fold(value, known)
+        if not isinstance(folded, str):
+            return value
+        if folded != value:
+            self._record(node, "constant_fold", f"selector {value!r} -> {folded!r}")
+        return folded
+
+    # ============ 语句改写 ============
+
+    def _optimize_block(self, nodes: List[ASTNode], known: Dict[str, Any]) -> List[ASTNode]:
+        """
+        优化语句块，known 会随着顺序执行被就地更新
+        """
+        result: List[ASTNode] = []
+        for node in nodes:
+            result.extend(self._optimize_node(node, known))
+            self._forget_volatile(known)
+        return self._merge_waits(result)
+
+    def _optimize_node(self, node: ASTNode, known: Dict[str, Any]) -> List[ASTNode]:
+        if isinstance(node, CommandNode):
+            return [self._optimize_command(node, known)]
+        if isinstance(node, SetNode):
+            return [self._optimize_set(node, known)]
+        if isinstance(node, IfNode):
+            return self._optimize_if(node, known)
+        if isinstance(node, LoopNode):
+            return self._optimize_loop(node, known)
+        if isinstance(node, WhileNode):
+            return self._optimize_while(node, known)
+        if isinstance(node, TryNode):
+            return [self._optimize_try(node, known)]
+        if isinstance(node, CallNode):
+            return [self._optimize_call(node, known)]
+        if isinstance(node, ParallelNode):
+            return [self._optimize_parallel(node, known)]
+        if isinstance(node, FuncNode):
+            return [self._optimize_func(node)]
+        if isinstance(node, OnNode):
+            return [self._optimize_on(node)]
+        if isinstance(node, ReturnNode):
+            if node.expression is not None:
+                return [replace(node)]
+            return [replace(node, value=self._fold_args(node, [node.value], known)[0])]
+        return [node]
+
+    def _optimize_command(self, node: CommandNode, known: Dict[str, Any]) -> CommandNode:
+        return replace(
+            node,
+            args=self._fold_args(node, node.args, known),
+            selector_value=self._fold_selector(node, node.selector_value, known),
+            selector_modifiers=dict(node.selector_modifiers),
+        )
+
+    def _optimize_set(self, node: SetNode, known: Dict[str, Any]) -> SetNode:
+        if node.call is not None:
+            optimized = replace(node, call=self._optimize_call(node.call, known))
+            known.pop(node.variable, None)
+            return optimized
+
+        if node.command:
+            optimized = replace(
+                node,
+                command_args=self._fold_args(node, node.command_args, known),
+                selector_value=self._fold_selector(node, node.selector_value, known),
+            )
+            known.pop(node.variable, None)
+            return optimized
+
+        if node.expression is not None:
+            value = self._static_expression(node.expression, known)
+            if value is _UNKNOWN or not self._is_literal(value):
+                known.pop(node.variable, None)
+                return replace(node)
+            known[node.variable] = value
+            self._record(node, "constant_fold", f"set {node.variable} = {value!r}")
+            return replace(node, value=value, expression=None)
+
+        value = self._static_value(node.value, known)
+        if value is _UNKNOWN or not self._is_literal(value):
+            known.pop(node.variable, None)
+            return replace(node)
+
+        known[node.variable] = value
+        if value != node.value or type(value) is not type(node.value):
+            self._record(node, "constant_fold", f"set {node.variable} = {value!r}")
+        return replace(node, value=value)
+
+    def _optimize_call(self, node: CallNode, known: Dict[str, Any]) -> CallNode:
+        # call 只解析变量引用，不做插值
+        args = []
+        for arg in node.args:
+            if isinstance(arg, str) and arg in known and self._is_literal(known[arg]):
+                self._record(node, "constant_fold", f"{arg!r} -> {known[arg]!r}")
+                args.append(known[arg])
+            else:
+                args.append(arg)
+        # 子脚本执行后会沿用子脚本的变量表，之后不再信任任何已知常量；
+        # 脚本内函数只写入自己的局部变量，不影响调用方
+        if node.function_name not in self._functions:
+            known.clear()
+        return replace(node, args=args)
+
+    def _optimize_func(self, node: FuncNode) -> FuncNode:
+        # 函数可能在任意位置被调用，函数体不依赖调用前的常量
+        return replace(node, params=list(node.params), body=self._optimize_block(node.body, {}))
+
+    def _optimize_on(self, node: OnNode) -> OnNode:
+        # 处理器在任意时刻执行，处理器体和条件都不依赖定义处的常量
+        return replace(node, body=self._optimize_block(node.body, {}))
+
+    def _invalidate(self, known: Dict[str, Any], nodes: List[ASTNode]) -> None:
+        """使语句块可能写入的变量失效"""
+        if contains_call(nodes):
+            known.clear()
+            return
+        for name in collect_writes(nodes):
+            known.pop(name, None)
+
+    def _optimize_condition(
+        self, cond: Optional[ConditionNode], known: Dict[str, Any]
+    ) -> Optional[ConditionNode]:
+        if cond is None:
+            return None
+        return replace(
+            cond,
+            args=self._fold_args(cond, cond.args, known),
+            selector_value=self._fold_selector(cond, cond.selector_value, known),
+        )
+
+    def _constant_condition(self, cond: Optional[ConditionNode], known: Dict[str, Any]) -> Optional[bool]:
+        """
+        判断条件是否恒定
+
+        表达式条件只引用已知常量时直接求值；没有命令也没有表达式的条件（如 `if not`）
+        在执行器中总是求值为 False，取反后总是为 True。
+
+        Returns:
+            恒定的布尔值，不确定时返回 None
+        """
+        if cond is None:
+            return False
+        if cond.expression is not None:
+            value = self._static_expression(cond.expression, known)
+            return None if value is _UNKNOWN else bool(value)
+        if not cond.command:
+            return cond.negated
+        return None
+
+    def _optimize_if(self, node: IfNode, known: Dict[str, Any]) -> List[ASTNode]:
+        branches = [(node.condition, node.then_body)] + list(node.elif_branches)
+        kept = []
+        else_body = node.else_body
+        for cond, body in branches:
+            constant = self._constant_condition(cond, known)
+            if constant is False:
+                self._record(cond or node, "dead_branch", "removed branch with constant false condition")
+                continue
+            if constant is True:
+                self._record(cond or node, "dead_branch", "condition is constant true, later branches removed")
+                else_body = body
+                break
+            kept.append((self._optimize_condition(cond, known), body))
+
+        entry = dict(known)
+        optimized = []
+        for cond, body in kept:
+            optimized.append((cond, self._optimize_block(body, dict(entry))))
+        new_else = self._optimize_block(else_body, dict(entry))
+
+        self._invalidate(known, [node])
+
+        if not optimized:
+            # 所有条件分支都被消除，直接内联 else 分支
+            return new_else
+
+        return [
+            replace(
+                node,
+                condition=optimized[0][0],
+                then_body=optimized[0][1],
+                elif_branches=optimized[1:],
+                else_body=new_else,
+            )
+        ]
+
+    def _optimize_loop(self, node: LoopNode, known: Dict[str, Any]) -> List[ASTNode]:
+        if node.count <= 0:
+            self._record(node, "dead_loop", f"removed loop with count {node.count}")
+            return []
+
+        writes = collect_writes([node])
+        self._invalidate(known, [node])
+
+        body = self._optimize_block(node.body, dict(known))
+        hoisted, body = self._hoist_invariants(node, body, writes)
+        return hoisted + [replace(node, body=body)]
+
+    def _optimize_while(self, node: WhileNode, known: Dict[str, Any]) -> List[ASTNode]:
+        # 进入循环前条件就不成立时循环体不会执行
+        if self._constant_condition(node.condition, known) is False:
+            self._record(node, "dead_loop", "removed while loop with constant false condition")
+            return []
+
+        writes = collect_writes([node])
+        self._invalidate(known, [node])
+
+        condition = self._optimize_condition(node.condition, known)
+        body = self._optimize_block(node.body, dict(known))
+        hoisted, body = self._hoist_invariants(node, body, writes)
+        return hoisted + [replace(node, condition=condition, body=body)]
+
+    def _optimize_try(self, node: TryNode, known: Dict[str, Any]) -> TryNode:
+        try_body = self._optimize_block(node.try_body, dict(known))
+
+        # try 体可能在任意位置中断，catch 体只能依赖 try 之前的常量
+        catch_known = dict(known)
+        self._invalidate(catch_known, node.try_body)
+        catch_body = self._optimize_block(node.catch_body, catch_known)
+
+        self._invalidate(known, [node])
+        return replace(node, try_body=try_body, catch_body=catch_body)
+
+    def _optimize_parallel(self, node: ParallelNode, known: Dict[str, Any]) -> ParallelNode:
+        # 每个分支从并行块之前的常量出发，互不影响
+        branches = [self._optimize_block(body, dict(known)) for body in node.branches]
+        self._invalidate(known, [node])
+        return replace(node, branches=branches, merge=list(node.merge))
+
+    # ============ 循环不变量外提 ============
+
+    def _is_invariant(self, value: Any, writes: Set[str]) -> bool:
+        """判断插值字符串是否只引用循环内不会被写入的变量"""
+        if not isinstance(value, str) or value in self._names:
+            return False
+        refs = _INTERPOLATION_PATTERN.findall(value)
+        if self._volatile is None:
+            return False
+        return bool(refs) and not any(ref in writes or ref in self._volatile for ref in refs)
+
+    def _hoist_value(self, loop: ASTNode, value: Any, writes: Set[str], hoisted: Dict[str, SetNode]):
+        if not self._is_invariant(value, writes):
+            return value
+        if value not in hoisted:
+            name = f"{HOIST_PREFIX}{self._hoist_counter}"
+            self._hoist_counter += 1
+            self._names.add(name)
+            hoisted[value] = SetNode(line=loop.line, column=loop.column, variable=name, value=value)
+            self._record(loop, "hoist", f"hoisted loop-invariant {value!r} into {name}")
+        return hoisted[value].variable
+
+    def _hoist_invariants(self, loop: ASTNode, body: List[ASTNode], writes: Set[str]):
+        """
+        将循环体中引用不变变量的插值字符串提取为循环前的临时变量
+
+        执行器对临时变量名做变量解析即可得到已插值的结果，
+        循环内每次迭代不再重复进行正则插值。
+
+        Returns:
+            (外提出的 SetNode 列表, 改写后的循环体)
+        """
+        hoisted: Dict[str, SetNode] = {}
+        if contains_call(body):
+            return [], body
+
+        def visit(nodes: List[ASTNode]) -> List[ASTNode]:
+            result = []
+            for node in nodes:
+                if isinstance(node, CommandNode):
+                    node = replace(
+                        node,
+                        args=[self._hoist_value(loop, a, writes, hoisted) for a in node.args],
+                        selector_value=self._hoist_value(loop, node.selector_value, writes, hoisted),
+                    )
+                elif isinstance(node, SetNode) and node.command:
+                    node = replace(
+                        node,
+                        command_args=[
+                            self._hoist_value(loop, a, writes, hoisted) for a in node.command_args
+                        ],
+                        selector_value=self._hoist_value(loop, node.selector_value, writes, hoisted),
+                    )
+                elif isinstance(node, IfNode):
+                    node = replace(
+                        node,
+                        then_body=visit(node.then_body),
+                        elif_branches=[(c, visit(b)) for c, b in node.elif_branches],
+                        else_body=visit(node.else_body),
+                    )
+                elif isinstance(node, TryNode):
+                    node = replace(node, try_body=visit(node.try_body), catch_body=visit(node.catch_body))
+                # 嵌套循环已在自身优化时完成外提
+                result.append(node)
+            return result
+
+        body = visit(body)
+        return list(hoisted.values()), body
+
+    # ============ wait 合并 ============
+
+    @staticmethod
+    def _wait_duration(node: ASTNode) -> Optional[float]:
+        if (
+            isinstance(node, CommandNode)
+            and node.command.lower() == "wait"
+            and not node.selector_type
+            and len(node.args) == 1
+            and isinstance(node.args[0], (int, float))
+            and not isinstance(node.args[0], bool)
+        ):
+            return node.args[0]
+        return None
+
+    def _merge_waits(self, nodes: List[ASTNode]) -> List[ASTNode]:
+        result: List[ASTNode] = []
+        for node in nodes:
+            duration = self._wait_duration(node)
+            previous = self._wait_duration(result[-1]) if result else None
+            if duration is not None and previous is not None:
+                merged = previous + duration
+                self._record(node, "merge_wait", f"merged wait {duration} into line {result[-1].line}")
+                result[-1] = replace(result[-1], args=[merged])
+            else:
+                result.append(node)
+        return result
+
+
+def optimize_ast(ast: List[ASTNode], variables: Optional[Dict[str, Any]] = None):
+    """
+    优化 AST
+
+    Args:
+        ast: AST节点列表
+        variables: 初始变量字典
+
+    Returns:
+        (优化后的AST节点列表, 优化记录列表)
+    """
+    optimizer = ScriptOptimizer(variables)
+    optimized = optimizer.optimize(ast)
+    return optimized, optimizer.report()
+
+
+# 导出的公共接口
+__all__ = [
+    "HOIST_PREFIX",
+    "OptimizationRecord",
+    "ScriptOptimizer",
+    "collect_writes",
+    "contains_call",
+    "child_blocks",
+    "optimize_ast",
+]
@@ -8,6 +8,17 @@ from enum import Enum, auto
 from dataclasses import dataclass, field
 from typing import List, Optional, Any, Dict, Union
 
+from .script_expression import (
+    BUILTINS,
+    Binary,
+    Expr,
+    Expression,
+    FunctionCall,
+    Literal,
+    Name,
+    Unary,
+)
+
 
 class TokenType(Enum):
     """Token类型枚举"""
@@ -41,6 +52,7 @@ class TokenType(Enum):
     EXISTS = auto()
     LOG = auto()
     SHELL = auto()
+    PIPELINE = auto()
 
     # 人类模拟操作关键字
     HUMAN_CLICK = auto()
@@ -50,6 +62,8 @@ class TokenType(Enum):
 
     # 控制流关键字
     NOT = auto()
+    AND = auto()
+    OR = auto()
     IF = auto()
     ELIF = auto()
     ELSE = auto()
@@ -61,6 +75,10 @@ class TokenType(Enum):
     CALL = auto()
     BREAK = auto()
     CONTINUE = auto()
+    PARALLEL = auto()
+    BRANCH = auto()
+    FUNC = auto()
+    RETURN = auto()
 
     # 设备连接命令关键字
     CONNECT = auto()
@@ -90,6 +108,19 @@ class TokenType(Enum):
     RPAREN = auto()
     EQUALS = auto()
 
+    # 表达式运算符
+    PLUS = auto()
+    MINUS = auto()
+    STAR = auto()
+    SLASH = auto()
+    PERCENT = auto()
+    EQ = auto()
+    NE = auto()
+    LT = auto()
+    LE = auto()
+    GT = auto()
+    GE = auto()
+
     # 字面量
     STRING = auto()
     NUMBER = auto()
@@ -109,6 +140,7 @@ class Token:
     value: Any
     line: int
     column: int
+    glued: bool = False  # 负数紧跟在数字之后（如 2024-01-01 中的 -01），不作为减法
 
     def __repr__(self) -> str:
         return f"Token({self.type.name}, {self.value!r}, line={self.line}, col={self.column})"
@@ -131,6 +163,7 @@ class ConditionNode(ASTNode):
     selector_value: Optional[str] = None
     negated: bool = False
     args: List[Any] = field(default_factory=list)
+    expression: Optional[Expression] = None  # 表达式条件（不访问设备），此时 command 为空
 
 
 @dataclass
@@ -154,6 +187,8 @@ class SetNode(ASTNode):
     command_args: List[Any] = field(default_factory=list)
     selector_type: Optional[str] = None
     selector_value: Optional[str] = None
+    call: Optional["CallNode"] = None  # set x = call f(...)，值为函数返回值
+    expression: Optional[Expression] = None  # set x = <表达式>
 
 
 @dataclass
@@ -199,6 +234,42 @@ class CallNode(ASTNode):
     args: List[Any] = field(default_factory=list)
 
 
+@dataclass
+class ParallelNode(ASTNode):
+    """并行执行节点"""
+
+    branches: List[List[ASTNode]] = field(default_factory=list)
+    merge: List[str] = field(default_factory=list)  # 执行结束后合并回主流程的变量
+
+
+@dataclass
+class FuncNode(ASTNode):
+    """函数定义节点（只能定义在脚本顶层）"""
+
+    name: str = ""
+    params: List[str] = field(default_factory=list)
+    body: List[ASTNode] = field(default_factory=list)
+
+
+@dataclass
+class ReturnNode(ASTNode):
+    """函数返回节点"""
+
+    value: Any = None
+    expression: Optional[Expression] = None
+
+
+@dataclass
+class OnNode(ASTNode):
+    """事件处理器节点（只能定义在脚本顶层，执行期间在界面快照上检查条件）"""
+
+    condition: Optional[ConditionNode] = None
+    body: List[ASTNode] = field(default_factory=list)
+    priority: int = 0  # 同一快照上多个处理器命中时，priority 高的先执行
+    cooldown: float = 0.0  # 触发后至少间隔多少秒才能再次触发
+    times: int = 0  # 最多触发次数，0 表示不限
+
+
 @dataclass
 class BreakNode(ASTNode):
     """Break节点"""
@@ -244,6 +315,8 @@ class ScriptLexer:
         "dump_hierarchy": TokenType.DUMP_HIERARCHY,
         "exists": TokenType.EXISTS,
         "not": TokenType.NOT,
+        "and": TokenType.AND,
+        "or": TokenType.OR,
         "if": TokenType.IF,
         "elif": TokenType.ELIF,
         "else": TokenType.ELSE,
@@ -255,8 +328,13 @@ class ScriptLexer:
         "call": TokenType.CALL,
         "log": TokenType.LOG,
         "shell": TokenType.SHELL,
+        "pipeline": TokenType.PIPELINE,
         "break": TokenType.BREAK,
         "continue": TokenType.CONTINUE,
+        "parallel": TokenType.PARALLEL,
+        "branch": TokenType.BRANCH,
+        "func": TokenType.FUNC,
+        "return": TokenType.RETURN,
         # 人类模拟操作关键字
         "human_click": TokenType.HUMAN_CLICK,
         "human_double_click": TokenType.HUMAN_DOUBLE_CLICK,
@@ -299,6 +377,23 @@ class ScriptLexer:
         "offset": "offset",
     }
 
+    OPERATORS: Dict[str, TokenType] = {
+        "+": TokenType.PLUS,
+        "-": TokenType.MINUS,
+        "*": TokenType.STAR,
+        "/": TokenType.SLASH,
+        "%": TokenType.PERCENT,
+        "<": TokenType.LT,
+        ">": TokenType.GT,
+    }
+
+    TWO_CHAR_OPERATORS: Dict[str, TokenType] = {
+        "==": TokenType.EQ,
+        "!=": TokenType.NE,
+        "<=": TokenType.LE,
+        ">=": TokenType.GE,
+    }
+
     def __init__(self, source: str):
         self.source = source
         self.pos = 0
@@ -438,12 +533,14 @@ class ScriptLexer:
 
             # 数字
             if char.isdigit() or (char == "-" and self.peek_char() and self.peek_char().isdigit()):
+                glued = False
                 if char == "-":
+                    glued = self.pos > 0 and self.source[self.pos - 1].isdigit()
                     self.advance()
                     value = -self.read_number()
                 else:
                     value = self.read_number()
-                self.tokens.append(Token(TokenType.NUMBER, value, start_line, start_column))
+                self.tokens.append(Token(TokenType.NUMBER, value, start_line, start_column, glued))
                 continue
 
             # 标识符和关键字
@@ -490,11 +587,24 @@ class ScriptLexer:
                 self.advance()
                 continue
 
+            if char in "=!<>" and self.peek_char() == "=":
+                operator = char + "="
+                token_type = self.TWO_CHAR_OPERATORS[operator]
+                self.tokens.append(Token(token_type, operator, start_line, start_column))
+                self.advance()
+                self.advance()
+                continue
+
             if char == "=":
                 self.tokens.append(Token(TokenType.EQUALS, "=", start_line, start_column))
                 self.advance()
                 continue
 
+            if char in self.OPERATORS:
+                self.tokens.append(Token(self.OPERATORS[char], char, start_line, start_column))
+                self.advance()
+                continue
+
             # 未知字符，跳过
             self.advance()
 
@@ -534,6 +644,7 @@ class ScriptParser:
         TokenType.EXISTS,
         TokenType.LOG,
         TokenType.SHELL,
+        TokenType.PIPELINE,
         # 人类模拟操作
         TokenType.HUMAN_CLICK,
         TokenType.HUMAN_DOUBLE_CLICK,
@@ -572,9 +683,27 @@ class ScriptParser:
         "offset": "offset",
     }
 
+    # 表达式运算符（按优先级分组）
+    COMPARISON_OPERATORS: Dict[TokenType, str] = {
+        TokenType.EQ: "==",
+        TokenType.NE: "!=",
+        TokenType.LT: "<",
+        TokenType.LE: "<=",
+        TokenType.GT: ">",
+        TokenType.GE: ">=",
+    }
+    ADDITIVE_OPERATORS: Dict[TokenType, str] = {TokenType.PLUS: "+", TokenType.MINUS: "-"}
+    MULTIPLICATIVE_OPERATORS: Dict[TokenType, str] = {
+        TokenType.STAR: "*",
+        TokenType.SLASH: "/",
+        TokenType.PERCENT: "%",
+    }
+
     def __init__(self, tokens: List[Token]):
         self.tokens = tokens
         self.pos = 0
+        self._functions: Dict[str, FuncNode] = {}
+        self._in_function = False
 
     def current_token(self) -> Token:
         """获取当前token"""
@@ -619,7 +748,12 @@ class ScriptParser:
             if self.current_token().type == TokenType.EOF:
                 break
 
-            stmt = self.parse_statement()
+            if self.current_token().type == TokenType.FUNC:
+                stmt = self.parse_func()
+            elif self._is_word(self.current_token(), "on"):
+                stmt = self.parse_on()
+            else:
+                stmt = self.parse_statement()
             if stmt is not None:
                 statements.append(stmt)
 
@@ -651,6 +785,9 @@ class ScriptParser:
         if token.type == TokenType.CALL:
             return self.parse_call()
 
+        if token.type == TokenType.PARALLEL:
+            return self.parse_parallel()
+
         if token.type == TokenType.BREAK:
             self.advance()
             return BreakNode(line=token.line, column=token.column)
@@ -659,6 +796,19 @@ class ScriptParser:
             self.advance()
             return ContinueNode(line=token.line, column=token.column)
 
+        if token.type == TokenType.RETURN:
+            return self.parse_return()
+
+        if token.type == TokenType.FUNC:
+            raise SyntaxError(
+                f"func must be defined at top level, line {token.line}, column {token.column}"
+            )
+
+        if self._is_word(token, "on"):
+            raise SyntaxError(
+                f"on must be defined at top level, line {token.line}, column {token.column}"
+            )
+
         if token.type in self.COMMAND_TOKENS:
             return self.parse_command()
 
@@ -729,8 +879,10 @@ class ScriptParser:
         # 等号
         self.expect(TokenType.EQUALS)
 
-        # 值：可以是字面量或命令结果
-        if self.current_token().type in self.COMMAND_TOKENS:
+        # 值：可以是字面量、命令结果或函数返回值
+        if self.current_token().type == TokenType.CALL:
+            node.call = self.parse_call()
+        elif self.current_token().type in self.COMMAND_TOKENS:
             cmd_token = self.advance()
             node.command = cmd_token.value
 
@@ -769,19 +921,50 @@ class ScriptParser:
                     self.advance()
                 else:
                     break
-        elif self.current_token().type == TokenType.STRING:
-            node.value = self.advance().value
-        elif self.current_token().type == TokenType.NUMBER:
-            node.value = self.advance().value
-        elif self.current_token().type == TokenType.IDENTIFIER:
-            node.value = self.advance().value
+        else:
+            node.value, node.expression = self.parse_value()
 
         return node
 
+    def parse_value(self) -> tuple:
+        """
+        解析赋值或返回值：单个字面量/变量名保持原有的解析方式，其余按表达式解析
+
+        不能作为表达式解析的值（如 http://x.com/a、50%、hello world、2024-01-01）
+        沿用引入表达式之前的规则：取第一个字面量，忽略同一行的其余部分。
+
+        Returns:
+            (value, expression)，二者至多一个不为 None
+
+        Raises:
+            SyntaxError: 值既不是表达式也不以字面量开头，或者是有语法错误的函数调用
+        """
+        token = self.current_token()
+        if token.type in (TokenType.NEWLINE, TokenType.EOF):
+            return None, None
+        literal = token.type in (TokenType.STRING, TokenType.NUMBER, TokenType.IDENTIFIER)
+        if literal and self.peek_token().type in (TokenType.NEWLINE, TokenType.EOF):
+            return self.advance().value, None
+        start = self.pos
+        try:
+            return None, self.parse_expression()
+        except SyntaxError:
+            # 旧写法中字面量后面不会紧跟括号，函数调用的错误照常报告
+            if not literal or self.tokens[start + 1].type == TokenType.LPAREN:
+                raise
+        self.pos = start + 1
+        while self.current_token().type not in (TokenType.NEWLINE, TokenType.EOF):
+            self.advance()
+        return token.value, None
+
     def parse_condition(self) -> ConditionNode:
         """解析条件"""
         node = ConditionNode(line=self.current_token().line, column=self.current_token().column)
 
+        if self._starts_expression():
+            node.expression = self.parse_expression()
+            return node
+
         # 检查是否有 not
         if self.current_token().type == TokenType.NOT:
             self.advance()
@@ -837,6 +1020,134 @@ class ScriptParser:
 
         return node
 
+    def _starts_expression(self) -> bool:
+        """条件不以命令开头时按表达式解析（not 后面跟命令时仍是命令条件）"""
+        token = self.current_token()
+        if token.type == TokenType.NOT:
+            token = self.peek_token()
+        return token.type not in self.COMMAND_TOKENS and token.type not in (TokenType.NEWLINE, TokenType.EOF)
+
+    # ============ 表达式 ============
+
+    def parse_expression(self) -> Expression:
+        """
+        解析表达式（一直到行尾）
+
+        优先级从低到高：or, and, not, 比较, + -, * / %, 一元 -, 字面量/变量/函数调用/括号
+
+        Returns:
+            编译后的表达式
+
+        Raises:
+            SyntaxError: 表达式语法错误
+        """
+        root = self._parse_or()
+        token = self.current_token()
+        if token.type not in (TokenType.NEWLINE, TokenType.EOF):
+            raise SyntaxError(
+                f"Unexpected {token.type.name} in expression at line {token.line}, column {token.column}"
+            )
+        return Expression(root)
+
+    def _parse_or(self) -> Expr:
+        left = self._parse_and()
+        while self.current_token().type == TokenType.OR:
+            token = self.advance()
+            left = Binary(op="or", left=left, right=self._parse_and(), line=token.line, column=token.column)
+        return left
+
+    def _parse_and(self) -> Expr:
+        left = self._parse_not()
+        while self.current_token().type == TokenType.AND:
+            token = self.advance()
+            left = Binary(op="and", left=left, right=self._parse_not(), line=token.line, column=token.column)
+        return left
+
+    def _parse_not(self) -> Expr:
+        if self.current_token().type == TokenType.NOT:
+            token = self.advance()
+            return Unary(op="not", operand=self._parse_not(), line=token.line, column=token.column)
+        return self._parse_comparison()
+
+    def _parse_comparison(self) -> Expr:
+        left = self._parse_additive()
+        op = self.COMPARISON_OPERATORS.get(self.current_token().type)
+        if op is None:
+            return left
+        token = self.advance()
+        return Binary(op=op, left=left, right=self._parse_additive(), line=token.line, column=token.column)
+
+    def _parse_additive(self) -> Expr:
+        left = self._parse_term()
+        while True:
+            token = self.current_token()
+            op = self.ADDITIVE_OPERATORS.get(token.type)
+            if op is not None:
+                self.advance()
+                right = self._parse_term()
+            elif token.type == TokenType.NUMBER and token.value < 0 and not token.glued:
+                # 词法分析器把 "i -1" 中的 "-1" 读成负数，这里还原为减法
+                self.advance()
+                op, right = "-", Literal(value=-token.value, line=token.line, column=token.column)
+            else:
+                return left
+            left = Binary(op=op, left=left, right=right, line=token.line, column=token.column)
+
+    def _parse_term(self) -> Expr:
+        left = self._parse_unary()
+        while self.current_token().type in self.MULTIPLICATIVE_OPERATORS:
+            token = self.advance()
+            op = self.MULTIPLICATIVE_OPERATORS[token.type]
+            left = Binary(op=op, left=left, right=self._parse_unary(), line=token.line, column=token.column)
+        return left
+
+    def _parse_unary(self) -> Expr:
+        if self.current_token().type == TokenType.MINUS:
+            token = self.advance()
+            return Unary(op="-", operand=self._parse_unary(), line=token.line, column=token.column)
+        return self._parse_primary()
+
+    def _parse_primary(self) -> Expr:
+        token = self.current_token()
+        if token.type in (TokenType.NUMBER, TokenType.STRING):
+            self.advance()
+            return Literal(value=token.value, line=token.line, column=token.column)
+
+        if token.type == TokenType.LPAREN:
+            self.advance()
+            inner = self._parse_or()
+            self.expect(TokenType.RPAREN)
+            return inner
+
+        if token.type == TokenType.IDENTIFIER:
+            self.advance()
+            if self.current_token().type != TokenType.LPAREN:
+                return Name(name=token.value, line=token.line, column=token.column)
+            return self._parse_function_call(token)
+
+        raise SyntaxError(
+            f"Unexpected {token.type.name} in expression at line {token.line}, column {token.column}"
+        )
+
+    def _parse_function_call(self, name_token: Token) -> FunctionCall:
+        name = name_token.value.lower()
+        if name not in BUILTINS:
+            raise SyntaxError(f"Unknown function {name_token.value} at line {name_token.line}")
+        self.expect(TokenType.LPAREN)
+        node = FunctionCall(name=name, line=name_token.line, column=name_token.column)
+        while self.current_token().type != TokenType.RPAREN:
+            if node.args:
+                self.expect(TokenType.COMMA)
+            node.args.append(self._parse_or())
+        self.advance()  # 消费 ')'
+
+        arity = BUILTINS[name][1]
+        if len(node.args) != arity:
+            raise SyntaxError(
+                f"{name}() takes {arity} arguments ({len(node.args)} given) at line {name_token.line}"
+            )
+        return node
+
     def parse_if(self) -> IfNode:
         """解析if语句"""
         token = self.advance()  # 消费 'if'
@@ -1002,6 +1313,52 @@ class ScriptParser:
 
         return node
 
+    def parse_parallel(self) -> ParallelNode:
+        """解析parallel语句"""
+        token = self.advance()  # 消费 'parallel'
+        node = ParallelNode(line=token.line, column=token.column)
+
+        # 可选的合并变量列表：parallel merge a, b
+        if (
+            self.current_token().type == TokenType.IDENTIFIER
+            and self.current_token().value.lower() == "merge"
+        ):
+            self.advance()
+            while self.current_token().type not in (TokenType.NEWLINE, TokenType.EOF):
+                if self.current_token().type == TokenType.IDENTIFIER:
+                    node.merge.append(self.advance().value)
+                elif self.current_token().type == TokenType.COMMA:
+                    self.advance()
+                else:
+                    break
+
+        self.skip_newlines()
+
+        # 解析各个branch
+        while self.current_token().type == TokenType.BRANCH:
+            self.advance()  # 消费 'branch'
+            self.skip_newlines()
+
+            body = []
+            while self.current_token().type not in (TokenType.BRANCH, TokenType.END, TokenType.EOF):
+                self.skip_newlines()
+                if self.current_token().type in (TokenType.BRANCH, TokenType.END, TokenType.EOF):
+                    break
+                stmt = self.parse_statement()
+                if stmt is not None:
+                    body.append(stmt)
+            node.branches.append(body)
+
+        token = self.current_token()
+        if token.type != TokenType.END:
+            raise SyntaxError(
+                f"Expected BRANCH or END in parallel block, got {token.type.name} "
+                f"at line {token.line}, column {token.column}"
+            )
+        self.advance()
+
+        return node
+
     def parse_call(self) -> CallNode:
         """解析函数调用"""
         token = self.advance()  # 消费 'call'
@@ -1038,11 +1395,129 @@ class ScriptParser:
                         node.args.append(identifier)
                 else:
                     node.args.append(identifier)
-            elif self.current_token().type == TokenType.COMMA:
+            elif self.current_token().type in (TokenType.COMMA, TokenType.LPAREN, TokenType.RPAREN):
+                # call f a, b 与 call f(a, b) 两种写法等价
+                self.advance()
+            else:
+                break
+
+        return node
+
+    def parse_func(self) -> FuncNode:
+        """解析函数定义：func name(a, b) ... end"""
+        token = self.advance()  # 消费 'func'
+        name_token = self.expect(TokenType.IDENTIFIER)
+        node = FuncNode(name=name_token.value, line=token.line, column=token.column)
+        if node.name in self._functions:
+            raise SyntaxError(f"Function {node.name} already defined at line {token.line}")
+
+        # 参数列表（括号可省略）
+        while self.current_token().type not in (TokenType.NEWLINE, TokenType.EOF):
+            param = self.advance()
+            if param.type == TokenType.IDENTIFIER:
+                if param.value in node.params:
+                    raise SyntaxError(f"Duplicate parameter {param.value} at line {param.line}")
+                node.params.append(param.value)
+            elif param.type not in (TokenType.COMMA, TokenType.LPAREN, TokenType.RPAREN):
+                raise SyntaxError(
+                    f"Unexpected {param.type.name} in parameters of {node.name} "
+                    f"at line {param.line}, column {param.column}"
+                )
+
+        self.skip_newlines()
+
+        # 解析函数体
+        self._in_function = True
+        try:
+            while self.current_token().type not in (TokenType.END, TokenType.EOF):
+                self.skip_newlines()
+                if self.current_token().type in (TokenType.END, TokenType.EOF):
+                    break
+                stmt = self.parse_statement()
+                if stmt is not None:
+                    node.body.append(stmt)
+        finally:
+            self._in_function = False
+
+        self.expect(TokenType.END)
+        self._functions[node.name] = node
+        return node
+
+    @staticmethod
+    def _is_word(token: Token, word: str) -> bool:
+        """on / do 不是保留字（pipeline on 等命令参数仍可使用），只在语句开头按关键字处理"""
+        return token.type == TokenType.IDENTIFIER and token.value == word
+
+    def parse_on(self) -> OnNode:
+        """解析事件处理器：on <条件> do [priority=N] [cooldown=秒] [times=N] ... end"""
+        token = self.advance()  # 消费 'on'
+        node = OnNode(line=token.line, column=token.column)
+
+        # 条件一直到同一行的 do 为止
+        end = self.pos
+        while self.tokens[end].type not in (TokenType.NEWLINE, TokenType.EOF):
+            if self._is_word(self.tokens[end], "do"):
+                break
+            end += 1
+        do_token = self.tokens[end]
+        if not self._is_word(do_token, "do"):
+            raise SyntaxError(f"Expected do after on condition at line {token.line}")
+
+        condition_parser = ScriptParser(
+            self.tokens[self.pos : end] + [Token(TokenType.EOF, None, do_token.line, do_token.column)]
+        )
+        node.condition = condition_parser.parse_condition()
+        rest = condition_parser.current_token()
+        if rest.type != TokenType.EOF:
+            raise SyntaxError(
+                f"Unexpected {rest.type.name} in on condition at line {rest.line}, column {rest.column}"
+            )
+        if node.condition.expression is None and not (
+            node.condition.command.lower() == "exists" and node.condition.selector_value
+        ):
+            raise SyntaxError(
+                f"on condition must be an expression or exists <selector> at line {token.line}"
+            )
+        self.pos = end + 1
+
+        # 选项
+        while self.current_token().type not in (TokenType.NEWLINE, TokenType.EOF):
+            if self.current_token().type == TokenType.COMMA:
                 self.advance()
+                continue
+            option = self.expect(TokenType.IDENTIFIER)
+            self.expect(TokenType.EQUALS)
+            value = self.expect(TokenType.NUMBER).value
+            if option.value == "priority":
+                node.priority = int(value)
+            elif option.value == "cooldown":
+                node.cooldown = float(value)
+            elif option.value == "times":
+                node.times = int(value)
             else:
+                raise SyntaxError(f"Unknown on option {option.value} at line {option.line}")
+
+        self.skip_newlines()
+
+        # 解析处理器体
+        while self.current_token().type not in (TokenType.END, TokenType.EOF):
+            self.skip_newlines()
+            if self.current_token().type in (TokenType.END, TokenType.EOF):
                 break
+            stmt = self.parse_statement()
+            if stmt is not None:
+                node.body.append(stmt)
+
+        self.expect(TokenType.END)
+        return node
 
+    def parse_return(self) -> ReturnNode:
+        """解析return语句"""
+        token = self.advance()  # 消费 'return'
+        if not self._in_function:
+            raise SyntaxError(f"return outside of func at line {token.line}, column {token.column}")
+        node = ReturnNode(line=token.line, column=token.column)
+        node.value, node.expression = self.parse_value()
         return node
 
 
@@ -1077,6 +1552,10 @@ __all__ = [
     "WhileNode",
     "TryNode",
     "CallNode",
+    "ParallelNode",
+    "FuncNode",
+    "ReturnNode",
+    "OnNode",
     "BreakNode",
     "ContinueNode",
     "ConditionNode",
@@ -0,0 +1,297 @@
+"""
+脚本命令流水线模块
+
+将连续的、结果不被使用的设备命令（坐标点击、导航按键、方向滑动）缓存起来，
+在需要读取设备状态或流水线关闭时，通过一次 JSON-RPC 批量请求发送到设备端的
+uiautomator2 服务，减少每条命令一次 HTTP 往返的开销。
+
+设备端不支持批量请求时自动回退为逐条发送，命令顺序始终保持不变。
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..core.cancellation import OperationCancelled
+from ..core.u2_compat import SCROLL_STEPS
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineError(Exception):
+    """
+    流水线命令执行失败
+
+    Attributes:
+        line: 失败命令所在的源码行号
+        command: 失败的脚本命令
+    """
+
+    def __init__(self, line: int, command: str, message: str):
+        super().__init__(f"Line {line}: {command} failed: {message}")
+        self.line = line
+        self.command = command
+
+
+@dataclass
+class PipelinedCall:
+    """
+    一条被缓存的设备调用
+
+    Attributes:
+        line: 源码行号
+        command: 脚本命令名
+        method: uiautomator2 JSON-RPC 方法名
+        params: JSON-RPC 参数列表
+    """
+
+    line: int
+    command: str
+    method: str
+    params: List[Any] = field(default_factory=list)
+
+
+class JsonRpcTransport:
+    """
+    uiautomator2 JSON-RPC 传输层
+
+    逐条调用使用设备对象的 jsonrpc_call，批量调用使用 jsonrpc_batch
+    （由 app.core.instrumentation.instrument_u2_device 安装，与其他设备调用一样经过埋点和取消检查）。
+    批量请求失败（设备对象不支持、HTTP 错误或服务端拒绝）时改为逐条发送。
+    """
+
+    # JSON-RPC 2.0 "Invalid Request" 错误码，表示服务端不接受批量请求
+    INVALID_REQUEST = -32600
+
+    def __init__(self, device: Any):
+        """
+        初始化传输层
+
+        Args:
+            device: uiautomator2 设备对象
+        """
+        self.device = device
+        self.supports_batch = True
+
+    def call(self, method: str, params: List[Any]) -> Any:
+        """
+        发送单条 JSON-RPC 调用
+
+        Args:
+            method: 方法名
+            params: 参数列表
+
+        Returns:
+            调用结果
+        """
+        return self.device.jsonrpc_call(method, params)
+
+    def _post(self, payload: List[Dict[str, Any]]) -> Any:
+        """发送批量请求并返回解析后的 JSON 响应"""
+        return self.device.jsonrpc_batch(payload)
+
+    def call_batch(self, calls: List[PipelinedCall]) -> List[Tuple[bool, Any]]:
+        """
+        按顺序发送一批调用
+
+        Args:
+            calls: 调用列表
+
+        Returns:
+            与 calls 一一对应的 (是否成功, 结果或错误信息) 列表。
+            逐条回退模式下，遇到第一个失败后不再发送后续调用。
+        """
+        if self.supports_batch and len(calls) > 1:
+            payload = [
+                {"jsonrpc": "2.0", "id": index, "method": call.method, "params": call.params}
+                for index, call in enumerate(calls)
+            ]
+            try:
+                data = self._post(payload)
+            except OperationCancelled:
+                raise
+            except Exception as e:
+                logger.warning(f"批量请求失败: {e}，改为逐条发送")
+                data = None
+            if isinstance(data, list):
+                by_id = {item.get("id"): item for item in data if isinstance(item, dict)}
+                results = []
+                for index in range(len(calls)):
+                    item = by_id.get(index, {"error": {"message": "missing response"}})
+                    if "error" in item:
+                        results.append((False, item["error"].get("message", str(item["error"]))))
+                    else:
+                        results.append((True, item.get("result")))
+                return results
+
+            if data is not None:
+                error = data.get("error", {}) if isinstance(data, dict) else {}
+                if error.get("code") != self.INVALID_REQUEST:
+                    raise RuntimeError(f"Unexpected batch response: {data!r}")
+            # 不支持批量请求，此后改为逐条发送
+            self.supports_batch = False
+
+        results = []
+        for call in calls:
+            try:
+                results.append((True, self.call(call.method, call.params)))
+            except Exception as e:
+                results.append((False, str(e)))
+                break
+        return results
+
+
+class CommandPipeline:
+    """
+    设备命令流水线
+
+    缓存不需要返回值的设备命令，在 flush 时批量发送。
+    失败时抛出 PipelineError，行号指向第一条失败的命令。
+
+    Attributes:
+        enabled: 是否启用流水线
+        max_batch: 单批最多缓存的调用数，达到后立即发送
+        batches: 已发送的批次数
+        calls: 已发送的调用总数
+    """
+
+    def __init__(self, transport_factory: Callable[[], JsonRpcTransport], max_batch: int = 32):
+        """
+        初始化流水线
+
+        Args:
+            transport_factory: 传输层工厂函数，首次发送时才创建传输层（避免提前连接设备）
+            max_batch: 单批最多缓存的调用数
+        """
+        self._transport_factory = transport_factory
+        self._transport: Optional[JsonRpcTransport] = None
+        self._buffer: List[PipelinedCall] = []
+        self._window_size: Optional[Tuple[int, int]] = None
+        self.enabled = False
+        self.max_batch = max_batch
+        self.batches = 0
+        self.calls = 0
+
+    @property
+    def transport(self) -> JsonRpcTransport:
+        if self._transport is None:
+            self._transport = self._transport_factory()
+        return self._transport
+
+    @property
+    def pending(self) -> int:
+        """当前缓存的调用数"""
+        return len(self._buffer)
+
+    def submit(self, call: PipelinedCall) -> None:
+        """
+        缓存一条调用
+
+        Args:
+            call: 设备调用
+        """
+        self._buffer.append(call)
+        if len(self._buffer) >= self.max_batch:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        发送所有缓存的调用
+
+        Raises:
+            PipelineError: 任一调用失败时抛出
+        """
+        if not self._buffer:
+            return
+        calls, self._buffer = self._buffer, []
+        results = self.transport.call_batch(calls)
+        self.batches += 1
+        self.calls += len(results)
+        for call, (ok, value) in zip(calls, results):
+            if not ok:
+                raise PipelineError(call.line, call.command, str(value))
+
+    def discard(self) -> None:
+        """丢弃所有缓存的调用"""
+        self._buffer = []
+
+    def window_size(self) -> Tuple[int, int]:
+        """
+        获取屏幕尺寸（每个流水线只查询一次）
+
+        Returns:
+            (宽, 高)
+        """
+        if self._window_size is None:
+            info = self.transport.device.info
+            self._window_size = (info["displayWidth"], info["displayHeight"])
+        return self._window_size
+
+    # 导航命令与 NavigationService 使用的按键名保持一致
+    PRESS_KEYS: Dict[str, str] = {
+        "back": "back",
+        "home": "home",
+        "menu": "menu",
+        "recent": "recent_apps",
+    }
+
+    def build_call(self, line: int, command: str, args: List[Any], has_selector: bool):
+        """
+        将脚本命令转换为可缓存的 JSON-RPC 调用
+
+        Args:
+            line: 源码行号
+            command: 脚本命令名
+            args: 已解析的命令参数
+            has_selector: 命令是否带有选择器
+
+        Returns:
+            PipelinedCall，命令不适合流水线时返回 None
+        """
+        if has_selector:
+            return None
+
+        if command in self.PRESS_KEYS:
+            return PipelinedCall(line, command, "pressKey", [self.PRESS_KEYS[command]])
+
+        if command == "click" and len(args) >= 2:
+            try:
+                x, y = int(args[0]), int(args[1])
+            except (TypeError, ValueError):
+                return None
+            return PipelinedCall(line, command, "click", [x, y])
+
+        if command == "swipe" and args:
+            direction = str(args[0]).lower()
+            try:
+                percent = float(args[1]) if len(args) > 1 else 0.5
+            except (TypeError, ValueError):
+                return None
+            points = self._swipe_points(direction, percent)
+            if points is None:
+                return None
+            return PipelinedCall(line, command, "swipe", [*points, SCROLL_STEPS])
+
+        return None
+
+    def _swipe_points(self, direction: str, percent: float):
+        """与 InputService.swipe 相同的滑动坐标计算"""
+        if direction not in ("up", "down", "left", "right"):
+            return None
+        width, height = self.window_size()
+        if direction == "up":
+            return width // 2, height * (1 - percent * 0.5), width // 2, height * percent * 0.5
+        if direction == "down":
+            return width // 2, height * percent * 0.5, width // 2, height * (1 - percent * 0.5)
+        if direction == "left":
+            return width * (1 - percent * 0.5), height // 2, width * percent * 0.5, height // 2
+        return width * percent * 0.5, height // 2, width * (1 - percent * 0.5), height // 2
+
+
+# 导出的公共接口
+__all__ = [
+    "CommandPipeline",
+    "JsonRpcTransport",
+    "PipelineError",
+    "PipelinedCall",
+]
@@ -0,0 +1,320 @@
+"""
+脚本性能分析模块
+
+按源码行和命令类型统计脚本的执行耗时、设备 RPC 耗时和调用次数，
+并可导出为 collapsed stack 格式（flamegraph.pl / speedscope 等工具可直接读取）。
+
+每条语句对应一个栈帧，call 子脚本、脚本内函数和并行分支会嵌套在调用语句的栈帧之下。
+设备 RPC 通过 app.core.instrumentation 的上下文监听器归属到当前栈帧。
+流水线中缓存的命令在 flush 时以一次批量请求发送，其 RPC 耗时计入触发 flush 的语句
+（脚本结束时才发送的只计入总计），调用次数按批内的调用数累计。
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .script_parser import (
+    ASTNode,
+    CommandNode,
+    SetNode,
+    IfNode,
+    LoopNode,
+    WhileNode,
+    TryNode,
+    CallNode,
+    ParallelNode,
+    FuncNode,
+    ReturnNode,
+    OnNode,
+    BreakNode,
+    ContinueNode,
+)
+from ..core.instrumentation import RpcEvent, rpc_listener
+
+
+@dataclass
+class ProfileStat:
+    """
+    一组语句的统计数据
+
+    Attributes:
+        hits: 执行次数
+        total_time: 总耗时（秒，包含子语句）
+        self_time: 自身耗时（秒，不含子语句）
+        rpc_time: 设备 RPC 耗时（秒，包含子语句）
+        rpc_count: 设备 RPC 次数（包含子语句）
+    """
+
+    hits: int = 0
+    total_time: float = 0.0
+    self_time: float = 0.0
+    rpc_time: float = 0.0
+    rpc_count: int = 0
+
+    def add(self, other: "ProfileStat") -> None:
+        self.hits += other.hits
+        self.total_time += other.total_time
+        self.self_time += other.self_time
+        self.rpc_time += other.rpc_time
+        self.rpc_count += other.rpc_count
+
+
+class _Frame:
+    """执行中的语句栈帧"""
+
+    __slots__ = ("label", "line_key", "command", "start", "child_time", "rpc_time", "rpc_count")
+
+    def __init__(self, label: str, line_key: str, command: str):
+        self.label = label
+        self.line_key = line_key
+        self.command = command
+        self.start = time.perf_counter()
+        self.child_time = 0.0
+        self.rpc_time = 0.0
+        self.rpc_count = 0
+
+
+def node_kind(node: ASTNode) -> str:
+    """
+    返回节点的命令类型，用于按命令统计
+
+    Args:
+        node: AST节点
+
+    Returns:
+        命令类型，例如 click、set、loop
+    """
+    if isinstance(node, CommandNode):
+        return node.command.lower()
+    if isinstance(node, SetNode):
+        if node.call is not None:
+            return "call"
+        return node.command.lower() if node.command else "set"
+    if isinstance(node, IfNode):
+        return "if"
+    if isinstance(node, LoopNode):
+        return "loop"
+    if isinstance(node, WhileNode):
+        return "while"
+    if isinstance(node, TryNode):
+        return "try"
+    if isinstance(node, CallNode):
+        return "call"
+    if isinstance(node, ParallelNode):
+        return "parallel"
+    if isinstance(node, FuncNode):
+        return "func"
+    if isinstance(node, ReturnNode):
+        return "return"
+    if isinstance(node, OnNode):
+        return "on"
+    if isinstance(node, BreakNode):
+        return "break"
+    if isinstance(node, ContinueNode):
+        return "continue"
+    return type(node).__name__
+
+
+class ScriptProfiler:
+    """
+    脚本性能分析器
+
+    Attributes:
+        lines: 按 "脚本:行号" 统计
+        commands: 按命令类型统计
+        stacks: collapsed stack -> 自身耗时（秒）
+        rpc_time: 设备 RPC 总耗时（秒）
+        rpc_count: 设备 RPC 总次数
+    """
+
+    def __init__(self, script: str = "main", base_stack: Tuple[str, ...] = ()):
+        """
+        初始化分析器
+
+        Args:
+            script: 顶层脚本名
+            base_stack: 栈底标签（并行分支使用，指向父分析器中的调用位置）
+        """
+        self.lines: Dict[str, ProfileStat] = {}
+        self.commands: Dict[str, ProfileStat] = {}
+        self.stacks: Dict[str, float] = {}
+        self._frames: List[_Frame] = []
+        self._scripts: List[str] = [script]
+        self._base = base_stack
+        self._started = time.perf_counter()
+        self.rpc_time = 0.0
+        self.rpc_count = 0
+
+    # ============ 采集 ============
+
+    def push_script(self, name: str) -> None:
+        """进入 call 子脚本"""
+        self._scripts.append(name)
+
+    def pop_script(self) -> None:
+        """离开 call 子脚本"""
+        if len(self._scripts) > 1:
+            self._scripts.pop()
+
+    def enter(self, node: ASTNode) -> None:
+        """
+        开始执行语句
+
+        Args:
+            node: AST节点
+        """
+        kind = node_kind(node)
+        line_key = f"{self._scripts[-1]}:{node.line}"
+        self._frames.append(_Frame(f"{line_key} {kind}", line_key, kind))
+
+    def exit(self) -> None:
+        """结束当前语句"""
+        frame = self._frames.pop()
+        elapsed = time.perf_counter() - frame.start
+        self_time = max(elapsed - frame.child_time, 0.0)
+
+        sample = ProfileStat(1, elapsed, self_time, frame.rpc_time, frame.rpc_count)
+        self.lines.setdefault(frame.line_key, ProfileStat()).add(sample)
+        self.commands.setdefault(frame.command, ProfileStat()).add(sample)
+
+        stack = ";".join(self._base + tuple(f.label for f in self._frames) + (frame.label,))
+        self.stacks[stack] = self.stacks.get(stack, 0.0) + self_time
+
+        if self._frames:
+            parent = self._frames[-1]
+            parent.child_time += elapsed
+            parent.rpc_time += frame.rpc_time
+            parent.rpc_count += frame.rpc_count
+
+    def on_rpc(self, event: RpcEvent) -> None:
+        """
+        记录一次设备 RPC
+
+        Args:
+            event: RPC 事件
+        """
+        self.rpc_time += event.duration
+        self.rpc_count += event.calls
+        if self._frames:
+            frame = self._frames[-1]
+            frame.rpc_time += event.duration
+            frame.rpc_count += event.calls
+
+    # ============ 并行分支 ============
+
+    def fork(self, label: str) -> "ScriptProfiler":
+        """
+        为并行分支创建子分析器
+
+        Args:
+            label: 分支标签
+
+        Returns:
+            子分析器
+        """
+        base = self._base + tuple(f.label for f in self._frames) + (label,)
+        return ScriptProfiler(self._scripts[-1], base)
+
+    def merge(self, child: "ScriptProfiler") -> None:
+        """
+        合并子分析器的统计数据
+
+        分支的 RPC 计入当前栈帧；分支并发执行，墙钟时间不累加到父栈帧。
+
+        Args:
+            child: 子分析器
+        """
+        for key, stat in child.lines.items():
+            self.lines.setdefault(key, ProfileStat()).add(stat)
+        for key, stat in child.commands.items():
+            self.commands.setdefault(key, ProfileStat()).add(stat)
+        for key, value in child.stacks.items():
+            self.stacks[key] = self.stacks.get(key, 0.0) + value
+        self.rpc_time += child.rpc_time
+        self.rpc_count += child.rpc_count
+        if self._frames:
+            self._frames[-1].rpc_time += child.rpc_time
+            self._frames[-1].rpc_count += child.rpc_count
+
+    # ============ 输出 ============
+
+    def collapsed(self) -> str:
+        """
+        导出 collapsed stack 格式
+
+        每行格式为 "帧1;帧2;帧3 微秒数"，数值为该栈的自身耗时。
+
+        Returns:
+            collapsed stack 文本
+        """
+        return "\n".join(
+            f"{stack} {int(seconds * 1_000_000)}"
+            for stack, seconds in sorted(self.stacks.items())
+            if seconds > 0
+        )
+
+    def report(self) -> Dict[str, Any]:
+        """
+        生成分析报告
+
+        Returns:
+            包含总耗时、按行统计、按命令统计和 collapsed stack 的字典
+        """
+
+        def rows(stats: Dict[str, ProfileStat], key: str) -> List[Dict[str, Any]]:
+            result = [{key: name, **asdict(stat)} for name, stat in stats.items()]
+            return sorted(result, key=lambda row: row["self_time"], reverse=True)
+
+        return {
+            "total_time": time.perf_counter() - self._started,
+            "rpc_time": self.rpc_time,
+            "rpc_count": self.rpc_count,
+            "lines": rows(self.lines, "line"),
+            "commands": rows(self.commands, "command"),
+            "collapsed": self.collapsed(),
+        }
+
+
+_active_profiler: ContextVar[Optional[ScriptProfiler]] = ContextVar(
+    "active_profiler", default=None
+)
+
+
+def _dispatch_rpc(event: RpcEvent) -> None:
+    profiler = _active_profiler.get()
+    if profiler is not None:
+        profiler.on_rpc(event)
+
+
+@contextmanager
+def profiling(profiler: ScriptProfiler):
+    """
+    在当前上下文中启用分析器，上下文内的设备 RPC 都会归属到该分析器
+
+    嵌套使用时（例如并行分支）替换当前分析器，不会重复计数。
+
+    Args:
+        profiler: 分析器
+    """
+    outer = _active_profiler.get()
+    token = _active_profiler.set(profiler)
+    try:
+        if outer is None:
+            with rpc_listener(_dispatch_rpc):
+                yield profiler
+        else:
+            yield profiler
+    finally:
+        _active_profiler.reset(token)
+
+
+# 导出的公共接口
+__all__ = [
+    "ProfileStat",
+    "ScriptProfiler",
+    "node_kind",
+    "profiling",
+]
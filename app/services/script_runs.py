@@ -0,0 +1,383 @@
+"""
+脚本执行记录模块
+
+使用本地 SQLite 数据库（WAL 模式）持久化每次脚本执行的记录：
+脚本哈希、设备、开始/结束时间、状态、变量、日志文件路径和性能分析摘要。
+按设备、状态和开始时间建立索引，支持在大量历史记录中快速查询，并按保留期限清理旧记录
+（连同记录的日志文件和失败检查点）。
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from .script_checkpoint import CheckpointStore
+
+
+class RunStatus(str, Enum):
+    """执行状态"""
+
+    RUNNING = "running"
+    SUCCESS = "success"
+    FAILED = "failed"
+    STOPPED = "stopped"
+    INTERRUPTED = "interrupted"  # 服务在执行过程中退出
+
+
+@dataclass
+class ScriptRun:
+    """
+    一次脚本执行记录
+
+    Attributes:
+        id: 执行会话 ID
+        script_hash: 脚本内容哈希
+        script_name: 脚本文件名（执行脚本内容时为 None）
+        device: 设备序列号
+        status: 执行状态（见 RunStatus）
+        started_at: 开始时间（Unix 时间戳）
+        finished_at: 结束时间（Unix 时间戳）
+        error: 错误信息
+        variables: 结束时的变量
+        log_file: 完整日志文件路径
+        log_total: 日志总条数
+        checkpoint_id: 可用于恢复执行的检查点
+        resumed_from: 从检查点恢复时为检查点 ID
+        profile: 性能分析摘要（total_time、rpc_time、rpc_count）
+    """
+
+    id: str
+    script_hash: str
+    script_name: Optional[str] = None
+    device: Optional[str] = None
+    status: str = RunStatus.RUNNING.value
+    started_at: float = 0.0
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    variables: Optional[Dict[str, Any]] = None
+    log_file: Optional[str] = None
+    log_total: int = 0
+    checkpoint_id: Optional[str] = None
+    resumed_from: Optional[str] = None
+    profile: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    script_hash TEXT NOT NULL,
+    script_name TEXT,
+    device TEXT,
+    status TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    error TEXT,
+    variables TEXT,
+    log_file TEXT,
+    log_total INTEGER NOT NULL DEFAULT 0,
+    checkpoint_id TEXT,
+    resumed_from TEXT,
+    profile TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started ON runs (started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_device_started ON runs (device, started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_status_started ON runs (status, started_at);
+"""
+
+_JSON_COLUMNS = ("variables", "profile")
+
+
+class ScriptRunStore:
+    """
+    脚本执行记录存储
+
+    连接在第一次使用时打开，所有线程共享一个连接并通过锁串行访问。
+    写入会等待锁并落盘（finish 还可能触发清理），异步代码中应通过 asyncio.to_thread 调用。
+
+    Attributes:
+        path: 数据库文件路径
+        retention: 记录保留时长（秒），为 0 时不清理
+        checkpoints: 检查点存储，清理记录时一并删除其检查点
+    """
+
+    PRUNE_INTERVAL = 3600.0  # 两次自动清理之间的最短间隔（秒）
+
+    def __init__(
+        self,
+        path: str,
+        retention: float = 0.0,
+        checkpoints: Optional[CheckpointStore] = None,
+    ):
+        """
+        初始化存储
+
+        Args:
+            path: 数据库文件路径（":memory:" 为内存数据库）
+            retention: 记录保留时长（秒），为 0 时不清理
+            checkpoints: 检查点存储，清理记录时一并删除其检查点
+        """
+        self.path = path
+        self.retention = retention
+        self.checkpoints = checkpoints
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        """打开数据库连接并初始化表结构（调用方持有锁）"""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            # 上次退出时仍在执行的记录不会再结束
+            conn.execute(
+                "UPDATE runs SET status = ? WHERE status = ?",
+                (RunStatus.INTERRUPTED.value, RunStatus.RUNNING.value),
+            )
+            self._conn = conn
+        return self._conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._connect().execute(sql, params)
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ============ 写入 ============
+
+    def start(
+        self,
+        run_id: str,
+        script_hash: str,
+        script_name: Optional[str] = None,
+        device: Optional[str] = None,
+        resumed_from: Optional[str] = None,
+    ) -> None:
+        """
+        记录脚本开始执行
+
+        Args:
+            run_id: 执行会话 ID
+            script_hash: 脚本内容哈希
+            script_name: 脚本文件名
+            device: 设备序列号
+            resumed_from: 从检查点恢复时为检查点 ID
+        """
+        self._execute(
+            "INSERT OR REPLACE INTO runs (id, script_hash, script_name, device, status, started_at, resumed_from)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (run_id, script_hash, script_name, device, RunStatus.RUNNING.value, time.time(), resumed_from),
+        )
+
+    def finish(
+        self,
+        run_id: str,
+        status: RunStatus,
+        device: Optional[str] = None,
+        error: Optional[str] = None,
+        variables: Optional[Dict[str, Any]] = None,
+        log_file: Optional[str] = None,
+        log_total: int = 0,
+        checkpoint_id: Optional[str] = None,
+        profile: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        记录脚本执行结束
+
+        Args:
+            run_id: 执行会话 ID
+            status: 结束状态
+            device: 设备序列号（开始时设备尚未连接的情况下补充）
+            error: 错误信息
+            variables: 结束时的变量
+            log_file: 完整日志文件路径
+            log_total: 日志总条数
+            checkpoint_id: 可用于恢复执行的检查点
+            profile: 性能分析摘要
+        """
+        self._execute(
+            "UPDATE runs SET status = ?, device = COALESCE(?, device), finished_at = ?, error = ?,"
+            " variables = ?, log_file = ?, log_total = ?, checkpoint_id = ?, profile = ? WHERE id = ?",
+            (
+                RunStatus(status).value,
+                device,
+                time.time(),
+                error,
+                _dumps(variables),
+                log_file,
+                log_total,
+                checkpoint_id,
+                _dumps(profile),
+                run_id,
+            ),
+        )
+        if self.retention and time.monotonic() - self._last_prune >= self.PRUNE_INTERVAL:
+            self.prune()
+
+    def prune(self, retention: Optional[float] = None) -> int:
+        """
+        删除超过保留期限的已结束记录，以及这些记录的日志文件和检查点
+
+        恢复执行会继续写入同一个检查点，仍被保留的记录引用的检查点不删除。
+
+        Args:
+            retention: 保留时长（秒），默认使用 self.retention
+
+        Returns:
+            删除的记录数
+        """
+        retention = self.retention if retention is None else retention
+        self._last_prune = time.monotonic()
+        if not retention:
+            return 0
+        expired = "started_at < ? AND status != ?"
+        params = (time.time() - retention, RunStatus.RUNNING.value)
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(
+                f"SELECT log_file, checkpoint_id FROM runs WHERE {expired}", params
+            ).fetchall()
+            if not rows:
+                return 0
+            kept = {
+                row[0]
+                for row in conn.execute(
+                    f"SELECT checkpoint_id FROM runs WHERE NOT ({expired})"
+                    f" UNION SELECT resumed_from FROM runs WHERE NOT ({expired})",
+                    params + params,
+                )
+            }
+            for row in rows:
+                if row["log_file"]:
+                    _remove(row["log_file"])
+                    _remove(row["log_file"] + ".idx")
+                checkpoint_id = row["checkpoint_id"]
+                if self.checkpoints is not None and checkpoint_id and checkpoint_id not in kept:
+                    try:
+                        self.checkpoints.delete(checkpoint_id)
+                    except (OSError, ValueError):
+                        pass
+            cursor = conn.execute(f"DELETE FROM runs WHERE {expired}", params)
+        return cursor.rowcount
+
+    # ============ 查询 ============
+
+    def get(self, run_id: str) -> Optional[ScriptRun]:
+        """
+        获取执行记录
+
+        Args:
+            run_id: 执行会话 ID
+
+        Returns:
+            执行记录，不存在时返回 None
+        """
+        with self._lock:
+            row = self._connect().execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return _to_run(row) if row is not None else None
+
+    def query(
+        self,
+        device: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> List[ScriptRun]:
+        """
+        按条件查询执行记录（按开始时间倒序）
+
+        Args:
+            device: 设备序列号
+            status: 执行状态（无效的状态会抛出 ValueError）
+            since: 开始时间下限（Unix 时间戳）
+            until: 开始时间上限（Unix 时间戳，不含）
+            limit: 最多返回的条数
+            offset: 跳过的条数
+
+        Returns:
+            执行记录列表
+        """
+        clauses = []
+        params: List[Any] = []
+        if device is not None:
+            clauses.append("device = ?")
+            params.append(device)
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(RunStatus(status).value)
+        if since is not None:
+            clauses.append("started_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("started_at < ?")
+            params.append(until)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT * FROM runs{where} ORDER BY started_at DESC LIMIT ? OFFSET ?"
+        with self._lock:
+            rows = self._connect().execute(sql, (*params, limit, offset)).fetchall()
+        return [_to_run(row) for row in rows]
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _dumps(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _to_run(row: sqlite3.Row) -> ScriptRun:
+    data = dict(row)
+    for column in _JSON_COLUMNS:
+        if data[column] is not None:
+            data[column] = json.loads(data[column])
+    return ScriptRun(**data)
+
+
+def profile_summary(profile: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    提取性能分析报告的摘要（按行和按命令的明细不入库）
+
+    Args:
+        profile: ScriptProfiler.report() 的结果
+
+    Returns:
+        摘要字典，未开启性能分析时返回 None
+    """
+    if not profile:
+        return None
+    return {key: profile[key] for key in ("total_time", "rpc_time", "rpc_count") if key in profile}
+
+
+# 导出的公共接口
+__all__ = [
+    "RunStatus",
+    "ScriptRun",
+    "ScriptRunStore",
+    "profile_summary",
+]
@@ -0,0 +1,413 @@
+"""
+脚本模拟执行模块
+
+使用录制的 UI 层次结构快照序列代替真实设备执行脚本，用于在没有手机的情况下
+批量校验脚本并估算执行时长：
+
+- 快照按录制时间（相对开始执行的秒数）排列，虚拟时钟到达某个时间点时，界面即为该时间点的快照
+- wait、device.sleep 和元素等待（wait_element / wait_gone 等）直接推进虚拟时钟，不真正等待；
+  元素等待会跳到元素出现（或消失）的快照时间，超时则跳到超时时间
+- 每次设备调用按配置的延迟推进虚拟时钟，结束时的虚拟时间即为估算的真实执行时长
+- 记录每个选择器在每一行的查找结果，报告哪些选择器在执行时会失败
+
+模拟执行不使用命令流水线；并行分支共享同一个虚拟时钟，估算时长按分支耗时之和计算。
+"""
+
+import bisect
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .script_executor import ExecutionResult, ScriptExecutor
+from .script_parser import CommandNode, ConditionNode
+from ..core.device import DeviceInfo
+from ..core.fake_device import FakeDevice, LatencyModel
+from ..core.hierarchy import Hierarchy
+
+# 只用于探测元素是否存在的命令，查找不到元素不算失败
+PROBE_COMMANDS = {"exists", "condition", "find_element", "find_elements"}
+
+_EMPTY_HIERARCHY = '<?xml version="1.0" encoding="UTF-8"?><hierarchy rotation="0"/>'
+
+
+class VirtualClock:
+    """
+    虚拟时钟
+
+    Attributes:
+        now: 当前虚拟时间（秒，从 0 开始）
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self._lock = threading.Lock()
+
+    def advance(self, seconds: float) -> None:
+        """
+        推进虚拟时间
+
+        Args:
+            seconds: 推进的秒数（负数忽略）
+        """
+        if seconds > 0:
+            with self._lock:
+                self.now += seconds
+
+
+@dataclass
+class HierarchySnapshot:
+    """
+    录制的一份界面快照
+
+    Attributes:
+        at: 快照出现的时间（相对开始执行的秒数）
+        hierarchy: 层次结构
+        name: 快照名（通常为文件名）
+    """
+
+    at: float
+    hierarchy: Hierarchy
+    name: str = ""
+
+
+def load_snapshots(directory: str, interval: float = 1.0) -> List[HierarchySnapshot]:
+    """
+    从目录加载快照序列
+
+    目录中有 timeline.json（[{"at": 秒数, "file": "xxx.xml"}, ...]）时按其排列，
+    否则按文件名排序，第 i 个 XML 文件在 i * interval 秒出现。
+
+    Args:
+        directory: 快照目录
+        interval: 没有 timeline.json 时相邻快照的间隔（秒）
+
+    Returns:
+        按时间排序的快照列表
+    """
+    timeline_path = os.path.join(directory, "timeline.json")
+    if os.path.exists(timeline_path):
+        with open(timeline_path, "r", encoding="utf-8") as f:
+            timeline = json.load(f)
+        entries = [(float(item["at"]), item["file"]) for item in timeline]
+    else:
+        files = sorted(name for name in os.listdir(directory) if name.endswith(".xml"))
+        entries = [(index * interval, name) for index, name in enumerate(files)]
+
+    return [
+        HierarchySnapshot(at, Hierarchy.from_file(os.path.join(directory, name)), name)
+        for at, name in entries
+    ]
+
+
+class Simulation:
+    """
+    一次模拟执行的状态：虚拟时钟、快照序列、设备延迟模型和选择器统计
+
+    Attributes:
+        clock: 虚拟时钟
+        latency: 设备调用延迟模型
+        rpc_count: 设备调用次数
+        waited: 等待（wait、sleep、元素等待）的总虚拟时间（秒）
+        device: 模拟设备
+        device_manager: 返回模拟设备的设备管理器
+    """
+
+    def __init__(
+        self,
+        snapshots: List[HierarchySnapshot],
+        rpc_latency: float = 0.1,
+        dump_latency: float = 0.5,
+    ):
+        """
+        初始化模拟执行
+
+        Args:
+            snapshots: 快照序列（为空时界面始终为空）
+            rpc_latency: 每次设备调用的估算延迟（秒）
+            dump_latency: 导出层次结构的估算延迟（秒）
+        """
+        self._snapshots = sorted(snapshots, key=lambda snapshot: snapshot.at) or [
+            HierarchySnapshot(0.0, Hierarchy(_EMPTY_HIERARCHY), "empty")
+        ]
+        self._times = [snapshot.at for snapshot in self._snapshots]
+        self.clock = VirtualClock()
+        self.latency = LatencyModel(rpc_latency, dump_latency)
+        self.rpc_count = 0
+        self.waited = 0.0
+        self._location: Tuple[int, str] = (0, "")
+        self._selectors: Dict[Tuple[int, str, str], List[int]] = {}
+        self._lock = threading.Lock()
+        self.device = SimulatedDevice(self)
+        self.device_manager = SimulatedDeviceManager(self.device)
+
+    @classmethod
+    def from_directory(cls, directory: str, interval: float = 1.0, **kwargs: Any) -> "Simulation":
+        """
+        从快照目录创建模拟执行（目录格式见 load_snapshots）
+
+        Args:
+            directory: 快照目录
+            interval: 没有 timeline.json 时相邻快照的间隔（秒）
+            **kwargs: 传给构造函数的延迟参数
+
+        Returns:
+            Simulation: 模拟执行
+        """
+        return cls(load_snapshots(directory, interval), **kwargs)
+
+    # ============ 时间线 ============
+
+    def _index_at(self, t: float) -> int:
+        return max(bisect.bisect_right(self._times, t) - 1, 0)
+
+    def snapshot_at(self, t: float) -> HierarchySnapshot:
+        """
+        指定虚拟时间的界面快照
+
+        Args:
+            t: 虚拟时间（秒）
+
+        Returns:
+            HierarchySnapshot: 该时间点的快照
+        """
+        return self._snapshots[self._index_at(t)]
+
+    @property
+    def hierarchy(self) -> Hierarchy:
+        """当前虚拟时间的层次结构"""
+        return self.snapshot_at(self.clock.now).hierarchy
+
+    def rpc(self, latency: float) -> None:
+        """
+        记录一次设备调用并推进虚拟时钟
+
+        Args:
+            latency: 本次调用的延迟（秒）
+        """
+        with self._lock:
+            self.rpc_count += 1
+        self.clock.advance(latency)
+
+    def sleep(self, seconds: float) -> None:
+        """
+        等待（推进虚拟时钟）
+
+        Args:
+            seconds: 等待时间（秒）
+        """
+        seconds = max(float(seconds), 0.0)
+        with self._lock:
+            self.waited += seconds
+        self.clock.advance(seconds)
+
+    def wait_until(self, predicate: Callable[[Hierarchy], bool], timeout: float) -> bool:
+        """
+        等待界面满足条件：跳到第一个满足条件的快照时间，超时则跳到超时时间
+
+        Args:
+            predicate: 界面条件
+            timeout: 超时时间（秒）
+
+        Returns:
+            在超时前满足条件返回 True
+        """
+        start = self.clock.now
+        deadline = start + max(float(timeout), 0.0)
+        index = self._index_at(start)
+        t = start
+        while True:
+            if predicate(self._snapshots[index].hierarchy):
+                self.sleep(t - start)
+                return True
+            index += 1
+            if index >= len(self._snapshots) or self._snapshots[index].at > deadline:
+                self.sleep(deadline - start)
+                return False
+            t = self._snapshots[index].at
+
+    # ============ 选择器统计 ============
+
+    def enter(self, line: int, command: str) -> None:
+        """
+        记录当前执行的命令，选择器查找会归属到该命令
+
+        Args:
+            line: 源码行号
+            command: 命令名（条件判断为 "condition"）
+        """
+        self._location = (line, command)
+
+    def record(self, selector: str, found: bool) -> None:
+        """
+        记录一次选择器查找
+
+        Args:
+            selector: 选择器描述，例如 id:"com.example:id/login"
+            found: 是否找到
+        """
+        line, command = self._location
+        with self._lock:
+            stat = self._selectors.setdefault((line, command, selector), [0, 0])
+            stat[0] += 1
+            if not found:
+                stat[1] += 1
+
+    def report(self) -> Dict[str, Any]:
+        """
+        生成模拟执行报告
+
+        Returns:
+            包含估算时长、设备调用次数、等待时间、选择器统计和失败选择器的字典
+        """
+        selectors = [
+            {"line": line, "command": command, "selector": selector, "lookups": stat[0], "misses": stat[1]}
+            for (line, command, selector), stat in sorted(self._selectors.items())
+        ]
+        return {
+            "estimated_duration": round(self.clock.now, 3),
+            "rpc_count": self.rpc_count,
+            "waited": round(self.waited, 3),
+            "final_snapshot": self.snapshot_at(self.clock.now).name,
+            "selectors": selectors,
+            "failed_selectors": [
+                item for item in selectors if item["misses"] and item["command"] not in PROBE_COMMANDS
+            ],
+        }
+
+
+class SimulatedDevice(FakeDevice):
+    """
+    模拟设备
+
+    设备操作与 FakeDevice 相同，但界面由快照时间线决定（操作不会切换界面），
+    调用延迟和等待推进虚拟时钟，选择器查找结果计入模拟执行报告。
+    """
+
+    def __init__(self, simulation: Simulation):
+        super().__init__(latency=simulation.latency, serial="simulated")
+        self._simulation = simulation
+
+    @property
+    def hierarchy(self) -> Hierarchy:
+        return self._simulation.hierarchy
+
+    def goto(self, screen: str) -> None:
+        pass
+
+    def _pause(self, seconds: float) -> None:
+        self._simulation.rpc(seconds)
+
+    def _wait_until(self, method: str, predicate: Callable[[Hierarchy], bool], timeout: float) -> bool:
+        self.jsonrpc_call(method, [timeout])
+        return self._simulation.wait_until(predicate, timeout)
+
+    def _record(self, selector: str, found: bool) -> None:
+        self._simulation.record(selector, found)
+
+    def sleep(self, seconds: float) -> None:
+        self._simulation.sleep(seconds)
+
+
+class SimulatedDeviceManager:
+    """返回模拟设备的设备管理器（接口与 DeviceManager 相同）"""
+
+    def __init__(self, device: SimulatedDevice):
+        self._device = device
+
+    def connect(self, device_serial: Optional[str] = None) -> DeviceInfo:
+        return DeviceInfo(serial=self._device.serial, product_name="simulated", api_level=0, battery_level=100)
+
+    def get_device(self) -> SimulatedDevice:
+        return self._device
+
+    def disconnect(self) -> None:
+        pass
+
+    def is_connected(self) -> bool:
+        return True
+
+
+class _SimulatedAdbService:
+    """模拟执行时代替 AdbService（shell 返回空输出）"""
+
+    def __init__(self, device: SimulatedDevice):
+        self._device = device
+
+    def shell(self, cmd: str) -> str:
+        return self._device.shell(cmd).output
+
+
+class SimulatedScriptExecutor(ScriptExecutor):
+    """
+    模拟脚本执行器
+
+    与 ScriptExecutor 的执行语义相同，设备换成模拟设备，等待推进虚拟时钟。
+    顶层 execute_script 的结果中 simulation 字段为模拟执行报告。
+    """
+
+    # 元素等待推进虚拟时钟，不分段，保持设备调用次数与一次真实等待一致
+    WAIT_SLICE = float("inf")
+
+    def __init__(self, simulation: Simulation, **kwargs: Any):
+        """
+        初始化模拟执行器
+
+        Args:
+            simulation: 模拟执行状态
+            **kwargs: 传给 ScriptExecutor 的日志参数
+        """
+        super().__init__(simulation.device_manager, **kwargs)
+        self.simulation = simulation
+        self._cached_device = simulation.device
+        self._adb_service = _SimulatedAdbService(simulation.device)
+        self._in_condition = False
+
+    def execute_script(self, source: str, *args: Any, **kwargs: Any) -> ExecutionResult:
+        result = super().execute_script(source, *args, **kwargs)
+        if not self._call_depth:
+            result.simulation = self.simulation.report()
+        return result
+
+    def execute_command(self, node: CommandNode) -> Any:
+        if not self._in_condition:
+            self.simulation.enter(node.line, node.command.lower())
+        return super().execute_command(node)
+
+    def evaluate_condition(self, cond: ConditionNode) -> bool:
+        if cond.expression is not None:
+            # 表达式在主机侧求值，不产生设备调用
+            return super().evaluate_condition(cond)
+        # 条件中的命令（如 if click ...）找不到元素只表示条件不成立
+        self.simulation.enter(cond.line, "condition")
+        self._in_condition = True
+        try:
+            return super().evaluate_condition(cond)
+        finally:
+            self._in_condition = False
+
+    def _sleep(self, seconds: float) -> None:
+        self.simulation.sleep(seconds)
+
+    def _now(self) -> float:
+        return self.simulation.clock.now
+
+    def _defer_command(self, node: CommandNode) -> bool:
+        # 模拟设备不支持批量请求，所有命令逐条执行
+        return False
+
+    def _create_branch_executor(self) -> "SimulatedScriptExecutor":
+        return type(self)(self.simulation)
+
+
+# 导出的公共接口
+__all__ = [
+    "HierarchySnapshot",
+    "Simulation",
+    "SimulatedDevice",
+    "SimulatedDeviceManager",
+    "SimulatedScriptExecutor",
+    "VirtualClock",
+    "load_snapshots",
+]
@@ -0,0 +1,168 @@
+"""
+脚本事件处理器模块
+
+脚本顶层的 on <条件> do ... end 定义一次事件处理器，执行期间在以下时机检查：
+- 执行点击、输入、滑动等界面操作之前
+- wait / wait_element / wait_gone 等待期间
+
+每次检查只导出一次界面层次结构，所有处理器的条件都在这份快照上判断，
+代替在每条语句之间插入 `if exists ...` 的多次设备调用：
+- 优先级：priority 高的处理器先判断，每份快照最多触发一个处理器；处理器执行后界面已经变化，
+  重新导出快照继续检查，直到没有处理器命中（最多 MAX_ROUNDS 轮）
+- 限流：两次检查至少间隔 interval 秒；处理器触发后 cooldown 秒内不再触发，times 限制总触发次数
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from .script_parser import ConditionNode, OnNode
+from ..core.hierarchy import Hierarchy, UiNode
+
+# 执行前需要检查事件处理器的界面操作命令
+WATCHED_COMMANDS = {
+    "click",
+    "click_text",
+    "click_id",
+    "input",
+    "clear",
+    "swipe",
+    "human_click",
+    "human_double_click",
+    "human_long_press",
+    "human_drag",
+}
+
+# 脚本选择器类型 -> uiautomator2 选择器参数（与 ScriptExecutor._get_element 一致）
+_SELECTOR_KEYS = {
+    "id": "resourceId",
+    "text": "text",
+    "class": "className",
+}
+
+
+def find_nodes(hierarchy: Hierarchy, selector_type: str, selector_value: str) -> List[UiNode]:
+    """
+    在快照中按脚本选择器查找节点
+
+    Args:
+        hierarchy: 界面快照
+        selector_type: 选择器类型 (id, text, xpath, class)
+        selector_value: 选择器值
+
+    Returns:
+        匹配的节点列表
+
+    Raises:
+        ValueError: 不支持的选择器类型
+    """
+    if selector_type == "xpath":
+        return hierarchy.xpath(selector_value)
+    key = _SELECTOR_KEYS.get(selector_type)
+    if key is None:
+        raise ValueError(f"Unsupported selector type: {selector_type}")
+    return hierarchy.select(**{key: selector_value})
+
+
+@dataclass
+class Watcher:
+    """
+    一个已登记的事件处理器
+
+    Attributes:
+        node: 处理器节点
+        fired: 已触发次数
+        last_fired: 上次触发的时间（秒，未触发时为 None）
+    """
+
+    node: OnNode
+    fired: int = 0
+    last_fired: Optional[float] = None
+
+    def ready(self, now: float) -> bool:
+        """处理器当前是否允许触发（未达到次数上限且不在冷却中）"""
+        if self.node.times and self.fired >= self.node.times:
+            return False
+        return self.last_fired is None or now - self.last_fired >= self.node.cooldown
+
+
+class WatcherSet:
+    """
+    脚本的事件处理器集合
+
+    并行分支共享同一个集合，触发次数和冷却时间按整个脚本计算。
+
+    Attributes:
+        MAX_ROUNDS: 一次检查中连续触发处理器的最大轮数
+        watchers: 按优先级排序的处理器（优先级相同时按定义顺序）
+        interval: 两次检查之间的最小间隔（秒）
+        checks: 已检查的快照数
+    """
+
+    MAX_ROUNDS = 5
+
+    def __init__(self, nodes: List[OnNode], interval: float, parent: Optional["WatcherSet"] = None):
+        """
+        登记事件处理器
+
+        Args:
+            nodes: 处理器节点
+            interval: 两次检查之间的最小间隔（秒）
+            parent: 调用方脚本的处理器集合（子脚本执行期间两者的处理器都生效）
+        """
+        watchers = list(parent.watchers) if parent else []
+        watchers.extend(Watcher(node) for node in nodes)
+        self.watchers = sorted(watchers, key=lambda watcher: -watcher.node.priority)
+        self.interval = interval
+        self.checks = 0
+        self._last_check: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self.watchers)
+
+    def due(self, now: float) -> bool:
+        """距离上次检查是否已超过检查间隔"""
+        return self._last_check is None or now - self._last_check >= self.interval
+
+    def match(
+        self,
+        hierarchy: Hierarchy,
+        condition: Callable[[ConditionNode, Hierarchy], bool],
+        now: float,
+    ) -> Optional[Watcher]:
+        """
+        在快照上按优先级查找第一个命中的处理器，并记为已触发
+
+        Args:
+            hierarchy: 界面快照
+            condition: 条件判断函数
+            now: 当前时间（秒）
+
+        Returns:
+            命中的处理器，没有命中时返回 None
+        """
+        with self._lock:
+            self.checks += 1
+            self._last_check = now
+            candidates = [watcher for watcher in self.watchers if watcher.ready(now)]
+
+        for watcher in candidates:
+            if condition(watcher.node.condition, hierarchy):
+                with self._lock:
+                    if not watcher.ready(now):
+                        # 并行分支在同一时刻已经触发了该处理器
+                        continue
+                    watcher.fired += 1
+                    watcher.last_fired = now
+                return watcher
+        return None
+
+
+# 导出的公共接口
+__all__ = [
+    "WATCHED_COMMANDS",
+    "find_nodes",
+    "Watcher",
+    "WatcherSet",
+]
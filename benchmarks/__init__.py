@@ -0,0 +1,6 @@
+"""
+性能基准测试
+
+每个模块都可以通过 python -m benchmarks.<name> 独立运行，
+不依赖真实设备，使用带可配置延迟的模拟端点。
+"""
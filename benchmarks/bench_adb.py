@@ -0,0 +1,116 @@
+"""
+ADB 路径基准
+
+在本地假 ADB server（app.core.fake_adb）上测量 AdbService 各条路径的耗时：
+应用列表、应用详情、全部应用详情、设备信息、截图和文件推送/拉取。
+服务端延迟、传输速率、应用数量和截图大小都可以配置，结果可以保存为基线，
+之后与基线对比，任一路径变慢超过容差时以非零状态退出，用于拦截性能回退。
+
+运行方式：
+    python -m benchmarks.bench_adb [--latency 0.005] [--bandwidth 20e6] [--packages 100]
+    python -m benchmarks.bench_adb --save baseline.json
+    python -m benchmarks.bench_adb --compare baseline.json [--tolerance 0.2]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+from app.core.fake_adb import FakeAdbServer
+from app.core.fake_device import LatencyModel
+from app.services.adb_service import AdbService
+
+
+def build_cases(service: AdbService, workdir: str, file_size: int) -> List[Tuple[str, Callable[[], object]]]:
+    """生成基准用例 (名称, 调用)"""
+    local = os.path.join(workdir, "payload.bin")
+    with open(local, "wb") as f:
+        f.write(os.urandom(file_size))
+    package = service.list_packages("third_party")[0]
+    return [
+        ("list_packages", lambda: service.list_packages()),
+        ("get_package_info", lambda: service.get_package_info(package)),
+        ("get_all_packages_info", lambda: service.get_all_packages_info("third_party")),
+        ("get_device_info", service.get_device_info),
+        ("take_screenshot_base64", service.take_screenshot_base64),
+        ("take_screenshot", lambda: service.take_screenshot(os.path.join(workdir, "screen.png"))),
+        ("push_file", lambda: service.push_file(local, "/sdcard/payload.bin")),
+        ("pull_file", lambda: service.pull_file("/sdcard/payload.bin", os.path.join(workdir, "pulled.bin"))),
+    ]
+
+
+def measure(func: Callable[[], object], repeat: int) -> float:
+    """多次执行取中位数（秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def compare(
+    results: Dict[str, float], baseline: Dict[str, float], tolerance: float, min_delta: float = 0.002
+) -> List[str]:
+    """返回比基线慢超过容差（且绝对差值超过 min_delta 秒）的用例"""
+    return [
+        name
+        for name, elapsed in results.items()
+        if name in baseline
+        and elapsed > baseline[name] * (1 + tolerance)
+        and elapsed - baseline[name] > min_delta
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AdbService benchmark against a fake ADB server")
+    parser.add_argument("--latency", type=float, default=0.005, help="每个 host/shell/sync 请求的服务端延迟（秒）")
+    parser.add_argument("--bandwidth", type=float, default=20e6, help="传输速率（字节/秒），0 为不限速")
+    parser.add_argument("--packages", type=int, default=100, help="设备上的应用数量（一半为第三方应用）")
+    parser.add_argument("--screenshot-size", type=int, default=500 * 1024, help="截图大小（字节）")
+    parser.add_argument("--file-size", type=int, default=2 * 1024 * 1024, help="推送/拉取文件大小（字节）")
+    parser.add_argument("--repeat", type=int, default=3, help="每个用例的执行次数")
+    parser.add_argument("--save", help="将结果保存为基线 JSON")
+    parser.add_argument("--compare", help="与基线 JSON 对比")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="对比时允许的变慢比例")
+    options = parser.parse_args()
+
+    server = FakeAdbServer(
+        serials=["bench"],
+        latency=LatencyModel(options.latency),
+        bandwidth=options.bandwidth,
+        packages=options.packages,
+        screenshot_size=options.screenshot_size,
+    )
+    results: Dict[str, float] = {}
+    with server, tempfile.TemporaryDirectory() as workdir:
+        service = AdbService("bench", port=server.port)
+        for name, func in build_cases(service, workdir, options.file_size):
+            before = dict(server.requests)
+            results[name] = measure(func, options.repeat)
+            requests = sum(server.requests.values()) - sum(before.values())
+            print(f"{name:<24}{results[name] * 1000:>10.1f}ms{requests / options.repeat:>8.0f} req")
+
+    if options.save:
+        with open(options.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline saved: {options.save}")
+
+    if options.compare:
+        with open(options.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, options.tolerance)
+        for name in regressions:
+            print(f"REGRESSION {name}: {baseline[name] * 1000:.1f}ms -> {results[name] * 1000:.1f}ms")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions (tolerance {options.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+并发空闲会话负载测试
+
+同时启动 N 个处于 wait 状态的脚本，对比每个会话一个线程的执行方式
+与 AsyncScriptExecutor（每台设备的脚本线程池，DEVICE_SCRIPT_WORKERS）的耗时、峰值线程数和内存占用。
+脚本线程池限制的是同一设备同时执行的脚本数，超出的会话排队，耗时随之增加。
+
+运行方式：
+    python -m benchmarks.bench_async_sessions [--sessions 200] [--wait 0.5] [--threaded]
+"""
+
+import argparse
+import asyncio
+import resource
+import threading
+import time
+
+from app.core.device import get_device_manager
+from app.services.script_async import AsyncScriptExecutor
+from app.services.script_executor import ScriptExecutor
+
+SCRIPT = 'set step = 1\nwait {wait}\nlog "done ${{step}}"\n'
+
+
+def _max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_threaded(sessions: int, wait: float) -> tuple:
+    source = SCRIPT.format(wait=wait)
+    results = []
+
+    def worker():
+        results.append(ScriptExecutor(get_device_manager()).execute_script(source))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(sessions)]
+    for thread in threads:
+        thread.start()
+    peak_threads = threading.active_count()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    assert all(result.success for result in results)
+    return elapsed, peak_threads
+
+
+async def run_async(sessions: int, wait: float) -> tuple:
+    source = SCRIPT.format(wait=wait)
+    start = time.perf_counter()
+    tasks = [
+        asyncio.create_task(AsyncScriptExecutor(get_device_manager()).execute_script_async(source))
+        for _ in range(sessions)
+    ]
+    peak_threads = 0
+    while not all(task.done() for task in tasks):
+        peak_threads = max(peak_threads, threading.active_count())
+        await asyncio.sleep(wait / 4)
+    results = await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    assert all(result.success for result in results)
+    return elapsed, peak_threads
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent idle script sessions load test")
+    parser.add_argument("--sessions", type=int, default=200, help="并发会话数")
+    parser.add_argument("--wait", type=float, default=0.5, help="每个会话的 wait 时长（秒）")
+    parser.add_argument("--threaded", action="store_true", help="同时测试每会话一个线程的模式")
+    options = parser.parse_args()
+
+    print(f"sessions={options.sessions} wait={options.wait}s")
+    print(f"{'mode':<10}{'elapsed(s)':>12}{'threads':>10}{'maxrss(MB)':>12}")
+
+    elapsed, threads = asyncio.run(run_async(options.sessions, options.wait))
+    print(f"{'device':<10}{elapsed:>12.3f}{threads:>10}{_max_rss_mb():>12.1f}")
+
+    if options.threaded:
+        elapsed, threads = run_threaded(options.sessions, options.wait)
+        print(f"{'threaded':<10}{elapsed:>12.3f}{threads:>10}{_max_rss_mb():>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
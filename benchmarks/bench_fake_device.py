@@ -0,0 +1,79 @@
+"""
+假设备延迟基准
+
+使用 tests/fixtures/fake_device 中的界面和可配置的调用延迟，在进程内假设备上
+重复执行一段登录流程脚本，按 JSON-RPC 方法统计调用次数和耗时。
+延迟模型固定时结果可复现，可作为其它性能优化的对照基线。
+
+运行方式：
+    python -m benchmarks.bench_fake_device [--latency 0.02] [--dump-latency 0.1] [--iterations 10]
+"""
+
+import argparse
+import os
+import time
+from collections import Counter, defaultdict
+
+from app.core.device import get_device_manager
+from app.core.fake_device import FakeDevice, LatencyModel
+from app.core.instrumentation import rpc_listener
+from app.services.script_executor import ScriptExecutor
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(__file__)), "tests", "fixtures", "fake_device")
+
+SCRIPT = """\
+loop {iterations}
+    wait_element id:"com.demo:id/login" 5
+    click id:"com.demo:id/login"
+    wait_element id:"com.demo:id/username" 5
+    click id:"com.demo:id/username"
+    input "demo"
+    find_elements class:"android.widget.Button"
+    click xpath:"//*[@text='返回']"
+end
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake device latency benchmark")
+    parser.add_argument("--latency", type=float, default=0.02, help="每次调用延迟（秒）")
+    parser.add_argument("--dump-latency", type=float, default=0.1, help="导出层次结构延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟随机抖动比例")
+    parser.add_argument("--iterations", type=int, default=10, help="登录流程重复次数")
+    options = parser.parse_args()
+
+    latency = LatencyModel(options.latency, options.dump_latency, jitter=options.jitter, seed=0)
+    device = FakeDevice.from_directory(FIXTURES, latency=latency)
+    manager = get_device_manager()
+    manager.attach(device)
+
+    counts: Counter = Counter()
+    durations: defaultdict = defaultdict(float)
+
+    def on_rpc(event) -> None:
+        counts[event.operation] += 1
+        durations[event.operation] += event.duration
+
+    try:
+        with rpc_listener(on_rpc):
+            start = time.perf_counter()
+            result = ScriptExecutor(manager).execute_script(SCRIPT.format(iterations=options.iterations))
+            elapsed = time.perf_counter() - start
+        assert result.success, result.error
+    finally:
+        manager.disconnect()
+
+    rpc_time = sum(durations.values())
+    print(
+        f"iterations={options.iterations} latency={options.latency * 1000:.0f}ms "
+        f"dump={options.dump_latency * 1000:.0f}ms jitter={options.jitter:.0%}"
+    )
+    print(f"{'method':<22}{'calls':>8}{'time(s)':>10}")
+    for method, count in counts.most_common():
+        print(f"{method:<22}{count:>8}{durations[method]:>10.3f}")
+    print(f"total: {sum(counts.values())} calls, rpc {rpc_time:.3f}s, elapsed {elapsed:.3f}s")
+    print(f"waits + host: {(elapsed - rpc_time) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
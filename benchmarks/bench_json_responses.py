@@ -0,0 +1,121 @@
+"""
+JSON 响应序列化与压缩基准
+
+构造接近真实大小的响应内容：
+- packages-info: 应用信息列表
+- hierarchy: 界面层次结构 XML
+- screenshot: base64 编码的截图（随机字节，接近 PNG 的不可压缩性）
+- script-result: 带大量 variables 的脚本执行结果
+
+对每种内容比较：
+- 序列化耗时：FastAPI 默认路径（jsonable_encoder + JSONResponse）与 FastJSONResponse
+- 传输字节数：不压缩、gzip（GZIP_LEVEL）、br（BROTLI_QUALITY，需要安装 brotli）及压缩耗时
+
+运行方式：
+    python -m benchmarks.bench_json_responses [--repeat 20] [--packages 400] [--nodes 1500]
+"""
+
+import argparse
+import base64
+import random
+import statistics
+import time
+import zlib
+from typing import Any, Callable, Dict
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.compression import BROTLI_QUALITY, GZIP_LEVEL, brotli
+from app.core.responses import FastJSONResponse, orjson
+
+
+def build_payloads(packages: int, nodes: int, rng: random.Random) -> Dict[str, Any]:
+    """构造各接口的响应内容"""
+    packages_info = [
+        {
+            "package_name": f"com.vendor{i % 37}.app{i}",
+            "version_name": f"{rng.randint(1, 12)}.{rng.randint(0, 20)}.{rng.randint(0, 99)}",
+            "version_code": rng.randint(1, 10**6),
+            "first_install_time": "2024-03-01 10:12:45",
+            "last_update_time": "2025-08-19 22:01:13",
+            "target_sdk": 34,
+            "min_sdk": rng.choice([21, 23, 24, 26]),
+        }
+        for i in range(packages)
+    ]
+    xml = '<?xml version="1.0" encoding="UTF-8"?><hierarchy rotation="0">' + "".join(
+        f'<node index="{i % 8}" text="列表项 {i}" resource-id="com.demo:id/item_title" '
+        f'class="android.widget.TextView" package="com.demo" content-desc="" checkable="false" '
+        f'checked="false" clickable="true" enabled="true" focusable="true" focused="false" '
+        f'scrollable="false" long-clickable="false" password="false" selected="false" '
+        f'bounds="[0,{i * 40}][1080,{i * 40 + 40}]" />'
+        for i in range(nodes)
+    ) + "</hierarchy>"
+    image = rng.randbytes(600 * 1024)
+    variables = {
+        f"item_{i}": {"text": f"商品 {i}", "price": rng.random() * 100, "tags": ["a", "b", "c"]}
+        for i in range(2000)
+    }
+    return {
+        "packages-info": {"count": len(packages_info), "packages": packages_info},
+        "hierarchy": {"xml": xml},
+        "screenshot": {
+            "image": base64.b64encode(image).decode("ascii"),
+            "format": "png",
+            "width": 1080,
+            "height": 2340,
+        },
+        "script-result": {"success": True, "error": None, "variables": variables},
+    }
+
+
+def timed(func: Callable[[], bytes], repeat: int) -> tuple:
+    """重复执行，返回（耗时中位数毫秒, 输出）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), output
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JSON response serialization benchmark")
+    parser.add_argument("--repeat", type=int, default=20, help="每项测量的重复次数")
+    parser.add_argument("--packages", type=int, default=400, help="应用信息条数")
+    parser.add_argument("--nodes", type=int, default=1500, help="界面层次结构节点数")
+    options = parser.parse_args()
+
+    payloads = build_payloads(options.packages, options.nodes, random.Random(0))
+    print(f"orjson={'yes' if orjson else 'no'} brotli={'yes' if brotli else 'no'}")
+    print(
+        f"{'payload':<15}{'default(ms)':>12}{'fast(ms)':>10}{'raw(KB)':>10}"
+        f"{'gzip(KB)':>10}{'gzip(ms)':>10}{'br(KB)':>9}{'br(ms)':>9}"
+    )
+    for name, content in payloads.items():
+        default_ms, _ = timed(
+            lambda: JSONResponse(jsonable_encoder(content)).body, options.repeat
+        )
+        fast_ms, body = timed(lambda: FastJSONResponse(content).body, options.repeat)
+
+        def gzip_body() -> bytes:
+            compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            return compressor.compress(body) + compressor.flush()
+
+        gzip_ms, gzipped = timed(gzip_body, options.repeat)
+        br = "-"
+        br_ms = "-"
+        if brotli is not None:
+            elapsed, packed = timed(
+                lambda: brotli.compress(body, quality=BROTLI_QUALITY), options.repeat
+            )
+            br, br_ms = f"{len(packed) / 1024:.1f}", f"{elapsed:.2f}"
+        print(
+            f"{name:<15}{default_ms:>12.2f}{fast_ms:>10.2f}{len(body) / 1024:>10.1f}"
+            f"{len(gzipped) / 1024:>10.1f}{gzip_ms:>10.2f}{br:>9}{br_ms:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
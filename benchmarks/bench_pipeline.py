@@ -0,0 +1,91 @@
+"""
+命令流水线延迟基准
+
+使用模拟的设备端 JSON-RPC 服务（每次 HTTP 往返固定延迟），
+对比逐条发送与流水线批量发送执行同一段脚本的耗时。
+
+运行方式：
+    python -m benchmarks.bench_pipeline [--latency 0.05] [--commands 20]
+"""
+
+import argparse
+import time
+from typing import Any, List
+
+from app.core.device import get_device_manager
+from app.services.script_executor import ScriptExecutor
+from app.services.script_pipeline import CommandPipeline, JsonRpcTransport
+
+
+class FakeAgentDevice:
+    """模拟设备对象，仅提供流水线需要的屏幕信息"""
+
+    info = {"displayWidth": 1080, "displayHeight": 2400}
+
+
+class FakeAgentTransport(JsonRpcTransport):
+    """
+    模拟设备端 uiautomator2 服务
+
+    每次 HTTP 请求（单条或批量）耗时 latency 秒。
+    """
+
+    def __init__(self, latency: float, supports_batch: bool = True):
+        super().__init__(FakeAgentDevice())
+        self.latency = latency
+        self.supports_batch = supports_batch
+        self.requests = 0
+        self.methods: List[str] = []
+
+    def call(self, method: str, params: List[Any]) -> Any:
+        time.sleep(self.latency)
+        self.requests += 1
+        self.methods.append(method)
+        return True
+
+    def _post(self, payload):
+        time.sleep(self.latency)
+        self.requests += 1
+        self.methods.extend(item["method"] for item in payload)
+        return [{"jsonrpc": "2.0", "id": item["id"], "result": True} for item in payload]
+
+
+def build_script(commands: int) -> str:
+    """生成由连续的点击/导航/滑动组成的脚本"""
+    lines = ["pipeline on"]
+    steps = ["click 500, 800", "back", "swipe up 0.5", "home"]
+    for i in range(commands):
+        lines.append(steps[i % len(steps)])
+    lines.append("pipeline off")
+    return "\n".join(lines)
+
+
+def run(latency: float, commands: int, batch: bool) -> tuple:
+    executor = ScriptExecutor(get_device_manager())
+    transport = FakeAgentTransport(latency, supports_batch=batch)
+    executor._pipeline = CommandPipeline(lambda: transport)
+    start = time.perf_counter()
+    result = executor.execute_script(build_script(commands))
+    elapsed = time.perf_counter() - start
+    assert result.success, result.error
+    return elapsed, transport.requests
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Command pipeline latency benchmark")
+    parser.add_argument("--latency", type=float, default=0.05, help="每次 HTTP 往返延迟（秒）")
+    parser.add_argument("--commands", type=int, default=20, help="连续命令数量")
+    options = parser.parse_args()
+
+    sequential, seq_requests = run(options.latency, options.commands, batch=False)
+    batched, batch_requests = run(options.latency, options.commands, batch=True)
+
+    print(f"commands={options.commands} latency={options.latency * 1000:.0f}ms")
+    print(f"{'mode':<12}{'requests':>10}{'elapsed(s)':>12}")
+    print(f"{'sequential':<12}{seq_requests:>10}{sequential:>12.3f}")
+    print(f"{'pipelined':<12}{batch_requests:>10}{batched:>12.3f}")
+    print(f"speedup: {sequential / batched:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+远程输入通道基准
+
+在本地启动服务并连接进程内假设备，逐条发送 N 次点击，比较每次点击的往返耗时：
+- raw: 直接调用设备对象（设备 RPC 本身的延迟）
+- http: POST /api/v1/input/click-by-point
+- ws: /api/v1/ws/device/{serial}/input 上发送 [seq, "tap", x, y] 并等待确认
+
+运行方式：
+    python -m benchmarks.bench_remote_input [--taps 200] [--latency 0.002]
+"""
+
+import argparse
+import json
+import socket
+import statistics
+import threading
+import time
+from typing import Callable, Dict
+
+import httpx
+import uvicorn
+from websockets.sync.client import connect
+
+from app.core.device import get_device_manager
+from app.core.fake_device import FakeDevice, LatencyModel
+from app.main import app
+
+SERIAL = "fake-bench"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure(func: Callable[[int], None], taps: int) -> Dict[str, float]:
+    """逐条执行，返回每次往返耗时的中位数和 p95（毫秒）"""
+    samples = []
+    for index in range(taps):
+        start = time.perf_counter()
+        func(index)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {"p50": statistics.median(samples), "p95": samples[int(len(samples) * 0.95) - 1]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Remote input channel benchmark")
+    parser.add_argument("--taps", type=int, default=200, help="每种方式的点击次数")
+    parser.add_argument("--latency", type=float, default=0.002, help="假设备每次 RPC 的延迟（秒）")
+    options = parser.parse_args()
+
+    device = FakeDevice(latency=LatencyModel(rpc=options.latency), serial=SERIAL)
+    get_device_manager().attach(device)
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    results = {"raw": measure(lambda index: device.click(100, 100), options.taps)}
+
+    with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+        def http_tap(index: int) -> None:
+            response = client.post("/api/v1/input/click-by-point", json={"x": 100, "y": 100})
+            response.raise_for_status()
+
+        results["http"] = measure(http_tap, options.taps)
+
+    with connect(f"ws://127.0.0.1:{port}/api/v1/ws/device/{SERIAL}/input") as ws:
+        def ws_tap(index: int) -> None:
+            ws.send(json.dumps([index, "tap", 100, 100]))
+            ack = json.loads(ws.recv())
+            assert ack == [index], ack
+
+        results["ws"] = measure(ws_tap, options.taps)
+
+    server.should_exit = True
+    thread.join()
+
+    print(f"taps={options.taps} rpc latency={options.latency * 1000:g}ms")
+    print(f"{'mode':<8}{'p50(ms)':>10}{'p95(ms)':>10}")
+    for mode, stats in results.items():
+        print(f"{mode:<8}{stats['p50']:>10.2f}{stats['p95']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
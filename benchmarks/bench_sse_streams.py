@@ -0,0 +1,130 @@
+"""
+SSE 日志流负载测试
+
+同时打开 N 个空闲的脚本日志流，测量一段时间内进程消耗的 CPU 时间；
+再从工作线程向其中一个流发布日志，测量日志从发布到被 SSE 生成器写出的延迟。
+对比事件驱动的 EventChannel 与旧的 50ms 轮询 queue.Queue 实现。
+
+运行方式：
+    python -m benchmarks.bench_sse_streams [--streams 500] [--idle 5] [--polling]
+"""
+
+import argparse
+import asyncio
+import json
+import queue
+import statistics
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from app.core.event_stream import EventChannel, sse_stream
+
+POLL_INTERVAL = 0.05
+
+
+class PollingChannel:
+    """旧实现：queue.Queue + 每 50ms 检查一次"""
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue()
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        self._queue.put(event)
+
+    def close(self) -> None:
+        pass
+
+    async def stream(self) -> AsyncIterator[str]:
+        while True:
+            await asyncio.sleep(POLL_INTERVAL)
+            while not self._queue.empty():
+                event = self._queue.get_nowait()
+                yield f"data: {json.dumps(event)}\n\n"
+                if event.get("type") == "end":
+                    return
+
+
+def _event_channel() -> Tuple[EventChannel, AsyncIterator[str]]:
+    channel = EventChannel()
+    return channel, sse_stream(channel, heartbeat=15.0)
+
+
+def _polling_channel() -> Tuple[PollingChannel, AsyncIterator[str]]:
+    channel = PollingChannel()
+    return channel, channel.stream()
+
+
+async def run(factory, streams: int, idle: float, messages: int) -> Dict[str, float]:
+    received: List[float] = []
+    sent: List[float] = []
+
+    async def consume(stream: AsyncIterator[str], record: bool) -> None:
+        async for chunk in stream:
+            if record:
+                now = time.perf_counter()
+                received.extend(now for _ in range(chunk.count('"type": "log"')))
+
+    channels = [factory() for _ in range(streams)]
+    tasks = [
+        asyncio.create_task(consume(stream, record=index == 0))
+        for index, (_, stream) in enumerate(channels)
+    ]
+    await asyncio.sleep(0.1)
+
+    cpu_start = time.process_time()
+    await asyncio.sleep(idle)
+    idle_cpu = time.process_time() - cpu_start
+
+    # 模拟设备线程中逐条产生的日志
+    publish = channels[0][0].publish
+
+    def producer() -> None:
+        for index in range(messages):
+            sent.append(time.perf_counter())
+            publish({"type": "log", "data": index})
+            time.sleep(0.01)
+
+    thread = threading.Thread(target=producer)
+    thread.start()
+    while thread.is_alive():
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(POLL_INTERVAL * 2)
+
+    for channel, _ in channels:
+        channel.publish({"type": "end", "data": None})
+        channel.close()
+    await asyncio.gather(*tasks)
+
+    latencies = [(end - start) * 1000 for start, end in zip(sent, received)]
+    return {
+        "idle_cpu_pct": idle_cpu / idle * 100,
+        "latency_ms_p50": statistics.median(latencies),
+        "latency_ms_max": max(latencies),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Idle SSE streams load test")
+    parser.add_argument("--streams", type=int, default=500, help="同时打开的日志流数量")
+    parser.add_argument("--idle", type=float, default=5.0, help="空闲测量时长（秒）")
+    parser.add_argument("--messages", type=int, default=50, help="测量延迟时发布的日志条数")
+    parser.add_argument("--polling", action="store_true", help="同时测试旧的 50ms 轮询实现")
+    options = parser.parse_args()
+
+    modes = [("event", _event_channel)]
+    if options.polling:
+        modes.append(("polling", _polling_channel))
+
+    print(f"streams={options.streams} idle={options.idle}s messages={options.messages}")
+    print(f"{'mode':<10}{'idle cpu(%)':>14}{'p50(ms)':>10}{'max(ms)':>10}")
+    for name, factory in modes:
+        stats = asyncio.run(run(factory, options.streams, options.idle, options.messages))
+        print(
+            f"{name:<10}{stats['idle_cpu_pct']:>14.2f}"
+            f"{stats['latency_ms_p50']:>10.2f}{stats['latency_ms_max']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -23,9 +23,9 @@ export const scriptApi = {
     return request.delete(`/script/delete/${name}`)
   },
 
-  // 执行脚本内容
-  execute(content, variables = null) {
-    return request.post('/script/execute', { content, variables })
+  // 执行脚本内容（optimize 为 true 时执行前优化脚本）
+  execute(content, variables = null, optimize = false) {
+    return request.post('/script/execute', { content, variables, optimize })
   },
 
   // 执行脚本文件
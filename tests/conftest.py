@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from app.core.device import get_device_manager
+from app.core.fake_device import FakeDevice
+from app.services.script_async import AsyncScriptExecutor
+
+
+class FlakyDevice(FakeDevice):
+    """记录点击坐标的假设备，第 fail_at 次点击时抛出异常（模拟 ADB 断开）"""
+
+    def __init__(self, fail_at=None):
+        super().__init__(serial="fake-flaky")
+        self.fail_at = fail_at
+        self.clicks = []
+
+    def click(self, x, y):
+        if len(self.clicks) + 1 == self.fail_at:
+            self.fail_at = None
+            raise ConnectionError("device offline")
+        self.clicks.append((x, y))
+        return super().click(x, y)
+
+
+@pytest.fixture
+def attach_device():
+    """通过 DeviceManager.attach 接入设备对象，测试结束后断开"""
+    manager = get_device_manager()
+
+    def attach(device):
+        manager.attach(device)
+        return device
+
+    yield attach
+    manager.disconnect()
+
+
+@pytest.fixture
+def fake_device(attach_device):
+    """接入一台使用默认 fixture 界面的 FakeDevice"""
+    return attach_device(FakeDevice(serial="fake-test"))
+
+
+@pytest.fixture
+def flaky_device(attach_device):
+    """创建并接入 FlakyDevice：flaky_device(fail_at=None)"""
+    return lambda fail_at=None: attach_device(FlakyDevice(fail_at))
+
+
+@pytest.fixture
+def run_script():
+    """用同步或异步执行器执行脚本：run_script(executor, source, **kwargs)"""
+
+    def run(executor, source, **kwargs):
+        if isinstance(executor, AsyncScriptExecutor):
+            return asyncio.run(executor.execute_script_async(source, **kwargs))
+        return executor.execute_script(source, **kwargs)
+
+    return run
@@ -0,0 +1,185 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from app.core.cancellation import cancellable_sleep
+from app.core.config import get_settings
+from app.core.device import get_device_manager
+from app.core.device_executor import (
+    DeviceBusyError,
+    DeviceExecutor,
+    DeviceTimeoutError,
+    shutdown_device_executors,
+)
+from app.core.fake_device import FakeDevice, LatencyModel
+from app.core.hierarchy import Hierarchy
+from app.main import app
+
+
+async def test_timeout_releases_worker_and_busy_rejects():
+    executor = DeviceExecutor("unit", max_workers=1, max_queue=1)
+    started = time.monotonic()
+    # 超时后取消令牌，可取消的等待立即结束，唯一的线程马上可以执行下一个调用
+    with pytest.raises(DeviceTimeoutError):
+        await executor.run_bounded(0.05, cancellable_sleep, 30)
+    assert await executor.run_bounded(1, lambda: 42) == 42
+    assert time.monotonic() - started < 1
+
+    release = threading.Event()
+    running = asyncio.ensure_future(executor.run_bounded(None, release.wait))
+    while executor.stats()["active"] == 0:
+        await asyncio.sleep(0.01)
+    queued = asyncio.ensure_future(executor.run_bounded(None, lambda: "queued"))
+    await asyncio.sleep(0.01)
+    with pytest.raises(DeviceBusyError):
+        await executor.run_bounded(None, lambda: "rejected")
+    # 脚本在独立的线程池中执行，不受 API 调用排队上限的限制，也不等待设备线程
+    assert await executor.run_script(lambda: "script") == "script"
+    release.set()
+    assert await queued == "queued"
+    await running
+
+    stats = executor.stats()
+    assert stats["timeouts"] == 1
+    assert stats["rejected"] == 1
+    assert stats["failed"] == 1
+    assert stats["completed"] == 3
+    assert stats["queued"] == stats["active"] == 0
+    assert stats["scripts_queued"] == stats["scripts_running"] == 0
+    executor.shutdown()
+
+
+async def test_health_stays_responsive_while_device_is_saturated(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "DEVICE_EXECUTOR_WORKERS", 1)
+    monkeypatch.setattr(settings, "DEVICE_EXECUTOR_QUEUE", 2)
+    monkeypatch.setattr(settings, "DEVICE_CALL_TIMEOUT", 0.3)
+    manager = get_device_manager()
+    manager.attach(FakeDevice(latency=LatencyModel(rpc=0.2), serial="fake-executor"))
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            presses = [
+                asyncio.ensure_future(client.post("/api/v1/navigation/home")) for _ in range(5)
+            ]
+            await asyncio.sleep(0.05)
+            started = time.monotonic()
+            health = await client.get("/health")
+            assert health.status_code == 200
+            assert time.monotonic() - started < 0.1
+
+            statuses = sorted(response.status_code for response in await asyncio.gather(*presses))
+            # 最多 1 个执行、2 个排队，其余直接拒绝；第二个调用 0.4 秒后才完成，超过 0.3 秒超时
+            assert statuses.count(503) >= 2
+            assert 504 in statuses
+            assert 200 in statuses
+
+            stats = (await client.get("/api/v1/device/executors")).json()
+            device_stats = next(item for item in stats if item["serial"] == "fake-executor")
+            assert device_stats["rejected"] >= 2
+            assert device_stats["timeouts"] >= 1
+    finally:
+        manager.disconnect()
+        shutdown_device_executors()
+
+
+async def test_concurrent_identical_reads_share_one_device_call(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "DEVICE_SNAPSHOT_TTL", 0.0)
+    manager = get_device_manager()
+    device = FakeDevice(latency=LatencyModel(rpc=0.0, dump=0.1), serial="fake-single-flight")
+    manager.attach(device)
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(
+                *[client.get("/api/v1/input/hierarchy") for _ in range(5)]
+            )
+            assert {response.json()["xml"] for response in responses} == {device.hierarchy.xml}
+            assert _dumps(device) == 1
+
+            # 没有结果缓存时，之后的读取重新访问设备；开启后在有效期内直接复用结果
+            await client.get("/api/v1/input/hierarchy")
+            assert _dumps(device) == 2
+            monkeypatch.setattr(settings, "DEVICE_SNAPSHOT_TTL", 10.0)
+            await client.get("/api/v1/input/hierarchy")
+            await client.get("/api/v1/input/hierarchy")
+            assert _dumps(device) == 3
+
+            stats = (await client.get("/api/v1/device/executors")).json()
+            device_stats = next(item for item in stats if item["serial"] == "fake-single-flight")
+            assert device_stats["shared"] == 4
+            assert device_stats["cache_hits"] == 1
+    finally:
+        manager.disconnect()
+        shutdown_device_executors()
+
+
+async def test_actions_invalidate_cached_reads(monkeypatch, attach_device):
+    monkeypatch.setattr(get_settings(), "DEVICE_SNAPSHOT_TTL", 10.0)
+    header = '<?xml version="1.0" encoding="UTF-8"?><hierarchy rotation="0">'
+    screens = {
+        "login": Hierarchy(
+            header + '<node class="android.widget.Button" text="OK" clickable="true" '
+            'bounds="[0,0][100,100]"/></hierarchy>'
+        ),
+        "home": Hierarchy(header + "</hierarchy>"),
+    }
+    transitions = [
+        {"from": "login", "click": {"text": "OK"}, "to": "home"},
+        {"from": "home", "press": "back", "to": "login"},
+    ]
+    device = attach_device(FakeDevice(screens, "login", transitions, serial="fake-invalidate"))
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            hierarchy = "/api/v1/input/hierarchy"
+            assert (await client.get(hierarchy)).json()["xml"] == screens["login"].xml
+            assert (await client.get(hierarchy)).json()["xml"] == screens["login"].xml
+            assert _dumps(device) == 1
+
+            # 点击之后缓存失效，读取到新界面
+            clicked = await client.post("/api/v1/input/click-by-text", params={"text": "OK"})
+            assert clicked.json()["success"]
+            assert (await client.get(hierarchy)).json()["xml"] == screens["home"].xml
+
+            batch = await client.post(
+                "/api/v1/input/execute-batch",
+                json={"steps": [{"service": "navigation", "action": "press_back"}]},
+            )
+            assert batch.json()["success"]
+            assert (await client.get(hierarchy)).json()["xml"] == screens["login"].xml
+    finally:
+        shutdown_device_executors()
+
+
+async def test_invalidate_discards_inflight_read():
+    executor = DeviceExecutor("unit", max_workers=2)
+    release = threading.Event()
+    calls = []
+
+    def read():
+        calls.append(1)
+        release.wait()
+        return len(calls)
+
+    first = asyncio.ensure_future(executor.run_shared("key", 10.0, None, read))
+    await asyncio.sleep(0.05)
+    # 读取进行中执行操作：已经在等待的调用方拿到结果，但结果不写入缓存
+    await executor.run_action(None, lambda: None)
+    release.set()
+    assert await first == 1
+    assert await executor.run_shared("key", 10.0, None, read) == 2
+    assert await executor.run_shared("key", 10.0, None, read) == 2
+    assert executor.stats()["invalidations"] == 2
+    executor.shutdown()
+
+
+def _dumps(device):
+    return [method for method, _ in device.calls].count("dumpWindowHierarchy")
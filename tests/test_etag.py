@@ -0,0 +1,62 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from app.core.config import get_settings
+from app.core.device import get_device_manager
+from app.core.etag import content_etag, etag_matches
+from app.core.fake_device import FakeDevice
+from app.core.hierarchy import Hierarchy
+from app.main import app
+
+HEADER = '<?xml version="1.0" encoding="UTF-8"?><hierarchy rotation="0">'
+
+
+def test_etag_matching_follows_if_none_match_rules():
+    etag = content_etag("abc", 1080, 2340)
+    assert etag == content_etag("abc", 1080, 2340)
+    # 各部分带长度前缀：拼接相同但切分不同的内容不会冲突
+    assert etag != content_etag("ab", "c1080", 2340)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
+
+
+def test_unchanged_hierarchy_returns_304(monkeypatch):
+    monkeypatch.setattr(get_settings(), "DEVICE_SNAPSHOT_TTL", 0.2)
+    screens = {
+        "home": Hierarchy(HEADER + '<node text="首页" bounds="[0,0][100,100]"/></hierarchy>'),
+        "detail": Hierarchy(HEADER + '<node text="详情" bounds="[0,0][100,100]"/></hierarchy>'),
+    }
+    manager = get_device_manager()
+    device = FakeDevice(screens, "home", serial="fake-etag")
+    manager.attach(device)
+    client = TestClient(app)
+    try:
+        first = client.get("/api/v1/input/hierarchy")
+        etag = first.headers["ETag"]
+        assert first.status_code == 200 and "首页" in first.json()["xml"]
+
+        cached = client.get("/api/v1/input/hierarchy", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["ETag"] == etag
+
+        # 设备自身的变化在快照缓存过期后才能看到，有效期内的轮询不访问设备
+        dumps = _dumps(device)
+        device.goto("detail")
+        stale = client.get("/api/v1/input/hierarchy", headers={"If-None-Match": etag})
+        assert stale.status_code == 304
+        assert _dumps(device) == dumps
+        time.sleep(0.25)
+        changed = client.get("/api/v1/input/hierarchy", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+        assert "详情" in changed.json()["xml"]
+    finally:
+        manager.disconnect()
+
+
+def _dumps(device):
+    return [method for method, _ in device.calls].count("dumpWindowHierarchy")
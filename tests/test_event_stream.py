@@ -0,0 +1,95 @@
+import asyncio
+import json
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.core.event_stream import SSE_HEARTBEAT, EventChannel, sse_stream
+from app.main import app
+
+
+async def test_thread_burst_is_delivered_as_one_chunk():
+    channel = EventChannel()
+    chunks = []
+
+    async def consume():
+        async for chunk in sse_stream(channel, heartbeat=10):
+            chunks.append(chunk)
+
+    consumer = asyncio.ensure_future(consume())
+    await asyncio.sleep(0.01)
+
+    def burst():
+        for index in range(100):
+            channel.publish({"type": "log", "data": index})
+
+    # 另一个线程的一批日志只唤醒一次消费者
+    thread = threading.Thread(target=burst)
+    thread.start()
+    thread.join()
+    await asyncio.sleep(0.01)
+    channel.publish({"type": "end", "data": None})
+    channel.close()
+    await asyncio.wait_for(consumer, 1)
+
+    assert len(chunks) == 2
+    lines = [line for chunk in chunks for line in chunk.split("\n") if line]
+    assert [int(line[4:]) for line in lines if line.startswith("id: ")] == list(range(1, 102))
+    events = [json.loads(line[6:]) for line in lines if line.startswith("data: ")]
+    assert [event["data"] for event in events[:-1]] == list(range(100))
+    assert events[-1]["type"] == "end"
+
+
+async def test_idle_stream_sends_heartbeats_and_ends_on_close():
+    channel = EventChannel()
+    stream = sse_stream(channel, heartbeat=0.02)
+    assert await asyncio.wait_for(stream.__anext__(), 1) == SSE_HEARTBEAT
+
+    channel.publish({"type": "log", "data": "tail"})
+    channel.close()
+    channel.publish({"type": "log", "data": "dropped"})
+    remaining = [chunk async for chunk in stream]
+    assert remaining == ['id: 1\ndata: {"type": "log", "data": "tail"}\n\n']
+
+
+async def test_evicted_events_are_reported_as_gap():
+    channel = EventChannel(capacity=3)
+    for index in range(10):
+        channel.publish({"type": "log", "data": index})
+    channel.close()
+
+    chunks = [chunk async for chunk in sse_stream(channel, heartbeat=0, last_id=4)]
+    messages = "".join(chunks).strip().split("\n\n")
+    # gap 事件不带 id，客户端的 Last-Event-ID 不会前进到未收到的事件
+    assert messages[0] == 'data: {"type": "gap", "data": {"first_id": 8, "missed": 3}}'
+    assert [message.split("\n")[0] for message in messages[1:]] == ["id: 8", "id: 9", "id: 10"]
+
+    # 没有丢失时不发送 gap 事件
+    batch = await channel.get_batch(7)
+    assert [event_id for event_id, _ in batch] == [8, 9, 10]
+
+
+def test_reattach_replays_after_last_event_id():
+    client = TestClient(app)
+    source = 'log "one"\nlog "two"\n'
+    body = client.post("/api/v1/script/execute/stream", json={"content": source}).text
+    events = _parse(body)
+    session_id = events[0][1]["data"]
+    assert [event["type"] for _, event in events][-2:] == ["result", "end"]
+
+    # 断线重连：只收到 Last-Event-ID 之后的事件；多个观察者互不影响
+    url = f"/api/v1/script/stream/{session_id}"
+    replay = _parse(client.get(url, headers={"Last-Event-ID": "2"}).text)
+    assert [event_id for event_id, _ in replay] == [event_id for event_id, _ in events[2:]]
+    again = _parse(client.get(url, params={"last_event_id": 0}).text)
+    assert again == events
+    assert client.get("/api/v1/script/stream/unknown").status_code == 404
+
+
+def _parse(body):
+    events = []
+    for message in body.strip().split("\n\n"):
+        lines = [line for line in message.split("\n") if not line.startswith(":")]
+        fields = dict(line.split(": ", 1) for line in lines)
+        events.append((int(fields["id"]), json.loads(fields["data"])))
+    return events
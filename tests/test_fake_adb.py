@@ -0,0 +1,44 @@
+import base64
+
+from app.core.fake_adb import FakeAdbServer
+from app.services.adb_service import AdbService
+
+
+def test_adb_service_paths_against_fake_server(tmp_path):
+    with FakeAdbServer(serials=["fake-1"], packages=10, screenshot_size=4096) as server:
+        service = AdbService(port=server.port)
+        assert service.serial == "fake-1"
+
+        assert len(service.list_packages()) == 10
+        third_party = service.list_packages("third_party")
+        assert third_party[0] == "com.example.app0000"
+
+        info = service.get_package_info(third_party[0])
+        assert info["version_name"] == "1.5.0"
+        assert (info["version_code"], info["min_sdk"], info["target_sdk"]) == (6, 21, 34)
+        assert len(service.get_all_packages_info("3")) == 5
+
+        assert service.get_device_info()["sdk_version"] == "34"
+        assert service.get_screen_resolution() == {"width": 1080, "height": 2340}
+        assert service.get_battery_info()["level"] == 85
+
+        screenshot = service.take_screenshot_base64()
+        png = base64.b64decode(screenshot["image"].split(",", 1)[1])
+        assert png.startswith(b"\x89PNG") and len(png) == 4096
+
+        local = tmp_path / "data.bin"
+        local.write_bytes(bytes(range(256)) * 1000)
+        assert service.push_file(str(local), "/sdcard/data.bin")
+        assert service.pull_file("/sdcard/data.bin", str(tmp_path / "copy.bin"))
+        assert (tmp_path / "copy.bin").read_bytes() == local.read_bytes()
+        assert service.take_screenshot(str(tmp_path / "screen.png"))
+        assert "/sdcard/screenshot_temp.png" not in server.devices["fake-1"].files
+
+
+def test_registered_shell_output():
+    with FakeAdbServer(serials=["fake-1", "fake-2"]) as server:
+        server.on_shell(r"^dumpsys window", lambda command: f"mCurrentFocus=Window{{{command}}}")
+        service = AdbService("fake-2", port=server.port)
+        assert service.shell("dumpsys window windows") == "mCurrentFocus=Window{dumpsys window windows}"
+        assert service.shell("unknown-command") == ""
+        assert server.requests["shell"] == 2
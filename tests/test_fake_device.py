@@ -0,0 +1,59 @@
+import os
+import time
+
+from app.core.device import get_device_manager
+from app.core.fake_device import FakeDevice, LatencyModel
+from app.core.instrumentation import rpc_listener
+from app.services.input import InputService
+from app.services.script_executor import ScriptExecutor
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "fake_device")
+
+
+def test_script_drives_fake_device_through_device_manager():
+    manager = get_device_manager()
+    info = manager.connect(f"fake:{FIXTURES}")
+    try:
+        assert info.serial == f"fake:{FIXTURES}"
+        assert info.battery_level == 100
+        device = manager.get_device()
+        assert device.screen == "splash"
+
+        events = []
+        with rpc_listener(events.append):
+            result = ScriptExecutor(manager).execute_script(
+                'wait_element id:"com.demo:id/login" 2\n'
+                'click id:"com.demo:id/login"\n'
+                'if exists id:"com.demo:id/username"\n'
+                "    back\n"
+                "end\n"
+            )
+        assert result.success, result.error
+        assert device.screen == "home"
+        # 所有操作都经过埋点
+        operations = [event.operation for event in events]
+        assert operations[0] == "waitForExists"
+        assert operations[-1] == "pressKey"
+
+        assert InputService(manager).click_by_text("登录")
+        assert device.screen == "login"
+        assert InputService(manager).click_by_xpath("//*[@text='返回']")
+        assert device.screen == "home"
+    finally:
+        manager.disconnect()
+
+
+def test_latency_model_is_applied_and_reproducible():
+    device = FakeDevice(latency=LatencyModel(rpc=0.02, dump=0.05))
+    start = time.perf_counter()
+    for _ in range(5):
+        device.click(10, 10)
+    device.dump_hierarchy()
+    assert time.perf_counter() - start >= 0.15
+    assert [method for method, _ in device.calls] == ["click"] * 5 + ["dumpWindowHierarchy"]
+
+    first = LatencyModel(rpc=0.1, jitter=0.5, seed=1)
+    second = LatencyModel(rpc=0.1, jitter=0.5, seed=1)
+    delays = [first.delay("click") for _ in range(10)]
+    assert delays == [second.delay("click") for _ in range(10)]
+    assert all(0.05 <= delay <= 0.15 for delay in delays)
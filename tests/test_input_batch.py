@@ -0,0 +1,82 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.device import get_device_manager
+from app.core.fake_device import FakeDevice
+from app.core.hierarchy import Hierarchy
+from app.main import app
+
+HEADER = '<?xml version="1.0" encoding="UTF-8"?><hierarchy rotation="0">'
+
+
+@pytest.fixture
+def device():
+    screens = {
+        "home": Hierarchy(
+            HEADER
+            + '<node class="android.widget.Button" text="打开" package="com.demo" '
+            'clickable="true" bounds="[100,100][300,200]"/></hierarchy>'
+        ),
+        "detail": Hierarchy(HEADER + "</hierarchy>"),
+    }
+    transitions = [
+        {"from": "home", "click": {"text": "打开"}, "to": "detail"},
+        {"from": "detail", "press": "back", "to": "home"},
+    ]
+    manager = get_device_manager()
+    device = FakeDevice(screens, "home", transitions, serial="fake-batch")
+    manager.attach(device)
+    yield device
+    manager.disconnect()
+
+
+def _steps(*steps):
+    return [
+        {"service": service, "action": action, "params": params}
+        for service, action, params in steps
+    ]
+
+
+def test_batch_runs_steps_across_services_in_order(device):
+    client = TestClient(app)
+    response = client.post(
+        "/api/v1/input/execute-batch",
+        json={
+            "steps": _steps(
+                ("input", "exists_by_text", {"text": "打开"}),
+                ("input", "click_by_text", {"text": "打开"}),
+                ("navigation", "press_back", {}),
+                ("input", "exists_by_text", {"text": "打开"}),
+            ),
+            "timing": True,
+        },
+    )
+    body = response.json()
+
+    assert response.status_code == 200
+    assert body["success"] and body["completed"] == 4
+    assert [item["result"] for item in body["results"]] == [True, True, True, True]
+    assert device.screen == "home"
+    assert all(item["elapsed_ms"] is not None for item in body["results"])
+    assert body["elapsed_ms"] >= sum(item["elapsed_ms"] for item in body["results"])
+
+
+def test_batch_stops_on_error_unless_disabled(device):
+    client = TestClient(app)
+    steps = _steps(
+        ("input", "click_by_text", {"text": "不存在"}),
+        ("app", "no_such_action", {}),
+        ("navigation", "press_home", {}),
+    )
+
+    body = client.post("/api/v1/input/execute-batch", json={"steps": steps}).json()
+    assert not body["success"]
+    assert body["completed"] == 1
+    assert body["results"][0]["error"] == "click_by_text returned False"
+    assert body["results"][0]["elapsed_ms"] is None
+
+    body = client.post(
+        "/api/v1/input/execute-batch", json={"steps": steps, "stop_on_error": False}
+    ).json()
+    assert [item["success"] for item in body["results"]] == [False, False, True]
+    assert body["results"][1]["error"] == "Unknown action: no_such_action"
@@ -0,0 +1,78 @@
+from fastapi.testclient import TestClient
+
+from app.core.device import get_device_manager
+from app.core.fake_adb import FakeAdbServer
+from app.core.fake_device import FakeDevice
+from app.core.instrumentation import RpcEvent, rpc_listener
+from app.core.metrics import REGISTRY, Histogram, Registry, record_rpc
+from app.main import app
+from app.services.adb_service import AdbService
+
+
+def _samples(text):
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, _, value = line.rpartition(" ")
+            samples[name] = float(value)
+    return samples
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.register(Histogram("op_seconds", 'Op "latency"', ("op",), (0.1, 1.0)))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, 'a"b')
+    text = registry.render()
+    assert '# HELP op_seconds Op "latency"' in text
+    samples = _samples(text)
+    assert samples['op_seconds_bucket{op="a\\"b",le="0.1"}'] == 1
+    assert samples['op_seconds_bucket{op="a\\"b",le="1"}'] == 3
+    assert samples['op_seconds_bucket{op="a\\"b",le="+Inf"}'] == 4
+    assert samples['op_seconds_count{op="a\\"b"}'] == 4
+    assert samples['op_seconds_sum{op="a\\"b"}'] == 4.05
+
+
+def test_metrics_endpoint_covers_routes_device_rpcs_and_executors():
+    manager = get_device_manager()
+    manager.attach(FakeDevice(serial="fake-metrics"))
+    client = TestClient(app)
+    try:
+        assert client.get("/api/v1/input/hierarchy").status_code == 200
+        response = client.get("/metrics")
+    finally:
+        manager.disconnect()
+
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = _samples(response.text)
+    route = 'method="GET",route="/api/v1/input/hierarchy",status="200"'
+    assert samples[f"http_request_duration_seconds_count{{{route}}}"] >= 1
+    assert samples['http_requests_in_flight{method="GET",route="/metrics"}'] == 1
+    rpc = 'serial="fake-metrics",kind="jsonrpc",operation="dumpWindowHierarchy"'
+    assert samples[f"device_rpc_duration_seconds_count{{{rpc}}}"] >= 1
+    assert samples['device_executor_submitted_total{serial="fake-metrics"}'] >= 1
+    assert samples['device_executor_queued{serial="fake-metrics"}'] == 0
+    assert "script_sessions_running" in samples
+
+
+def test_batches_recorded_with_own_operation_and_call_count():
+    record_rpc(RpcEvent("jsonrpc", "batch", 0.02, "fake-batch", calls=3))
+    record_rpc(RpcEvent("jsonrpc", "batch", 0.02, "fake-batch", calls=2))
+    samples = _samples(REGISTRY.render())
+    rpc = 'serial="fake-batch",kind="jsonrpc",operation="batch"'
+    assert samples[f"device_rpc_duration_seconds_count{{{rpc}}}"] == 2
+    assert samples['device_rpc_batched_calls_total{serial="fake-batch"}'] == 5
+
+
+def test_adb_sync_transfers_are_instrumented(tmp_path):
+    local = tmp_path / "data.bin"
+    local.write_bytes(b"x" * 1024)
+    events = []
+    with FakeAdbServer(serials=["fake-1"]) as server, rpc_listener(events.append):
+        service = AdbService(port=server.port)
+        assert service.push_file(str(local), "/sdcard/data.bin")
+        assert service.pull_file("/sdcard/data.bin", str(tmp_path / "copy.bin"))
+    assert [(e.kind, e.operation, e.serial) for e in events if e.kind == "sync"] == [
+        ("sync", "push", "fake-1"),
+        ("sync", "pull", "fake-1"),
+    ]
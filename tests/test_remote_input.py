@@ -0,0 +1,106 @@
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.api import remote
+from app.core.config import get_settings
+from app.core.device import get_device_manager
+from app.core.fake_device import FakeDevice, LatencyModel
+from app.core.hierarchy import Hierarchy
+from app.main import app
+
+HEADER = '<?xml version="1.0" encoding="UTF-8"?><hierarchy rotation="0">'
+
+
+def _device(**kwargs):
+    screens = {
+        "home": Hierarchy(
+            HEADER
+            + '<node class="android.widget.Button" text="打开" package="com.demo" '
+            'clickable="true" bounds="[100,100][300,200]"/></hierarchy>'
+        ),
+        "detail": Hierarchy(HEADER + "</hierarchy>"),
+    }
+    transitions = [
+        {"from": "home", "click": {"text": "打开"}, "to": "detail"},
+        {"from": "detail", "press": "back", "to": "home"},
+    ]
+    return FakeDevice(screens, "home", transitions, serial="fake-remote", **kwargs)
+
+
+@pytest.fixture
+def device():
+    manager = get_device_manager()
+    device = _device(latency=LatencyModel(rpc=0.02))
+    manager.attach(device)
+    device.calls.clear()
+    yield device
+    manager.disconnect()
+
+
+def test_commands_are_applied_in_order_and_acked(device):
+    client = TestClient(app)
+    with client.websocket_connect("/api/v1/ws/device/fake-remote/input") as ws:
+        ws.send_json([1, "tap", 200, 150])
+        ws.send_json([2, "key", "back"])
+        ws.send_json([3, "fly", 1])
+        ws.send_text("not json")
+        ws.send_json([4, "down", 200, 150])
+        for seq in range(5, 10):
+            ws.send_json([seq, "move", 200 + seq, 150])
+        ws.send_json([10, "move", 200, 150])
+        ws.send_json([11, "up", 200, 150])
+        acks = [ws.receive_json() for _ in range(12)]
+
+    assert acks[:2] == [[1], [2]]
+    assert acks[2] == [3, "Unknown operation: 'fly'"]
+    assert acks[3] == [None, "Invalid JSON"]
+    assert [ack[0] for ack in acks[4:]] == list(range(4, 12))
+    assert all(len(ack) == 1 for ack in acks[4:])
+    # 按下和抬起在同一位置：触摸序列被识别为点击
+    assert device.screen == "detail"
+    methods = [method for method, _ in device.calls]
+    assert methods[:2] == ["click", "pressKey"]
+    # 设备执行 move 期间积压的 move 只执行最后一条
+    events = [params for method, params in device.calls if method == "injectInputEvent"]
+    moves = [params for params in events if params[0] == 2]
+    assert moves[-1] == [2, 200, 150, 0]
+    assert len(moves) < 6
+
+
+def test_unknown_serial_is_rejected(device):
+    client = TestClient(app)
+    with pytest.raises(WebSocketDisconnect) as info:
+        with client.websocket_connect("/api/v1/ws/device/other/input") as ws:
+            ws.receive_json()
+    assert info.value.code == 1008
+
+
+def test_queue_overflow_closes_connection(device, monkeypatch):
+    monkeypatch.setattr(get_settings(), "REMOTE_INPUT_QUEUE", 2)
+    device.latency.rpc = 0.2
+    client = TestClient(app)
+    acks = []
+    with pytest.raises(WebSocketDisconnect) as info:
+        with client.websocket_connect("/api/v1/ws/device/fake-remote/input") as ws:
+            for seq in range(10):
+                ws.send_json([seq, "key", "back"])
+            while True:
+                acks.append(ws.receive_json())
+    assert info.value.code == 1013
+    assert "Too many pending commands" in info.value.reason
+    assert len(acks) < 10
+
+
+def test_worker_failure_closes_connection(device, monkeypatch):
+    async def broken(*args):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(remote, "_apply", broken)
+    client = TestClient(app)
+    with pytest.raises(WebSocketDisconnect) as info:
+        with client.websocket_connect("/api/v1/ws/device/fake-remote/input") as ws:
+            ws.send_json([1, "tap", 200, 150])
+            ws.receive_json()
+    assert info.value.code == 1011
+    assert info.value.reason == "boom"
@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.routing import Route
+
+from app.core.compression import CompressionMiddleware, accepted_encodings
+from app.core.device import get_device_manager
+from app.core.fake_device import FakeDevice
+from app.core.hierarchy import Hierarchy
+from app.core.responses import json_list_response
+from app.main import app
+
+HEADER = '<?xml version="1.0" encoding="UTF-8"?><hierarchy rotation="0">'
+
+
+async def _body(response):
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+def test_streamed_list_matches_plain_json():
+    items = [{"package": f"com.demo.{i}", "label": "应用", "version": i} for i in range(10)]
+    for values in (items, []):
+        response = json_list_response("packages", values, batch_size=3, count=len(values))
+        body = asyncio.run(_body(response))
+        assert json.loads(body) == {"count": len(values), "packages": values}
+    assert accepted_encodings("gzip;q=0, br, *;q=0.1") == {"gzip": 0.0, "br": 1.0, "*": 0.1}
+
+
+def test_large_responses_are_compressed_with_weak_etag():
+    nodes = "".join(
+        f'<node text="条目 {i}" resource-id="com.demo:id/item" bounds="[0,{i}][100,{i + 1}]"/>'
+        for i in range(200)
+    )
+    manager = get_device_manager()
+    manager.attach(FakeDevice({"list": Hierarchy(HEADER + nodes + "</hierarchy>")}, serial="fake-gz"))
+    client = TestClient(app)
+    try:
+        plain = client.get("/api/v1/input/hierarchy", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+
+        packed = client.get("/api/v1/input/hierarchy", headers={"Accept-Encoding": "gzip"})
+        assert packed.headers["content-encoding"] == "gzip"
+        assert packed.json() == plain.json()
+        assert int(packed.headers["content-length"]) < len(plain.content) / 5
+        assert packed.headers["ETag"] == "W/" + plain.headers["ETag"]
+
+        cached = client.get(
+            "/api/v1/input/hierarchy",
+            headers={"Accept-Encoding": "gzip", "If-None-Match": packed.headers["ETag"]},
+        )
+        assert cached.status_code == 304
+    finally:
+        manager.disconnect()
+
+
+def test_streamed_responses_compress_per_chunk_and_sse_passes_through():
+    chunks = [json.dumps({"index": i, "text": "条目" * 50}).encode() for i in range(20)]
+
+    def stream(request):
+        return StreamingResponse(iter(chunks), media_type="application/json")
+
+    def events(request):
+        return StreamingResponse(iter([b"data: 1\n\n"] * 200), media_type="text/event-stream")
+
+    inner = Starlette(routes=[Route("/stream", stream), Route("/events", events)])
+    client = TestClient(CompressionMiddleware(inner, minimum_size=100))
+
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.content == b"".join(chunks)
+
+    sse = client.get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in sse.headers
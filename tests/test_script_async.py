@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import get_settings
+from app.core.device import get_device_manager
+from app.core.device_executor import get_device_executor, shutdown_device_executors
+from app.core.fake_device import FakeDevice
+from app.core.hierarchy import Hierarchy
+from app.services.script_async import AsyncScriptExecutor
+from app.services.script_executor import ScriptExecutor
+
+
+HEADER = '<?xml version="1.0" encoding="UTF-8"?><hierarchy rotation="0">'
+
+
+def _device():
+    """0.05 秒后出现 OK 按钮"""
+    screens = {
+        "loading": Hierarchy(HEADER + "</hierarchy>"),
+        "ready": Hierarchy(
+            HEADER + '<node class="android.widget.Button" text="OK" bounds="[0,0][100,100]"/>'
+            "</hierarchy>"
+        ),
+    }
+    transitions = [{"from": "loading", "after": 0.05, "to": "ready"}]
+    return FakeDevice(screens, "loading", transitions, serial="fake-async")
+
+
+@pytest.fixture
+def script_workers(monkeypatch):
+    """每台设备同时执行 2 个脚本"""
+    shutdown_device_executors()
+    monkeypatch.setattr(get_settings(), "DEVICE_SCRIPT_WORKERS", 2)
+    yield 2
+    shutdown_device_executors()
+
+
+async def test_scripts_per_device_are_bounded(script_workers):
+    executor = get_device_executor("")
+    peak = 0
+
+    async def watch():
+        nonlocal peak
+        while True:
+            peak = max(peak, executor.stats()["scripts_running"])
+            await asyncio.sleep(0.01)
+
+    watcher = asyncio.ensure_future(watch())
+    started = time.monotonic()
+    results = await asyncio.gather(
+        *(
+            AsyncScriptExecutor(get_device_manager()).execute_script_async(
+                "set i = 1\nwait 0.1\nlog \"${i}\"\n"
+            )
+            for _ in range(6)
+        )
+    )
+    watcher.cancel()
+    assert all(result.success for result in results)
+    # 6 个脚本分 3 批执行
+    assert time.monotonic() - started >= 0.3
+    assert peak == script_workers
+    assert executor.stats()["scripts_queued"] == executor.stats()["scripts_running"] == 0
+
+
+async def test_cancelled_caller_stops_script(script_workers):
+    executor = AsyncScriptExecutor(get_device_manager())
+    task = asyncio.ensure_future(executor.execute_script_async('wait 30\nlog "never"\n'))
+    await asyncio.sleep(0.1)
+    started = time.monotonic()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    # 取消令牌让 wait 立即结束，脚本线程随即释放
+    while get_device_executor("").stats()["scripts_running"]:
+        await asyncio.sleep(0.01)
+    assert time.monotonic() - started < 1
+    assert executor.context.stop_requested
+
+
+async def test_wait_element_on_script_thread(attach_device):
+    attach_device(_device())
+    result = await AsyncScriptExecutor(get_device_manager()).execute_script_async(
+        'set found = wait_element text:"OK" 1\n'
+    )
+    assert result.success, result.error
+    assert result.variables["found"] is True
+
+
+async def test_control_flow_matches_sync_executor():
+    source = (
+        "set total = 0\n"
+        "loop 3 i\n"
+        "    if not exists text:\"\"\n"
+        "        set last = i\n"
+        "    end\n"
+        "end\n"
+        "parallel merge a\nbranch\n    set a = 1\nbranch\n    wait 0.01\nend\n"
+    )
+    result = await AsyncScriptExecutor(get_device_manager()).execute_script_async(source)
+    assert result.success, result.error
+    assert result.variables["last"] == 2
+    assert result.variables["a"] == 1
+    assert result.variables == ScriptExecutor(get_device_manager()).execute_script(source).variables
+
+
+async def test_device_commands_invalidate_cached_reads(attach_device):
+    attach_device(FakeDevice(serial="fake-async-cache"))
+    executor = get_device_executor("fake-async-cache")
+    reads = []
+    assert await executor.run_shared("key", 10.0, None, lambda: reads.append(1) or len(reads)) == 1
+    before = executor.stats()["invalidations"]
+
+    result = await AsyncScriptExecutor(get_device_manager()).execute_script_async(
+        'set a = 1\nlog "${a}"\nhome\nback\n'
+    )
+    assert result.success, result.error
+    # home、back 各一次，脚本结束时一次；set、log 不访问设备
+    assert executor.stats()["invalidations"] == before + 3
+    assert await executor.run_shared("key", 10.0, None, lambda: reads.append(1) or len(reads)) == 2
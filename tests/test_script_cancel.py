@@ -0,0 +1,55 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.cancellation import CancellationToken, OperationCancelled, cancellable_sleep, cancellation_scope
+from app.core.device import get_device_manager
+from app.services.script_async import AsyncScriptExecutor
+from app.services.script_executor import ScriptExecutor
+
+
+def test_token_interrupts_sleeps_and_awaits():
+    token = CancellationToken()
+    threading.Timer(0.05, token.cancel).start()
+    started = time.monotonic()
+    with cancellation_scope(token), pytest.raises(OperationCancelled):
+        cancellable_sleep(30)
+    assert time.monotonic() - started < 1
+
+    async def main():
+        token = CancellationToken()
+        asyncio.get_running_loop().call_later(0.05, token.cancel)
+        slow = asyncio.ensure_future(asyncio.sleep(30))
+        with pytest.raises(OperationCancelled):
+            await token.run_async(slow)
+        await asyncio.sleep(0)
+        assert slow.cancelled()
+
+    asyncio.run(main())
+
+
+def test_stop_interrupts_long_wait_sync():
+    executor = ScriptExecutor(get_device_manager())
+    threading.Timer(0.1, executor.stop).start()
+    started = time.monotonic()
+    result = executor.execute_script('wait 30\nlog "never"\n')
+
+    assert time.monotonic() - started < 1
+    assert not result.success
+    assert "stopped" in result.error.lower()
+
+
+def test_stop_interrupts_long_wait_async():
+    async def main():
+        executor = AsyncScriptExecutor(get_device_manager())
+        asyncio.get_running_loop().call_later(0.1, executor.stop)
+        return await executor.execute_script_async('wait 30\nlog "never"\n')
+
+    started = time.monotonic()
+    result = asyncio.run(main())
+
+    assert time.monotonic() - started < 1
+    assert not result.success
+    assert "stopped" in result.error.lower()
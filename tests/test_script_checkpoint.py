@@ -0,0 +1,103 @@
+import asyncio
+
+from app.core.device import get_device_manager
+from app.services.script_async import AsyncScriptExecutor
+from app.services.script_checkpoint import CheckpointStore, Checkpointer, script_hash
+from app.services.script_executor import ScriptExecutor
+
+
+SCRIPT = (
+    "set last = -1\n"
+    "loop 5 i\n"
+    "    if click $i, 1\n"
+    "        click $i, 2\n"
+    "    end\n"
+    "    call sub\n"
+    "end\n"
+)
+SUB = "click 9, $i\nset last = $i\n"
+
+
+def _executor(executor_class, store):
+    executor = executor_class(get_device_manager())
+    executor.checkpointer = Checkpointer(store, "run-1", interval=3600)
+    return executor
+
+
+def _call_frame(path):
+    return {"path": str(path), "hash": script_hash(path.read_text(encoding="utf-8"))}
+
+
+def test_failure_checkpoint_resumes_inside_loop(tmp_path, flaky_device):
+    (tmp_path / "sub.script").write_text(SUB, encoding="utf-8")
+    store = CheckpointStore(str(tmp_path / "checkpoints"))
+
+    # 每次迭代点击 3 次，第 11 次点击是 i=3 时 then 分支中的 click 3, 2
+    device = flaky_device(fail_at=11)
+    result = _executor(ScriptExecutor, store).execute_script(SCRIPT, script_dir=str(tmp_path))
+    assert not result.success
+    assert result.checkpoint_id == "run-1"
+
+    checkpoint = store.load("run-1")
+    assert checkpoint.reason == "failure"
+    assert checkpoint.cursor == [
+        {"index": 1, "iteration": 3},
+        {"index": 0, "branch": 0},
+        {"index": 0},
+    ]
+    assert checkpoint.variables["last"] == 2
+
+    result = _executor(ScriptExecutor, store).resume(checkpoint)
+    assert result.success, result.error
+    assert result.checkpoint_id is None
+    assert store.load("run-1") is None
+    assert result.variables["last"] == 4
+    assert device.clicks[9:] == [(3, 1), (3, 2), (9, 3), (4, 1), (4, 2), (9, 4)]
+
+
+def test_async_resume_inside_call(tmp_path, flaky_device):
+    sub = tmp_path / "sub.script"
+    sub.write_text(SUB, encoding="utf-8")
+    store = CheckpointStore(str(tmp_path / "checkpoints"))
+
+    device = flaky_device()
+    executor = _executor(AsyncScriptExecutor, store)
+    executor.checkpointer.interval = 0
+    result = asyncio.run(executor.execute_script_async(SCRIPT, script_dir=str(tmp_path)))
+    assert result.success, result.error
+    # 执行完成后检查点被删除
+    assert store.load("run-1") is None
+
+    # 模拟进程在最后一次迭代的子脚本第二条语句之前退出
+    executor.checkpointer.save(
+        [{"index": 1, "iteration": 4}, {"index": 1, "call": _call_frame(sub)}, {"index": 1}],
+        {"last": 3, "i": 4},
+    )
+    device.clicks.clear()
+    checkpoint = store.load("run-1")
+    result = asyncio.run(_executor(AsyncScriptExecutor, store).resume_async(checkpoint))
+    assert result.success, result.error
+    assert device.clicks == []
+    assert result.variables["last"] == 4
+
+
+def test_resume_rejects_changed_script(tmp_path, flaky_device):
+    sub = tmp_path / "sub.script"
+    sub.write_text(SUB, encoding="utf-8")
+    store = CheckpointStore(str(tmp_path / "checkpoints"))
+    checkpointer = Checkpointer(store, "run-1")
+    checkpointer.bind(SCRIPT, str(tmp_path), None, False)
+    checkpoint = checkpointer.save(
+        [{"index": 1, "iteration": 2}, {"index": 1, "call": _call_frame(sub)}, {"index": 0}],
+        {"last": 1, "i": 2},
+    )
+
+    sub.write_text("click 8, 8\n", encoding="utf-8")
+    flaky_device()
+    result = _executor(ScriptExecutor, store).resume(checkpoint)
+    assert not result.success
+    assert "Script changed since checkpoint" in result.error
+
+    checkpoint.source += "log \"changed\"\n"
+    result = _executor(ScriptExecutor, store).resume(checkpoint)
+    assert "does not match checkpoint hash" in result.error
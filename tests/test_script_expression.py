@@ -0,0 +1,92 @@
+import pytest
+
+from app.core.device import get_device_manager
+from app.services.script_executor import ScriptExecutor
+from app.services.script_optimizer import optimize_ast
+from app.services.script_parser import CommandNode, SetNode, parse_script
+
+
+def test_expressions_evaluate_on_host_without_device():
+    source = (
+        "set count = 0\n"
+        "set total = 0\n"
+        "while count < 5 and not done\n"
+        "    set count = count + 1\n"
+        "    if count % 2 == 0\n"
+        "        continue\n"
+        "    end\n"
+        "    set total = total + count * 10\n"
+        "end\n"
+        'set label = "n=" + count\n'
+        'set price = "42"\n'
+        "set expensive = price >= 40 and len(label) == 3\n"
+        'set greeting = upper("hi ${label}")\n'
+        "set ratio = (total - 10) / 4\n"
+    )
+    # 没有连接设备，任何设备访问都会失败
+    result = ScriptExecutor(get_device_manager()).execute_script(source, variables={"done": False})
+
+    assert result.success, result.error
+    assert result.variables["count"] == 5
+    assert result.variables["total"] == 90
+    assert result.variables["label"] == "n=5"
+    assert result.variables["expensive"] is True
+    assert result.variables["greeting"] == "HI N=5"
+    assert result.variables["ratio"] == 20.0
+
+
+def test_expression_errors():
+    with pytest.raises(SyntaxError):
+        parse_script("if count <\nend\n")
+    with pytest.raises(SyntaxError):
+        parse_script("set x = nosuch(1)\n")
+
+    result = ScriptExecutor(get_device_manager()).execute_script("if missing > 1\nend\n")
+    assert not result.success
+    assert "Undefined variable: missing" in result.error
+
+
+def test_unparseable_values_keep_literal_handling():
+    source = (
+        "set u = http://x.com/a\n"
+        "set p = 50%\n"
+        "set a = hello world\n"
+        "set t = 2024-01-01\n"
+        'set d = "2024-01-01"\n'
+        "set n = 10 - 2\n"
+        "set m = t -4\n"
+    )
+    result = ScriptExecutor(get_device_manager()).execute_script(source)
+
+    assert result.success, result.error
+    # 与引入表达式之前一致：只取第一个字面量
+    assert result.variables["u"] == "http"
+    assert result.variables["p"] == 50
+    assert result.variables["a"] == "hello"
+    assert result.variables["t"] == 2024
+    assert result.variables["d"] == "2024-01-01"
+    assert result.variables["n"] == 8
+    assert result.variables["m"] == 2020
+
+
+def test_optimizer_folds_constant_expressions():
+    source = (
+        "set retries = 3\n"
+        "set limit = retries * 2\n"
+        "if limit > 10\n"
+        '    log "never"\n'
+        "else\n"
+        '    log "limit ${limit}"\n'
+        "end\n"
+        "while retries < 0\n"
+        "    back\n"
+        "end\n"
+    )
+    optimized, report = optimize_ast(parse_script(source))
+
+    assert isinstance(optimized[1], SetNode) and optimized[1].value == 6
+    assert optimized[1].expression is None
+    assert len(optimized) == 3
+    assert isinstance(optimized[2], CommandNode) and optimized[2].args == ["limit 6"]
+    kinds = [item["kind"] for item in report]
+    assert "dead_branch" in kinds and "dead_loop" in kinds
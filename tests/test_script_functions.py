@@ -0,0 +1,70 @@
+import pytest
+
+from app.core.device import get_device_manager
+from app.services.script_async import AsyncScriptExecutor
+from app.services.script_checkpoint import CheckpointStore, Checkpointer
+from app.services.script_executor import ScriptExecutor
+from app.services.script_parser import parse_script
+
+
+SCRIPT = (
+    'set greeting = "hi"\n'
+    "set first = call tap(1, 2)\n"
+    "call tap 3, 4\n"
+    "func tap(x, y)\n"
+    "    click x, y\n"
+    "    loop 2 i\n"
+    "        click x, i\n"
+    "    end\n"
+    '    set note = "${greeting} ${x}"\n'
+    "    return note\n"
+    "end\n"
+)
+
+
+@pytest.mark.parametrize("executor_class", [ScriptExecutor, AsyncScriptExecutor])
+@pytest.mark.parametrize("optimize", [False, True])
+def test_function_call_frames_and_return_values(executor_class, optimize, flaky_device, run_script):
+    device = flaky_device()
+    result = run_script(executor_class(get_device_manager()), SCRIPT, optimize=optimize)
+
+    assert result.success, result.error
+    assert device.clicks == [(1, 2), (1, 0), (1, 1), (3, 4), (3, 0), (3, 1)]
+    # 参数、循环变量和函数内赋值都是局部变量，全局变量表只有顶层赋值
+    assert result.variables == {"greeting": "hi", "first": "hi 1"}
+
+
+def test_function_errors(run_script):
+    with pytest.raises(SyntaxError):
+        parse_script("return 1\n")
+    with pytest.raises(SyntaxError):
+        parse_script("loop 2\n    func f()\n    end\nend\n")
+
+    executor = ScriptExecutor(get_device_manager())
+    result = run_script(executor, "func f(a)\nend\ncall f 1, 2\n")
+    assert not result.success
+    assert "f() takes 1 arguments (2 given)" in result.error
+
+    executor = ScriptExecutor(get_device_manager())
+    result = run_script(executor, "func f()\n    call f\nend\ncall f\n")
+    assert "Maximum function call depth" in result.error
+
+
+def test_resume_inside_function_restores_locals(tmp_path, flaky_device):
+    store = CheckpointStore(str(tmp_path))
+    # 第 5 次点击是第二次调用 tap(3, 4) 中的 click 3, 0
+    flaky_device(fail_at=5)
+    executor = ScriptExecutor(get_device_manager())
+    executor.checkpointer = Checkpointer(store, "run-1", interval=3600)
+    result = executor.execute_script(SCRIPT)
+    assert not result.success
+
+    checkpoint = store.load("run-1")
+    assert checkpoint.variables == {"greeting": "hi", "first": "hi 1"}
+    assert checkpoint.cursor[0]["func"] == {"name": "tap", "locals": {"x": 3, "y": 4, "i": 0}}
+
+    device = flaky_device()
+    resumed = ScriptExecutor(get_device_manager()).resume(checkpoint)
+    assert resumed.success, resumed.error
+    assert device.clicks == [(3, 0), (3, 1)]
+    assert resumed.variables == {"greeting": "hi", "first": "hi 1"}
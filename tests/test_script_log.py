@@ -0,0 +1,78 @@
+import os
+import threading
+
+from app.core.device import get_device_manager
+from app.services.script_executor import ScriptExecutor
+from app.services.script_log import LogBuffer, LogLevel, LogRecord, read_log_file
+
+
+def _record(index, level=LogLevel.INFO):
+    return LogRecord(0.0, index, level, "message {}", (index,), "")
+
+
+def test_ring_buffer_spills_oldest_records(tmp_path):
+    path = str(tmp_path / "run.ndjson")
+    buffer = LogBuffer(capacity=3, spill_path=path)
+    for index in range(10):
+        buffer.append(_record(index))
+
+    assert len(buffer) == 3
+    assert buffer.total == 10
+    page = buffer.page(offset=5, limit=4)
+    assert [item["line"] for item in page["items"]] == [5, 6, 7, 8]
+
+    buffer.persist()
+    assert [item["line"] for item in read_log_file(path, 0, 100)["items"]] == list(range(10))
+
+
+def test_spill_is_written_off_thread_and_indexed(tmp_path, monkeypatch):
+    path = str(tmp_path / "run.ndjson")
+    buffer = LogBuffer(capacity=2, spill_path=path)
+    written = []
+    write = buffer._write
+    monkeypatch.setattr(
+        buffer, "_write", lambda records: written.append(threading.current_thread()) or write(records)
+    )
+    for index in range(50):
+        buffer.append(_record(index))
+    # 记录日志的线程不写文件；等待写入的记录同样可以分页读取
+    assert threading.current_thread() not in written
+    assert [item["line"] for item in buffer.page(offset=10, limit=3)["items"]] == [10, 11, 12]
+    buffer.close()
+    assert buffer.on_disk == 48
+
+    assert buffer.persist() == path
+    assert os.path.getsize(path + ".idx") == 50 * 8
+    page = read_log_file(path, 47, 10)
+    assert page["total"] == 50
+    assert [item["line"] for item in page["items"]] == [47, 48, 49]
+    assert read_log_file(path, 60, 10) == {"total": 50, "offset": 60, "items": []}
+
+    # 没有索引的旧日志文件扫描一遍
+    os.remove(path + ".idx")
+    assert [item["line"] for item in read_log_file(path, 48, 10)["items"]] == [48, 49]
+
+
+def test_level_filter_skips_formatting():
+    buffer = LogBuffer(level=LogLevel.INFO)
+    buffer.append(LogRecord(0.0, 1, LogLevel.TRACE, "{", ("never formatted",), ""))
+    buffer.append(_record(2))
+    assert buffer.total == 1
+
+
+def test_verbosity_suppresses_statement_trace():
+    executor = ScriptExecutor(get_device_manager(), log_level="info")
+    result = executor.execute_script('set a = 1\nlog "hello ${a}"\n')
+    assert result.success, result.error
+    assert len(result.logs) == 1
+    assert result.logs[0].endswith("Line 2: [LOG] hello 1")
+
+
+def test_call_shares_parent_log_buffer(tmp_path):
+    (tmp_path / "child.script").write_text('log "child"\n', encoding="utf-8")
+    executor = ScriptExecutor(get_device_manager(), log_level="info")
+    result = executor.execute_script(
+        'log "before"\ncall child\nlog "after"\n', script_dir=str(tmp_path)
+    )
+    assert result.success, result.error
+    assert [entry.split("[LOG] ")[1] for entry in result.logs] == ["before", "child", "after"]
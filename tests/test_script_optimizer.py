@@ -0,0 +1,69 @@
+from app.core.device import get_device_manager
+from app.services.script_executor import ScriptExecutor
+from app.services.script_optimizer import optimize_ast, HOIST_PREFIX
+from app.services.script_parser import parse_script, CommandNode, SetNode, LoopNode
+
+
+def _kinds(report):
+    return [item["kind"] for item in report]
+
+
+def test_constant_fold_set_chain():
+    ast = parse_script('set a = 5\nset b = a\nset c = "${a}-${b}"\nwait b\n')
+    optimized, report = optimize_ast(ast)
+    assert optimized[1].value == 5
+    assert optimized[2].value == "5-5"
+    assert optimized[3].args == [5]
+    assert "constant_fold" in _kinds(report)
+
+
+def test_fold_stops_after_command_assignment():
+    ast = parse_script('set a = 1\nset a = get_text id:"x"\nlog "${a}"\n')
+    optimized, _ = optimize_ast(ast)
+    assert optimized[2].args == ["${a}"]
+
+
+def test_dead_branch_elimination():
+    ast = parse_script('if false\n    log "never"\nelse\n    log "always"\nend\nwhile false\n    log "x"\nend\n')
+    optimized, report = optimize_ast(ast)
+    assert len(optimized) == 1
+    assert isinstance(optimized[0], CommandNode)
+    assert optimized[0].args == ["always"]
+    assert _kinds(report).count("dead_branch") == 1
+    assert "dead_loop" in _kinds(report)
+
+
+def test_merge_consecutive_waits():
+    ast = parse_script("wait 1\nwait 2\nwait 0.5\nback\nwait 1\n")
+    optimized, report = optimize_ast(ast)
+    assert [n.args for n in optimized] == [[3.5], [], [1]]
+    assert _kinds(report).count("merge_wait") == 2
+
+
+def test_hoist_loop_invariant_interpolation():
+    ast = parse_script('set p = get_text id:"prefix"\nloop 3 i\n    click id:"${p}/button"\n    log "${i}"\nend\n')
+    optimized, report = optimize_ast(ast)
+    hoisted, loop = optimized[1], optimized[2]
+    assert isinstance(hoisted, SetNode) and hoisted.variable.startswith(HOIST_PREFIX)
+    assert isinstance(loop, LoopNode)
+    assert loop.body[0].selector_value == hoisted.variable
+    # 引用循环变量的插值不能外提
+    assert loop.body[1].args == ["${i}"]
+    assert "hoist" in _kinds(report)
+
+
+def test_optimize_does_not_mutate_input():
+    ast = parse_script("set a = 1\nwait a\nwait 2\n")
+    optimize_ast(ast)
+    assert ast[1].args == ["a"]
+    assert len(ast) == 3
+
+
+def test_optimized_execution_matches_plain():
+    source = 'set a = 2\nset b = "${a}x"\nloop 3 i\n    set c = "${b}-${i}"\nend\nif not\n    set d = b\nend\n'
+    plain = ScriptExecutor(get_device_manager()).execute_script(source)
+    optimized = ScriptExecutor(get_device_manager()).execute_script(source, optimize=True)
+    assert plain.success and optimized.success
+    assert plain.variables == optimized.variables
+    assert optimized.optimizations
+    assert not any(name.startswith(HOIST_PREFIX) for name in optimized.variables)
@@ -0,0 +1,90 @@
+import time
+
+from app.core.device import get_device_manager
+from app.services.script_executor import ScriptExecutor
+from app.services.script_parser import ParallelNode, parse_script
+
+
+def test_parse_parallel_with_merge():
+    ast = parse_script("parallel merge a, b\nbranch\n    set a = 1\nbranch\n    set b = 2\nend\n")
+    assert isinstance(ast[0], ParallelNode)
+    assert ast[0].merge == ["a", "b"]
+    assert [len(body) for body in ast[0].branches] == [1, 1]
+
+
+def test_branches_overlap_waits():
+    start = time.monotonic()
+    result = ScriptExecutor(get_device_manager()).execute_script(
+        "parallel\nbranch\n    wait 0.3\nbranch\n    wait 0.3\nend\n"
+    )
+    assert result.success, result.error
+    assert time.monotonic() - start < 0.5
+
+
+def test_only_merged_variables_are_visible():
+    result = ScriptExecutor(get_device_manager()).execute_script(
+        "set a = 0\n"
+        "parallel merge a\n"
+        "branch\n    set a = 1\n    set tmp = 1\n"
+        "branch\n    wait 0.05\n    set a = 2\n"
+        "end\n"
+    )
+    assert result.success, result.error
+    # 后面的分支覆盖前面的分支，与完成先后无关
+    assert result.variables["a"] == 2
+    assert "tmp" not in result.variables
+
+
+def test_later_branch_wins_even_when_assigning_unchanged_value():
+    result = ScriptExecutor(get_device_manager()).execute_script(
+        "set x = 5\n"
+        "parallel merge x, i\n"
+        "branch\n    set x = 7\n"
+        "branch\n    set x = 5\n    loop 2 i\n    end\n"
+        "end\n"
+    )
+    assert result.success, result.error
+    assert result.variables["x"] == 5
+    assert result.variables["i"] == 1
+
+
+def test_logs_grouped_in_branch_order():
+    result = ScriptExecutor(get_device_manager()).execute_script(
+        'parallel\nbranch\n    wait 0.1\n    log "first"\nbranch\n    log "second"\nend\n'
+    )
+    assert result.success, result.error
+    branch_logs = [entry for entry in result.logs if "[LOG]" in entry]
+    assert "[branch 1]" in branch_logs[0] and "first" in branch_logs[0]
+    assert "[branch 2]" in branch_logs[1] and "second" in branch_logs[1]
+
+
+def test_branch_logs_stream_live_with_branch_tags():
+    streamed = []
+    executor = ScriptExecutor(get_device_manager())
+    result = executor.execute_script(
+        'parallel\nbranch\n    wait 0.2\n    log "first"\nbranch\n    log "second"\nend\n',
+        log_callback=lambda message: streamed.append((time.monotonic(), message)),
+    )
+    assert result.success, result.error
+    live = [(at, message) for at, message in streamed if "[LOG]" in message]
+    # 第二个分支的日志在第一个分支结束前就已经输出
+    assert "[branch 2]" in live[0][1] and "[branch 1]" in live[1][1]
+    assert live[1][0] - live[0][0] >= 0.15
+    assert len(streamed) == len(result.logs)
+
+    # 保存的日志按分支标签排序
+    items = executor.context.logs.page(0, 100)["items"]
+    assert [item["branch"] for item in items if "branch" in item and "[LOG]" in item["message"]] == [
+        "1",
+        "2",
+    ]
+
+
+def test_failure_cancels_siblings():
+    start = time.monotonic()
+    result = ScriptExecutor(get_device_manager()).execute_script(
+        "parallel\nbranch\n    loop 100\n        wait 0.05\n    end\nbranch\n    wait 0.1\n    break\nend\n"
+    )
+    assert not result.success
+    assert "Parallel branch 2 failed" in result.error
+    assert time.monotonic() - start < 1
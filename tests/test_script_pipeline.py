@@ -0,0 +1,104 @@
+from app.core.device import get_device_manager
+from app.core.fake_device import FakeDevice
+from app.core.instrumentation import rpc_listener
+from app.services.script_executor import ScriptExecutor
+from app.services.script_pipeline import CommandPipeline, JsonRpcTransport
+
+
+class FakeTransport(JsonRpcTransport):
+    """记录请求的模拟传输层，fail_method 指定的方法返回错误"""
+
+    def __init__(self, fail_method=None, supports_batch=True):
+        super().__init__(type("Device", (), {"info": {"displayWidth": 1000, "displayHeight": 2000}})())
+        self.supports_batch = supports_batch
+        self.fail_method = fail_method
+        self.requests = []
+
+    def call(self, method, params):
+        self.requests.append([method])
+        if method == self.fail_method:
+            raise RuntimeError("boom")
+        return True
+
+    def _post(self, payload):
+        if not self.supports_batch:
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid Request"}}
+        self.requests.append([item["method"] for item in payload])
+        return [
+            {"id": item["id"], "error": {"message": "boom"}}
+            if item["method"] == self.fail_method
+            else {"id": item["id"], "result": True}
+            for item in payload
+        ]
+
+
+def _executor(transport):
+    executor = ScriptExecutor(get_device_manager())
+    executor._pipeline = CommandPipeline(lambda: transport)
+    return executor
+
+
+def test_consecutive_commands_sent_as_one_batch_in_order():
+    transport = FakeTransport()
+    result = _executor(transport).execute_script(
+        'pipeline on\nclick 10, 20\nback\nlog "x"\nswipe up 0.5\nhome\n'
+    )
+    assert result.success, result.error
+    assert transport.requests == [["click", "pressKey", "swipe", "pressKey"]]
+
+
+def test_failure_reported_at_source_line():
+    transport = FakeTransport(fail_method="pressKey")
+    result = _executor(transport).execute_script("pipeline on\nclick 1, 2\n\nback\nclick 3, 4\n")
+    assert not result.success
+    assert result.error.startswith("Line 4: back failed")
+
+
+def test_failure_inside_try_is_caught():
+    transport = FakeTransport(fail_method="pressKey")
+    result = _executor(transport).execute_script(
+        'pipeline on\ntry\n    back\ncatch\n    set handled = "yes"\nend\n'
+    )
+    assert result.success, result.error
+    assert result.variables["handled"] == "yes"
+
+
+def test_falls_back_to_sequential_calls():
+    transport = FakeTransport(supports_batch=False)
+    result = _executor(transport).execute_script("pipeline on\nclick 1, 2\nback\nmenu\n")
+    assert result.success, result.error
+    assert transport.requests == [["click"], ["pressKey"], ["pressKey"]]
+    assert transport.supports_batch is False
+
+
+def test_transport_error_falls_back_to_sequential_calls():
+    class BrokenTransport(FakeTransport):
+        def _post(self, payload):
+            raise ConnectionError("HTTP 500")
+
+    transport = BrokenTransport()
+    result = _executor(transport).execute_script("pipeline on\nclick 1, 2\nback\n")
+    assert result.success, result.error
+    assert transport.requests == [["click"], ["pressKey"]]
+    assert transport.supports_batch is False
+
+
+def test_batch_on_attached_device_is_instrumented(attach_device):
+    device = attach_device(FakeDevice(serial="fake-pipeline"))
+    device.calls.clear()
+    events = []
+    with rpc_listener(events.append):
+        result = ScriptExecutor(get_device_manager()).execute_script(
+            "pipeline on\nclick 1, 2\nclick 3, 4\nclick 5, 6\n"
+        )
+    assert result.success, result.error
+    assert device.calls == [("click", [1, 2]), ("click", [3, 4]), ("click", [5, 6])]
+    assert [(event.operation, event.calls) for event in events] == [("batch", 3)]
+
+
+def test_pipeline_off_by_default():
+    transport = FakeTransport()
+    executor = _executor(transport)
+    executor.execute_script('log "no device commands"\n')
+    assert executor._pipeline.enabled is False
+    assert transport.requests == []
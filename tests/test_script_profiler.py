@@ -0,0 +1,66 @@
+import pytest
+
+from app.core.device import get_device_manager
+from app.services.script_executor import ScriptExecutor
+
+pytestmark = pytest.mark.usefixtures("fake_device")
+
+
+def _by(rows, key):
+    return {row[key]: row for row in rows}
+
+
+def test_profile_per_line_and_command(tmp_path):
+    (tmp_path / "sub.script").write_text("click 5, 6\n", encoding="utf-8")
+    result = ScriptExecutor(get_device_manager()).execute_script(
+        "click 1, 2\nloop 3\n    click 3, 4\nend\ncall sub\n",
+        script_dir=str(tmp_path),
+        profile=True,
+    )
+    assert result.success, result.error
+    profile = result.profile
+    assert profile["rpc_count"] == 5
+
+    lines = _by(profile["lines"], "line")
+    assert lines["main:1"]["rpc_count"] == 1
+    assert lines["main:3"]["hits"] == 3
+    assert lines["main:2"]["rpc_count"] == 3
+    assert lines["sub.script:1"]["rpc_count"] == 1
+
+    commands = _by(profile["commands"], "command")
+    assert commands["click"]["hits"] == 5
+    assert commands["click"]["rpc_count"] == 5
+
+    stacks = [line.rsplit(" ", 1)[0] for line in profile["collapsed"].splitlines()]
+    assert "main:5 call;sub.script:1 click" in stacks
+    assert "main:2 loop;main:3 click" in stacks
+
+
+def test_profile_parallel_branches_nest_under_block():
+    result = ScriptExecutor(get_device_manager()).execute_script(
+        "parallel\nbranch\n    click 1, 2\nbranch\n    click 3, 4\n    click 5, 6\nend\n",
+        profile=True,
+    )
+    assert result.success, result.error
+    assert result.profile["rpc_count"] == 3
+    lines = _by(result.profile["lines"], "line")
+    assert lines["main:1"]["rpc_count"] == 3
+    assert "main:1 parallel;branch 2;main:6 click" in result.profile["collapsed"]
+
+
+def test_profile_pipelined_calls_count_under_flushing_statement():
+    result = ScriptExecutor(get_device_manager()).execute_script(
+        "pipeline on\nclick 1, 2\nclick 3, 4\nclick 5, 6\npipeline off\n", profile=True
+    )
+    assert result.success, result.error
+    assert result.profile["rpc_count"] == 3
+    lines = _by(result.profile["lines"], "line")
+    assert lines["main:2"]["rpc_count"] == 0
+    assert lines["main:5"]["rpc_count"] == 3
+    assert lines["main:5"]["rpc_time"] > 0
+
+
+def test_profile_disabled_by_default():
+    result = ScriptExecutor(get_device_manager()).execute_script("click 1, 2\n")
+    assert result.success, result.error
+    assert result.profile is None
@@ -0,0 +1,96 @@
+import time
+
+from app.services.script_checkpoint import CheckpointStore
+from app.services.script_runs import RunStatus, ScriptRunStore
+
+
+def _store(tmp_path, retention=0.0):
+    return ScriptRunStore(str(tmp_path / "runs.db"), retention=retention)
+
+
+def test_record_and_query_runs(tmp_path):
+    store = _store(tmp_path)
+    store.start("a", "hash-a", "collect.script", device="dev-1")
+    store.start("b", "hash-b", device="dev-2")
+    store.start("c", "hash-a", "collect.script", device="dev-1")
+    store.finish("a", RunStatus.SUCCESS, variables={"count": 3}, profile={"total_time": 1.5})
+    store.finish("b", RunStatus.FAILED, error="device offline", checkpoint_id="b")
+
+    run = store.get("a")
+    assert run.status == "success"
+    assert run.variables == {"count": 3}
+    assert run.profile == {"total_time": 1.5}
+    assert run.finished_at >= run.started_at
+
+    assert [run.id for run in store.query(device="dev-1")] == ["c", "a"]
+    assert [run.id for run in store.query(status=RunStatus.FAILED)] == ["b"]
+    assert [run.id for run in store.query(device="dev-1", status="running")] == ["c"]
+    assert store.query(since=time.time() + 60) == []
+    assert len(store.query(limit=2)) == 2
+
+
+def test_running_runs_marked_interrupted_after_restart(tmp_path):
+    store = _store(tmp_path)
+    store.start("a", "hash-a")
+    store.close()
+
+    assert _store(tmp_path).get("a").status == "interrupted"
+
+
+def test_prune_removes_only_expired_finished_runs(tmp_path):
+    store = _store(tmp_path, retention=3600)
+    store.start("old", "hash")
+    store.finish("old", RunStatus.SUCCESS)
+    store.start("running", "hash")
+    store.start("new", "hash")
+    store.finish("new", RunStatus.SUCCESS)
+    store._execute("UPDATE runs SET started_at = started_at - 7200 WHERE id IN ('old', 'running')")
+
+    assert store.prune() == 1
+    assert store.get("old") is None
+    assert store.get("running") is not None
+    assert store.get("new") is not None
+
+
+def test_prune_removes_log_files_and_unreferenced_checkpoints(tmp_path):
+    checkpoints = CheckpointStore(str(tmp_path / "checkpoints"))
+    store = ScriptRunStore(str(tmp_path / "runs.db"), retention=3600, checkpoints=checkpoints)
+    (tmp_path / "checkpoints").mkdir()
+    for checkpoint_id in ("old", "shared"):
+        (tmp_path / "checkpoints" / f"{checkpoint_id}.json").write_text("{}", encoding="utf-8")
+    log_file = tmp_path / "old.ndjson"
+    log_file.write_text("{}\n", encoding="utf-8")
+
+    store.start("old", "hash")
+    store.finish("old", RunStatus.FAILED, log_file=str(log_file), checkpoint_id="old")
+    store.start("first", "hash")
+    store.finish("first", RunStatus.FAILED, checkpoint_id="shared")
+    store.start("resumed", "hash", resumed_from="shared")
+    store._execute("UPDATE runs SET started_at = started_at - 7200 WHERE id IN ('old', 'first')")
+
+    assert store.prune() == 2
+    assert not log_file.exists()
+    assert not (tmp_path / "checkpoints" / "old.json").exists()
+    # 恢复执行仍在使用的检查点保留
+    assert (tmp_path / "checkpoints" / "shared.json").exists()
+
+
+def test_api_store_created_on_first_use(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.api import script
+    from app.main import app
+
+    path = tmp_path / "data" / "runs.db"
+    monkeypatch.setattr(script, "RUNS_DB", str(path))
+    script.get_run_store.cache_clear()
+    try:
+        # 导入模块和启动应用都不创建数据库
+        with TestClient(app) as client:
+            assert not path.parent.exists()
+            assert client.get("/api/v1/script/runs").json() == []
+        assert path.exists()
+        assert script.get_run_store() is script.get_run_store()
+    finally:
+        script.get_run_store().close()
+        script.get_run_store.cache_clear()
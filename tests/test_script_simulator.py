@@ -0,0 +1,70 @@
+import time
+
+from app.core.hierarchy import Hierarchy
+from app.services.script_simulator import HierarchySnapshot, Simulation, SimulatedScriptExecutor
+
+LOADING = (
+    '<?xml version="1.0" encoding="UTF-8"?><hierarchy rotation="0">'
+    '<node class="android.widget.FrameLayout" package="com.demo" bounds="[0,0][1080,2340]">'
+    '<node class="android.widget.ProgressBar" resource-id="com.demo:id/loading" package="com.demo"'
+    ' bounds="[490,1120][590,1220]"/>'
+    "</node></hierarchy>"
+)
+LOGIN = (
+    '<?xml version="1.0" encoding="UTF-8"?><hierarchy rotation="0">'
+    '<node class="android.widget.FrameLayout" package="com.demo" bounds="[0,0][1080,2340]">'
+    '<node class="android.widget.Button" text="登录" resource-id="com.demo:id/login" package="com.demo"'
+    ' clickable="true" bounds="[100,1800][980,1920]"/>'
+    "</node></hierarchy>"
+)
+
+
+def _simulation():
+    return Simulation(
+        [HierarchySnapshot(0.0, Hierarchy(LOADING), "loading"), HierarchySnapshot(12.0, Hierarchy(LOGIN), "login")],
+        rpc_latency=0.1,
+    )
+
+
+def test_waits_advance_virtual_clock():
+    simulation = _simulation()
+    started = time.monotonic()
+    result = SimulatedScriptExecutor(simulation).execute_script(
+        "wait 5\n"
+        'wait_element id:"com.demo:id/login" 30\n'
+        'click text:"登录"\n'
+        'wait_gone xpath:"//android.widget.Button" 3\n'
+    )
+    assert result.success, result.error
+    assert time.monotonic() - started < 1
+
+    report = result.simulation
+    # wait 5 + 元素在 12 秒出现 + wait_gone 超时 3 秒
+    assert report["waited"] == 5 + (12 - 5.1) + 3
+    # 设备调用：wait_element 1 次，click 的 count/exist/objInfo/click 4 次，wait_gone 1 次
+    assert report["rpc_count"] == 6
+    # XPath 等待按导出层次结构计延迟（0.5 秒）
+    assert report["estimated_duration"] == 15.9
+    assert report["final_snapshot"] == "login"
+    assert report["failed_selectors"][0]["line"] == 4
+
+
+def test_reports_failing_selectors():
+    result = SimulatedScriptExecutor(_simulation()).execute_script(
+        'click id:"com.demo:id/login"\n'
+        'if exists text:"跳过"\n'
+        '    click text:"跳过"\n'
+        "end\n"
+        "wait 15\n"
+        'click id:"com.demo:id/login"\n'
+    )
+    assert result.success, result.error
+
+    report = result.simulation
+    assert [(item["line"], item["selector"]) for item in report["failed_selectors"]] == [
+        (1, 'id:"com.demo:id/login"')
+    ]
+    # if 条件中找不到元素不算失败
+    assert {"line": 2, "command": "condition", "selector": 'text:"跳过"', "lookups": 1, "misses": 1} in report[
+        "selectors"
+    ]
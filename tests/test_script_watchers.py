@@ -0,0 +1,104 @@
+import pytest
+
+from app.core.device import get_device_manager
+from app.core.fake_device import FakeDevice
+from app.core.hierarchy import Hierarchy
+from app.services.script_async import AsyncScriptExecutor
+from app.services.script_executor import ScriptExecutor
+from app.services.script_optimizer import optimize_ast
+from app.services.script_parser import IfNode, parse_script
+
+HEADER = '<?xml version="1.0" encoding="UTF-8"?><hierarchy rotation="0">'
+
+
+def _screen(*nodes):
+    return Hierarchy(
+        HEADER
+        + '<node class="android.widget.FrameLayout" package="com.demo" bounds="[0,0][1080,2340]">'
+        + "".join(nodes)
+        + "</node></hierarchy>"
+    )
+
+
+def _button(text, resource_id, bounds):
+    return (
+        f'<node class="android.widget.Button" text="{text}" resource-id="{resource_id}" '
+        f'package="com.demo" clickable="true" bounds="{bounds}"/>'
+    )
+
+
+def _device(initial="splash"):
+    """启动 0.2 秒后弹出权限对话框，点击“允许”后回到首页"""
+    screens = {
+        "splash": _screen(),
+        "popup": _screen(_button("允许", "android:id/allow", "[600,1200][900,1300]")),
+        "home": _screen(_button("登录", "com.demo:id/login", "[100,1800][980,1920]")),
+        "login": _screen(),
+    }
+    transitions = [
+        {"from": "splash", "after": 0.2, "to": "popup"},
+        {"from": "popup", "click": {"text": "允许"}, "to": "home"},
+        {"from": "home", "click": {"resourceId": "com.demo:id/login"}, "to": "login"},
+    ]
+    return FakeDevice(screens, initial, transitions, poll_interval=0.02)
+
+
+HANDLERS = (
+    'on exists text:"允许" do priority=5 cooldown=0.5\n'
+    '    click text:"允许"\n'
+    "    set dismissed = dismissed + 1\n"
+    "end\n"
+    'on exists text:"以后再说" do priority=10\n'
+    '    click text:"以后再说"\n'
+    "end\n"
+)
+
+
+def _executor(executor_class):
+    executor = executor_class(get_device_manager())
+    executor.WATCH_INTERVAL = 0.05
+    return executor
+
+
+@pytest.mark.parametrize("executor_class", [ScriptExecutor, AsyncScriptExecutor])
+def test_handler_dismisses_popup_during_wait(executor_class, attach_device, run_script):
+    device = attach_device(_device())
+    source = HANDLERS + 'wait_element id:"com.demo:id/login" 5\nclick id:"com.demo:id/login"\n'
+    result = run_script(_executor(executor_class), source, variables={"dismissed": 0})
+
+    assert result.success, result.error
+    assert device.screen == "login"
+    assert result.variables["dismissed"] == 1
+    assert any("On handler at line 1 triggered" in line for line in result.logs)
+
+
+@pytest.mark.parametrize("executor_class", [ScriptExecutor, AsyncScriptExecutor])
+def test_handler_runs_before_ui_action_on_one_snapshot(executor_class, attach_device, run_script):
+    device = attach_device(_device(initial="popup"))
+    source = HANDLERS + 'click id:"com.demo:id/login"\nlog "done"\n'
+    result = run_script(_executor(executor_class), source, variables={"dismissed": 0})
+
+    assert result.success, result.error
+    assert device.screen == "login"
+    # 一次快照判断两个处理器，处理器执行后再导出一次确认没有新的弹窗；log 不触发检查
+    methods = [method for method, _ in device.calls]
+    assert methods.count("dumpWindowHierarchy") == 2
+    assert result.variables["dismissed"] == 1
+
+
+def test_handlers_parse_and_block_constant_propagation():
+    with pytest.raises(SyntaxError):
+        parse_script("loop 2\n    on exists text:\"x\" do\n    end\nend\n")
+    with pytest.raises(SyntaxError):
+        parse_script('on click text:"x" do\nend\n')
+    with pytest.raises(SyntaxError):
+        parse_script('on exists text:"x"\nend\n')
+
+    body = 'set done = false\nwait 1\nif done\n    log "handled"\nend\n'
+    handler = 'on exists text:"完成" do\n    set done = true\nend\n'
+    optimized, _ = optimize_ast(parse_script(body))
+    assert not any(isinstance(node, IfNode) for node in optimized)
+    # done 可能在 wait 期间被处理器改写，if 不能按常量条件消除
+    optimized, report = optimize_ast(parse_script(handler + body))
+    assert any(isinstance(node, IfNode) for node in optimized)
+    assert not any(item["kind"] == "dead_branch" for item in report)
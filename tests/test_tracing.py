@@ -0,0 +1,87 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.core.device import get_device_manager
+from app.core.fake_device import FakeDevice
+from app.core.hierarchy import Hierarchy
+from app.core.config import get_settings
+from app.core.tracing import Trace, trace_writer, tracing, write_chrome_trace
+from app.main import app
+from app.services.script_async import AsyncScriptExecutor
+
+HEADER = '<?xml version="1.0" encoding="UTF-8"?><hierarchy rotation="0">'
+
+
+def _device():
+    screens = {
+        "home": Hierarchy(
+            HEADER
+            + '<node class="android.widget.Button" text="打开" package="com.demo" '
+            'clickable="true" bounds="[100,100][300,200]"/></hierarchy>'
+        ),
+        "detail": Hierarchy(HEADER + "</hierarchy>"),
+    }
+    transitions = [{"from": "home", "click": {"text": "打开"}, "to": "detail"}]
+    device = FakeDevice(screens, "home", transitions, serial="fake-trace")
+    get_device_manager().attach(device)
+    device.calls.clear()
+    return device
+
+
+def test_rpc_count_headers_and_chrome_trace_file(tmp_path, monkeypatch):
+    device = _device()
+    trace_file = tmp_path / "trace.json"
+    monkeypatch.setattr(get_settings(), "TRACE_FILE", str(trace_file))
+    client = TestClient(app)
+    try:
+        response = client.get("/api/v1/input/hierarchy")
+        client.get("/health")
+    finally:
+        get_device_manager().disconnect()
+
+    assert response.headers["X-Device-RPC-Count"] == str(len(device.calls)) == "1"
+    assert response.headers["Server-Timing"].startswith("rpc;dur=")
+    assert 'desc="1 calls", jsonrpc;dur=' in response.headers["Server-Timing"]
+
+    # 数组格式允许省略末尾的 ]；没有设备调用的请求不写入文件
+    trace_writer.flush()
+    events = json.loads(trace_file.read_text(encoding="utf-8") + "]")
+    names = [event["args"]["name"] for event in events if event["ph"] == "M"]
+    assert names == ["GET /api/v1/input/hierarchy"]
+    rpc = next(event for event in events if event.get("cat") == "jsonrpc")
+    assert rpc["name"] == "dumpWindowHierarchy"
+    assert rpc["args"] == {"serial": "fake-trace", "size": len(device.hierarchy.xml)}
+
+
+async def test_script_statements_are_parent_spans():
+    _device()
+    try:
+        with tracing(Trace("script", keep_spans=True)) as trace:
+            result = await AsyncScriptExecutor(get_device_manager()).execute_script_async(
+                'set x = 1\nclick text:"打开"\n'
+            )
+    finally:
+        get_device_manager().disconnect()
+
+    assert result.success
+    statements = [span for span in trace.spans if span.category == "script"]
+    rpcs = [span for span in trace.spans if span.category != "script"]
+    assert [span.name for span in statements] == ["1 set", "2 click"]
+    click = statements[1]
+    assert rpcs and trace.rpc_count == len(rpcs)
+    assert all(
+        click.start <= span.start and span.start + span.duration <= click.start + click.duration
+        for span in rpcs
+    )
+
+
+def test_trace_file_rotates_when_too_large(tmp_path):
+    trace_file = tmp_path / "trace.json"
+    trace = Trace("GET /x", keep_spans=True)
+    trace.finish()
+    write_chrome_trace(trace, str(trace_file), max_bytes=1)
+    first = trace_file.read_text(encoding="utf-8")
+    write_chrome_trace(trace, str(trace_file), max_bytes=1)
+    assert (tmp_path / "trace.json.1").read_text(encoding="utf-8") == first
+    assert json.loads(trace_file.read_text(encoding="utf-8") + "]")[0]["ph"] == "M"
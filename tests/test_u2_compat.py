@@ -0,0 +1,29 @@
+from app.core import u2_compat
+from app.core.fake_device import FakeDevice
+
+
+def test_uiautomator2_internals_are_available():
+    # 升级 uiautomator2 后这里失败时，更新 app.core.u2_compat 并调整 pyproject.toml 中的版本范围
+    assert u2_compat.MISSING_INTERNALS == []
+    assert isinstance(u2_compat.SCROLL_STEPS, int)
+
+
+def test_batch_requests_use_device_server_port(monkeypatch):
+    requests = []
+
+    class Response:
+        def json(self):
+            return [{"jsonrpc": "2.0", "id": 1, "result": True}]
+
+    def http_request(dev, device_port, method, path, data=None, timeout=10.0):
+        requests.append((dev, device_port, method, path, data, timeout))
+        return Response()
+
+    monkeypatch.setattr(u2_compat, "_http_request", http_request)
+    device = type("Device", (), {"_dev": "adb", "_device_server_port": 9008})()
+    payload = [{"jsonrpc": "2.0", "id": 1, "method": "click", "params": [1, 2]}]
+
+    assert u2_compat.supports_batch(device)
+    assert not u2_compat.supports_batch(FakeDevice())
+    assert u2_compat.jsonrpc_batch(device, payload, timeout=3) == Response().json()
+    assert requests == [("adb", 9008, "POST", "/jsonrpc/0", payload, 3)]